@@ -1,6 +1,7 @@
 import type { NextConfig } from "next";
 import createNextIntlPlugin from 'next-intl/plugin';
 import withPWAInit from "@ducanh2912/next-pwa";
+import { ENGINE_CACHES } from "./src/lib/engine-assets";
 
 // 1. PWAの設定
 const withPWA = withPWAInit({
@@ -10,18 +11,61 @@ const withPWA = withPWAInit({
   reloadOnOnline: true,
   swcMinify: true,
   disable: process.env.NODE_ENV === "development",
+  // FFmpegコア・OCRの言語データ・ONNX Runtime（数十MB）はインストール時にプリキャッシュせず、初回使用時にキャッシュする
+  publicExcludes: ["!noprecache/**/*", "!ffmpeg/**/*", "!tesseract/**/*", "!transformers/**/*"],
+  // 代わりに src/service-worker がアイドル時に engine-assets.ts の一覧を下の runtimeCaching と同じキャッシュへ先読みする
+  customWorkerSrc: "src/service-worker",
+  extendDefaultRuntimeCaching: true,
   workboxOptions: {
     disableDevLogs: true,
+    runtimeCaching: [
+      {
+        // public/ffmpeg/<version>/ はバージョン付きパスなので中身は不変
+        urlPattern: /\/ffmpeg\/.*\.(?:js|wasm)$/,
+        handler: "CacheFirst",
+        options: {
+          cacheName: ENGINE_CACHES.ffmpeg,
+          expiration: { maxEntries: 10 },
+          cacheableResponse: { statuses: [0, 200] },
+        },
+      },
+      {
+        // public/tesseract/<version>/ も同様に不変（ワーカー・コア・言語データ）
+        urlPattern: /\/tesseract\/.*\.(?:js|gz)$/,
+        handler: "CacheFirst",
+        options: {
+          cacheName: ENGINE_CACHES.tesseract,
+          expiration: { maxEntries: 20 },
+          cacheableResponse: { statuses: [0, 200] },
+        },
+      },
+      {
+        // public/transformers/<version>/ の onnxruntime-web の wasm（モデル本体は transformers.js が Cache API に保存する）
+        urlPattern: /\/transformers\/.*\.wasm$/,
+        handler: "CacheFirst",
+        options: {
+          cacheName: ENGINE_CACHES.onnx,
+          expiration: { maxEntries: 10 },
+          cacheableResponse: { statuses: [0, 200] },
+        },
+      },
+    ],
   },
 });
 
 // 2. 多言語化の設定
 const withNextIntl = createNextIntlPlugin();
 
+// 負荷試験でミドルウェアのコストを測るときの比較用ビルド（next-intl を外す）。本番のビルドでは設定しない
+// 出力先を分けて、通常の .next を上書きしないようにする
+const benchNoI18n = process.env.LUMINA_BENCH_NO_I18N === "1";
+
 // 3. 基本設定 ＆ ヘッダー設定（FFmpeg用）
 const nextConfig: NextConfig = {
+  distDir: benchNoI18n ? ".next-bench" : ".next",
   env: {
     NEXT_PUBLIC_APP_VERSION: process.env.npm_package_version || "1.0.0",
+    LUMINA_BENCH_NO_I18N: benchNoI18n ? "1" : "",
   },
   // AIモデルやWASMの扱いに関する設定
   webpack: (config) => {
@@ -0,0 +1,51 @@
+// ffmpeg.wasm のコアを public/ffmpeg/<version>/ に配置する（predev / prebuild で実行）
+// 同一オリジンから配信することで、Service Worker のキャッシュと
+// V8 の WebAssembly コードキャッシュが効くようになる。
+// node_modules にあればコピー、なければ unpkg から固定バージョンを取得する。
+import { access, copyFile, mkdir, writeFile } from "node:fs/promises";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+
+// src/lib/engine-assets.ts の FFMPEG_CORE_VERSION と揃えること
+const VERSION = "0.12.6";
+
+const FLAVORS = {
+  st: { pkg: "@ffmpeg/core", files: ["ffmpeg-core.js", "ffmpeg-core.wasm"] },
+  mt: { pkg: "@ffmpeg/core-mt", files: ["ffmpeg-core.js", "ffmpeg-core.wasm", "ffmpeg-core.worker.js"] },
+};
+
+const root = path.resolve(path.dirname(fileURLToPath(import.meta.url)), "..");
+
+async function exists(file) {
+  try {
+    await access(file);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+for (const [flavor, { pkg, files }] of Object.entries(FLAVORS)) {
+  const outDir = path.join(root, "public", "ffmpeg", VERSION, flavor);
+  await mkdir(outDir, { recursive: true });
+
+  for (const file of files) {
+    const target = path.join(outDir, file);
+    if (await exists(target)) continue;
+
+    const local = path.join(root, "node_modules", pkg, "dist", "umd", file);
+    if (await exists(local)) {
+      await copyFile(local, target);
+      console.log(`ffmpeg core: copied ${pkg}/${file}`);
+      continue;
+    }
+
+    const url = `https://unpkg.com/${pkg}@${VERSION}/dist/umd/${file}`;
+    const res = await fetch(url);
+    if (!res.ok) {
+      throw new Error(`Failed to download ${url}: ${res.status}`);
+    }
+    await writeFile(target, Buffer.from(await res.arrayBuffer()));
+    console.log(`ffmpeg core: downloaded ${pkg}/${file}`);
+  }
+}
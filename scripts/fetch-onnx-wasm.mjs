@@ -0,0 +1,54 @@
+// transformers.js（onnxruntime-web）の wasm を public/transformers/<version>/ に配置する（predev / prebuild で実行）
+// 既定では CDN から読み込まれるため、同一オリジンから配信して Service Worker のキャッシュに載せ、オフラインでも推論できるようにする。
+// node_modules にあればコピー、なければ固定バージョンを CDN から取得する。
+import { access, copyFile, mkdir, writeFile } from "node:fs/promises";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+
+// src/lib/engine-assets.ts の TRANSFORMERS_VERSION と揃えること
+const VERSION = "2.17.2";
+
+// SIMD・スレッド対応はブラウザ側で判定して選ぶので、全バリアントを置く
+const WASM_FILES = [
+  "ort-wasm.wasm",
+  "ort-wasm-simd.wasm",
+  "ort-wasm-threaded.wasm",
+  "ort-wasm-simd-threaded.wasm",
+];
+
+const root = path.resolve(path.dirname(fileURLToPath(import.meta.url)), "..");
+const outDir = path.join(root, "public", "transformers", VERSION);
+
+const assets = WASM_FILES.map((file) => ({
+  target: path.join(outDir, file),
+  local: path.join(root, "node_modules", "@xenova", "transformers", "dist", file),
+  url: `https://cdn.jsdelivr.net/npm/@xenova/transformers@${VERSION}/dist/${file}`,
+}));
+
+async function exists(file) {
+  try {
+    await access(file);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+for (const { target, local, url } of assets) {
+  if (await exists(target)) continue;
+  await mkdir(path.dirname(target), { recursive: true });
+  const name = path.relative(outDir, target);
+
+  if (await exists(local)) {
+    await copyFile(local, target);
+    console.log(`transformers: copied ${name}`);
+    continue;
+  }
+
+  const res = await fetch(url);
+  if (!res.ok) {
+    throw new Error(`Failed to download ${url}: ${res.status}`);
+  }
+  await writeFile(target, Buffer.from(await res.arrayBuffer()));
+  console.log(`transformers: downloaded ${name}`);
+}
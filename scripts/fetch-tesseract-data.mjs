@@ -0,0 +1,67 @@
+// Tesseract.js のワーカー・コア・言語データを public/tesseract/<version>/ に配置する（predev / prebuild で実行）
+// CDN ではなく同一オリジンから配信することで、Service Worker のキャッシュに載り、オフラインでも OCR が使える。
+// node_modules にあればコピー、なければ固定バージョンを CDN から取得する。
+import { access, copyFile, mkdir, writeFile } from "node:fs/promises";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+
+// src/lib/engine-assets.ts の TESSERACT_VERSION / LANG_DATA_VERSION と揃えること
+const VERSION = "7.0.0";
+const LANG_DATA_VERSION = "4.0.0_best_int";
+const LANGUAGES = ["eng", "jpn"];
+
+// コアは SIMD 対応などでブラウザ側が選ぶので、LSTM 用の全バリアントを置く
+const CORE_FILES = [
+  "tesseract-core-lstm.wasm.js",
+  "tesseract-core-simd-lstm.wasm.js",
+  "tesseract-core-relaxedsimd-lstm.wasm.js",
+];
+
+const root = path.resolve(path.dirname(fileURLToPath(import.meta.url)), "..");
+const outDir = path.join(root, "public", "tesseract", VERSION);
+
+const assets = [
+  {
+    target: path.join(outDir, "worker.min.js"),
+    local: path.join(root, "node_modules", "tesseract.js", "dist", "worker.min.js"),
+    url: `https://unpkg.com/tesseract.js@${VERSION}/dist/worker.min.js`,
+  },
+  ...CORE_FILES.map((file) => ({
+    target: path.join(outDir, "core", file),
+    local: path.join(root, "node_modules", "tesseract.js-core", file),
+    url: `https://unpkg.com/tesseract.js-core@${VERSION}/${file}`,
+  })),
+  ...LANGUAGES.map((lang) => ({
+    target: path.join(outDir, "lang", LANG_DATA_VERSION, `${lang}.traineddata.gz`),
+    local: path.join(root, "node_modules", "@tesseract.js-data", lang, LANG_DATA_VERSION, `${lang}.traineddata.gz`),
+    url: `https://cdn.jsdelivr.net/npm/@tesseract.js-data/${lang}/${LANG_DATA_VERSION}/${lang}.traineddata.gz`,
+  })),
+];
+
+async function exists(file) {
+  try {
+    await access(file);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+for (const { target, local, url } of assets) {
+  if (await exists(target)) continue;
+  await mkdir(path.dirname(target), { recursive: true });
+  const name = path.relative(outDir, target);
+
+  if (await exists(local)) {
+    await copyFile(local, target);
+    console.log(`tesseract: copied ${name}`);
+    continue;
+  }
+
+  const res = await fetch(url);
+  if (!res.ok) {
+    throw new Error(`Failed to download ${url}: ${res.status}`);
+  }
+  await writeFile(target, Buffer.from(await res.arrayBuffer()));
+  console.log(`tesseract: downloaded ${name}`);
+}
@@ -1,8 +1,10 @@
 import type { Metadata, Viewport } from "next";
 import { Inter } from "next/font/google";
 import "../globals.css";
-import { NextIntlClientProvider } from 'next-intl';
-import { getMessages } from 'next-intl/server';
+import { notFound } from "next/navigation";
+import { NextIntlClientProvider, hasLocale } from 'next-intl';
+import { getMessages, setRequestLocale } from 'next-intl/server';
+import { routing } from "@/i18n/routing";
 import { Analytics } from "@vercel/analytics/react";
 import { SpeedInsights } from "@vercel/speed-insights/next";
 import { AdaptiveLayout } from "@/components/hybrid/AdaptiveLayout";
@@ -63,6 +65,11 @@ export const viewport: Viewport = {
   viewportFit: "cover", // For notch support
 };
 
+// 全ページを en / ja それぞれビルド時に静的生成する（ツールはすべてクライアント側で動くので、リクエストごとのレンダリングは不要）
+export function generateStaticParams() {
+  return routing.locales.map((locale) => ({ locale }));
+}
+
 export default async function RootLayout({
   children,
   params
@@ -71,6 +78,11 @@ export default async function RootLayout({
   params: Promise<{ locale: string }>;
 }) {
   const { locale } = await params;
+  if (!hasLocale(routing.locales, locale)) {
+    notFound();
+  }
+  // ヘッダーからロケールを読まない（読むとページが動的レンダリングになる）
+  setRequestLocale(locale);
   const messages = await getMessages();
 
   return (
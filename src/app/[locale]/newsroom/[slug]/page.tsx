@@ -5,7 +5,16 @@ import { Link } from "@/i18n/routing";
 import { ArrowLeft, Calendar, User, Share2, Sparkles, ArrowRight } from "lucide-react";
 import { Metadata } from "next";
 import React from "react";
+import { setRequestLocale } from "next-intl/server";
 import { ShareButton } from "@/components/shared/ShareButton";
+import { routing } from "@/i18n/routing";
+
+// 記事は config/newsroom.ts の静的データなので、全ロケール×全記事をビルド時に生成する
+export function generateStaticParams() {
+  return routing.locales.flatMap((locale) =>
+    (newsPosts[locale] || newsPosts["en"] || []).map((post) => ({ locale, slug: post.slug }))
+  );
+}
 
 export async function generateMetadata({ params }: { params: Promise<{ locale: string; slug: string }> }): Promise<Metadata> {
   const { locale, slug } = await params;
@@ -20,6 +29,7 @@ export async function generateMetadata({ params }: { params: Promise<{ locale: s
 
 export default async function NewsPostPage({ params }: { params: Promise<{ locale: string; slug: string }> }) {
   const { locale, slug } = await params;
+  setRequestLocale(locale);
   const posts = newsPosts[locale] || newsPosts["en"] || [];
   const post = posts.find((p) => p.slug === slug);
 
@@ -1,6 +1,6 @@
 import { newsPosts } from "@/config/newsroom";
 import { NewsroomClient } from "./NewsroomClient";
-import { getTranslations } from "next-intl/server";
+import { setRequestLocale } from "next-intl/server";
 
 export async function generateMetadata({ params }: { params: Promise<{ locale: string }> }) {
   const { locale } = await params;
@@ -12,6 +12,7 @@ export async function generateMetadata({ params }: { params: Promise<{ locale: s
 
 export default async function NewsroomPage({ params }: { params: Promise<{ locale: string }> }) {
   const { locale } = await params;
+  setRequestLocale(locale);
 
   // Get posts for current locale, fallback to English
   const posts = newsPosts[locale] || newsPosts["en"] || [];
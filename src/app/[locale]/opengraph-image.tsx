@@ -1,6 +1,6 @@
 import { ImageResponse } from 'next/og';
 
-export const runtime = 'edge';
+// edge ランタイムにすると静的生成されないので Node.js ランタイムのまま、ロケールごとにビルド時に PNG を生成する
 export const alt = 'Lumina Studio';
 export const size = { width: 1200, height: 630 };
 export const contentType = 'image/png';
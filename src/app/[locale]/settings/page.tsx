@@ -19,6 +19,7 @@ import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
 import { useTheme } from "next-themes";
 import { toast } from "sonner";
+import { removeShelfDirectory } from "@/lib/shelf-store";
 
 export default function SettingsPage() {
   const t = useTranslations("Settings");
@@ -37,6 +38,8 @@ export default function SettingsPage() {
         dbs.forEach(db => {
             if (db.name) window.indexedDB.deleteDatabase(db.name);
         });
+        // File Shelf の本体は OPFS にある
+        await removeShelfDirectory();
 
         toast.success(t('data.cleared'));
         setTimeout(() => {
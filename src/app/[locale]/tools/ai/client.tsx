@@ -9,18 +9,65 @@ import {
   X,
   ChevronLeft,
   Loader2,
-  AlertCircle
+  AlertCircle,
+  Check
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
 import { FileDropzone } from "@/components/shared/FileDropzone";
 import { CompareSlider } from "@/components/shared/CompareSlider";
-import { useAiBackgroundRemover } from "@/hooks/useAiBackgroundRemover";
+import { useAiBackgroundRemover, type AiBatchItem } from "@/hooks/useAiBackgroundRemover";
+import type { AiModelVariant } from "@/lib/ai-engine";
+
+const MODEL_VARIANTS: AiModelVariant[] = ["quantized", "full"];
+
+// 一括処理の結果1枚（URL は表示中だけ作り、外れたら解放する）
+function BatchResult({ item, label }: { item: AiBatchItem; label: string }) {
+  const [url, setUrl] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (!item.result) return;
+    const objectUrl = URL.createObjectURL(item.result);
+    setUrl(objectUrl);
+    return () => {
+      URL.revokeObjectURL(objectUrl);
+      setUrl(null);
+    };
+  }, [item.result]);
+
+  const fileName = `${item.name.replace(/\.[^.]+$/, "")}-removed-background.png`;
+
+  return (
+    <div className="relative aspect-square rounded-2xl overflow-hidden border border-white/10 bg-[repeating-conic-gradient(#262626_0%_25%,#171717_0%_50%)] bg-[length:16px_16px] flex items-center justify-center">
+      {url ? (
+        <>
+          {/* eslint-disable-next-line @next/next/no-img-element */}
+          <img src={url} alt={item.name} className="max-w-full max-h-full object-contain" />
+          <a
+            href={url}
+            download={fileName}
+            aria-label={label}
+            className="absolute bottom-2 right-2 w-9 h-9 rounded-full bg-black/60 hover:bg-white/20 border border-white/10 flex items-center justify-center text-white backdrop-blur-md"
+          >
+            <Download className="w-4 h-4" />
+          </a>
+        </>
+      ) : item.failed ? (
+        <AlertCircle className="w-6 h-6 text-red-400" />
+      ) : (
+        <Loader2 className="w-6 h-6 text-purple-300 animate-spin" />
+      )}
+      <span className="absolute top-2 left-2 right-2 text-[10px] text-neutral-300 truncate">{item.name}</span>
+    </div>
+  );
+}
 
 export default function AiLabPage() {
   const t = useTranslations("AILab");
   const {
+    variant,
+    setVariant,
     isReady,
     isLoading,
     isProcessing,
@@ -28,8 +75,10 @@ export default function AiLabPage() {
     loadingStatus,
     error,
     result,
+    batch,
     loadModel,
     processImage,
+    processBatch,
     reset
   } = useAiBackgroundRemover();
 
@@ -65,13 +114,15 @@ export default function AiLabPage() {
   }, [result]);
 
   const handleDrop = useCallback((acceptedFiles: File[]) => {
-    if (acceptedFiles.length > 0) {
+    if (acceptedFiles.length > 1) {
+      processBatch(acceptedFiles);
+    } else if (acceptedFiles.length > 0) {
       const file = acceptedFiles[0];
       setSelectedFile(file);
       setPreviewUrl(URL.createObjectURL(file));
       processImage(file);
     }
-  }, [processImage]);
+  }, [processImage, processBatch]);
 
   const handleReset = () => {
     setSelectedFile(null);
@@ -116,6 +167,21 @@ export default function AiLabPage() {
           <p className="text-lg text-neutral-400 font-light">
             {t('description')}
           </p>
+          <div className="flex items-center justify-center gap-2 pt-4">
+            <span className="text-xs text-neutral-500 mr-1">{t('model.label')}</span>
+            {MODEL_VARIANTS.map((key) => (
+              <Button
+                key={key}
+                size="sm"
+                variant={variant === key ? "default" : "outline"}
+                onClick={() => setVariant(key)}
+                disabled={isLoading || isProcessing}
+                className={`rounded-full text-xs ${variant === key ? 'bg-purple-600 text-white border-purple-500' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
+              >
+                {t(`model.${key}`)}
+              </Button>
+            ))}
+          </div>
         </div>
 
         {error && (
@@ -157,11 +223,44 @@ export default function AiLabPage() {
 
         {isReady && (
           <AnimatePresence mode="wait">
-            {!selectedFile ? (
+            {batch.length > 0 ? (
+              <motion.div
+                key="batch"
+                initial={{ opacity: 0, scale: 0.95 }}
+                animate={{ opacity: 1, scale: 1 }}
+                exit={{ opacity: 0, scale: 0.95 }}
+                transition={springTransition}
+                className="max-w-5xl mx-auto"
+              >
+                <Card className="bg-black/40 backdrop-blur-2xl border-white/10 rounded-3xl shadow-2xl p-6 space-y-6">
+                  <div className="flex items-center justify-between">
+                    <span className="flex items-center gap-2 text-sm font-mono text-purple-200">
+                      {isProcessing ? <Loader2 className="w-4 h-4 animate-spin" /> : <Check className="w-4 h-4 text-green-400" />}
+                      {t('batch.progress', { done: batch.filter((item) => item.result || item.failed).length, total: batch.length })}
+                    </span>
+                    <Button
+                      variant="ghost"
+                      size="icon"
+                      onClick={handleReset}
+                      disabled={isProcessing}
+                      className="rounded-full bg-black/60 hover:bg-white/20 text-white backdrop-blur-md border border-white/10"
+                    >
+                      <X className="w-5 h-5" />
+                    </Button>
+                  </div>
+                  <div className="grid grid-cols-2 sm:grid-cols-3 md:grid-cols-4 gap-4">
+                    {batch.map((item, index) => (
+                      <BatchResult key={index} item={item} label={item.failed ? t('batch.failed') : t('actions.download')} />
+                    ))}
+                  </div>
+                </Card>
+              </motion.div>
+            ) : !selectedFile ? (
                <div className="max-w-3xl mx-auto">
                 <FileDropzone
                   key="dropzone"
                   onDrop={handleDrop}
+                  maxFiles={0}
                   accept={{
                     'image/jpeg': [],
                     'image/png': [],
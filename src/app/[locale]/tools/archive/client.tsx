@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useCallback } from "react";
+import React, { useState, useCallback, useEffect, useSyncExternalStore } from "react";
 import { useTranslations } from "next-intl";
 import { motion, AnimatePresence } from "framer-motion";
 import {
@@ -13,6 +13,9 @@ import {
   FolderArchive,
   Save,
   Eye,
+  Check,
+  X,
+  Loader2,
   Archive as ArchiveIcon
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
@@ -23,22 +26,75 @@ import { Label } from "@/components/ui/label";
 import { GlassTabs } from "@/components/shared/GlassTabs";
 import { FileDropzone } from "@/components/shared/FileDropzone";
 import { useFileShelf } from "@/context/FileShelfContext";
-import JSZip from "jszip";
+import { formatBytes } from "@/lib/converter";
+import { DEFAULT_ZIP_OPTIONS, extractEntry, readZipIndex, type CompressionLevel, type ZipEntry, type ZipOptions } from "@/lib/zip";
+import { blobSink, createZipArchive, pickSaveFile, supportsDirectWrite } from "@/lib/archive";
 import { toast } from "sonner";
 
+const LEVELS: { level: CompressionLevel; key: string }[] = [
+  { level: 0, key: "store" },
+  { level: 1, key: "fast" },
+  { level: 6, key: "standard" },
+  { level: 9, key: "max" },
+];
+
+const MIME_TYPES: Record<string, string> = {
+  png: "image/png", jpg: "image/jpeg", jpeg: "image/jpeg", gif: "image/gif", webp: "image/webp", svg: "image/svg+xml",
+  txt: "text/plain", md: "text/markdown", csv: "text/csv", json: "application/json", xml: "application/xml",
+  html: "text/html", css: "text/css", js: "text/javascript", ts: "text/plain", log: "text/plain",
+  pdf: "application/pdf", mp4: "video/mp4", webm: "video/webm", mp3: "audio/mpeg", wav: "audio/wav", zip: "application/zip",
+};
+
+// プレビューは先頭だけ読む（巨大なテキストを丸ごと描画しない）
+const TEXT_PREVIEW_BYTES = 64 * 1024;
+
+function mimeTypeOf(name: string): string {
+  return MIME_TYPES[name.split(".").pop()?.toLowerCase() ?? ""] ?? "application/octet-stream";
+}
+
+function baseName(name: string): string {
+  return name.split("/").filter(Boolean).pop() || name;
+}
+
+const subscribeNothing = () => () => {};
+
+interface Preview {
+  name: string;
+  url?: string;
+  text?: string;
+}
+
 export default function ArchiveLabPage() {
   const t = useTranslations("ArchiveLab");
   const { addItem } = useFileShelf();
   const [activeTab, setActiveTab] = useState("viewer"); // viewer | compressor
 
   // --- Viewer State ---
-  const [viewingZip, setViewingZip] = useState<JSZip | null>(null);
-  const [zipFiles, setZipFiles] = useState<{name: string, dir: boolean, date: Date}[]>([]);
-  const [zipFileName, setZipFileName] = useState<string>("");
+  // 開いたZIPは File のまま持ち、一覧はセントラルディレクトリだけから作る
+  const [archive, setArchive] = useState<{ file: File; entries: ZipEntry[] } | null>(null);
+  const [preview, setPreview] = useState<Preview | null>(null);
+  const [busyEntry, setBusyEntry] = useState<string | null>(null);
 
   // --- Compressor State ---
   const [filesToCompress, setFilesToCompress] = useState<File[]>([]);
   const [outputName, setOutputName] = useState("archive");
+  const [zipOptions, setZipOptions] = useState<ZipOptions>(DEFAULT_ZIP_OPTIONS);
+  const [directWrite, setDirectWrite] = useState(true);
+  const [zipProgress, setZipProgress] = useState<number | null>(null);
+  const [zipUrl, setZipUrl] = useState<{ url: string; name: string } | null>(null);
+  const canDirectWrite = useSyncExternalStore(subscribeNothing, supportsDirectWrite, () => false);
+
+  useEffect(() => {
+    return () => {
+      if (preview?.url) URL.revokeObjectURL(preview.url);
+    };
+  }, [preview]);
+
+  useEffect(() => {
+    return () => {
+      if (zipUrl) URL.revokeObjectURL(zipUrl.url);
+    };
+  }, [zipUrl]);
 
   // --- Logic ---
 
@@ -47,19 +103,9 @@ export default function ArchiveLabPage() {
     if (!file) return;
 
     try {
-      const zip = await JSZip.loadAsync(file);
-      setViewingZip(zip);
-      setZipFileName(file.name);
-
-      const files: {name: string, dir: boolean, date: Date}[] = [];
-      zip.forEach((relativePath, zipEntry) => {
-        files.push({
-          name: zipEntry.name,
-          dir: zipEntry.dir,
-          date: zipEntry.date
-        });
-      });
-      setZipFiles(files);
+      const entries = await readZipIndex(file);
+      setArchive({ file, entries });
+      setPreview(null);
       toast.success("ZIP loaded successfully");
     } catch (e) {
       toast.error("Failed to load ZIP file");
@@ -67,31 +113,57 @@ export default function ArchiveLabPage() {
     }
   }, []);
 
-  const handleExtractAll = async () => {
-    if (!viewingZip) return;
+  const extract = async (entry: ZipEntry): Promise<Blob | null> => {
+    if (!archive) return null;
+    setBusyEntry(entry.name);
+    try {
+      return await extractEntry(archive.file, entry, mimeTypeOf(entry.name));
+    } catch (e) {
+      toast.error(`Failed to extract ${entry.name}`);
+      console.error(e);
+      return null;
+    } finally {
+      setBusyEntry(null);
+    }
+  };
 
-    // In a browser, extracting all usually means downloading them one by one or creating a new zip?
-    // Usually "Extract" implies saving files. Since we can't save to disk folder directly,
-    // we iterate and trigger downloads or add to shelf.
-    // For this MVP, let's add extracted files to Shelf!
+  const handlePreviewEntry = async (entry: ZipEntry) => {
+    const type = mimeTypeOf(entry.name);
+    const blob = await extract(entry);
+    if (!blob) return;
 
-    let count = 0;
-    const promises: Promise<void>[] = [];
-
-    viewingZip.forEach((path, entry) => {
-      if (!entry.dir) {
-        promises.push(entry.async("blob").then(blob => {
-           const fileName = entry.name.split('/').pop() || entry.name;
-           // Workaround: if File constructor is not recognized, use Blob then cast (though File inherits Blob).
-           // Or just treat as any to suppress if lib "dom" is not fully picking it up in this context.
-           const file = new (File as any)([blob], fileName, { type: "application/octet-stream" });
-           addItem(file, "Archive Lab");
-           count++;
-        }));
-      }
-    });
+    if (type.startsWith("image/")) {
+      setPreview({ name: entry.name, url: URL.createObjectURL(blob) });
+    } else {
+      setPreview({ name: entry.name, text: await blob.slice(0, TEXT_PREVIEW_BYTES).text() });
+    }
+  };
+
+  const handleDownloadEntry = async (entry: ZipEntry) => {
+    const blob = await extract(entry);
+    if (!blob) return;
+
+    const url = URL.createObjectURL(blob);
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = baseName(entry.name);
+    a.click();
+    setTimeout(() => URL.revokeObjectURL(url), 60_000);
+  };
 
-    await Promise.all(promises);
+  const handleExtractAll = async () => {
+    if (!archive) return;
+
+    // フォルダへ直接保存できないので、展開したファイルはシェルフへ送る
+    // 1件ずつ展開するので、同時にメモリに載るのはエントリ1つ分だけ
+    let count = 0;
+    for (const entry of archive.entries) {
+      if (entry.dir) continue;
+      const blob = await extract(entry);
+      if (!blob) continue;
+      addItem(new window.File([blob], baseName(entry.name), { type: blob.type }), "Archive Lab");
+      count++;
+    }
     toast.success(`Extracted ${count} files to Shelf`);
   };
 
@@ -102,27 +174,48 @@ export default function ArchiveLabPage() {
   const createZip = async (saveToShelf = false) => {
     if (filesToCompress.length === 0) return;
 
-    const zip = new JSZip();
-    filesToCompress.forEach(file => {
-      zip.file(file.name, file);
-    });
-
-    const blob = await zip.generateAsync({ type: "blob" });
     const fileName = `${outputName || "archive"}.zip`;
-    const file = new (File as any)([blob], fileName, { type: "application/zip" });
+    const onProgress = ({ done, total }: { done: number; total: number }) => {
+      setZipProgress(total > 0 ? Math.round((done / total) * 100) : 100);
+    };
 
-    if (saveToShelf) {
-      addItem(file, "Archive Lab");
-    } else {
-      const url = URL.createObjectURL(blob);
-      const a = document.createElement("a");
-      a.href = url;
-      a.download = fileName;
-      a.click();
-      URL.revokeObjectURL(url);
+    try {
+      if (canDirectWrite && directWrite) {
+        // 保存先のファイルへ直接書き込む（アーカイブ全体をメモリに持たない）
+        const handle = await pickSaveFile(fileName);
+        setZipProgress(0);
+        await createZipArchive(filesToCompress, zipOptions, await handle.createWritable(), onProgress);
+        if (saveToShelf) addItem(await handle.getFile(), "Archive Lab");
+        toast.success(`Saved ${fileName}`);
+      } else {
+        setZipProgress(0);
+        const sink = blobSink("application/zip");
+        await createZipArchive(filesToCompress, zipOptions, sink.writable, onProgress);
+        const blob = sink.result();
+
+        if (saveToShelf) {
+          addItem(new window.File([blob], fileName, { type: "application/zip" }), "Archive Lab");
+        } else {
+          const url = URL.createObjectURL(blob);
+          setZipUrl({ url, name: fileName });
+          const a = document.createElement("a");
+          a.href = url;
+          a.download = fileName;
+          a.click();
+        }
+      }
+    } catch (e) {
+      // 保存ダイアログのキャンセルはエラー扱いしない
+      if (e instanceof DOMException && e.name === "AbortError") return;
+      toast.error("Failed to create ZIP file");
+      console.error(e);
+    } finally {
+      setZipProgress(null);
     }
   };
 
+  const isZipping = zipProgress !== null;
+
   const tabs = [
     { id: "viewer", label: t('tabs.viewer'), icon: <Eye className="w-4 h-4" /> },
     { id: "compressor", label: t('tabs.compressor'), icon: <ArchiveIcon className="w-4 h-4" /> },
@@ -170,7 +263,7 @@ export default function ArchiveLabPage() {
                     exit={{ opacity: 0, y: -10 }}
                     className="space-y-6"
                 >
-                    {!viewingZip ? (
+                    {!archive ? (
                         <div className="max-w-2xl mx-auto h-80">
                             <FileDropzone
                                 onDrop={handleUnzipDrop}
@@ -191,25 +284,58 @@ export default function ArchiveLabPage() {
                                         <FileArchive className="w-6 h-6 text-amber-400" />
                                     </div>
                                     <div>
-                                        <h2 className="text-lg font-semibold text-white">{zipFileName}</h2>
-                                        <p className="text-xs text-neutral-400">{zipFiles.length} items</p>
+                                        <h2 className="text-lg font-semibold text-white">{archive.file.name}</h2>
+                                        <p className="text-xs text-neutral-400">{archive.entries.length} items · {formatBytes(archive.file.size)}</p>
                                     </div>
                                 </div>
                                 <div className="flex gap-2">
-                                    <Button variant="outline" onClick={() => { setViewingZip(null); setZipFiles([]); }} className="border-white/10 hover:bg-white/10">
+                                    <Button variant="outline" onClick={() => { setArchive(null); setPreview(null); }} className="border-white/10 hover:bg-white/10">
                                         Close
                                     </Button>
-                                    <Button onClick={handleExtractAll} className="bg-amber-600 hover:bg-amber-500 text-white">
+                                    <Button onClick={handleExtractAll} disabled={busyEntry !== null} className="bg-amber-600 hover:bg-amber-500 text-white">
                                         {t('viewer.extractAll')}
                                     </Button>
                                 </div>
                             </div>
+
+                            {preview && (
+                                <div className="mb-6 p-4 rounded-2xl bg-white/5 border border-white/10">
+                                    <div className="flex items-center justify-between mb-3">
+                                        <span className="text-sm text-neutral-300 truncate">{preview.name}</span>
+                                        <Button variant="ghost" size="icon" onClick={() => setPreview(null)} className="w-8 h-8 rounded-full text-neutral-400 hover:text-white">
+                                            <X className="w-4 h-4" />
+                                        </Button>
+                                    </div>
+                                    {preview.url ? (
+                                        // eslint-disable-next-line @next/next/no-img-element
+                                        <img src={preview.url} alt={preview.name} className="max-h-80 mx-auto rounded-lg" />
+                                    ) : (
+                                        <pre className="max-h-80 overflow-auto text-xs text-neutral-300 whitespace-pre-wrap font-mono">{preview.text}</pre>
+                                    )}
+                                </div>
+                            )}
+
                             <div className="flex-1 overflow-y-auto">
                                 <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-3">
-                                    {zipFiles.map((file, i) => (
-                                        <div key={i} className="flex items-center gap-3 p-3 rounded-xl bg-white/5 border border-white/5">
-                                            {file.dir ? <FolderArchive className="w-5 h-5 text-amber-200" /> : <File className="w-5 h-5 text-neutral-400" />}
-                                            <span className="text-sm text-neutral-200 truncate flex-1">{file.name}</span>
+                                    {archive.entries.map((entry) => (
+                                        <div key={entry.name} className="group flex items-center gap-3 p-3 rounded-xl bg-white/5 border border-white/5">
+                                            {entry.dir ? <FolderArchive className="w-5 h-5 text-amber-200" /> : <File className="w-5 h-5 text-neutral-400" />}
+                                            <span className="text-sm text-neutral-200 truncate flex-1">{entry.name}</span>
+                                            {!entry.dir && (
+                                                busyEntry === entry.name ? (
+                                                    <Loader2 className="w-4 h-4 animate-spin text-amber-400" />
+                                                ) : (
+                                                    <div className="flex items-center gap-1">
+                                                        <span className="text-xs text-neutral-500 mr-1">{formatBytes(entry.size)}</span>
+                                                        <button onClick={() => handlePreviewEntry(entry)} aria-label={t('viewer.preview')} className="p-1 text-neutral-500 hover:text-white">
+                                                            <Eye className="w-4 h-4" />
+                                                        </button>
+                                                        <button onClick={() => handleDownloadEntry(entry)} aria-label={t('actions.download')} className="p-1 text-neutral-500 hover:text-white">
+                                                            <Download className="w-4 h-4" />
+                                                        </button>
+                                                    </div>
+                                                )
+                                            )}
                                         </div>
                                     ))}
                                 </div>
@@ -228,6 +354,7 @@ export default function ArchiveLabPage() {
                     <div className="space-y-6">
                         <FileDropzone
                             onDrop={handleCompressDrop}
+                            maxFiles={0}
                             accept={{ 'application/octet-stream': [], 'image/*': [], 'video/*': [], 'text/*': [], 'application/pdf': [] }} // Accept mostly anything for compression
                             text={{
                                 idle: t('dropzone.idle'),
@@ -250,6 +377,39 @@ export default function ArchiveLabPage() {
                                 </div>
                             </div>
                         </Card>
+                        <Card className="bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl p-6 space-y-5">
+                            <div className="space-y-3">
+                                <Label className="text-white block pl-1">{t('compressor.level')}</Label>
+                                <div className="grid grid-cols-4 gap-2">
+                                    {LEVELS.map(({ level, key }) => (
+                                        <Button
+                                            key={level}
+                                            variant={zipOptions.level === level ? "default" : "outline"}
+                                            onClick={() => setZipOptions(prev => ({ ...prev, level }))}
+                                            disabled={isZipping}
+                                            className={`h-10 text-xs rounded-xl ${zipOptions.level === level ? 'bg-amber-600 text-white border-amber-500' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
+                                        >
+                                            {t(`compressor.levels.${key}`)}
+                                        </Button>
+                                    ))}
+                                </div>
+                            </div>
+                            {([
+                                [zipOptions.storeCompressed, () => setZipOptions(prev => ({ ...prev, storeCompressed: !prev.storeCompressed })), t('compressor.storeCompressed')],
+                                ...(canDirectWrite ? [[directWrite, () => setDirectWrite(prev => !prev), t('compressor.directWrite')] as const] : [])
+                            ] as const).map(([checked, toggle, label]) => (
+                                <div
+                                    key={label}
+                                    className="flex items-center space-x-3 cursor-pointer group p-2 -ml-2 rounded-lg hover:bg-white/5 transition-colors"
+                                    onClick={() => !isZipping && toggle()}
+                                >
+                                    <div className={`w-5 h-5 rounded-md border flex items-center justify-center transition-all duration-300 ${checked ? 'bg-amber-600 border-amber-600' : 'border-neutral-600 group-hover:border-neutral-400'}`}>
+                                        {checked && <Check className="w-3.5 h-3.5 text-white" />}
+                                    </div>
+                                    <span className="text-sm text-neutral-400 group-hover:text-white transition-colors select-none">{label}</span>
+                                </div>
+                            ))}
+                        </Card>
                     </div>
 
                     <Card className="bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl p-6 h-full min-h-[400px] flex flex-col">
@@ -273,15 +433,32 @@ export default function ArchiveLabPage() {
                                             <File className="w-4 h-4 text-amber-400 flex-shrink-0" />
                                             <span className="text-sm text-neutral-200 truncate">{f.name}</span>
                                         </div>
-                                        <span className="text-xs text-neutral-500 ml-2">{(f.size / 1024).toFixed(1)} KB</span>
+                                        <span className="text-xs text-neutral-500 ml-2">{formatBytes(f.size)}</span>
                                     </div>
                                 ))
                             )}
                         </div>
+                        {isZipping && (
+                            <div className="mb-4 space-y-2">
+                                <p className="text-sm text-neutral-400 font-mono">{t('compressor.progress', { percent: zipProgress })}</p>
+                                <div className="w-full h-1.5 bg-white/5 rounded-full overflow-hidden">
+                                    <motion.div
+                                        className="h-full bg-amber-500"
+                                        animate={{ width: `${zipProgress}%` }}
+                                        transition={{ ease: "linear" }}
+                                    />
+                                </div>
+                            </div>
+                        )}
+                        {zipUrl && !isZipping && (
+                            <a href={zipUrl.url} download={zipUrl.name} className="mb-4 text-sm text-amber-400 hover:text-amber-300 underline underline-offset-4">
+                                {zipUrl.name}
+                            </a>
+                        )}
                         <div className="grid grid-cols-2 gap-4">
                             <Button
                                 onClick={() => createZip(false)}
-                                disabled={filesToCompress.length === 0}
+                                disabled={filesToCompress.length === 0 || isZipping}
                                 className="h-12 bg-amber-600 hover:bg-amber-500 text-white shadow-lg shadow-amber-900/20"
                             >
                                 <Download className="w-4 h-4 mr-2" />
@@ -289,7 +466,7 @@ export default function ArchiveLabPage() {
                             </Button>
                             <Button
                                 onClick={() => createZip(true)}
-                                disabled={filesToCompress.length === 0}
+                                disabled={filesToCompress.length === 0 || isZipping}
                                 variant="outline"
                                 className="h-12 border-amber-500/30 text-amber-400 hover:bg-amber-500/10"
                             >
@@ -1,4 +1,5 @@
 import { Metadata } from "next";
+import { setRequestLocale } from "next-intl/server";
 import { seoData } from "@/lib/seo-data";
 import ArchiveLabPage from "./client";
 
@@ -22,6 +23,8 @@ export async function generateMetadata({ params }: Props): Promise<Metadata> {
   };
 }
 
-export default function Page() {
+export default async function Page({ params }: Props) {
+  const { locale } = await params;
+  setRequestLocale(locale);
   return <ArchiveLabPage />;
 }
@@ -1,6 +1,7 @@
 "use client";
 
 import React, { useState, useEffect, useCallback } from "react";
+import dynamic from "next/dynamic";
 import { useTranslations } from "next-intl";
 import { motion, AnimatePresence } from "framer-motion";
 import {
@@ -19,9 +20,14 @@ import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
 import { Separator } from "@/components/ui/separator";
 import { FileDropzone } from "@/components/shared/FileDropzone";
-import { WaveformPlayer } from "@/components/shared/WaveformPlayer";
 import { useAudioConverter, AudioFormat } from "@/hooks/useAudioConverter";
 
+// wavesurfer.js はファイルを選んだ時に初めて読み込む（音声ラボの初期表示に含めない）
+const WaveformPlayer = dynamic(
+  () => import("@/components/shared/WaveformPlayer").then((mod) => mod.WaveformPlayer),
+  { ssr: false }
+);
+
 export default function AudioLabPage() {
   const t = useTranslations("AudioLab");
   const {
@@ -30,7 +36,11 @@ export default function AudioLabPage() {
     isConverting,
     progress,
     error,
-    loadFFmpeg,
+    lastEngine,
+    enginePreference,
+    setEnginePreference,
+    webCodecsAvailable,
+    loadEngine,
     convertAudio
   } = useAudioConverter();
 
@@ -39,8 +49,8 @@ export default function AudioLabPage() {
   const [convertedBlobUrl, setConvertedBlobUrl] = useState<string | null>(null);
 
   useEffect(() => {
-    loadFFmpeg();
-  }, [loadFFmpeg]);
+    loadEngine();
+  }, [loadEngine]);
 
   const handleDrop = useCallback((acceptedFiles: File[]) => {
     if (acceptedFiles.length > 0) {
@@ -178,6 +188,15 @@ export default function AudioLabPage() {
                               <p className="font-medium text-emerald-400 text-lg">{t('status.completed')}</p>
                               <p className="text-sm text-emerald-500/70">
                                 {outputFormat.toUpperCase()}
+                                {lastEngine && (
+                                  <span
+                                    data-engine={lastEngine.engine}
+                                    title={lastEngine.fallbackReason ? t('engines.fallback', { reason: lastEngine.fallbackReason }) : undefined}
+                                    className={`ml-2 ${lastEngine.fallbackReason ? 'text-amber-400/80' : ''}`}
+                                  >
+                                    {t(`engines.${lastEngine.engine}`)}
+                                  </span>
+                                )}
                               </p>
                             </div>
                           </div>
@@ -220,6 +239,32 @@ export default function AudioLabPage() {
                         </div>
                       </div>
 
+                      {/* WebCodecs が使えないブラウザでは常に FFmpeg なので選択肢を出さない */}
+                      {webCodecsAvailable && (
+                        <div className="space-y-4">
+                          <label className="text-xs font-bold text-neutral-500 uppercase tracking-widest pl-1">
+                            {t('controls.engine')}
+                          </label>
+                          <div className="grid grid-cols-2 gap-2">
+                            {(['auto', 'ffmpeg'] as const).map((engine) => (
+                              <button
+                                key={engine}
+                                onClick={() => setEnginePreference(engine)}
+                                disabled={isConverting}
+                                data-engine-preference={engine}
+                                className={`
+                                  text-left px-3 py-2 rounded-xl border transition-all duration-300
+                                  ${enginePreference === engine ? 'bg-emerald-600/20 border-emerald-500 text-white' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}
+                                `}
+                              >
+                                <p className="text-sm font-semibold">{t(`engines.${engine}`)}</p>
+                                <p className="text-xs text-neutral-500">{t(`engines.${engine}Hint`)}</p>
+                              </button>
+                            ))}
+                          </div>
+                        </div>
+                      )}
+
                       <Separator className="bg-white/10" />
 
                       <div className="pt-6 mt-auto">
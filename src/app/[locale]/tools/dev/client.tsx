@@ -1,6 +1,8 @@
 "use client";
 
-import React, { useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
+import dynamic from "next/dynamic";
+import type { OnMount } from "@monaco-editor/react";
 import { useTranslations } from "next-intl";
 import { motion } from "framer-motion";
 import {
@@ -10,47 +12,147 @@ import {
   Binary,
   KeyRound,
   Copy,
-  Check,
+  Download,
+  FolderOpen,
+  PenLine,
+  Loader2,
+  X,
   RefreshCw
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
-import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Slider } from "@/components/ui/slider";
 import { GlassTabs } from "@/components/shared/GlassTabs";
+import { JsonViewer } from "@/components/shared/JsonViewer";
+import { useJsonFormatter } from "@/hooks/useJsonFormatter";
+import { formatBytes } from "@/lib/converter";
 import { toast } from "sonner";
 
+// Monaco は数MBあるので、エディタに切り替えた時に初めて読み込む
+const MonacoEditor = dynamic(() => import("@monaco-editor/react"), {
+  ssr: false,
+  loading: () => (
+    <div className="flex-1 flex items-center justify-center">
+      <Loader2 className="w-6 h-6 text-emerald-400 animate-spin" />
+    </div>
+  ),
+});
+
+type MonacoEditorInstance = Parameters<OnMount>[0];
+type MonacoApi = Parameters<OnMount>[1];
+
+// これより大きい入力はエディタでは開かない（Monaco が重くなる）
+const MONACO_MAX_CHARS = 2_000_000;
+
 export default function DevLabPage() {
   const t = useTranslations("DevLab");
   const [activeTab, setActiveTab] = useState("json");
-  const [inputText, setInputText] = useState("");
   const [outputResult, setOutputResult] = useState("");
   const [errorMsg, setErrorMsg] = useState<string | null>(null);
+  // 入力欄は非制御（巨大な JSON を貼り付けても、キー入力ごとに React の状態を経由しない）
+  const textareaRef = useRef<HTMLTextAreaElement>(null);
+  const fileInputRef = useRef<HTMLInputElement>(null);
+  const [file, setFile] = useState<File | null>(null);
+  const [useEditor, setUseEditor] = useState(false);
+  const editorRef = useRef<MonacoEditorInstance | null>(null);
+  const monacoRef = useRef<MonacoApi | null>(null);
+  const editorInitialValue = useRef("");
+  const json = useJsonFormatter();
 
   // Password State
   const [passwordLength, setPasswordLength] = useState(16);
 
+  const readInput = () => (useEditor ? editorRef.current?.getValue() : textareaRef.current?.value) ?? "";
+
+  // エラー箇所をエディタ上にも表示する
+  useEffect(() => {
+    const model = editorRef.current?.getModel();
+    const monaco = monacoRef.current;
+    if (!useEditor || !model || !monaco) return;
+    const error = json.error;
+    monaco.editor.setModelMarkers(model, "devlab", error ? [{
+      startLineNumber: error.line,
+      startColumn: error.column,
+      endLineNumber: error.line,
+      endColumn: error.column + 1,
+      message: t(`json.errors.${error.code}`, { found: error.found ?? "" }),
+      severity: monaco.MarkerSeverity.Error,
+    }] : []);
+  }, [json.error, useEditor, t]);
+
   // --- Actions ---
-  const handleJsonAction = (action: "format" | "minify") => {
-    try {
-        const obj = JSON.parse(inputText);
-        if (action === "format") {
-            setOutputResult(JSON.stringify(obj, null, 2));
-        } else {
-            setOutputResult(JSON.stringify(obj));
-        }
-        setErrorMsg(null);
+  const handleJsonAction = async (action: "format" | "minify") => {
+    setErrorMsg(null);
+    // 解析・整形はワーカーで行い、結果は届いた分から表示する
+    const result = await json.run(action, file ?? readInput());
+    if (!result) return;
+    if (result.ok) {
         toast.success(t('json.valid'));
-    } catch (e) {
-        setErrorMsg(t('json.invalid'));
-        setOutputResult("");
+    } else {
+        if (!result.error) setErrorMsg(t('json.invalid'));
         toast.error(t('json.invalid'));
     }
   };
 
+  const jumpToError = () => {
+    const error = json.error;
+    if (!error || file) return;
+    if (useEditor) {
+        const editor = editorRef.current;
+        if (!editor) return;
+        editor.setPosition({ lineNumber: error.line, column: error.column });
+        editor.revealPositionInCenter({ lineNumber: error.line, column: error.column });
+        editor.focus();
+        return;
+    }
+    const textarea = textareaRef.current;
+    if (!textarea) return;
+    textarea.focus();
+    textarea.setSelectionRange(error.offset, error.offset + 1);
+    const lineHeight = parseFloat(getComputedStyle(textarea).lineHeight) || 20;
+    textarea.scrollTop = Math.max(0, (error.line - 1) * lineHeight - textarea.clientHeight / 2);
+  };
+
+  const toggleEditor = () => {
+    if (useEditor) {
+        if (textareaRef.current) textareaRef.current.value = editorRef.current?.getValue() ?? "";
+        editorRef.current = null;
+        monacoRef.current = null;
+        setUseEditor(false);
+        return;
+    }
+    const text = textareaRef.current?.value ?? "";
+    if (text.length > MONACO_MAX_CHARS) {
+        toast.error(t('json.editorTooLarge'));
+        return;
+    }
+    editorInitialValue.current = text;
+    setUseEditor(true);
+  };
+
+  const handleEditorMount: OnMount = (editor, monaco) => {
+    editorRef.current = editor;
+    monacoRef.current = monaco;
+  };
+
+  // ファイルは文字列にせず、ワーカーがストリームで読む
+  const openFile = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const selected = e.target.files?.[0];
+    e.target.value = "";
+    if (!selected) return;
+    setFile(selected);
+    json.reset();
+  };
+
+  const closeFile = () => {
+    setFile(null);
+    json.reset();
+  };
+
   const handleBase64Action = (action: "encode" | "decode") => {
+      const inputText = readInput();
       try {
           if (action === "encode") {
               setOutputResult(btoa(unescape(encodeURIComponent(inputText))));
@@ -73,15 +175,40 @@ export default function DevLabPage() {
           retVal += charset[values[i] % charset.length];
       }
       setOutputResult(retVal);
-      setInputText(""); // Clear input for password mode logic consistency if needed, though split view might handle differently
   };
 
+  const changeTab = (id: string) => {
+      setActiveTab(id);
+      if (textareaRef.current) textareaRef.current.value = "";
+      editorRef.current = null;
+      monacoRef.current = null;
+      setUseEditor(false);
+      setFile(null);
+      json.reset();
+      setOutputResult("");
+      setErrorMsg(null);
+  };
+
+  const jsonOutput = activeTab === "json" && json.output && json.rowCount > 0 ? json.output : null;
+
   const copyToClipboard = () => {
-      if (!outputResult) return;
-      navigator.clipboard.writeText(outputResult);
+      // JSON の出力はコピーする時に初めて1つの文字列にする
+      const text = jsonOutput ? jsonOutput.text() : outputResult;
+      if (!text) return;
+      navigator.clipboard.writeText(text);
       toast.success("Copied to clipboard");
   };
 
+  const downloadJson = () => {
+      if (!jsonOutput) return;
+      const url = URL.createObjectURL(jsonOutput.blob());
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = file ? file.name.replace(/\.json$/i, "") + (json.lastRun?.mode === "minify" ? ".min.json" : ".formatted.json") : "output.json";
+      a.click();
+      setTimeout(() => URL.revokeObjectURL(url), 1000);
+  };
+
   const tabs = [
     { id: "json", label: t('tabs.json'), icon: <FileJson className="w-4 h-4" /> },
     { id: "base64", label: t('tabs.base64'), icon: <Binary className="w-4 h-4" /> },
@@ -118,7 +245,7 @@ export default function DevLabPage() {
         </div>
 
         <div className="flex justify-center mb-8">
-            <GlassTabs tabs={tabs} activeTab={activeTab} onChange={(id) => { setActiveTab(id); setInputText(""); setOutputResult(""); setErrorMsg(null); }} />
+            <GlassTabs tabs={tabs} activeTab={activeTab} onChange={changeTab} />
         </div>
 
         <div className="grid grid-cols-1 lg:grid-cols-2 gap-8 items-start">
@@ -150,11 +277,49 @@ export default function DevLabPage() {
                     </div>
                 ) : (
                     <>
-                        <Label className="text-white mb-3 pl-1">Input</Label>
+                        <div className="flex justify-between items-center mb-3 pl-1">
+                            <Label className="text-white">Input</Label>
+                            {activeTab === "json" && (
+                                <div className="flex gap-1">
+                                    <input ref={fileInputRef} type="file" accept=".json,.geojson,.txt,application/json" className="hidden" onChange={openFile} />
+                                    <Button variant="ghost" size="sm" onClick={() => fileInputRef.current?.click()} className="text-neutral-400 hover:text-white h-8">
+                                        <FolderOpen className="w-4 h-4 mr-2" />
+                                        {t('json.openFile')}
+                                    </Button>
+                                    <Button variant="ghost" size="sm" onClick={toggleEditor} disabled={!!file} className="text-neutral-400 hover:text-white h-8">
+                                        <PenLine className="w-4 h-4 mr-2" />
+                                        {useEditor ? t('json.plainInput') : t('json.editor')}
+                                    </Button>
+                                </div>
+                            )}
+                        </div>
+                        {file && (
+                            <div className="flex-1 flex flex-col items-center justify-center gap-3 bg-white/5 border border-white/10 rounded-xl p-4 text-white">
+                                <FileJson className="w-10 h-10 text-emerald-400" />
+                                <div className="text-sm font-mono break-all text-center">{file.name}</div>
+                                <div className="text-xs text-neutral-400">{formatBytes(file.size)}</div>
+                                <Button variant="ghost" size="sm" onClick={closeFile} className="text-neutral-400 hover:text-white h-8">
+                                    <X className="w-4 h-4 mr-2" />
+                                    {t('json.closeFile')}
+                                </Button>
+                            </div>
+                        )}
+                        {useEditor && !file && (
+                            <div className="flex-1 min-h-0 border border-white/10 rounded-xl overflow-hidden flex flex-col">
+                                <MonacoEditor
+                                    defaultLanguage="json"
+                                    defaultValue={editorInitialValue.current}
+                                    theme="vs-dark"
+                                    onMount={handleEditorMount}
+                                    options={{ minimap: { enabled: false }, fontSize: 13, scrollBeyondLastLine: false, automaticLayout: true }}
+                                />
+                            </div>
+                        )}
                         <textarea
-                            value={inputText}
-                            onChange={(e) => setInputText(e.target.value)}
-                            className="flex-1 bg-white/5 border border-white/10 rounded-xl p-4 text-white placeholder:text-neutral-600 resize-none focus:outline-none focus:ring-2 focus:ring-emerald-500/50 font-mono text-sm"
+                            ref={textareaRef}
+                            defaultValue=""
+                            spellCheck={false}
+                            className={`flex-1 bg-white/5 border border-white/10 rounded-xl p-4 text-white placeholder:text-neutral-600 resize-none focus:outline-none focus:ring-2 focus:ring-emerald-500/50 font-mono text-sm ${useEditor || file ? "hidden" : ""}`}
                             placeholder="Paste your code or text here..."
                         />
                         <div className="mt-4 flex gap-3">
@@ -187,23 +352,61 @@ export default function DevLabPage() {
             <Card className="p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl h-[500px] flex flex-col relative">
                 <div className="flex justify-between items-center mb-3 pl-1">
                      <Label className="text-white">Output</Label>
-                     {outputResult && (
-                         <Button variant="ghost" size="sm" onClick={copyToClipboard} className="text-emerald-400 hover:text-emerald-300 h-8">
-                             <Copy className="w-4 h-4 mr-2" />
-                             Copy
-                         </Button>
-                     )}
+                     <div className="flex gap-1">
+                         {jsonOutput && !json.isProcessing && (
+                             <Button variant="ghost" size="sm" onClick={downloadJson} className="text-emerald-400 hover:text-emerald-300 h-8">
+                                 <Download className="w-4 h-4 mr-2" />
+                                 {t('json.download')}
+                             </Button>
+                         )}
+                         {(outputResult || (jsonOutput && !json.isProcessing)) && (
+                             <Button variant="ghost" size="sm" onClick={copyToClipboard} className="text-emerald-400 hover:text-emerald-300 h-8">
+                                 <Copy className="w-4 h-4 mr-2" />
+                                 Copy
+                             </Button>
+                         )}
+                     </div>
                 </div>
 
-                <div className="flex-1 bg-black/50 border border-white/5 rounded-xl p-4 relative overflow-auto">
-                    {errorMsg ? (
-                        <div className="text-red-400 font-mono text-sm">{errorMsg}</div>
-                    ) : (
-                        <pre className="text-white font-mono text-sm whitespace-pre-wrap break-all">
-                            {outputResult || <span className="text-neutral-600 italic">Result will appear here...</span>}
-                        </pre>
-                    )}
-                </div>
+                {activeTab === "json" && json.error ? (
+                    <div className="flex-1 bg-black/50 border border-white/5 rounded-xl p-4 space-y-3">
+                        <div className="text-red-400 font-mono text-sm" data-testid="json-error">
+                            {t('json.errorAt', { line: json.error.line, column: json.error.column })}
+                            {t(`json.errors.${json.error.code}`, { found: json.error.found ?? "" })}
+                        </div>
+                        {!file && (
+                            <Button variant="outline" size="sm" onClick={jumpToError} className="bg-transparent border-white/20 text-white hover:bg-white/10 h-8">
+                                {t('json.jump')}
+                            </Button>
+                        )}
+                    </div>
+                ) : jsonOutput ? (
+                    <JsonViewer
+                        output={jsonOutput}
+                        rowCount={json.rowCount}
+                        className="flex-1 min-h-0 bg-black/50 border border-white/5 rounded-xl py-2 text-white text-sm font-mono"
+                    />
+                ) : (
+                    <div className="flex-1 bg-black/50 border border-white/5 rounded-xl p-4 relative overflow-auto">
+                        {errorMsg ? (
+                            <div className="text-red-400 font-mono text-sm">{errorMsg}</div>
+                        ) : activeTab === "json" && json.isProcessing ? (
+                            <div className="text-neutral-400 font-mono text-sm flex items-center gap-2">
+                                <Loader2 className="w-4 h-4 animate-spin" />
+                                {t('json.processing', { percent: json.progress })}
+                            </div>
+                        ) : (
+                            <pre className="text-white font-mono text-sm whitespace-pre-wrap break-all">
+                                {outputResult || <span className="text-neutral-600 italic">Result will appear here...</span>}
+                            </pre>
+                        )}
+                    </div>
+                )}
+                {activeTab === "json" && json.lastRun && (
+                    <div className="mt-3 pl-1 text-xs text-neutral-500 font-mono" data-testid="json-summary">
+                        {t('json.summary', { rows: json.rowCount.toLocaleString(), size: formatBytes(json.lastRun.bytes), ms: Math.round(json.lastRun.ms) })}
+                    </div>
+                )}
             </Card>
         </div>
       </motion.div>
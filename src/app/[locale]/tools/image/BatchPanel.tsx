@@ -0,0 +1,207 @@
+"use client";
+
+import React, { useState, useEffect } from "react";
+import { useTranslations } from "next-intl";
+import { motion } from "framer-motion";
+import { Check, FileArchive, Loader2, RefreshCw, X, AlertCircle } from "lucide-react";
+import { Button } from "@/components/ui/button";
+import { Card } from "@/components/ui/card";
+import { Slider } from "@/components/ui/slider";
+import { formatBytes } from "@/lib/converter";
+import { convertBatch } from "@/lib/image-pool";
+import { blobSink } from "@/lib/archive";
+import { ZipWriter } from "@/lib/zip";
+import type { OutputFormat } from "@/lib/constants";
+
+type ItemStatus = "pending" | "done" | "error";
+
+interface BatchItem {
+  file: File;
+  status: ItemStatus;
+  newSize?: number;
+}
+
+const EXTENSIONS: Record<OutputFormat, string> = {
+  "image/jpeg": "jpg",
+  "image/png": "png",
+  "image/webp": "webp",
+};
+
+interface BatchPanelProps {
+  files: File[];
+  onClose: () => void;
+}
+
+export function BatchPanel({ files, onClose }: BatchPanelProps) {
+  const t = useTranslations("ImageLab");
+
+  const [items, setItems] = useState<BatchItem[]>(() => files.map((file) => ({ file, status: "pending" })));
+  const [format, setFormat] = useState<OutputFormat>("image/webp");
+  const [quality, setQuality] = useState(0.8);
+  const [isConverting, setIsConverting] = useState(false);
+  const [zipUrl, setZipUrl] = useState<string | null>(null);
+
+  useEffect(() => {
+    return () => {
+      if (zipUrl) URL.revokeObjectURL(zipUrl);
+    };
+  }, [zipUrl]);
+
+  const doneCount = items.filter((item) => item.status !== "pending").length;
+
+  const handleConvertAll = async () => {
+    setIsConverting(true);
+    setZipUrl(null);
+    setItems((prev) => prev.map((item) => ({ ...item, status: "pending", newSize: undefined })));
+
+    // 変換が終わった順にZIPへ書き出していく（結果の Blob は書き終えたら手放す）
+    // 画像は既に圧縮済みなので、ZIPは無圧縮(STORE)でまとめる
+    const sink = blobSink("application/zip");
+    const writer = sink.writable.getWriter();
+    const zip = new ZipWriter((chunk) => writer.write(chunk));
+    const usedNames = new Set<string>();
+    let writing = Promise.resolve();
+
+    try {
+      await convertBatch(files, { format, quality }, (index, result) => {
+        if (result) {
+          const base = files[index].name.replace(/\.[^.]+$/, "");
+          let name = `${base}.${EXTENSIONS[format]}`;
+          for (let n = 1; usedNames.has(name); n++) name = `${base}-${n}.${EXTENSIONS[format]}`;
+          usedNames.add(name);
+          const blob = result.blob;
+          writing = writing.then(() => zip.addFile(name, blob, Date.now(), 0));
+        }
+        setItems((prev) => {
+          const next = [...prev];
+          next[index] = {
+            ...next[index],
+            status: result ? "done" : "error",
+            newSize: result?.newSize,
+          };
+          return next;
+        });
+      });
+
+      await writing;
+      await zip.finish();
+      await writer.close();
+      setZipUrl(URL.createObjectURL(sink.result()));
+    } catch (error) {
+      await writer.abort(error).catch(() => {});
+      console.error("Batch conversion failed:", error);
+    } finally {
+      setIsConverting(false);
+    }
+  };
+
+  return (
+    <motion.div
+      initial={{ opacity: 0, y: 20 }}
+      animate={{ opacity: 1, y: 0 }}
+      className="grid grid-cols-1 lg:grid-cols-3 gap-8"
+    >
+      <Card className="lg:col-span-2 p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl shadow-2xl">
+        <div className="flex items-center justify-between mb-4">
+          <h2 className="font-semibold text-lg text-white">{t("batch.title", { count: files.length })}</h2>
+          <Button
+            variant="ghost"
+            size="icon"
+            onClick={onClose}
+            disabled={isConverting}
+            className="rounded-full bg-black/60 hover:bg-white/20 text-white border border-white/10"
+          >
+            <X className="w-5 h-5" />
+          </Button>
+        </div>
+        <div className="max-h-[480px] overflow-y-auto space-y-2 pr-2 custom-scrollbar">
+          {items.map((item, index) => (
+            <div key={index} className="flex items-center justify-between bg-white/5 border border-white/10 rounded-xl p-3 text-sm">
+              <span className="truncate text-neutral-300 max-w-[60%]">{item.file.name}</span>
+              <div className="flex items-center gap-3 font-mono text-xs">
+                <span className="text-neutral-500">{formatBytes(item.file.size)}</span>
+                {item.status === "done" && (
+                  <span className="flex items-center text-emerald-400">
+                    <Check className="w-3.5 h-3.5 mr-1" />
+                    {formatBytes(item.newSize ?? 0)}
+                  </span>
+                )}
+                {item.status === "error" && <AlertCircle className="w-4 h-4 text-red-400" />}
+                {item.status === "pending" && isConverting && <Loader2 className="w-4 h-4 animate-spin text-neutral-500" />}
+              </div>
+            </div>
+          ))}
+        </div>
+      </Card>
+
+      <Card className="p-8 space-y-8 backdrop-blur-xl bg-black/40 border-white/10 rounded-3xl shadow-xl">
+        <div className="space-y-4">
+          <label className="text-xs font-bold text-neutral-500 uppercase tracking-widest pl-1">
+            Format
+          </label>
+          <div className="grid grid-cols-3 gap-3">
+            {(["image/jpeg", "image/png", "image/webp"] as const).map((fmt) => (
+              <Button
+                key={fmt}
+                variant={format === fmt ? "default" : "outline"}
+                onClick={() => setFormat(fmt)}
+                disabled={isConverting}
+                className={`
+                  h-10 text-xs font-medium transition-all duration-300 rounded-xl
+                  ${format === fmt ? 'bg-blue-600 text-white border-blue-500 shadow-lg shadow-blue-900/20' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}
+                `}
+              >
+                {fmt.split("/")[1].toUpperCase()}
+              </Button>
+            ))}
+          </div>
+        </div>
+
+        {format !== "image/png" && (
+          <div className="space-y-5">
+            <div className="flex justify-between items-center pl-1">
+              <label className="text-xs font-bold text-neutral-500 uppercase tracking-widest">
+                {t("controls.quality")}
+              </label>
+              <span className="text-xs font-mono bg-white/10 px-2 py-1 rounded-md text-white/80">
+                {Math.round(quality * 100)}%
+              </span>
+            </div>
+            <Slider
+              value={[quality]}
+              min={0.1}
+              max={1.0}
+              step={0.05}
+              disabled={isConverting}
+              onValueChange={([val]) => setQuality(val)}
+              className="py-2 cursor-pointer"
+            />
+          </div>
+        )}
+
+        <p className="text-sm text-neutral-400 font-mono">
+          {t("batch.progress", { done: doneCount, total: items.length })}
+        </p>
+
+        <div className="space-y-3">
+          <Button
+            className="w-full h-14 text-base font-semibold rounded-2xl bg-white text-black hover:bg-white/90"
+            onClick={handleConvertAll}
+            disabled={isConverting}
+          >
+            <RefreshCw className={`w-5 h-5 mr-3 ${isConverting ? "animate-spin" : ""}`} />
+            {isConverting ? t("status.processing") : t("batch.convertAll")}
+          </Button>
+          {zipUrl && (
+            <Button asChild className="w-full h-12 bg-emerald-600 hover:bg-emerald-500 text-white rounded-2xl">
+              <a href={zipUrl} download="converted-images.zip">
+                <FileArchive className="w-4 h-4 mr-2" />
+                {t("batch.downloadZip")}
+              </a>
+            </Button>
+          )}
+        </div>
+      </Card>
+    </motion.div>
+  );
+}
@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useCallback } from "react";
+import React, { useState, useCallback, useEffect } from "react";
 import { useTranslations } from "next-intl";
 import { motion, AnimatePresence } from "framer-motion";
 import { z } from "zod";
@@ -19,6 +19,10 @@ import { Input } from "@/components/ui/input";
 import { Slider } from "@/components/ui/slider";
 import { Separator } from "@/components/ui/separator";
 import { FileDropzone } from "@/components/shared/FileDropzone";
+import { PrivacyMode } from "@/components/features/PrivacyMode";
+import { isHeic } from "@/lib/heic";
+import { installImageApi } from "@/lib/converter";
+import { BatchPanel } from "./BatchPanel";
 
 // Zodスキーマ定義
 const ImageFormatSchema = z.union([
@@ -45,8 +49,14 @@ type ProcessingOptions = z.infer<typeof ProcessingOptionsSchema>;
 export default function ImageLabPage() {
   const t = useTranslations("ImageLab");
 
+  // メインスレッドの変換（window.__luminaImage）を計測スクリプトから呼べるようにしておく
+  useEffect(() => installImageApi(), []);
+
   // 状態管理
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
+  const [batchFiles, setBatchFiles] = useState<File[] | null>(null);
+  const [labMode, setLabMode] = useState<"convert" | "privacy">("convert");
+  const [privacyFiles, setPrivacyFiles] = useState<File[] | null>(null);
   const [previewUrl, setPreviewUrl] = useState<string | null>(null);
   const [processedImageUrl, setProcessedImageUrl] = useState<string | null>(null);
   const [isProcessing, setIsProcessing] = useState<boolean>(false);
@@ -62,6 +72,19 @@ export default function ImageLabPage() {
 
   // ファイルがドロップされた時の処理
   const handleDrop = useCallback((acceptedFiles: File[]) => {
+    // メタデータ削除は枚数に関係なくワーカープールで処理
+    if (labMode === "privacy") {
+      if (acceptedFiles.length > 0) setPrivacyFiles(acceptedFiles);
+      return;
+    }
+
+    // 複数ファイルはワーカープールで一括変換
+    // HEICは<img>でプレビューできないので、1枚でもワーカープール（タイルを直接デコードする）で変換する
+    if (acceptedFiles.length > 1 || acceptedFiles.some(isHeic)) {
+      setBatchFiles(acceptedFiles);
+      return;
+    }
+
     if (acceptedFiles.length > 0) {
       const file = acceptedFiles[0];
       setSelectedFile(file);
@@ -83,7 +106,7 @@ export default function ImageLabPage() {
       };
       sourceImage.src = objectUrl;
     }
-  }, []);
+  }, [labMode]);
 
   const handleResetAction = () => {
     if (previewUrl) URL.revokeObjectURL(previewUrl);
@@ -196,11 +219,28 @@ export default function ImageLabPage() {
         </div>
 
         <AnimatePresence mode="wait">
-          {!selectedFile ? (
-            <div className="max-w-3xl mx-auto">
+          {privacyFiles ? (
+            <PrivacyMode key="privacy" files={privacyFiles} onClose={() => setPrivacyFiles(null)} />
+          ) : batchFiles ? (
+            <BatchPanel key="batch" files={batchFiles} onClose={() => setBatchFiles(null)} />
+          ) : !selectedFile ? (
+            <div className="max-w-3xl mx-auto space-y-4">
+               <div className="flex justify-center gap-2">
+                 {(["convert", "privacy"] as const).map((key) => (
+                   <Button
+                     key={key}
+                     variant={labMode === key ? "default" : "outline"}
+                     onClick={() => setLabMode(key)}
+                     className={`rounded-xl text-xs ${labMode === key ? 'bg-blue-600 text-white border-blue-500' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
+                   >
+                     {t(`modes.${key}`)}
+                   </Button>
+                 ))}
+               </div>
                <FileDropzone
                  key="dropzone"
                  onDrop={handleDrop}
+                 maxFiles={0}
                  accept={{
                    'image/jpeg': [],
                    'image/png': [],
@@ -11,50 +11,66 @@ import {
   ChevronLeft,
   Loader2,
   AlertCircle,
-  Plus
+  Plus,
+  Check
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
 import { FileDropzone } from "@/components/shared/FileDropzone";
 import { usePdfMerger } from "@/hooks/usePdfMerger";
+import { DEFAULT_MERGE_OPTIONS, type MergeOptions } from "@/lib/pdf-options";
 
 interface PdfFile {
   id: string;
   file: File;
 }
 
+// 合計サイズがこれを超えたら省メモリモードを自動でオンにする
+const INCREMENTAL_THRESHOLD = 200 * 1024 * 1024;
+
 export default function PdfLabPage() {
   const t = useTranslations("PDFLab");
-  const { isMerging, error, mergePdfs } = usePdfMerger();
+  const { isMerging, progress, error, mergePdfs } = usePdfMerger();
 
   const [files, setFiles] = useState<PdfFile[]>([]);
   const [mergedBlobUrl, setMergedBlobUrl] = useState<string | null>(null);
+  const [options, setOptions] = useState<MergeOptions>(DEFAULT_MERGE_OPTIONS);
+
+  // 古い結果のURLを解放してからリセットする
+  const resetResult = useCallback(() => {
+    if (mergedBlobUrl) URL.revokeObjectURL(mergedBlobUrl);
+    setMergedBlobUrl(null);
+  }, [mergedBlobUrl]);
 
   const handleDrop = useCallback((acceptedFiles: File[]) => {
     const newFiles = acceptedFiles.map(file => ({
       id: `${file.name}-${Date.now()}-${Math.random()}`,
       file
     }));
-    setFiles(prev => [...prev, ...newFiles]);
-    setMergedBlobUrl(null); // 新しいファイルが追加されたら結果をリセット
-  }, []);
+    const next = [...files, ...newFiles];
+    setFiles(next);
+    if (next.reduce((acc, curr) => acc + curr.file.size, 0) > INCREMENTAL_THRESHOLD) {
+      setOptions(prev => ({ ...prev, incremental: true }));
+    }
+    resetResult(); // 新しいファイルが追加されたら結果をリセット
+  }, [files, resetResult]);
 
   const handleRemove = (id: string) => {
     setFiles(prev => prev.filter(f => f.id !== id));
-    setMergedBlobUrl(null);
+    resetResult();
   };
 
   const handleClear = () => {
     setFiles([]);
-    if (mergedBlobUrl) URL.revokeObjectURL(mergedBlobUrl);
-    setMergedBlobUrl(null);
+    resetResult();
   };
 
   const handleMerge = async () => {
     if (files.length < 2) return;
 
-    const blob = await mergePdfs(files.map(f => f.file));
+    resetResult();
+    const blob = await mergePdfs(files.map(f => f.file), options);
     if (blob) {
       const url = URL.createObjectURL(blob);
       setMergedBlobUrl(url);
@@ -110,7 +126,7 @@ export default function PdfLabPage() {
                    <FileDropzone
                      onDrop={handleDrop}
                      accept={{ 'application/pdf': ['.pdf'] }}
-                     maxFiles={20}
+                     maxFiles={0}
                      text={{
                        idle: t('dropzone.idle'),
                        active: t('dropzone.active'),
@@ -177,7 +193,7 @@ export default function PdfLabPage() {
                      <FileDropzone
                        onDrop={handleDrop}
                        accept={{ 'application/pdf': ['.pdf'] }}
-                       maxFiles={20}
+                       maxFiles={0}
                        text={{
                          idle: "",
                          active: "",
@@ -216,6 +232,40 @@ export default function PdfLabPage() {
                  </div>
                </div>
 
+               <div className="space-y-3">
+                 <h3 className="text-xs font-bold text-neutral-500 uppercase tracking-widest">{t('options.title')}</h3>
+                 {([
+                   ['useObjectStreams', t('options.objectStreams')],
+                   ['incremental', t('options.incremental')]
+                 ] as const).map(([key, label]) => (
+                   <div
+                     key={key}
+                     className="flex items-center space-x-3 cursor-pointer group p-2 -ml-2 rounded-lg hover:bg-white/5 transition-colors"
+                     onClick={() => !isMerging && setOptions(prev => ({ ...prev, [key]: !prev[key] }))}
+                   >
+                     <div className={`w-5 h-5 rounded-md border flex items-center justify-center transition-all duration-300 ${options[key] ? 'bg-red-600 border-red-600' : 'border-neutral-600 group-hover:border-neutral-400'}`}>
+                       {options[key] && <Check className="w-3.5 h-3.5 text-white" />}
+                     </div>
+                     <span className="text-sm text-neutral-400 group-hover:text-white transition-colors select-none">{label}</span>
+                   </div>
+                 ))}
+               </div>
+
+               {isMerging && progress && (
+                 <div className="space-y-2">
+                   <p className="text-sm text-neutral-400 font-mono">
+                     {t('status.progress', progress)}
+                   </p>
+                   <div className="w-full h-1.5 bg-white/5 rounded-full overflow-hidden">
+                     <motion.div
+                       className="h-full bg-red-500"
+                       animate={{ width: `${(progress.done / progress.total) * 100}%` }}
+                       transition={{ ease: "linear" }}
+                     />
+                   </div>
+                 </div>
+               )}
+
                <Button
                  className="w-full h-14 text-base font-semibold rounded-2xl shadow-xl shadow-red-900/20 transition-all hover:scale-[1.02] active:scale-[0.98] bg-white text-black hover:bg-white/90 disabled:opacity-50"
                  onClick={handleMerge}
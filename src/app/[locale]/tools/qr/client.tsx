@@ -10,7 +10,8 @@ import {
   Image as ImageIcon,
   ChevronLeft,
   X,
-  QrCode
+  QrCode,
+  Layers
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
@@ -18,6 +19,8 @@ import { Card } from "@/components/ui/card";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { Separator } from "@/components/ui/separator";
+import { GlassTabs } from "@/components/shared/GlassTabs";
+import { QrBulkMode } from "@/components/features/QrBulkMode";
 
 export default function QRMasterPage() {
   const t = useTranslations("QRLab");
@@ -25,6 +28,9 @@ export default function QRMasterPage() {
   const [fgColor, setFgColor] = useState("#ffffff");
   const [bgColor, setBgColor] = useState("#000000");
   const [logoUrl, setLogoUrl] = useState<string | null>(null);
+  // 一括モードのワーカーには URL ではなくファイルそのものを渡す
+  const [logoFile, setLogoFile] = useState<File | null>(null);
+  const [mode, setMode] = useState("single");
 
   const qrRef = useRef<SVGSVGElement>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
@@ -36,6 +42,7 @@ export default function QRMasterPage() {
     if (file) {
       const url = URL.createObjectURL(file);
       setLogoUrl(url);
+      setLogoFile(file);
     }
   };
 
@@ -43,6 +50,7 @@ export default function QRMasterPage() {
     if (logoUrl) {
       URL.revokeObjectURL(logoUrl);
       setLogoUrl(null);
+      setLogoFile(null);
       if (fileInputRef.current) fileInputRef.current.value = "";
     }
   };
@@ -115,9 +123,21 @@ export default function QRMasterPage() {
           </p>
         </div>
 
+        <div className="flex justify-center">
+            <GlassTabs
+                tabs={[
+                    { id: "single", label: t('modes.single'), icon: <QrCode className="w-4 h-4" /> },
+                    { id: "bulk", label: t('modes.bulk'), icon: <Layers className="w-4 h-4" /> },
+                ]}
+                activeTab={mode}
+                onChange={setMode}
+            />
+        </div>
+
         <div className="grid grid-cols-1 lg:grid-cols-2 gap-8 items-start h-full">
             {/* Left Column: Controls */}
             <Card className="p-8 space-y-8 backdrop-blur-xl bg-black/40 border-white/10 rounded-3xl shadow-xl h-full">
+                {mode === "single" && (
                 <div className="space-y-4">
                     <Label className="text-white text-base font-medium pl-1">Content</Label>
                     <Input
@@ -127,6 +147,7 @@ export default function QRMasterPage() {
                         className="bg-white/5 border-white/10 text-white placeholder:text-neutral-500 h-14 text-lg rounded-xl focus:ring-cyan-500/50 focus:border-cyan-500 transition-all"
                     />
                 </div>
+                )}
 
                 <div className="grid grid-cols-2 gap-6">
                     <div className="space-y-3">
@@ -187,7 +208,10 @@ export default function QRMasterPage() {
                 </div>
             </Card>
 
-            {/* Right Column: Preview */}
+            {/* Right Column: Preview / Bulk */}
+            {mode === "bulk" ? (
+            <QrBulkMode fgColor={fgColor} bgColor={bgColor} logo={logoFile} />
+            ) : (
             <div className="space-y-6 lg:sticky lg:top-24">
                 <motion.div
                     layout
@@ -240,6 +264,7 @@ export default function QRMasterPage() {
                     </Button>
                 </div>
             </div>
+            )}
         </div>
       </motion.div>
     </div>
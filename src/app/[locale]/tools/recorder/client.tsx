@@ -19,20 +19,26 @@ import {
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
 import { useFileShelf } from "@/context/FileShelfContext";
+import { DiskRecorder, discardRecording, type Recording } from "@/lib/recorder";
+import { formatBytes } from "@/lib/converter";
 import { toast } from "sonner";
 
 export default function RecorderPage() {
   const t = useTranslations("Recorder");
-  const { addItem } = useFileShelf();
+  const { addItem, moveToShelf, getFile } = useFileShelf();
 
   const [isRecording, setIsRecording] = useState(false);
-  const [recordedBlob, setRecordedBlob] = useState<Blob | null>(null);
+  const [recording, setRecording] = useState<Recording | null>(null);
+  const [playbackUrl, setPlaybackUrl] = useState<string | null>(null);
+  const [recordedBytes, setRecordedBytes] = useState(0);
+  const [savedToShelf, setSavedToShelf] = useState(false);
   const [micEnabled, setMicEnabled] = useState(true);
   const [stream, setStream] = useState<MediaStream | null>(null);
 
   const videoRef = useRef<HTMLVideoElement>(null);
-  const mediaRecorderRef = useRef<MediaRecorder | null>(null);
-  const chunksRef = useRef<Blob[]>([]);
+  const recorderRef = useRef<DiskRecorder | null>(null);
+  // 録画中のストリームを閉じ込めた停止処理（画面共有の終了からも呼ばれる）
+  const stopRef = useRef<() => void>(() => {});
 
   useEffect(() => {
     return () => {
@@ -42,6 +48,50 @@ export default function RecorderPage() {
     };
   }, [stream]);
 
+  // 再生用URLは差し替え・アンマウント時に破棄する
+  useEffect(() => {
+    return () => {
+      if (playbackUrl) URL.revokeObjectURL(playbackUrl);
+    };
+  }, [playbackUrl]);
+
+  useEffect(() => {
+    return () => {
+      recorderRef.current?.abort();
+    };
+  }, []);
+
+  const showRecording = (file: File) => {
+    const url = URL.createObjectURL(file);
+    setPlaybackUrl(url);
+    if (videoRef.current) {
+      videoRef.current.srcObject = null;
+      videoRef.current.src = url;
+      videoRef.current.controls = true;
+      videoRef.current.muted = false; // Unmute for playback
+    }
+  };
+
+  const finishRecording = async (combinedStream: MediaStream) => {
+    const recorder = recorderRef.current;
+    if (!recorder) return;
+
+    try {
+      const result = await recorder.stop();
+      setRecording(result);
+      showRecording(result.file);
+    } catch (err) {
+      console.error("Error finishing recording:", err);
+      toast.error("Failed to save recording.");
+    } finally {
+      // Stop all tracks
+      combinedStream.getTracks().forEach(track => track.stop());
+      recorderRef.current = null;
+      setStream(null);
+      setIsRecording(false);
+    }
+  };
+
   const startRecording = async () => {
     try {
       // Request screen stream
@@ -67,6 +117,7 @@ export default function RecorderPage() {
         }
       }
 
+      reset();
       setStream(combinedStream);
 
       if (videoRef.current) {
@@ -77,39 +128,18 @@ export default function RecorderPage() {
         ? "video/webm; codecs=vp9"
         : "video/webm";
 
-      const mediaRecorder = new MediaRecorder(combinedStream, { mimeType });
-      mediaRecorderRef.current = mediaRecorder;
-      chunksRef.current = [];
-
-      mediaRecorder.ondataavailable = (e) => {
-        if (e.data.size > 0) {
-          chunksRef.current.push(e.data);
-        }
-      };
-
-      mediaRecorder.onstop = () => {
-        const blob = new Blob(chunksRef.current, { type: mimeType });
-        setRecordedBlob(blob);
-        if (videoRef.current) {
-            videoRef.current.srcObject = null;
-            videoRef.current.src = URL.createObjectURL(blob);
-            videoRef.current.controls = true;
-            videoRef.current.muted = false; // Unmute for playback
-        }
-        // Stop all tracks
-        combinedStream.getTracks().forEach(track => track.stop());
-        setStream(null);
-        setIsRecording(false);
-      };
+      // チャンクは届くたびに OPFS のファイルへ書き出す（メモリに溜めない）
+      const recorder = new DiskRecorder(combinedStream, mimeType, setRecordedBytes);
+      recorderRef.current = recorder;
 
       // Stop recording if user stops sharing via browser UI
       displayStream.getVideoTracks()[0].onended = () => {
-          stopRecording();
+          finishRecording(combinedStream);
       };
+      stopRef.current = () => finishRecording(combinedStream);
 
-      mediaRecorder.start();
+      await recorder.start();
       setIsRecording(true);
-      setRecordedBlob(null);
 
     } catch (err) {
       console.error("Error starting recording:", err);
@@ -117,33 +147,44 @@ export default function RecorderPage() {
     }
   };
 
-  const stopRecording = () => {
-    if (mediaRecorderRef.current && mediaRecorderRef.current.state !== "inactive") {
-      mediaRecorderRef.current.stop();
-    }
-  };
+  const stopRecording = () => stopRef.current();
 
   const downloadVideo = () => {
-    if (!recordedBlob) return;
-    const url = URL.createObjectURL(recordedBlob);
+    if (!recording || !playbackUrl) return;
     const a = document.createElement("a");
-    a.href = url;
-    a.download = `screen-recording-${Date.now()}.webm`;
+    a.href = playbackUrl;
+    a.download = recording.file.name;
     a.click();
-    URL.revokeObjectURL(url);
   };
 
-  const saveToShelf = () => {
-    if (!recordedBlob) return;
-    const file = new (File as any)([recordedBlob], `screen-recording-${Date.now()}.webm`, { type: "video/webm" });
-    addItem(file, "Screen Recorder");
+  const saveToShelf = async () => {
+    if (!recording || savedToShelf) return;
+
+    if (!recording.handle) {
+      await addItem(recording.file, "Screen Recorder");
+      setSavedToShelf(true);
+      return;
+    }
+
+    // OPFS 上の録画ファイルをそのままシェルフへ移動する（コピーしない）
+    const item = await moveToShelf(recording.handle, recording.file.name, "video/webm", "Screen Recorder");
+    if (!item) return;
+    const file = await getFile(item.id);
+    setRecording({ file, handle: null });
+    setSavedToShelf(true);
+    showRecording(file);
   };
 
   const reset = () => {
-      setRecordedBlob(null);
+      if (!savedToShelf) discardRecording(recording);
+      setRecording(null);
+      setPlaybackUrl(null);
+      setRecordedBytes(0);
+      setSavedToShelf(false);
       if (videoRef.current) {
-          videoRef.current.src = "";
+          videoRef.current.removeAttribute("src");
           videoRef.current.srcObject = null;
+          videoRef.current.controls = false;
       }
   };
 
@@ -192,7 +233,7 @@ export default function RecorderPage() {
                     className="w-full h-full object-contain"
                 />
 
-                {!isRecording && !recordedBlob && (
+                {!isRecording && !recording && (
                     <div className="absolute inset-0 flex flex-col items-center justify-center text-neutral-500 pointer-events-none">
                         <Monitor className="w-16 h-16 opacity-20 mb-4" />
                         <p className="text-sm font-medium opacity-50">Ready to Capture</p>
@@ -203,6 +244,9 @@ export default function RecorderPage() {
                     <div className="absolute top-4 right-4 flex items-center gap-2 bg-red-500/20 backdrop-blur-md px-3 py-1.5 rounded-full border border-red-500/30">
                         <div className="w-2 h-2 bg-red-500 rounded-full animate-pulse" />
                         <span className="text-xs font-mono font-medium text-red-200">REC</span>
+                        {recordedBytes > 0 && (
+                            <span className="text-xs font-mono text-red-200/70" data-testid="recorded-bytes">{formatBytes(recordedBytes)}</span>
+                        )}
                     </div>
                 )}
             </div>
@@ -224,7 +268,7 @@ export default function RecorderPage() {
                 </div>
 
                 <div className="flex items-center gap-6">
-                    {!isRecording && !recordedBlob && (
+                    {!isRecording && !recording && (
                         <motion.button
                             whileHover={{ scale: 1.05 }}
                             whileTap={{ scale: 0.95 }}
@@ -246,13 +290,13 @@ export default function RecorderPage() {
                         </motion.button>
                     )}
 
-                    {recordedBlob && (
+                    {recording && (
                         <div className="flex gap-4 animate-in fade-in slide-in-from-bottom-4 duration-500">
                             <Button onClick={downloadVideo} className="h-12 bg-white text-black hover:bg-neutral-200 rounded-xl px-6">
                                 <Download className="w-4 h-4 mr-2" />
                                 {t('actions.download')}
                             </Button>
-                            <Button variant="outline" onClick={saveToShelf} className="h-12 border-white/10 hover:bg-white/10 rounded-xl px-6">
+                            <Button variant="outline" onClick={saveToShelf} disabled={savedToShelf} className="h-12 border-white/10 hover:bg-white/10 rounded-xl px-6">
                                 <Save className="w-4 h-4 mr-2" />
                                 {t('actions.saveToShelf')}
                             </Button>
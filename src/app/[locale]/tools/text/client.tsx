@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useMemo } from "react";
+import React, { useState, useEffect, useRef, useCallback } from "react";
 import { useTranslations } from "next-intl";
 import { motion } from "framer-motion";
 import {
@@ -10,41 +10,99 @@ import {
   ArrowRightLeft,
   Wand2,
   Copy,
-  Check
+  Check,
+  ScanText
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
-import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
-import { Textarea } from "@/components/ui/textarea"; // Need to check if exists, otherwise assume input or create
 import { GlassTabs } from "@/components/shared/GlassTabs";
+import { VirtualList } from "@/components/shared/VirtualList";
+import { OcrMode } from "@/components/features/OcrMode";
+import { TextEngine } from "@/lib/text-engine";
+import { convertText, type ConversionMode, type TextStats } from "@/lib/text-stats";
 import { toast } from "sonner";
 
+const CONVERSION_MODES: ConversionMode[] = ["upper", "lower", "fullToHalf", "halfToFull"];
+const OUTPUT_ROW_HEIGHT = 20;
+// 入力が止まってから変換結果の行分割を更新するまでの時間
+const OUTPUT_DEBOUNCE_MS = 150;
+// これより短いテキストのコピーはその場で変換する（クリップボードへの書き込みをユーザー操作の直後に行うため）
+const SYNC_COPY_CHARS = 1_000_000;
+const EMPTY_STATS: TextStats = { chars: 0, words: 0, lines: 0, noSpace: 0 };
+
 export default function TextLabPage() {
   const t = useTranslations("TextLab");
   const [activeTab, setActiveTab] = useState("counter");
-  const [inputText, setInputText] = useState("");
   const [loremCount, setLoremCount] = useState(3);
+  const [stats, setStats] = useState<TextStats>(EMPTY_STATS);
+  const [mode, setMode] = useState<ConversionMode>("upper");
+  // 変換タブに表示する時点のテキストと、その表示行の開始位置
+  const [output, setOutput] = useState<{ text: string; offsets: Uint32Array } | null>(null);
+  const [textVersion, setTextVersion] = useState(0);
+
+  // 入力欄は非制御にして、巨大なテキストを React の state に載せない
+  const textareaRef = useRef<HTMLTextAreaElement>(null);
+  const textRef = useRef("");
+  const engineRef = useRef<TextEngine | null>(null);
 
   // --- Logic ---
-  const stats = useMemo(() => {
-    return {
-      chars: inputText.length,
-      words: inputText.trim() === "" ? 0 : inputText.trim().split(/\s+/).length,
-      lines: inputText.trim() === "" ? 0 : inputText.split(/\n/).length,
-      noSpace: inputText.replace(/\s/g, "").length
+  useEffect(() => {
+    const engine = new TextEngine(setStats);
+    engineRef.current = engine;
+    return () => {
+      engine.terminate();
+      engineRef.current = null;
+    };
+  }, []);
+
+  // キー入力ごとに、編集前の選択範囲と編集後のカーソル位置から差分を求めてワーカーに送る
+  useEffect(() => {
+    const textarea = textareaRef.current;
+    if (!textarea) return;
+    let selectionStart = 0;
+    const handleBeforeInput = () => {
+      selectionStart = textarea.selectionStart;
+    };
+    const handleInput = (e: Event) => {
+      const before = textRef.current;
+      const after = textarea.value;
+      textRef.current = after;
+      engineRef.current?.update(before, after, selectionStart, textarea.selectionEnd, (e as InputEvent).inputType);
+      selectionStart = textarea.selectionStart;
+      setTextVersion((v) => v + 1);
     };
-  }, [inputText]);
-
-  const convertedText = useMemo(() => {
-    return {
-      upper: inputText.toUpperCase(),
-      lower: inputText.toLowerCase(),
-      fullToHalf: inputText.replace(/[！-～]/g, s => String.fromCharCode(s.charCodeAt(0) - 0xFEE0)),
-      halfToFull: inputText.replace(/[!-~]/g, s => String.fromCharCode(s.charCodeAt(0) + 0xFEE0))
+    textarea.addEventListener("beforeinput", handleBeforeInput);
+    textarea.addEventListener("input", handleInput);
+    return () => {
+      textarea.removeEventListener("beforeinput", handleBeforeInput);
+      textarea.removeEventListener("input", handleInput);
     };
-  }, [inputText]);
+  }, []);
+
+  const setInputText = useCallback((text: string) => {
+    if (textareaRef.current) textareaRef.current.value = text;
+    textRef.current = text;
+    engineRef.current?.reset(text);
+    setTextVersion((v) => v + 1);
+  }, []);
+
+  // 変換結果は表示中のタブの分だけ、見えている行だけをその場で変換する
+  useEffect(() => {
+    if (activeTab !== "converter") return;
+    const timer = setTimeout(() => {
+      const text = textRef.current;
+      engineRef.current?.rows(text).then((offsets) => setOutput({ text, offsets }));
+    }, OUTPUT_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [activeTab, textVersion]);
+
+  const outputRow = (index: number) => {
+    if (!output) return "";
+    const row = output.text.slice(output.offsets[index], output.offsets[index + 1]);
+    return convertText(row.endsWith("\n") ? row.slice(0, -1) : row, mode);
+  };
 
   const generateLorem = () => {
     // Simple mock lorem ipsum for client-side
@@ -67,10 +125,20 @@ export default function TextLabPage() {
     toast.success("Copied to clipboard");
   };
 
+  const copyConverted = () => {
+    const text = textRef.current;
+    if (text.length < SYNC_COPY_CHARS) {
+      copyToClipboard(convertText(text, mode));
+      return;
+    }
+    engineRef.current?.convert(text, mode).then(copyToClipboard);
+  };
+
   const tabs = [
     { id: "counter", label: t('tabs.counter'), icon: <AlignLeft className="w-4 h-4" /> },
     { id: "converter", label: t('tabs.converter'), icon: <ArrowRightLeft className="w-4 h-4" /> },
     { id: "generator", label: t('tabs.generator'), icon: <Wand2 className="w-4 h-4" /> },
+    { id: "ocr", label: t('tabs.ocr'), icon: <ScanText className="w-4 h-4" /> },
   ];
 
   return (
@@ -111,18 +179,18 @@ export default function TextLabPage() {
             <Card className="p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl h-[500px] flex flex-col">
                 <Label className="text-white mb-3 pl-1">Input Text</Label>
                 <textarea
-                    value={inputText}
-                    onChange={(e) => setInputText(e.target.value)}
+                    ref={textareaRef}
+                    defaultValue=""
                     className="flex-1 bg-white/5 border border-white/10 rounded-xl p-4 text-white placeholder:text-neutral-600 resize-none focus:outline-none focus:ring-2 focus:ring-blue-500/50"
                     placeholder="Type or paste here..."
                 />
             </Card>
 
             {/* Result Area */}
-            <Card className="p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl h-[500px] overflow-y-auto">
+            <Card className="p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl h-[500px] overflow-y-auto flex flex-col">
                 {activeTab === "counter" && (
                     <div className="grid grid-cols-2 gap-4 h-full content-start">
-                        <StatCard label={t('counter.chars')} value={stats.chars} />
+                        <StatCard label={t('counter.chars')} value={stats.chars} testId="stat-chars" />
                         <StatCard label={t('counter.words')} value={stats.words} />
                         <StatCard label={t('counter.lines')} value={stats.lines} />
                         <StatCard label={t('counter.noSpace')} value={stats.noSpace} />
@@ -130,11 +198,37 @@ export default function TextLabPage() {
                 )}
 
                 {activeTab === "converter" && (
-                    <div className="space-y-4">
-                        <ConvertResult label={t('converter.upper')} value={convertedText.upper} onCopy={copyToClipboard} />
-                        <ConvertResult label={t('converter.lower')} value={convertedText.lower} onCopy={copyToClipboard} />
-                        <ConvertResult label={t('converter.fullToHalf')} value={convertedText.fullToHalf} onCopy={copyToClipboard} />
-                        <ConvertResult label={t('converter.halfToFull')} value={convertedText.halfToFull} onCopy={copyToClipboard} />
+                    <div className="flex-1 min-h-0 flex flex-col gap-4">
+                        <div className="flex flex-wrap items-center gap-2">
+                            {CONVERSION_MODES.map((key) => (
+                                <Button
+                                    key={key}
+                                    size="sm"
+                                    variant={mode === key ? "default" : "outline"}
+                                    onClick={() => setMode(key)}
+                                    className={`rounded-xl text-xs ${mode === key ? 'bg-blue-600 text-white border-blue-500' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}`}
+                                >
+                                    {t(`converter.${key}`)}
+                                </Button>
+                            ))}
+                            <button onClick={copyConverted} className="ml-auto text-blue-400 hover:text-blue-300 text-xs flex items-center gap-1 transition-colors">
+                                <Copy className="w-3 h-3" /> {t('converter.copy')}
+                            </button>
+                        </div>
+                        {output && output.text.length > 0 ? (
+                            <VirtualList
+                                count={output.offsets.length - 1}
+                                rowHeight={OUTPUT_ROW_HEIGHT}
+                                className="flex-1 min-h-0 bg-white/5 border border-white/10 rounded-xl py-2 text-white text-sm font-mono"
+                                renderRow={(index) => (
+                                    <div className="px-3 whitespace-pre leading-5">{outputRow(index)}</div>
+                                )}
+                            />
+                        ) : (
+                            <div className="bg-white/5 border border-white/10 rounded-xl p-3 text-sm min-h-[3rem] flex items-center">
+                                <span className="text-neutral-600 italic">No output</span>
+                            </div>
+                        )}
                     </div>
                 )}
 
@@ -165,6 +259,10 @@ export default function TextLabPage() {
                         </Button>
                     </div>
                 )}
+
+                {activeTab === "ocr" && (
+                    <OcrMode onUseText={(text) => { setInputText(text); setActiveTab("counter"); }} />
+                )}
             </Card>
         </div>
       </motion.div>
@@ -172,27 +270,11 @@ export default function TextLabPage() {
   );
 }
 
-function StatCard({ label, value }: { label: string, value: number }) {
+function StatCard({ label, value, testId }: { label: string, value: number, testId?: string }) {
     return (
         <div className="bg-white/5 border border-white/10 rounded-2xl p-6 flex flex-col items-center justify-center space-y-2">
             <span className="text-neutral-400 text-sm font-medium">{label}</span>
-            <span className="text-4xl font-mono font-bold text-white tracking-tight">{value.toLocaleString()}</span>
-        </div>
-    )
-}
-
-function ConvertResult({ label, value, onCopy }: { label: string, value: string, onCopy: (text: string) => void }) {
-    return (
-        <div className="space-y-2">
-            <div className="flex justify-between items-center px-1">
-                <span className="text-xs text-neutral-400 font-medium uppercase tracking-wider">{label}</span>
-                <button onClick={() => onCopy(value)} className="text-blue-400 hover:text-blue-300 text-xs flex items-center gap-1 transition-colors">
-                    <Copy className="w-3 h-3" /> Copy
-                </button>
-            </div>
-            <div className="bg-white/5 border border-white/10 rounded-xl p-3 text-white text-sm break-all font-mono min-h-[3rem] flex items-center">
-                {value || <span className="text-neutral-600 italic">No output</span>}
-            </div>
+            <span data-testid={testId} className="text-4xl font-mono font-bold text-white tracking-tight">{value.toLocaleString()}</span>
         </div>
     )
 }
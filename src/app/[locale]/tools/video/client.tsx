@@ -12,61 +12,69 @@ import {
   Video as VideoIcon,
   Loader2,
   AlertCircle,
-  ChevronLeft
+  ChevronLeft,
+  Plus,
+  Trash2
 } from "lucide-react";
 import { Link } from "@/i18n/routing";
 import { Button } from "@/components/ui/button";
 import { Card } from "@/components/ui/card";
 import { Separator } from "@/components/ui/separator";
 import { FileDropzone } from "@/components/shared/FileDropzone";
-import { useVideoConverter, VideoFormat } from "@/hooks/useVideoConverter";
+import { formatBytes } from "@/lib/converter";
+import { useVideoConverter, VideoFormat, VideoPreset } from "@/hooks/useVideoConverter";
+
+const VIDEO_ACCEPT = {
+  'video/mp4': [],
+  'video/webm': [],
+  'video/quicktime': []
+};
+
+const PRESETS: VideoPreset[] = ['remux', 'fast', 'quality'];
 
 export default function VideoLabPage() {
   const t = useTranslations("VideoLab");
   const {
     isLoaded,
     isConverting,
-    progress,
+    jobs,
     error,
-    loadFFmpeg,
-    convertVideo
+    enginePreference,
+    setEnginePreference,
+    webCodecsAvailable,
+    loadEngine,
+    addFiles,
+    removeJob,
+    clearJobs,
+    convertAll
   } = useVideoConverter();
 
-  const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [outputFormat, setOutputFormat] = useState<VideoFormat>("mp4");
-  const [convertedBlobUrl, setConvertedBlobUrl] = useState<string | null>(null);
+  const [preset, setPreset] = useState<VideoPreset>("remux");
 
   useEffect(() => {
-    loadFFmpeg();
-  }, [loadFFmpeg]);
+    loadEngine();
+  }, [loadEngine]);
 
   const handleDrop = useCallback((acceptedFiles: File[]) => {
     if (acceptedFiles.length > 0) {
-      setSelectedFile(acceptedFiles[0]);
-      setConvertedBlobUrl(null);
+      addFiles(acceptedFiles);
     }
-  }, []);
+  }, [addFiles]);
 
-  const handleResetAction = () => {
-    if (convertedBlobUrl) URL.revokeObjectURL(convertedBlobUrl);
-    setSelectedFile(null);
-    setConvertedBlobUrl(null);
+  const handleAddFiles = (event: React.ChangeEvent<HTMLInputElement>) => {
+    if (event.target.files) {
+      addFiles(Array.from(event.target.files));
+    }
+    event.target.value = "";
   };
 
-  const performConversion = async () => {
-    if (!selectedFile) return;
-
-    const blob = await convertVideo({
-      file: selectedFile,
-      outputFormat
-    });
-
-    if (blob) {
-      const url = URL.createObjectURL(blob);
-      setConvertedBlobUrl(url);
-    }
+  const performConversion = () => {
+    convertAll({ outputFormat, preset });
   };
 
+  const doneCount = jobs.filter((job) => job.status === "done" || job.status === "error").length;
+
   const springTransition = { type: "spring" as const, stiffness: 300, damping: 30 };
 
   return (
@@ -114,16 +122,13 @@ export default function VideoLabPage() {
 
         {isLoaded && (
           <AnimatePresence mode="wait">
-            {!selectedFile ? (
+            {jobs.length === 0 ? (
                <div className="max-w-3xl mx-auto">
                 <FileDropzone
                   key="dropzone"
                   onDrop={handleDrop}
-                  accept={{
-                    'video/mp4': [],
-                    'video/webm': [],
-                    'video/quicktime': []
-                  }}
+                  accept={VIDEO_ACCEPT}
+                  maxFiles={0}
                   text={{
                     idle: t('dropzone.idle'),
                     active: t('dropzone.active'),
@@ -141,71 +146,107 @@ export default function VideoLabPage() {
                 transition={springTransition}
                 className="grid grid-cols-1 lg:grid-cols-3 gap-8"
               >
-                <div className="lg:col-span-2 space-y-6">
-                   <Card className="relative p-8 flex flex-col items-center justify-center bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl min-h-[400px] shadow-2xl overflow-hidden">
-                      <div className="w-24 h-24 rounded-full bg-white/5 border border-white/10 flex items-center justify-center mb-6">
-                        <VideoIcon className="w-10 h-10 text-white/50" />
-                      </div>
-                      <p className="text-xl font-medium text-white mb-2">{selectedFile.name}</p>
-                      <p className="text-sm text-neutral-500 font-mono bg-black/30 px-3 py-1 rounded-full border border-white/5">
-                        {(selectedFile.size / (1024 * 1024)).toFixed(2)} MB
-                      </p>
-
-                      <div className="absolute top-6 right-6">
-                        <Button
-                          variant="ghost"
-                          size="icon"
-                          onClick={handleResetAction}
-                          disabled={isConverting}
-                          className="rounded-full bg-black/60 hover:bg-white/20 text-white backdrop-blur-md border border-white/10"
-                        >
-                          <X className="w-5 h-5" />
-                        </Button>
-                      </div>
-
-                      {/* プログレスバー */}
-                      {isConverting && (
-                        <div className="absolute bottom-0 left-0 w-full h-1.5 bg-white/5">
-                          <motion.div
-                            className="h-full bg-orange-500 shadow-[0_0_15px_rgba(249,115,22,0.6)]"
-                            initial={{ width: 0 }}
-                            animate={{ width: `${progress}%` }}
-                            transition={{ ease: "linear" }}
+                <Card className="lg:col-span-2 p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl shadow-2xl">
+                  <div className="flex items-center justify-between mb-4">
+                    <h2 className="font-semibold text-lg text-white">{t('queue.title', { count: jobs.length })}</h2>
+                    <div className="flex items-center gap-2">
+                      <Button
+                        asChild
+                        variant="ghost"
+                        size="sm"
+                        className="rounded-full bg-white/5 hover:bg-white/20 text-white border border-white/10"
+                      >
+                        <label className={isConverting ? "pointer-events-none opacity-50" : "cursor-pointer"}>
+                          <Plus className="w-4 h-4 mr-1" />
+                          {t('queue.addMore')}
+                          <input
+                            type="file"
+                            multiple
+                            accept={Object.keys(VIDEO_ACCEPT).join(",")}
+                            onChange={handleAddFiles}
+                            className="hidden"
                           />
+                        </label>
+                      </Button>
+                      <Button
+                        variant="ghost"
+                        size="icon"
+                        onClick={clearJobs}
+                        disabled={isConverting}
+                        aria-label={t('queue.clear')}
+                        className="rounded-full bg-black/60 hover:bg-white/20 text-white border border-white/10"
+                      >
+                        <Trash2 className="w-4 h-4" />
+                      </Button>
+                    </div>
+                  </div>
+
+                  <div className="max-h-[480px] overflow-y-auto space-y-2 pr-2 custom-scrollbar">
+                    {jobs.map((job) => (
+                      <div key={job.id} className="relative overflow-hidden flex items-center justify-between bg-white/5 border border-white/10 rounded-xl p-3 text-sm">
+                        <div className="flex items-center gap-3 min-w-0">
+                          <VideoIcon className="w-4 h-4 text-white/50 flex-shrink-0" />
+                          <span className="truncate text-neutral-300">{job.file.name}</span>
+                        </div>
+                        <div className="flex items-center gap-3 font-mono text-xs flex-shrink-0">
+                          <span className="text-neutral-500">{formatBytes(job.file.size)}</span>
+                          {job.status === "converting" && (
+                            <span className="flex items-center text-orange-400">
+                              <Loader2 className="w-3.5 h-3.5 mr-1 animate-spin" />
+                              {job.progress}%
+                            </span>
+                          )}
+                          {job.status === "error" && <AlertCircle className="w-4 h-4 text-red-400" />}
+                          {job.status === "done" && job.url && (
+                            <>
+                              <span className="flex items-center text-emerald-400">
+                                <Check className="w-3.5 h-3.5 mr-1" />
+                                {formatBytes(job.newSize ?? 0)}
+                                {job.mode && <span className="ml-2 text-emerald-500/70">{t(`modes.${job.mode}`)}</span>}
+                                {job.engine && (
+                                  <span
+                                    data-engine={job.engine}
+                                    title={job.fallbackReason ? t('engines.fallback', { reason: job.fallbackReason }) : undefined}
+                                    className={`ml-2 ${job.fallbackReason ? 'text-amber-400/80' : 'text-neutral-500'}`}
+                                  >
+                                    {t(`engines.${job.engine}`)}
+                                  </span>
+                                )}
+                              </span>
+                              <Button asChild size="sm" className="h-7 bg-emerald-600 hover:bg-emerald-500 text-white rounded-full px-3">
+                                <a href={job.url} download={`${job.file.name.replace(/\.[^.]+$/, "")}.${job.format}`}>
+                                  <Download className="w-3.5 h-3.5 mr-1" />
+                                  {t('actions.download')}
+                                </a>
+                              </Button>
+                            </>
+                          )}
+                          {job.status !== "converting" && (
+                            <button
+                              onClick={() => removeJob(job.id)}
+                              disabled={isConverting}
+                              className="text-neutral-500 hover:text-white disabled:opacity-30"
+                            >
+                              <X className="w-4 h-4" />
+                            </button>
+                          )}
                         </div>
-                      )}
-                   </Card>
 
-                   <AnimatePresence>
-                    {convertedBlobUrl && (
-                      <motion.div
-                        initial={{ opacity: 0, height: 0 }}
-                        animate={{ opacity: 1, height: 'auto' }}
-                        transition={springTransition}
-                      >
-                        <Card className="p-6 bg-emerald-500/10 border-emerald-500/20 flex items-center justify-between rounded-2xl backdrop-blur-md">
-                          <div className="flex items-center space-x-4">
-                            <div className="p-3 bg-emerald-500/20 rounded-full border border-emerald-500/30">
-                              <Check className="w-6 h-6 text-emerald-500" />
-                            </div>
-                            <div>
-                              <p className="font-medium text-emerald-400 text-lg">{t('status.completed')}</p>
-                              <p className="text-sm text-emerald-500/70">
-                                {outputFormat.toUpperCase()}
-                              </p>
-                            </div>
+                        {/* ファイルごとのプログレスバー */}
+                        {job.status === "converting" && (
+                          <div className="absolute bottom-0 left-0 w-full h-0.5 bg-white/5">
+                            <motion.div
+                              className="h-full bg-orange-500 shadow-[0_0_15px_rgba(249,115,22,0.6)]"
+                              initial={{ width: 0 }}
+                              animate={{ width: `${job.progress}%` }}
+                              transition={{ ease: "linear" }}
+                            />
                           </div>
-                          <Button asChild className="bg-emerald-600 hover:bg-emerald-500 text-white rounded-full px-6 shadow-lg shadow-emerald-900/20">
-                            <a href={convertedBlobUrl} download={`converted.${outputFormat}`}>
-                              <Download className="w-4 h-4 mr-2" />
-                              {t('actions.download')}
-                            </a>
-                          </Button>
-                        </Card>
-                      </motion.div>
-                    )}
-                  </AnimatePresence>
-                </div>
+                        )}
+                      </div>
+                    ))}
+                  </div>
+                </Card>
 
                 <div className="space-y-4">
                    <Card className="p-8 space-y-8 backdrop-blur-xl bg-black/40 border-white/10 h-full rounded-3xl shadow-xl">
@@ -223,6 +264,7 @@ export default function VideoLabPage() {
                               key={fmt}
                               variant={outputFormat === fmt ? "default" : "outline"}
                               onClick={() => setOutputFormat(fmt)}
+                              disabled={isConverting}
                               className={`
                                 h-12 text-sm font-semibold transition-all duration-300 rounded-xl
                                 ${outputFormat === fmt ? 'bg-orange-600 text-white border-orange-500 shadow-lg shadow-orange-900/20' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}
@@ -234,18 +276,70 @@ export default function VideoLabPage() {
                         </div>
                       </div>
 
+                      <div className="space-y-4">
+                        <label className="text-xs font-bold text-neutral-500 uppercase tracking-widest pl-1">
+                          {t('controls.preset')}
+                        </label>
+                        <div className="space-y-2">
+                          {PRESETS.map((p) => (
+                            <button
+                              key={p}
+                              onClick={() => setPreset(p)}
+                              disabled={isConverting}
+                              className={`
+                                w-full text-left px-4 py-3 rounded-xl border transition-all duration-300
+                                ${preset === p ? 'bg-orange-600/20 border-orange-500 text-white' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}
+                              `}
+                            >
+                              <p className="text-sm font-semibold">{t(`presets.${p}`)}</p>
+                              <p className="text-xs text-neutral-500">{t(`presets.${p}Hint`)}</p>
+                            </button>
+                          ))}
+                        </div>
+                      </div>
+
+                      {/* WebCodecs が使えないブラウザでは常に FFmpeg なので選択肢を出さない */}
+                      {webCodecsAvailable && (
+                        <div className="space-y-4">
+                          <label className="text-xs font-bold text-neutral-500 uppercase tracking-widest pl-1">
+                            {t('controls.engine')}
+                          </label>
+                          <div className="grid grid-cols-2 gap-2">
+                            {(['auto', 'ffmpeg'] as const).map((engine) => (
+                              <button
+                                key={engine}
+                                onClick={() => setEnginePreference(engine)}
+                                disabled={isConverting}
+                                data-engine-preference={engine}
+                                className={`
+                                  text-left px-3 py-2 rounded-xl border transition-all duration-300
+                                  ${enginePreference === engine ? 'bg-orange-600/20 border-orange-500 text-white' : 'bg-white/5 border-white/10 text-neutral-400 hover:bg-white/10 hover:text-white'}
+                                `}
+                              >
+                                <p className="text-sm font-semibold">{t(`engines.${engine}`)}</p>
+                                <p className="text-xs text-neutral-500">{t(`engines.${engine}Hint`)}</p>
+                              </button>
+                            ))}
+                          </div>
+                        </div>
+                      )}
+
                       <Separator className="bg-white/10" />
 
-                      <div className="pt-6 mt-auto">
+                      <p className="text-sm text-neutral-400 font-mono">
+                        {t('queue.progress', { done: doneCount, total: jobs.length })}
+                      </p>
+
+                      <div className="mt-auto">
                         <Button
                           className="w-full h-14 text-base font-semibold rounded-2xl shadow-xl shadow-orange-900/20 transition-all hover:scale-[1.02] active:scale-[0.98] bg-white text-black hover:bg-white/90"
                           onClick={performConversion}
-                          disabled={isConverting || !!convertedBlobUrl}
+                          disabled={isConverting}
                         >
                           {isConverting ? (
                             <>
                               <RefreshCw className="w-5 h-5 mr-3 animate-spin" />
-                              {t('status.processing')} {progress}%
+                              {t('status.processing')}
                             </>
                           ) : (
                             <>
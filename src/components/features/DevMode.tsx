@@ -4,6 +4,8 @@ import React, { useState } from "react";
 import { motion } from "framer-motion";
 import { Braces, Binary, Copy, Check, RefreshCw } from "lucide-react";
 import { Button } from "@/components/ui/button";
+import { JsonViewer } from "@/components/shared/JsonViewer";
+import { useJsonFormatter } from "@/hooks/useJsonFormatter";
 import { cn } from "@/lib/utils";
 import { toast } from "sonner";
 
@@ -19,19 +21,19 @@ export function DevMode({ onClear }: Props) {
   const [output, setOutput] = useState("");
   const [error, setError] = useState<string | null>(null);
   const [isCopied, setIsCopied] = useState(false);
+  const json = useJsonFormatter();
 
-  // JSON整形処理
-  const formatJSON = () => {
+  // JSON整形処理（ワーカーで検証・整形し、結果は見えている行だけ描画する）
+  const formatJSON = async () => {
     if (!input.trim()) return;
-    try {
-      const parsed = JSON.parse(input);
-      setOutput(JSON.stringify(parsed, null, 2));
-      setError(null);
+    setOutput("");
+    setError(null);
+    const result = await json.run("format", input);
+    if (!result) return;
+    if (result.ok) {
       toast.success("JSON Formatted");
-    } catch (e) {
-      // 👇 ここを修正: anyを使わず安全にキャスト
-      const message = e instanceof Error ? e.message : "Invalid JSON";
-      setError(message);
+    } else {
+      setError(result.error ? `Invalid JSON at line ${result.error.line}, column ${result.error.column}` : "Invalid JSON");
       toast.error("Invalid JSON");
     }
   };
@@ -39,6 +41,7 @@ export function DevMode({ onClear }: Props) {
   // Base64処理
   const handleBase64 = (mode: "encode" | "decode") => {
     if (!input.trim()) return;
+    json.reset();
     try {
       const res = mode === "encode" ? btoa(input) : atob(input);
       setOutput(res);
@@ -50,9 +53,12 @@ export function DevMode({ onClear }: Props) {
     }
   };
 
+  const jsonOutput = activeTool === "json" && json.output && json.rowCount > 0 ? json.output : null;
+
   const copyToClipboard = () => {
-    if (!output) return;
-    navigator.clipboard.writeText(output);
+    const text = jsonOutput ? jsonOutput.text() : output;
+    if (!text) return;
+    navigator.clipboard.writeText(text);
     setIsCopied(true);
     toast.success("Copied to clipboard");
     setTimeout(() => setIsCopied(false), 2000);
@@ -64,13 +70,13 @@ export function DevMode({ onClear }: Props) {
       {/* Header / Tabs */}
       <div className="flex items-center border-b border-white/10 bg-black/40 px-2">
         <button
-          onClick={() => { setActiveTool("json"); setInput(""); setOutput(""); setError(null); }}
+          onClick={() => { setActiveTool("json"); setInput(""); setOutput(""); setError(null); json.reset(); }}
           className={cn("flex items-center gap-2 px-4 py-3 text-sm font-medium transition-colors border-b-2", activeTool === "json" ? "border-blue-500 text-white" : "border-transparent text-neutral-500 hover:text-neutral-300")}
         >
           <Braces className="w-4 h-4" /> JSON
         </button>
         <button
-          onClick={() => { setActiveTool("base64"); setInput(""); setOutput(""); setError(null); }}
+          onClick={() => { setActiveTool("base64"); setInput(""); setOutput(""); setError(null); json.reset(); }}
           className={cn("flex items-center gap-2 px-4 py-3 text-sm font-medium transition-colors border-b-2", activeTool === "base64" ? "border-purple-500 text-white" : "border-transparent text-neutral-500 hover:text-neutral-300")}
         >
           <Binary className="w-4 h-4" /> Base64
@@ -115,16 +121,18 @@ export function DevMode({ onClear }: Props) {
               <label className={cn("text-xs font-mono uppercase", error ? "text-red-500" : "text-green-500")}>
                 {error ? "Error" : "Output"}
               </label>
-              {output && (
+              {(output || (jsonOutput && !json.isProcessing)) && (
                 <button onClick={copyToClipboard} className="text-neutral-400 hover:text-white transition-colors">
                   {isCopied ? <Check className="w-4 h-4" /> : <Copy className="w-4 h-4" />}
                 </button>
               )}
             </div>
             
-            <div className="flex-1 overflow-y-auto custom-scrollbar">
+            <div className="flex-1 min-h-0 overflow-y-auto custom-scrollbar">
               {error ? (
                 <div className="text-red-400 font-mono text-sm break-all">{error}</div>
+              ) : jsonOutput ? (
+                <JsonViewer output={jsonOutput} rowCount={json.rowCount} className="h-full text-neutral-300 font-mono text-sm" />
               ) : (
                 <pre className="text-neutral-300 font-mono text-sm whitespace-pre-wrap break-all">{output}</pre>
               )}
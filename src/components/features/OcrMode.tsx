@@ -1,18 +1,36 @@
 "use client";
 import React, { useState } from "react";
+import { useTranslations } from "next-intl";
 import { motion } from "framer-motion";
-import { Copy, Check } from "lucide-react";
+import { Copy, Check, ScanText, AlertCircle, Loader2, ArrowLeft } from "lucide-react";
 import { Button } from "@/components/ui/button";
+import { FileDropzone } from "@/components/shared/FileDropzone";
+import { useOcrBatch } from "@/hooks/useOcrBatch";
 import { toast } from "sonner";
 
 interface Props {
-  text: string;
-  onClear: () => void;
+  onUseText: (text: string) => void;
 }
 
-export function OcrMode({ text, onClear }: Props) {
+// 画像・スキャンPDFをまとめて文字認識する（ページごとの進捗つき）
+export function OcrMode({ onUseText }: Props) {
+  const t = useTranslations("TextLab");
+  const { pages, isRecognizing, addFiles, recognizeAll, clearPages } = useOcrBatch();
   const [isCopied, setIsCopied] = useState(false);
 
+  const finished = pages.filter((page) => page.status === "done" || page.status === "error").length;
+  const text = pages
+    .filter((page) => page.status === "done")
+    .map((page) => page.text.trim())
+    .join("\n\n");
+
+  const handleDrop = (files: File[]) => {
+    addFiles(files).catch((e) => {
+      console.error(e);
+      toast.error("Failed to read file");
+    });
+  };
+
   const handleCopy = () => {
     navigator.clipboard.writeText(text);
     setIsCopied(true);
@@ -21,19 +39,74 @@ export function OcrMode({ text, onClear }: Props) {
   };
 
   return (
-    <motion.div initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} className="w-full max-w-lg flex flex-col gap-4">
-      <div className="bg-[#111] border border-white/10 rounded-xl p-4 text-left max-h-[300px] overflow-y-auto custom-scrollbar shadow-inner relative group">
-        <pre className="text-sm text-neutral-300 font-mono whitespace-pre-wrap">{text}</pre>
-        <Button size="icon" variant="secondary" className="absolute top-2 right-2 h-8 w-8 bg-white/10 hover:bg-white/20 text-white opacity-0 group-hover:opacity-100 transition-opacity" onClick={handleCopy}>
-           {isCopied ? <Check className="h-4 w-4" /> : <Copy className="h-4 w-4" />}
-        </Button>
-      </div>
-      <div className="flex gap-3">
-        <Button variant="outline" className="flex-1 bg-white/5 border-white/10" onClick={onClear}>Close</Button>
-        <Button className="flex-[2] bg-indigo-600 hover:bg-indigo-700 text-white" onClick={handleCopy}>
-          <Copy className="mr-2 h-4 w-4" /> Copy Text
-        </Button>
-      </div>
+    <motion.div initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} className="w-full flex flex-col gap-4">
+      <FileDropzone
+        onDrop={handleDrop}
+        accept={{ "image/*": [".png", ".jpg", ".jpeg", ".webp", ".bmp"], "application/pdf": [".pdf"] }}
+        maxFiles={0}
+        text={{
+          idle: t("ocr.dropzone.idle"),
+          active: t("ocr.dropzone.active"),
+          subtext: t("ocr.dropzone.subtext")
+        }}
+        className="h-32 bg-white/5 border-blue-500/20 rounded-2xl hover:border-blue-500/50 transition-all"
+      />
+
+      {pages.length > 0 && (
+        <>
+          <div className="flex items-center justify-between px-1">
+            <span className="text-sm text-neutral-400 font-mono">{t("ocr.progress", { done: finished, total: pages.length })}</span>
+            <div className="flex gap-2">
+              <Button variant="outline" size="sm" onClick={clearPages} disabled={isRecognizing} className="bg-white/5 border-white/10">
+                {t("ocr.clear")}
+              </Button>
+              <Button size="sm" onClick={recognizeAll} disabled={isRecognizing || finished === pages.length} className="bg-blue-600 hover:bg-blue-500 text-white">
+                {isRecognizing ? <Loader2 className="w-4 h-4 mr-2 animate-spin" /> : <ScanText className="w-4 h-4 mr-2" />}
+                {t("ocr.run")}
+              </Button>
+            </div>
+          </div>
+
+          <div className="space-y-2 max-h-48 overflow-y-auto custom-scrollbar">
+            {pages.map((page) => (
+              <div key={page.id} className="flex items-center gap-3 p-2 rounded-lg bg-white/5 border border-white/5">
+                <span className="text-xs text-neutral-300 truncate flex-1">{page.label}</span>
+                {page.status === "error" ? (
+                  <span className="flex items-center gap-1 text-xs text-red-400">
+                    <AlertCircle className="w-3 h-3" />
+                    {page.image ? t("ocr.failed") : t("ocr.noImage")}
+                  </span>
+                ) : page.status === "done" ? (
+                  <Check className="w-4 h-4 text-green-400" />
+                ) : (
+                  <div className="w-24 h-1.5 bg-white/5 rounded-full overflow-hidden">
+                    <div className="h-full bg-blue-500 transition-all" style={{ width: `${Math.round(page.progress * 100)}%` }} />
+                  </div>
+                )}
+              </div>
+            ))}
+          </div>
+        </>
+      )}
+
+      {text && !isRecognizing && (
+        <>
+          <div className="bg-[#111] border border-white/10 rounded-xl p-4 text-left max-h-[300px] overflow-y-auto custom-scrollbar shadow-inner relative group">
+            <pre className="text-sm text-neutral-300 font-mono whitespace-pre-wrap">{text}</pre>
+            <Button size="icon" variant="secondary" className="absolute top-2 right-2 h-8 w-8 bg-white/10 hover:bg-white/20 text-white opacity-0 group-hover:opacity-100 transition-opacity" onClick={handleCopy}>
+               {isCopied ? <Check className="h-4 w-4" /> : <Copy className="h-4 w-4" />}
+            </Button>
+          </div>
+          <div className="flex gap-3">
+            <Button variant="outline" className="flex-1 bg-white/5 border-white/10" onClick={() => onUseText(text)}>
+              <ArrowLeft className="mr-2 h-4 w-4" /> {t("ocr.useText")}
+            </Button>
+            <Button className="flex-[2] bg-indigo-600 hover:bg-indigo-700 text-white" onClick={handleCopy}>
+              <Copy className="mr-2 h-4 w-4" /> Copy Text
+            </Button>
+          </div>
+        </>
+      )}
     </motion.div>
   );
-}
\ No newline at end of file
+}
@@ -1,62 +1,164 @@
 "use client";
-import React from "react";
+import React, { useEffect, useState } from "react";
+import { useTranslations } from "next-intl";
 import { motion } from "framer-motion";
-import { ShieldCheck, Download, Trash2 } from "lucide-react";
+import { ShieldCheck, Download, FileArchive, Loader2, AlertCircle, X, Check } from "lucide-react";
 import { Button } from "@/components/ui/button";
+import { Card } from "@/components/ui/card";
 import { formatBytes } from "@/lib/converter";
+import { removeMetadataBatch, type CleanResult } from "@/lib/privacy";
 
 interface CleanedFile {
   originalName: string;
-  blob: Blob;
-  url: string;
-  size: number;
+  result: CleanResult | null; // null は失敗（壊れたファイルなど）
+  url: string | null;
 }
 
 interface Props {
-  results: CleanedFile[];
-  onClear: () => void;
+  files: File[];
+  onClose: () => void;
 }
 
-export function PrivacyMode({ results, onClear }: Props) {
-  const downloadAll = () => {
-    results.forEach((res) => {
-      const link = document.createElement("a");
-      link.href = res.url;
-      link.download = "clean_" + res.originalName;
-      link.click();
-    });
-  };
+// 画像を再エンコードせずに Exif（位置情報など）・XMP・IPTC を取り除き、個別または ZIP でダウンロードさせる
+export function PrivacyMode({ files, onClose }: Props) {
+  const t = useTranslations("ImageLab");
+  const [keepOrientation, setKeepOrientation] = useState(true);
+  const [results, setResults] = useState<(CleanedFile | undefined)[]>([]);
+  const [zipUrl, setZipUrl] = useState<string | null>(null);
+
+  useEffect(() => {
+    let cancelled = false;
+    const urls: string[] = [];
+    let zipObjectUrl: string | null = null;
+    setResults(new Array(files.length).fill(undefined));
+    setZipUrl(null);
+
+    // 終わった順に ZIP へ追加する（画像は圧縮済みなので無圧縮でまとめる）
+    // jszip はファイルを受け取ってから読み込む（画像ラボの初期表示に含めない）
+    const usedNames = new Set<string>();
+
+    import("jszip")
+      .then(({ default: JSZip }) => {
+        const zip = new JSZip();
+        return removeMetadataBatch(files, (index, result) => {
+          if (cancelled) return;
+          const originalName = files[index].name;
+          let url: string | null = null;
+          if (result) {
+            url = URL.createObjectURL(result.blob);
+            urls.push(url);
+            let name = originalName;
+            for (let n = 1; usedNames.has(name); n++) name = originalName.replace(/(\.[^.]+)?$/, `-${n}$1`);
+            usedNames.add(name);
+            zip.file(name, result.blob);
+          }
+          setResults((prev) => {
+            const next = [...prev];
+            next[index] = { originalName, result, url };
+            return next;
+          });
+        }, keepOrientation).then(() => (cancelled ? null : zip.generateAsync({ type: "blob", compression: "STORE" })));
+      })
+      .then((blob) => {
+        if (cancelled || !blob) return;
+        zipObjectUrl = URL.createObjectURL(blob);
+        setZipUrl(zipObjectUrl);
+      });
+
+    return () => {
+      cancelled = true;
+      urls.forEach((url) => URL.revokeObjectURL(url));
+      if (zipObjectUrl) URL.revokeObjectURL(zipObjectUrl);
+    };
+  }, [files, keepOrientation]);
+
+  const doneCount = results.filter(Boolean).length;
+  const removedBytes = results.reduce(
+    (sum, item) => sum + (item?.result?.removed.reduce((total, entry) => total + entry.bytes, 0) ?? 0),
+    0
+  );
 
   return (
-    <motion.div initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} className="w-full max-w-lg flex flex-col gap-4">
-      
-      <div className="flex items-center justify-center p-4 bg-green-500/10 border border-green-500/20 rounded-xl mb-2">
-        <ShieldCheck className="w-6 h-6 text-green-400 mr-2" />
-        <span className="text-green-100 font-medium">Metadata Removed & Secure</span>
-      </div>
-
-      <div className="max-h-[300px] overflow-y-auto space-y-2 pr-2 custom-scrollbar">
-        {results.map((res, index) => (
-          <div key={index} className="flex items-center justify-between bg-white/5 border border-white/10 rounded-xl p-3 text-sm">
-            <div className="flex items-center gap-3 overflow-hidden">
-              <div className="h-8 w-8 rounded bg-neutral-800 flex items-center justify-center shrink-0">
-                <img src={res.url} className="h-full w-full object-cover rounded opacity-80" alt="" />
+    <motion.div
+      initial={{ opacity: 0, y: 20 }}
+      animate={{ opacity: 1, y: 0 }}
+      className="grid grid-cols-1 lg:grid-cols-3 gap-8"
+    >
+      <Card className="lg:col-span-2 p-6 bg-black/40 backdrop-blur-xl border-white/10 rounded-3xl shadow-2xl">
+        <div className="flex items-center justify-between mb-4">
+          <h2 className="font-semibold text-lg text-white">{t("privacy.title", { count: files.length })}</h2>
+          <Button
+            variant="ghost"
+            size="icon"
+            onClick={onClose}
+            className="rounded-full bg-black/60 hover:bg-white/20 text-white border border-white/10"
+          >
+            <X className="w-5 h-5" />
+          </Button>
+        </div>
+        <div className="max-h-[480px] overflow-y-auto space-y-2 pr-2 custom-scrollbar">
+          {files.map((file, index) => {
+            const item = results[index];
+            const removed = item?.result?.removed.reduce((total, entry) => total + entry.bytes, 0) ?? 0;
+            return (
+              <div key={index} data-testid="privacy-item" className="flex items-center justify-between bg-white/5 border border-white/10 rounded-xl p-3 text-sm">
+                <span className="truncate text-neutral-300 max-w-[50%]">{file.name}</span>
+                <div className="flex items-center gap-3 font-mono text-xs">
+                  <span className="text-neutral-500">{formatBytes(file.size)}</span>
+                  {!item && <Loader2 className="w-4 h-4 animate-spin text-neutral-500" />}
+                  {item && !item.result && <AlertCircle className="w-4 h-4 text-red-400" />}
+                  {item?.result && (
+                    <span className="flex items-center text-emerald-400">
+                      <Check className="w-3.5 h-3.5 mr-1" />
+                      {item.result.container === null
+                        ? t("privacy.unsupported")
+                        : removed > 0
+                          ? t("privacy.removed", { size: formatBytes(removed) })
+                          : t("privacy.none")}
+                    </span>
+                  )}
+                  {item?.url && (
+                    <a href={item.url} download={item.originalName} className="text-neutral-400 hover:text-white" aria-label={t("actions.download")}>
+                      <Download className="w-4 h-4" />
+                    </a>
+                  )}
+                </div>
               </div>
-              <span className="truncate text-neutral-300 max-w-[150px]">{res.originalName}</span>
-            </div>
-            <div className="flex items-center gap-2 text-neutral-500 font-mono text-xs">
-              {formatBytes(res.size)}
-            </div>
-          </div>
-        ))}
-      </div>
-      
-      <div className="flex gap-3 mt-2">
-        <Button variant="outline" className="flex-1 bg-white/5 border-white/10" onClick={onClear}>Clear</Button>
-        <Button className="flex-[2] bg-green-600 hover:bg-green-700 text-white" onClick={(e) => { e.stopPropagation(); downloadAll(); }}>
-          <Download className="mr-2 h-4 w-4" /> Download Clean Files
-        </Button>
-      </div>
+            );
+          })}
+        </div>
+      </Card>
+
+      <Card className="p-8 space-y-6 backdrop-blur-xl bg-black/40 border-white/10 rounded-3xl shadow-xl">
+        <div className="flex items-center p-4 bg-green-500/10 border border-green-500/20 rounded-xl">
+          <ShieldCheck className="w-6 h-6 text-green-400 mr-3 shrink-0" />
+          <span className="text-green-100 text-sm">{t("privacy.hint")}</span>
+        </div>
+
+        <label className="flex items-center space-x-3 cursor-pointer text-sm text-neutral-400 hover:text-white select-none">
+          <input
+            type="checkbox"
+            checked={keepOrientation}
+            onChange={(e) => setKeepOrientation(e.target.checked)}
+            className="w-4 h-4 accent-blue-600"
+          />
+          <span>{t("privacy.keepOrientation")}</span>
+        </label>
+
+        <p className="text-sm text-neutral-400 font-mono" data-testid="privacy-summary">
+          {t("batch.progress", { done: doneCount, total: files.length })}
+          {doneCount > 0 && ` • ${t("privacy.removed", { size: formatBytes(removedBytes) })}`}
+        </p>
+
+        {zipUrl && (
+          <Button asChild className="w-full h-12 bg-emerald-600 hover:bg-emerald-500 text-white rounded-2xl">
+            <a href={zipUrl} download="cleaned-images.zip">
+              <FileArchive className="w-4 h-4 mr-2" />
+              {t("batch.downloadZip")}
+            </a>
+          </Button>
+        )}
+      </Card>
     </motion.div>
   );
-}
\ No newline at end of file
+}
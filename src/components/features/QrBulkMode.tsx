@@ -0,0 +1,206 @@
+"use client";
+import React, { useDeferredValue, useEffect, useMemo, useRef, useState } from "react";
+import { useTranslations } from "next-intl";
+import { motion } from "framer-motion";
+import { Download, FileArchive, FileUp, Loader2, X } from "lucide-react";
+import { Button } from "@/components/ui/button";
+import { Card } from "@/components/ui/card";
+import { Label } from "@/components/ui/label";
+import { Textarea } from "@/components/ui/textarea";
+import { blobSink } from "@/lib/archive";
+import { formatBytes } from "@/lib/converter";
+import { createQrZip, looksLikeCsv, parseQrList, type QrBulkProgress, type QrBulkResult, type QrOutputFormat } from "@/lib/qr-bulk";
+
+const FORMATS: QrOutputFormat[] = ["png", "svg"];
+const SIZES = [256, 512, 1024];
+
+interface Props {
+  fgColor: string;
+  bgColor: string;
+  logo: File | null;
+}
+
+// CSV または1行1件のリストから QR コードをまとめて作り、ZIP で保存させる（色とロゴは単体モードと共通）
+export function QrBulkMode({ fgColor, bgColor, logo }: Props) {
+  const t = useTranslations("QRLab");
+  // 読み込んだファイル名（CSV かどうかの判定に使う。入力欄を書き換えたら貼り付けと同じ扱い）
+  const [source, setSource] = useState<{ text: string; fileName?: string }>({ text: "" });
+  const [format, setFormat] = useState<QrOutputFormat>("png");
+  const [size, setSize] = useState(512);
+  const [progress, setProgress] = useState<QrBulkProgress | null>(null);
+  const [result, setResult] = useState<(QrBulkResult & { url: string; name: string }) | null>(null);
+  const cancelled = useRef(false);
+  const fileInputRef = useRef<HTMLInputElement>(null);
+
+  // 1万行の貼り付けでも入力が引っかからないように、読み込みは後回しにする
+  const deferred = useDeferredValue(source);
+  const items = useMemo(
+    () => parseQrList(deferred.text, looksLikeCsv(deferred.text, deferred.fileName)),
+    [deferred]
+  );
+
+  useEffect(() => {
+    return () => {
+      cancelled.current = true;
+    };
+  }, []);
+
+  useEffect(() => {
+    return () => {
+      if (result) URL.revokeObjectURL(result.url);
+    };
+  }, [result]);
+
+  const handleFile = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    if (!file) return;
+    setSource({ text: await file.text(), fileName: file.name });
+    e.target.value = "";
+  };
+
+  const generate = async () => {
+    if (items.length === 0 || progress) return;
+    cancelled.current = false;
+    setResult(null);
+    setProgress({ done: 0, total: items.length });
+
+    const name = `lumina-qr-${items.length}.zip`;
+    const sink = blobSink("application/zip");
+    try {
+      const summary = await createQrZip(
+        items,
+        { format, size, fgColor, bgColor, logo },
+        sink.writable,
+        setProgress,
+        () => cancelled.current
+      );
+      const url = URL.createObjectURL(sink.result());
+      setResult({ ...summary, url, name });
+      const a = document.createElement("a");
+      a.href = url;
+      a.download = name;
+      a.click();
+    } catch (error) {
+      if (!(error instanceof DOMException && error.name === "AbortError")) console.error("QR bulk generation failed:", error);
+    } finally {
+      setProgress(null);
+    }
+  };
+
+  const percent = progress && progress.total > 0 ? Math.round((progress.done / progress.total) * 100) : 0;
+
+  return (
+    <Card className="p-8 space-y-6 backdrop-blur-xl bg-black/40 border-white/10 rounded-3xl shadow-xl">
+      <div className="space-y-3">
+        <div className="flex items-center justify-between">
+          <Label className="text-white text-base font-medium pl-1">{t("bulk.listLabel")}</Label>
+          <span className="text-xs text-neutral-400 font-mono" data-qr-count={items.length}>
+            {t("bulk.count", { count: items.length })}
+          </span>
+        </div>
+        <Textarea
+          value={source.text}
+          onChange={(e) => setSource({ text: e.target.value })}
+          placeholder={t("bulk.listPlaceholder")}
+          spellCheck={false}
+          className="h-48 font-mono text-xs bg-white/5 border-white/10 text-white placeholder:text-neutral-500 rounded-xl"
+        />
+        <Button
+          variant="outline"
+          onClick={() => fileInputRef.current?.click()}
+          className="bg-white/5 border-white/10 text-neutral-300 hover:text-white hover:bg-white/10 h-10 w-full justify-start px-4"
+        >
+          <FileUp className="w-4 h-4 mr-2" />
+          {source.fileName ?? t("bulk.upload")}
+        </Button>
+        <input
+          type="file"
+          ref={fileInputRef}
+          onChange={handleFile}
+          accept=".csv,.tsv,.txt,text/csv,text/plain"
+          className="hidden"
+          data-qr-list
+        />
+      </div>
+
+      <div className="grid grid-cols-2 gap-6">
+        <div className="space-y-2">
+          <Label className="text-white text-sm font-medium pl-1">{t("bulk.format")}</Label>
+          <div className="flex gap-2">
+            {FORMATS.map((value) => (
+              <Button
+                key={value}
+                variant="outline"
+                onClick={() => setFormat(value)}
+                className={`flex-1 border-white/10 ${format === value ? "bg-cyan-600 text-white hover:bg-cyan-500" : "bg-white/5 text-neutral-300 hover:bg-white/10"}`}
+              >
+                {value.toUpperCase()}
+              </Button>
+            ))}
+          </div>
+        </div>
+        <div className="space-y-2">
+          <Label className="text-white text-sm font-medium pl-1">{t("bulk.size")}</Label>
+          <div className="flex gap-2">
+            {SIZES.map((value) => (
+              <Button
+                key={value}
+                variant="outline"
+                onClick={() => setSize(value)}
+                className={`flex-1 px-0 border-white/10 ${size === value ? "bg-cyan-600 text-white hover:bg-cyan-500" : "bg-white/5 text-neutral-300 hover:bg-white/10"}`}
+              >
+                {value}
+              </Button>
+            ))}
+          </div>
+        </div>
+      </div>
+
+      {progress ? (
+        <div className="space-y-2">
+          <div className="flex items-center justify-between text-sm text-neutral-300">
+            <span className="flex items-center gap-2">
+              <Loader2 className="w-4 h-4 animate-spin" />
+              {t("bulk.progress", { done: progress.done, total: progress.total })}
+            </span>
+            <Button variant="ghost" size="sm" onClick={() => { cancelled.current = true; }} className="text-neutral-400 hover:text-white">
+              <X className="w-4 h-4 mr-1" />
+              {t("bulk.cancel")}
+            </Button>
+          </div>
+          <div className="h-2 w-full bg-white/10 rounded-full overflow-hidden">
+            <motion.div className="h-full bg-cyan-500" animate={{ width: `${percent}%` }} transition={{ duration: 0.2 }} />
+          </div>
+        </div>
+      ) : (
+        <Button
+          onClick={generate}
+          disabled={items.length === 0}
+          className="w-full h-14 bg-cyan-600 hover:bg-cyan-500 text-white rounded-2xl shadow-lg shadow-cyan-900/20 text-base font-semibold"
+        >
+          <FileArchive className="w-5 h-5 mr-2" />
+          {t("bulk.generate")}
+        </Button>
+      )}
+
+      {result && (
+        <div className="flex items-center justify-between gap-4 p-4 rounded-xl bg-white/5 border border-white/10" data-qr-result={result.count}>
+          <div className="text-sm space-y-1">
+            <p className="text-white">{t("bulk.done", { count: result.count })} ({formatBytes(result.size)})</p>
+            {result.failed.length > 0 && (
+              <p className="text-amber-400" title={result.failed.map((failure) => failure.name).join(", ")}>
+                {t("bulk.failed", { count: result.failed.length })}
+              </p>
+            )}
+          </div>
+          <a href={result.url} download={result.name}>
+            <Button variant="outline" className="border-white/10 bg-white/5 text-white hover:bg-white/10">
+              <Download className="w-4 h-4 mr-2" />
+              {t("bulk.download")}
+            </Button>
+          </a>
+        </div>
+      )}
+    </Card>
+  );
+}
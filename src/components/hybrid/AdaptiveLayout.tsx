@@ -1,6 +1,6 @@
 "use client";
 
-import React from "react";
+import React, { useEffect } from "react";
 import { FileShelfProvider } from "@/context/FileShelfContext";
 import { FloatingDock } from "./FloatingDock";
 import { BottomTabBar } from "./BottomTabBar";
@@ -8,8 +8,15 @@ import { CommandPalette } from "./CommandPalette";
 import { FileShelf } from "./FileShelf";
 import { Toaster } from "sonner";
 import { OfflineIndicator } from "./OfflineIndicator";
+import { installPerfApi } from "@/lib/perf";
+import { scheduleEngineWarmup } from "@/lib/engine-warmup";
 
 export function AdaptiveLayout({ children }: { children: React.ReactNode }) {
+  // 計測 API（window.__luminaPerf）はどのページでも最初から使えるようにしておく
+  useEffect(() => installPerfApi(), []);
+  // FFmpeg・OCR・AI のエンジン資産は、最初のアイドル時に Service Worker が裏で取っておく（オフラインでも使えるように）
+  useEffect(() => scheduleEngineWarmup(), []);
+
   return (
     <FileShelfProvider>
         <div className="relative min-h-screen w-full bg-[#050505] text-white selection:bg-blue-500/30 overflow-x-hidden">
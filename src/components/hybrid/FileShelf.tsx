@@ -6,9 +6,10 @@ import { Drawer } from "vaul";
 import { AnimatePresence, motion } from "framer-motion";
 import { X, File, Image as ImageIcon, Trash2, Download } from "lucide-react";
 import { Button } from "@/components/ui/button";
+import { formatBytes } from "@/lib/converter";
 
 export function FileShelf() {
-  const { items, removeItem, clearShelf, isOpen, setIsOpen } = useFileShelf();
+  const { items, getFile, removeItem, clearShelf, isOpen, setIsOpen } = useFileShelf();
   const isDesktop = useMediaQuery("(min-width: 1024px)");
 
   if (isDesktop) {
@@ -32,7 +33,7 @@ export function FileShelf() {
                         transition={{ type: "spring", damping: 20, stiffness: 300 }}
                         className="fixed right-0 top-0 h-full w-80 bg-[#0a0a0a]/95 backdrop-blur-xl border-l border-white/10 z-50 p-6 shadow-2xl"
                     >
-                        <ShelfContent items={items} onRemove={removeItem} onClear={clearShelf} onClose={() => setIsOpen(false)} />
+                        <ShelfContent items={items} getFile={getFile} onRemove={removeItem} onClear={clearShelf} onClose={() => setIsOpen(false)} />
                     </motion.div>
                 </>
             )}
@@ -47,7 +48,7 @@ export function FileShelf() {
         <Drawer.Content className="bg-[#111] flex flex-col rounded-t-[10px] h-[85vh] fixed bottom-0 left-0 right-0 z-50 border-t border-white/10 outline-none">
           <div className="p-4 bg-[#111] rounded-t-[10px] flex-1">
             <div className="mx-auto w-12 h-1.5 flex-shrink-0 rounded-full bg-neutral-600 mb-8" />
-            <ShelfContent items={items} onRemove={removeItem} onClear={clearShelf} onClose={() => setIsOpen(false)} />
+            <ShelfContent items={items} getFile={getFile} onRemove={removeItem} onClear={clearShelf} onClose={() => setIsOpen(false)} />
           </div>
         </Drawer.Content>
       </Drawer.Portal>
@@ -55,7 +56,22 @@ export function FileShelf() {
   );
 }
 
-function ShelfContent({ items, onRemove, onClear, onClose }: { items: ShelfItem[], onRemove: (id: string) => void, onClear: () => void, onClose: () => void }) {
+function ShelfContent({ items, getFile, onRemove, onClear, onClose }: { items: ShelfItem[], getFile: (id: string) => Promise<File>, onRemove: (id: string) => void, onClear: () => void, onClose: () => void }) {
+    // ダウンロード用のURLはクリックした時だけ作り、ダウンロードが始まったら破棄する
+    const handleDownload = async (item: ShelfItem) => {
+        try {
+            const file = await getFile(item.id);
+            const url = URL.createObjectURL(file);
+            const a = document.createElement("a");
+            a.href = url;
+            a.download = item.name;
+            a.click();
+            setTimeout(() => URL.revokeObjectURL(url), 60_000);
+        } catch (e) {
+            console.error("Failed to read shelf item", e);
+        }
+    };
+
     return (
         <div className="h-full flex flex-col">
             <div className="flex items-center justify-between mb-6">
@@ -89,8 +105,8 @@ function ShelfContent({ items, onRemove, onClear, onClose }: { items: ShelfItem[
                             onDragStart={(e) => {
                                 e.dataTransfer.setData("application/json", JSON.stringify({
                                     id: item.id,
-                                    name: item.file.name,
-                                    type: item.file.type
+                                    name: item.name,
+                                    type: item.type
                                 }));
                                 // Note: passing File object directly via drag/drop is restricted by browser security in some contexts,
                                 // but within the same app window we can use a custom logic or simply transfer ID and lookup in context.
@@ -100,29 +116,24 @@ function ShelfContent({ items, onRemove, onClear, onClose }: { items: ShelfItem[
                             }}
                         >
                             <div className="w-12 h-12 rounded-lg bg-black/40 flex items-center justify-center overflow-hidden border border-white/10">
-                                {item.previewUrl ? (
-                                    <img src={item.previewUrl} alt="preview" className="w-full h-full object-cover" />
+                                {item.thumbnail ? (
+                                    <Thumbnail blob={item.thumbnail} />
                                 ) : (
                                     <File className="w-6 h-6 text-neutral-400" />
                                 )}
                             </div>
                             <div className="flex-1 min-w-0">
-                                <p className="text-sm font-medium text-white truncate">{item.file.name}</p>
-                                <p className="text-xs text-neutral-500">{item.source} • {(item.file.size / 1024).toFixed(1)} KB</p>
+                                <p className="text-sm font-medium text-white truncate">{item.name}</p>
+                                <p className="text-xs text-neutral-500">{item.source} • {formatBytes(item.size)}</p>
                             </div>
                             <div className="flex gap-1 opacity-0 group-hover:opacity-100 transition-opacity">
-                                <a
-                                    href={item.previewUrl || URL.createObjectURL(item.file)}
-                                    download={item.file.name}
+                                <button
+                                    onClick={() => handleDownload(item)}
+                                    aria-label="Download"
                                     className="p-2 text-blue-400 hover:text-blue-300 hover:bg-blue-900/20 rounded-lg"
-                                    onClick={(e) => {
-                                         // If we created a temporary URL just for this click, we should theoretically revoke it,
-                                         // but previewUrl is managed.
-                                         if (!item.previewUrl) e.stopPropagation();
-                                    }}
                                 >
                                     <Download className="w-4 h-4" />
-                                </a>
+                                </button>
                                 <button
                                     onClick={() => onRemove(item.id)}
                                     className="p-2 text-red-400 hover:text-red-300 hover:bg-red-900/20 rounded-lg"
@@ -138,6 +149,20 @@ function ShelfContent({ items, onRemove, onClear, onClose }: { items: ShelfItem[
     )
 }
 
+// サムネイルのURLは表示されている間だけ有効にする（シェルフを閉じると破棄される）
+function Thumbnail({ blob }: { blob: Blob }) {
+    const [url, setUrl] = React.useState<string | null>(null);
+
+    React.useEffect(() => {
+        const objectUrl = URL.createObjectURL(blob);
+        setUrl(objectUrl);
+        return () => URL.revokeObjectURL(objectUrl);
+    }, [blob]);
+
+    // eslint-disable-next-line @next/next/no-img-element
+    return url ? <img src={url} alt="preview" className="w-full h-full object-cover" /> : null;
+}
+
 function useMediaQuery(query: string) {
   const [matches, setMatches] = React.useState(false);
 
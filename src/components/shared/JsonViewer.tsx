@@ -0,0 +1,27 @@
+"use client";
+
+import React from "react";
+import { VirtualList } from "@/components/shared/VirtualList";
+import type { JsonOutputBuffer } from "@/lib/json-engine";
+
+const ROW_HEIGHT = 20;
+
+interface JsonViewerProps {
+  output: JsonOutputBuffer;
+  rowCount: number;
+  className?: string;
+}
+
+// ワーカーが整形・圧縮した JSON を、見えている行だけデコードして表示する
+export function JsonViewer({ output, rowCount, className = "" }: JsonViewerProps) {
+  return (
+    <VirtualList
+      count={rowCount}
+      rowHeight={ROW_HEIGHT}
+      className={className}
+      renderRow={(index) => (
+        <div className="px-3 whitespace-pre leading-5" data-testid="json-row">{output.row(index)}</div>
+      )}
+    />
+  );
+}
@@ -0,0 +1,45 @@
+"use client";
+
+import React, { useEffect, useRef, useState } from "react";
+
+interface VirtualListProps {
+  count: number;
+  rowHeight: number;
+  renderRow: (index: number) => React.ReactNode;
+  overscan?: number;
+  className?: string;
+}
+
+// 見えている行（と前後 overscan 行）だけを描画するスクロール領域。行の高さは固定
+export function VirtualList({ count, rowHeight, renderRow, overscan = 10, className = "" }: VirtualListProps) {
+  const containerRef = useRef<HTMLDivElement>(null);
+  const [scrollTop, setScrollTop] = useState(0);
+  const [height, setHeight] = useState(0);
+
+  useEffect(() => {
+    const container = containerRef.current;
+    if (!container) return;
+    const observer = new ResizeObserver(() => setHeight(container.clientHeight));
+    observer.observe(container);
+    return () => observer.disconnect();
+  }, []);
+
+  const first = Math.max(0, Math.floor(scrollTop / rowHeight) - overscan);
+  const last = Math.min(count, Math.ceil((scrollTop + height) / rowHeight) + overscan);
+  const rows: React.ReactNode[] = [];
+  for (let index = first; index < last; index++) {
+    rows.push(
+      <div key={index} className="absolute left-0 min-w-full" style={{ top: index * rowHeight, height: rowHeight }}>
+        {renderRow(index)}
+      </div>
+    );
+  }
+
+  return (
+    <div ref={containerRef} onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)} className={`relative overflow-auto ${className}`}>
+      <div className="relative" style={{ height: count * rowHeight }}>
+        {rows}
+      </div>
+    </div>
+  );
+}
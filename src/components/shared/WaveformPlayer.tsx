@@ -4,6 +4,7 @@ import React, { useEffect, useRef, useState, useCallback } from "react";
 import WaveSurfer from "wavesurfer.js";
 import { Play, Pause } from "lucide-react";
 import { motion } from "framer-motion";
+import { getWaveformEngine, supportsWaveformWorker } from "@/lib/waveform-engine";
 
 interface WaveformPlayerProps {
   file: File;
@@ -11,12 +12,18 @@ interface WaveformPlayerProps {
   color?: string;
 }
 
+// cache: IndexedDB に保存済みのピーク / worker: ワーカーで今デコードしたピーク / fallback: WaveSurfer 自身のデコード
+type WaveformSource = "cache" | "worker" | "fallback";
+
 export function WaveformPlayer({ file, onReady, color = "#10b981" }: WaveformPlayerProps) {
   const containerRef = useRef<HTMLDivElement>(null);
   const wavesurfer = useRef<WaveSurfer | null>(null);
   const [isPlaying, setIsPlaying] = useState(false);
   const [duration, setDuration] = useState("0:00");
   const [currentTime, setCurrentTime] = useState("0:00");
+  // 前のファイルの状態が残らないように、どのファイルの値かを一緒に持つ
+  const [progress, setProgress] = useState<{ file: File; value: number } | null>(null);
+  const [loaded, setLoaded] = useState<{ file: File; source: WaveformSource } | null>(null);
 
   const formatTime = (seconds: number) => {
     const min = Math.floor(seconds / 60);
@@ -25,43 +32,78 @@ export function WaveformPlayer({ file, onReady, color = "#10b981" }: WaveformPla
   };
 
   useEffect(() => {
-    if (!containerRef.current) return;
-
-    // WaveSurferの初期化
-    const ws = WaveSurfer.create({
-      container: containerRef.current,
-      waveColor: 'rgba(255, 255, 255, 0.2)',
-      progressColor: color,
-      cursorColor: 'rgba(255, 255, 255, 0.5)',
-      barWidth: 2,
-      barGap: 3,
-      barRadius: 3,
-      height: 120,
-      normalize: true,
-      backend: 'WebAudio',
-    });
-
-    // ファイルの読み込み
-    const url = URL.createObjectURL(file);
-    ws.load(url);
+    const container = containerRef.current;
+    if (!container) return;
 
-    ws.on('ready', () => {
-      setDuration(formatTime(ws.getDuration()));
-      if (onReady) onReady();
-    });
-
-    ws.on('timeupdate', (currentTime) => {
-      setCurrentTime(formatTime(currentTime));
-    });
+    let cancelled = false;
+    let ws: WaveSurfer | null = null;
+    const url = URL.createObjectURL(file);
 
-    ws.on('finish', () => {
-      setIsPlaying(false);
-    });
+    // 再生は MediaElement（ファイル全体を AudioBuffer にしない）。ピークがあれば WaveSurfer はデコードしない
+    const create = (source: WaveformSource, peaks?: Float32Array, peaksDuration?: number) => {
+      if (cancelled) return;
+      const instance = WaveSurfer.create({
+        container,
+        waveColor: 'rgba(255, 255, 255, 0.2)',
+        progressColor: color,
+        cursorColor: 'rgba(255, 255, 255, 0.5)',
+        barWidth: 2,
+        barGap: 3,
+        barRadius: 3,
+        height: 120,
+        normalize: true,
+        backend: 'MediaElement',
+        url,
+        peaks: peaks ? [peaks] : undefined,
+        duration: peaksDuration,
+      });
+
+      instance.on('ready', () => {
+        setDuration(formatTime(instance.getDuration()));
+        setLoaded({ file, source });
+        if (onReady) onReady();
+      });
+
+      instance.on('timeupdate', (currentTime) => {
+        setCurrentTime(formatTime(currentTime));
+      });
+
+      instance.on('finish', () => {
+        setIsPlaying(false);
+      });
+
+      ws = instance;
+      wavesurfer.current = instance;
+    };
 
-    wavesurfer.current = ws;
+    const engine = supportsWaveformWorker() ? getWaveformEngine() : null;
+    if (engine) {
+      let lastPercent = -1;
+      engine
+        .peaks(file, (value) => {
+          const percent = Math.round(value * 100);
+          if (percent === lastPercent) return;
+          lastPercent = percent;
+          setProgress({ file, value: percent });
+        })
+        .then((result) => {
+          if (!result) return;
+          if (result.ok) {
+            create(result.cached ? "cache" : "worker", result.peaks, result.duration);
+          } else {
+            if (!result.unsupported) console.warn("Waveform worker failed:", result.message);
+            create("fallback");
+          }
+        });
+    } else {
+      create("fallback");
+    }
 
     return () => {
-      ws.destroy();
+      cancelled = true;
+      engine?.cancel();
+      ws?.destroy();
+      wavesurfer.current = null;
       URL.revokeObjectURL(url);
     };
   }, [file, color, onReady]);
@@ -77,6 +119,9 @@ export function WaveformPlayer({ file, onReady, color = "#10b981" }: WaveformPla
     }
   }, [isPlaying]);
 
+  const source = loaded?.file === file ? loaded.source : null;
+  const percent = progress?.file === file ? progress.value : 0;
+
   return (
     <div className="w-full bg-black/40 backdrop-blur-xl border border-white/10 rounded-3xl p-6 shadow-2xl relative overflow-hidden group">
       {/* 背景装飾 */}
@@ -91,7 +136,19 @@ export function WaveformPlayer({ file, onReady, color = "#10b981" }: WaveformPla
         </div>
       </div>
 
-      <div className="relative z-10 my-4" ref={containerRef} />
+      <div
+        className="relative z-10 my-4 min-h-[120px]"
+        data-waveform={source ? "ready" : "loading"}
+        data-waveform-source={source ?? undefined}
+      >
+        {/* 波形の計算中（長いファイルのデコード）だけ進捗を出す */}
+        {!source && percent > 0 && (
+          <div className="absolute inset-x-0 top-1/2 h-1 -translate-y-1/2 rounded-full bg-white/10 overflow-hidden">
+            <div className="h-full bg-emerald-400/60 transition-[width]" style={{ width: `${percent}%` }} />
+          </div>
+        )}
+        <div ref={containerRef} />
+      </div>
 
       <div className="flex justify-center relative z-10 mt-2">
         <motion.button
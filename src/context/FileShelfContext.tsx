@@ -1,19 +1,18 @@
 "use client";
 
-import React, { createContext, useContext, useState, useCallback, ReactNode } from "react";
+import React, { createContext, useContext, useState, useCallback, useEffect, useRef, ReactNode } from "react";
 import { toast } from "sonner";
+import { clearItems, deleteItem, getItemFile, listItems, moveItem, putItem, type ShelfItemMeta } from "@/lib/shelf-store";
 
-export interface ShelfItem {
-  id: string;
-  file: File;
-  previewUrl?: string;
-  source: string; // e.g., "ImageLab", "Upload"
-  timestamp: number;
-}
+// 本体（File）は持たず、メタデータとサムネイルだけを保持する
+// 本体は OPFS にあり、getFile で必要な時に取り出す
+export type ShelfItem = ShelfItemMeta; // source e.g., "ImageLab", "Upload"
 
 interface FileShelfContextType {
   items: ShelfItem[];
-  addItem: (file: File, source?: string) => void;
+  addItem: (file: File, source?: string) => Promise<void>;
+  moveToShelf: (handle: FileSystemFileHandle, name: string, type: string, source: string) => Promise<ShelfItem | null>;
+  getFile: (id: string) => Promise<File>;
   removeItem: (id: string) => void;
   clearShelf: () => void;
   isOpen: boolean;
@@ -25,53 +24,57 @@ const FileShelfContext = createContext<FileShelfContextType | undefined>(undefin
 export function FileShelfProvider({ children }: { children: ReactNode }) {
   const [items, setItems] = useState<ShelfItem[]>([]);
   const [isOpen, setIsOpen] = useState(false);
+  // 追加は1件ずつ順番に保存する（容量チェックと追い出しが競合しないように）
+  const queueRef = useRef<Promise<void>>(Promise.resolve());
 
-  const addItem = useCallback((file: File, source: string = "Upload") => {
-    let previewUrl: string | undefined = undefined;
-    if (file.type.startsWith("image/")) {
-      previewUrl = URL.createObjectURL(file);
-    }
-    // We could add more preview logic here if needed, but for now images are main concern.
-    // Video preview is handled by creating object URL in component if needed or here.
-    else if (file.type.startsWith("video/")) {
-        // Optional: Generate thumbnail? For now just URL for access
-        // previewUrl = URL.createObjectURL(file);
-        // Note: Creating object URL for large video might use memory, but it's fine for local shelf usually.
-        // Let's keep previewUrl for images mainly for the small icon preview.
-    }
-
-    const newItem: ShelfItem = {
-      id: crypto.randomUUID(),
-      file,
-      source,
-      timestamp: Date.now(),
-      previewUrl
-    };
-
-    setItems((prev) => [newItem, ...prev]);
-    toast.success("Added to File Shelf");
-    setIsOpen(true); // Auto-open shelf to show feedback
+  // リロード後も前回のシェルフを復元する
+  useEffect(() => {
+    listItems()
+      .then(setItems)
+      .catch((e) => console.error("Failed to load File Shelf", e));
   }, []);
 
-  const removeItem = useCallback((id: string) => {
-    setItems((prev) => {
-      const item = prev.find(i => i.id === id);
-      if (item?.previewUrl) {
-        URL.revokeObjectURL(item.previewUrl);
+  const enqueue = useCallback((save: () => ReturnType<typeof putItem>) => {
+    const task = queueRef.current.then(async () => {
+      try {
+        const { item, evicted } = await save();
+        setItems((prev) => [item, ...prev.filter((i) => !evicted.includes(i.id))]);
+        toast.success("Added to File Shelf");
+        setIsOpen(true); // Auto-open shelf to show feedback
+        return item;
+      } catch (e) {
+        console.error("Failed to add to File Shelf", e);
+        toast.error("Failed to add to File Shelf");
+        return null;
       }
-      return prev.filter((i) => i.id !== id);
     });
+    queueRef.current = task.then(() => {});
+    return task;
+  }, []);
+
+  const addItem = useCallback(async (file: File, source: string = "Upload") => {
+    await enqueue(() => putItem(file, source));
+  }, [enqueue]);
+
+  // OPFS 上のファイル（録画など）はコピーせずに移動する
+  const moveToShelf = useCallback((handle: FileSystemFileHandle, name: string, type: string, source: string) => {
+    return enqueue(() => moveItem(handle, name, type, source));
+  }, [enqueue]);
+
+  const getFile = useCallback((id: string) => getItemFile(id), []);
+
+  const removeItem = useCallback((id: string) => {
+    setItems((prev) => prev.filter((i) => i.id !== id));
+    deleteItem(id).catch((e) => console.error("Failed to remove shelf item", e));
   }, []);
 
   const clearShelf = useCallback(() => {
-    items.forEach(item => {
-      if (item.previewUrl) URL.revokeObjectURL(item.previewUrl);
-    });
     setItems([]);
-  }, [items]);
+    queueRef.current = queueRef.current.then(() => clearItems()).catch((e) => console.error("Failed to clear File Shelf", e));
+  }, []);
 
   return (
-    <FileShelfContext.Provider value={{ items, addItem, removeItem, clearShelf, isOpen, setIsOpen }}>
+    <FileShelfContext.Provider value={{ items, addItem, moveToShelf, getFile, removeItem, clearShelf, isOpen, setIsOpen }}>
       {children}
     </FileShelfContext.Provider>
   );
@@ -1,6 +1,15 @@
-import { useState, useEffect, useRef, useCallback } from 'react';
+import { useState, useCallback } from 'react';
+import { getAiEngine, type AiLoadProgress, type AiModelVariant } from '@/lib/ai-engine';
+
+export interface AiBatchItem {
+  name: string;
+  result: Blob | null;
+  failed: boolean;
+}
 
 interface UseAiBackgroundRemoverReturn {
+  variant: AiModelVariant;
+  setVariant: (variant: AiModelVariant) => void;
   isReady: boolean;
   isLoading: boolean;
   isProcessing: boolean;
@@ -8,80 +17,64 @@ interface UseAiBackgroundRemoverReturn {
   loadingStatus: string | null;
   error: string | null;
   result: Blob | null;
+  batch: AiBatchItem[];
   loadModel: () => void;
   processImage: (image: File) => void;
+  processBatch: (images: File[]) => void;
   reset: () => void;
 }
 
 export function useAiBackgroundRemover(): UseAiBackgroundRemoverReturn {
-  const [isReady, setIsReady] = useState(false);
+  // ワーカーとモデルは getAiEngine() がページをまたいで保持する（アンマウントしても破棄しない）
+  const [variant, setVariant] = useState<AiModelVariant>(() => getAiEngine().loadedVariant ?? 'quantized');
+  const [isReady, setIsReady] = useState(() => getAiEngine().loadedVariant === variant);
   const [isLoading, setIsLoading] = useState(false);
   const [isProcessing, setIsProcessing] = useState(false);
   const [progress, setProgress] = useState(0);
   const [loadingStatus, setLoadingStatus] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [result, setResult] = useState<Blob | null>(null);
+  const [batch, setBatch] = useState<AiBatchItem[]>([]);
 
-  const workerRef = useRef<Worker | null>(null);
-
-  useEffect(() => {
-    // Web Workerの初期化
-    if (!workerRef.current) {
-      workerRef.current = new Worker(new URL('../workers/ai.worker.ts', import.meta.url), {
-        type: 'module'
-      });
-
-      workerRef.current.onmessage = (event) => {
-        const { type, data } = event.data;
-
-        switch (type) {
-          case 'progress':
-            if (data.status === 'progress') {
-                const percent = data.progress ? Math.round(data.progress) : 0;
-                // ファイル名を短縮して表示
-                const fileName = data.file ? data.file.split('/').pop() : 'model';
-                setLoadingStatus(fileName);
-                setProgress(percent);
-            } else if (data.status === 'done') {
-                // ダウンロード完了、次のステップへ
-                setProgress(100);
-            } else if (data.status === 'initiate') {
-                setLoadingStatus(data.file);
-                setProgress(0);
-            }
-            break;
-          case 'ready':
-            setIsReady(true);
-            setIsLoading(false);
-            setLoadingStatus(null);
-            setProgress(100);
-            break;
-          case 'complete':
-            setResult(data);
-            setIsProcessing(false);
-            break;
-          case 'error':
-            setError("AI処理中にエラーが発生しました。");
-            console.error(data);
-            setIsLoading(false);
-            setIsProcessing(false);
-            break;
-        }
-      };
+  const handleProgress = useCallback((data: AiLoadProgress) => {
+    if (data.status === 'progress') {
+      const percent = data.progress ? Math.round(data.progress) : 0;
+      // ファイル名を短縮して表示
+      const fileName = data.file ? data.file.split('/').pop() ?? null : 'model';
+      setLoadingStatus(fileName);
+      setProgress(percent);
+    } else if (data.status === 'done') {
+      // ダウンロード完了、次のステップへ
+      setProgress(100);
+    } else if (data.status === 'initiate') {
+      setLoadingStatus(data.file ?? null);
+      setProgress(0);
     }
-
-    return () => {
-      workerRef.current?.terminate();
-      workerRef.current = null;
-    };
   }, []);
 
   const loadModel = useCallback(() => {
-    if (isReady || isLoading) return;
+    const engine = getAiEngine();
+    if (engine.loadedVariant === variant) {
+      setIsReady(true);
+      return;
+    }
+    setIsReady(false);
     setIsLoading(true);
     setLoadingStatus(null);
-    workerRef.current?.postMessage({ type: 'init' });
-  }, [isReady, isLoading]);
+    setError(null);
+    engine
+      .load(variant, handleProgress)
+      .then(() => {
+        setIsReady(true);
+        setLoadingStatus(null);
+        setProgress(100);
+      })
+      .catch((e) => {
+        setError("AI処理中にエラーが発生しました。");
+        console.error(e);
+      })
+      .finally(() => setIsLoading(false));
+  }, [variant, handleProgress]);
 
   const processImage = useCallback((image: File) => {
     if (!isReady) return;
@@ -89,17 +82,41 @@ export function useAiBackgroundRemover(): UseAiBackgroundRemoverReturn {
     setError(null);
     setResult(null);
 
-    const imageUrl = URL.createObjectURL(image);
-    workerRef.current?.postMessage({ type: 'process', data: { imageUrl } });
+    getAiEngine()
+      .removeBackground(image)
+      .then(setResult)
+      .catch((e) => {
+        setError("AI処理中にエラーが発生しました。");
+        console.error(e);
+      })
+      .finally(() => setIsProcessing(false));
+  }, [isReady]);
+
+  // 複数枚はデコードと推論を重ねて流す（結果は届いた順に反映）
+  const processBatch = useCallback((images: File[]) => {
+    if (!isReady) return;
+    setIsProcessing(true);
+    setError(null);
+    setBatch(images.map((image) => ({ name: image.name, result: null, failed: false })));
+
+    getAiEngine()
+      .removeBackgroundBatch(images, (index, blob, e) => {
+        if (e) console.error(e);
+        setBatch((prev) => prev.map((item, i) => (i === index ? { ...item, result: blob, failed: !blob } : item)));
+      })
+      .finally(() => setIsProcessing(false));
   }, [isReady]);
 
   const reset = useCallback(() => {
     setResult(null);
+    setBatch([]);
     setError(null);
     setIsProcessing(false);
   }, []);
 
   return {
+    variant,
+    setVariant,
     isReady,
     isLoading,
     isProcessing,
@@ -107,8 +124,10 @@ export function useAiBackgroundRemover(): UseAiBackgroundRemoverReturn {
     loadingStatus,
     error,
     result,
+    batch,
     loadModel,
     processImage,
+    processBatch,
     reset
   };
 }
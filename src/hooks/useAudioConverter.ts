@@ -1,20 +1,12 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
-import { FFmpeg } from '@ffmpeg/ffmpeg';
-import { toBlobURL, fetchFile } from '@ffmpeg/util';
+import { getFFmpeg, getLoadedFFmpeg } from '@/lib/ffmpeg-engine';
+import { convertAudio as convertWithEngine, prefersWebCodecs, type EngineResult, type EnginePreference } from '@/lib/media-engine';
+import { useMediaEngine } from './useMediaEngine';
 import { z } from 'zod';
 
-// Video Converterと同じインスタンスを共有または新規作成
-// シングルトンパターンでリソースを節約
-let ffmpegInstance: FFmpeg | null = null;
-
 const AudioFormatSchema = z.enum(["mp3", "wav", "aac", "ogg"]);
 export type AudioFormat = z.infer<typeof AudioFormatSchema>;
 
-interface FFmpegProgressEvent {
-  progress: number;
-  time: number;
-}
-
 interface ConvertOptions {
   file: File;
   outputFormat: AudioFormat;
@@ -26,7 +18,12 @@ interface UseAudioConverterReturn {
   isConverting: boolean;
   progress: number;
   error: string | null;
-  loadFFmpeg: () => Promise<void>;
+  // 直前の変換で使ったエンジン（WebCodecs から切り替えた場合はその理由も）
+  lastEngine: EngineResult | null;
+  enginePreference: EnginePreference;
+  setEnginePreference: (preference: EnginePreference) => void;
+  webCodecsAvailable: boolean;
+  loadEngine: () => Promise<void>;
   convertAudio: (options: ConvertOptions) => Promise<Blob | null>;
 }
 
@@ -36,6 +33,8 @@ export function useAudioConverter(): UseAudioConverterReturn {
   const [isConverting, setIsConverting] = useState(false);
   const [progress, setProgress] = useState(0);
   const [error, setError] = useState<string | null>(null);
+  const [lastEngine, setLastEngine] = useState<EngineResult | null>(null);
+  const { preference, setPreference, webCodecsAvailable } = useMediaEngine();
 
   const isMounted = useRef(true);
 
@@ -45,8 +44,10 @@ export function useAudioConverter(): UseAudioConverterReturn {
     };
   }, []);
 
-  const loadFFmpeg = useCallback(async () => {
-    if (ffmpegInstance && ffmpegInstance.loaded) {
+  // WebCodecs を使う場合は ffmpeg.wasm（約30MB）をロードせずにすぐ使えるようにする
+  // MP3 出力など ffmpeg が必要になったときは、その変換の中で初めてロードする
+  const loadEngine = useCallback(async () => {
+    if (prefersWebCodecs(preference) || getLoadedFFmpeg()) {
       setIsLoaded(true);
       return;
     }
@@ -57,15 +58,8 @@ export function useAudioConverter(): UseAudioConverterReturn {
     setError(null);
 
     try {
-      const ffmpeg = new FFmpeg();
-      ffmpegInstance = ffmpeg;
-
-      const baseURL = 'https://unpkg.com/@ffmpeg/core@0.12.6/dist/umd';
-
-      await ffmpeg.load({
-        coreURL: await toBlobURL(`${baseURL}/ffmpeg-core.js`, 'text/javascript'),
-        wasmURL: await toBlobURL(`${baseURL}/ffmpeg-core.wasm`, 'application/wasm'),
-      });
+      // 動画ラボ・音声ラボで共有するインスタンス（同一オリジンのコアを使用）
+      await getFFmpeg();
 
       if (isMounted.current) {
         setIsLoaded(true);
@@ -80,61 +74,27 @@ export function useAudioConverter(): UseAudioConverterReturn {
         setIsLoading(false);
       }
     }
-  }, [isLoading]);
+  }, [isLoading, preference]);
 
   const convertAudio = useCallback(async ({ file, outputFormat }: ConvertOptions): Promise<Blob | null> => {
-    if (!ffmpegInstance || !ffmpegInstance.loaded) {
-      setError("FFmpegがロードされていません。");
-      return null;
-    }
-
     setIsConverting(true);
     setProgress(0);
     setError(null);
+    setLastEngine(null);
 
-    const handleProgress = ({ progress }: FFmpegProgressEvent) => {
+    const handleProgress = (progress: number) => {
       if (isMounted.current) {
         setProgress(Math.round(progress * 100));
       }
     };
 
     try {
-      const ffmpeg = ffmpegInstance;
-      ffmpeg.on('progress', handleProgress);
-
-      // 拡張子を取得
-      const ext = file.name.split('.').pop() || 'tmp';
-      const inputFileName = `input.${ext}`;
-      const outputFileName = `output.${outputFormat}`;
-
-      await ffmpeg.writeFile(inputFileName, await fetchFile(file));
-
-      // コマンド構築
-      // オーディオ変換用の基本的なパラメータ
-      const args = ['-i', inputFileName];
-
-      if (outputFormat === 'mp3') {
-        args.push('-acodec', 'libmp3lame', '-q:a', '2');
-      } else if (outputFormat === 'aac') {
-        args.push('-acodec', 'aac', '-b:a', '192k');
+      // WebCodecs で変換できない場合は media-engine の中で ffmpeg.wasm に切り替わる
+      const { blob, engine, fallbackReason } = await convertWithEngine(file, outputFormat, handleProgress);
+      if (isMounted.current) {
+        setLastEngine({ engine, fallbackReason });
       }
-
-      args.push(outputFileName);
-
-      await ffmpeg.exec(args);
-
-      const data = await ffmpeg.readFile(outputFileName);
-
-      await ffmpeg.deleteFile(inputFileName);
-      await ffmpeg.deleteFile(outputFileName);
-
-      let mimeType = 'audio/mpeg';
-      if (outputFormat === 'wav') mimeType = 'audio/wav';
-      if (outputFormat === 'ogg') mimeType = 'audio/ogg';
-      if (outputFormat === 'aac') mimeType = 'audio/aac';
-
-      return new Blob([data as unknown as BlobPart], { type: mimeType });
-
+      return blob;
     } catch (err) {
       console.error("Audio conversion failed:", err);
       if (isMounted.current) {
@@ -142,9 +102,6 @@ export function useAudioConverter(): UseAudioConverterReturn {
       }
       return null;
     } finally {
-      if (ffmpegInstance) {
-        ffmpegInstance.off('progress', handleProgress);
-      }
       if (isMounted.current) {
         setIsConverting(false);
       }
@@ -157,7 +114,11 @@ export function useAudioConverter(): UseAudioConverterReturn {
     isConverting,
     progress,
     error,
-    loadFFmpeg,
+    lastEngine,
+    enginePreference: preference,
+    setEnginePreference: setPreference,
+    webCodecsAvailable,
+    loadEngine,
     convertAudio
   };
 }
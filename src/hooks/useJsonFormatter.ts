@@ -0,0 +1,79 @@
+import { useState, useCallback, useEffect, useRef } from 'react';
+import { JsonEngine, JsonOutputBuffer, type JsonRunResult } from '@/lib/json-engine';
+import type { JsonOutputMode, JsonSyntaxError } from '@/lib/json-stream';
+
+interface UseJsonFormatterReturn {
+  output: JsonOutputBuffer | null;
+  rowCount: number; // 出力が届くたびに増える（再描画のきっかけ）
+  error: JsonSyntaxError | null;
+  isProcessing: boolean;
+  progress: number; // 0-100
+  lastRun: { mode: JsonOutputMode; bytes: number; ms: number } | null;
+  run: (mode: JsonOutputMode, source: string | Blob) => Promise<JsonRunResult | null>;
+  reset: () => void;
+}
+
+export function useJsonFormatter(): UseJsonFormatterReturn {
+  const engineRef = useRef<JsonEngine | null>(null);
+  const [output, setOutput] = useState<JsonOutputBuffer | null>(null);
+  const [rowCount, setRowCount] = useState(0);
+  const [error, setError] = useState<JsonSyntaxError | null>(null);
+  const [isProcessing, setIsProcessing] = useState(false);
+  const [progress, setProgress] = useState(0);
+  const [lastRun, setLastRun] = useState<UseJsonFormatterReturn['lastRun']>(null);
+
+  useEffect(() => {
+    const engine = new JsonEngine();
+    engineRef.current = engine;
+    return () => {
+      engine.terminate();
+      engineRef.current = null;
+    };
+  }, []);
+
+  const run = useCallback(async (mode: JsonOutputMode, source: string | Blob) => {
+    const engine = engineRef.current;
+    if (!engine) return null;
+    const buffer = new JsonOutputBuffer();
+    setOutput(mode === 'validate' ? null : buffer);
+    setRowCount(0);
+    setError(null);
+    setLastRun(null);
+    setProgress(0);
+    setIsProcessing(true);
+
+    // 出力は届いた分から表示する（エラーで終わった場合は消す）
+    const result = await engine.run(
+      mode,
+      source,
+      buffer,
+      () => setRowCount(buffer.rowCount),
+      (fraction) => setProgress(Math.floor(fraction * 100))
+    );
+    // 別の処理に置き換えられた場合は何もしない
+    if (!result) return null;
+
+    setIsProcessing(false);
+    if (result.ok) {
+      setRowCount(buffer.bytes ? buffer.rowCount : 0);
+      setLastRun({ mode, bytes: result.bytes, ms: result.ms });
+    } else {
+      setOutput(null);
+      setRowCount(0);
+      setError(result.error);
+      if (!result.error) console.error(result.message);
+    }
+    return result;
+  }, []);
+
+  const reset = useCallback(() => {
+    engineRef.current?.cancel();
+    setOutput(null);
+    setRowCount(0);
+    setError(null);
+    setLastRun(null);
+    setIsProcessing(false);
+  }, []);
+
+  return { output, rowCount, error, isProcessing, progress, lastRun, run, reset };
+}
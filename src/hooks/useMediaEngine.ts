@@ -0,0 +1,27 @@
+import { useCallback, useSyncExternalStore } from 'react';
+import { getFFmpeg } from '@/lib/ffmpeg-engine';
+import {
+  getEnginePreference,
+  setEnginePreference,
+  subscribeEnginePreference,
+  supportsWebCodecs,
+  type EnginePreference,
+} from '@/lib/media-engine';
+
+const subscribeNothing = () => () => {};
+
+// 動画ラボ・音声ラボで共有する変換エンジンの設定（localStorage に保存されるので、両方のラボで同じ値になる）
+export function useMediaEngine() {
+  const preference = useSyncExternalStore(subscribeEnginePreference, getEnginePreference, () => 'auto' as const);
+  const webCodecsAvailable = useSyncExternalStore(subscribeNothing, supportsWebCodecs, () => false);
+
+  const setPreference = useCallback((next: EnginePreference) => {
+    setEnginePreference(next);
+    // FFmpeg に切り替えたら、最初の変換を待たせないよう裏でロードしておく
+    if (next === 'ffmpeg') {
+      getFFmpeg().catch((err) => console.error("FFmpeg load failed:", err));
+    }
+  }, []);
+
+  return { preference, setPreference, webCodecsAvailable };
+}
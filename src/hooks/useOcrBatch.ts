@@ -0,0 +1,98 @@
+import { useState, useCallback, useRef } from 'react';
+import { extractPdfPageImages, getOcrPool } from '@/lib/ocr';
+
+export type OcrPageStatus = 'pending' | 'processing' | 'done' | 'error';
+
+export interface OcrPage {
+  id: string;
+  label: string;
+  image: Blob | null;
+  status: OcrPageStatus;
+  progress: number;
+  text: string;
+}
+
+interface UseOcrBatchReturn {
+  pages: OcrPage[];
+  isRecognizing: boolean;
+  addFiles: (files: File[]) => Promise<void>;
+  recognizeAll: () => Promise<void>;
+  clearPages: () => void;
+}
+
+export function useOcrBatch(): UseOcrBatchReturn {
+  const [pages, setPages] = useState<OcrPage[]>([]);
+  const [isRecognizing, setIsRecognizing] = useState(false);
+  const pagesRef = useRef<OcrPage[]>([]);
+
+  const updatePages = useCallback((update: (prev: OcrPage[]) => OcrPage[]) => {
+    pagesRef.current = update(pagesRef.current);
+    setPages(pagesRef.current);
+  }, []);
+
+  const updatePage = useCallback((id: string, patch: Partial<OcrPage>) => {
+    updatePages((prev) => prev.map((page) => (page.id === id ? { ...page, ...patch } : page)));
+  }, [updatePages]);
+
+  // PDFはページごとに分けて並べる（スキャン画像のないページはエラー扱い）
+  const addFiles = useCallback(async (files: File[]) => {
+    const added: OcrPage[] = [];
+    for (const file of files) {
+      if (file.type === 'application/pdf' || file.name.toLowerCase().endsWith('.pdf')) {
+        const images = await extractPdfPageImages(file);
+        images.forEach((image, index) => {
+          added.push({
+            id: crypto.randomUUID(),
+            label: `${file.name} (${index + 1})`,
+            image,
+            status: image ? 'pending' : 'error',
+            progress: 0,
+            text: '',
+          });
+        });
+      } else {
+        added.push({ id: crypto.randomUUID(), label: file.name, image: file, status: 'pending', progress: 0, text: '' });
+      }
+    }
+    updatePages((prev) => [...prev, ...added]);
+  }, [updatePages]);
+
+  // 未処理のページをまとめてプールに投げる（同時に動くのはプールのワーカー数まで）
+  const recognizeAll = useCallback(async () => {
+    const targets = pagesRef.current.filter((page) => page.status === 'pending' && page.image);
+    if (targets.length === 0) return;
+
+    setIsRecognizing(true);
+    const pool = getOcrPool();
+    await Promise.all(
+      targets.map(async (page) => {
+        let reported = 0;
+        try {
+          const text = await pool.recognize(page.image!, (progress) => {
+            // logger は細かく呼ばれるので、5%刻みでだけ再描画する
+            if (progress - reported < 0.05 && progress < 1) return;
+            reported = progress;
+            updatePage(page.id, { status: 'processing', progress });
+          });
+          updatePage(page.id, { status: 'done', progress: 1, text });
+        } catch (error) {
+          console.error(`OCR failed for ${page.label}:`, error);
+          updatePage(page.id, { status: 'error' });
+        }
+      })
+    );
+    setIsRecognizing(false);
+  }, [updatePage]);
+
+  const clearPages = useCallback(() => {
+    updatePages(() => []);
+  }, [updatePages]);
+
+  return {
+    pages,
+    isRecognizing,
+    addFiles,
+    recognizeAll,
+    clearPages,
+  };
+}
@@ -1,57 +1,101 @@
-import { useState, useCallback } from 'react';
-import { PDFDocument } from 'pdf-lib';
+import { useState, useCallback, useRef, useEffect } from 'react';
+import { DEFAULT_MERGE_OPTIONS, type MergeOptions } from '@/lib/pdf-options';
+import { startRun, type StageTiming } from '@/lib/perf';
+
+export interface PdfMergeProgress {
+  done: number;
+  total: number;
+  pages: number;
+}
+
+type WorkerResponse =
+  | { type: 'progress'; index: number; pages: number; totalPages: number }
+  | { type: 'chunk'; chunk: Uint8Array }
+  | { type: 'complete'; totalPages: number; timings: StageTiming[] }
+  | { type: 'error'; message: string };
 
 interface UsePdfMergerReturn {
   isMerging: boolean;
+  progress: PdfMergeProgress | null;
   error: string | null;
-  mergePdfs: (files: File[]) => Promise<Blob | null>;
+  mergePdfs: (files: File[], options?: MergeOptions) => Promise<Blob | null>;
 }
 
 export function usePdfMerger(): UsePdfMergerReturn {
   const [isMerging, setIsMerging] = useState(false);
+  const [progress, setProgress] = useState<PdfMergeProgress | null>(null);
   const [error, setError] = useState<string | null>(null);
 
-  const mergePdfs = useCallback(async (files: File[]): Promise<Blob | null> => {
+  const workerRef = useRef<Worker | null>(null);
+
+  useEffect(() => {
+    return () => {
+      workerRef.current?.terminate();
+      workerRef.current = null;
+    };
+  }, []);
+
+  const mergePdfs = useCallback(async (files: File[], options: MergeOptions = DEFAULT_MERGE_OPTIONS): Promise<Blob | null> => {
     if (files.length === 0) return null;
 
     setIsMerging(true);
     setError(null);
+    setProgress({ done: 0, total: files.length, pages: 0 });
 
-    try {
-      // 新しいPDFドキュメントを作成
-      const mergedPdf = await PDFDocument.create();
-
-      for (const file of files) {
-        // ファイルをArrayBufferとして読み込み
-        const arrayBuffer = await file.arrayBuffer();
-
-        // PDFをロード
-        const pdf = await PDFDocument.load(arrayBuffer);
+    // 結合ごとに新しいワーカーを使い、終わったら破棄する（pdf-lib が抱えたメモリをまとめて解放）
+    const worker = new Worker(new URL('../workers/pdf.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+    workerRef.current = worker;
+    const perf = startRun('pdf', options.incremental ? 'incremental' : 'save');
 
-        // 全ページをコピー
-        const copiedPages = await mergedPdf.copyPages(pdf, pdf.getPageIndices());
-
-        // ページを追加
-        copiedPages.forEach((page) => mergedPdf.addPage(page));
-      }
+    try {
+      // 受け取ったチャンクはすぐ Blob にする（大きな Blob はブラウザがディスクへ退避できる）
+      const parts: Blob[] = [];
 
-      // 結合したPDFを保存
-      const pdfBytes = await mergedPdf.save();
+      await new Promise<void>((resolve, reject) => {
+        worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+          const message = event.data;
+          switch (message.type) {
+            case 'progress':
+              setProgress({ done: message.index + 1, total: files.length, pages: message.totalPages });
+              break;
+            case 'chunk':
+              parts.push(new Blob([message.chunk as unknown as BlobPart]));
+              break;
+            case 'complete':
+              perf.record(message.timings);
+              resolve();
+              break;
+            case 'error':
+              reject(new Error(message.message));
+              break;
+          }
+        };
+        worker.onerror = (event) => reject(new Error(event.message));
+        worker.postMessage({ files, options });
+      });
 
-      // Uint8Arrayを明示的にBlobPartとして扱うための型アサーション
-      return new Blob([pdfBytes as unknown as BlobPart], { type: 'application/pdf' });
+      const blob = await perf.stage('write', () => new Blob(parts, { type: 'application/pdf' }));
+      perf.bytes(files.reduce((sum, file) => sum + file.size, 0), blob.size);
+      perf.end(true, { files: files.length });
+      return blob;
 
     } catch (err) {
+      perf.end(false);
       console.error("PDF merge failed:", err);
       setError("PDFの結合中にエラーが発生しました。ファイルが破損しているか、暗号化されている可能性があります。");
       return null;
     } finally {
+      worker.terminate();
+      if (workerRef.current === worker) workerRef.current = null;
       setIsMerging(false);
     }
   }, []);
 
   return {
     isMerging,
+    progress,
     error,
     mergePdfs
   };
@@ -1,60 +1,87 @@
 import { useState, useRef, useEffect, useCallback } from 'react';
-import { FFmpeg } from '@ffmpeg/ffmpeg';
-import { toBlobURL, fetchFile } from '@ffmpeg/util';
+import { getFFmpeg, getLoadedFFmpeg } from '@/lib/ffmpeg-engine';
+import { convertVideo, prefersWebCodecs, type EnginePreference, type MediaEngine } from '@/lib/media-engine';
+import type { VideoJobMode, VideoPreset } from '@/lib/video-queue';
+import { useMediaEngine } from './useMediaEngine';
 import { z } from 'zod';
 
-// 型定義のインポート問題を回避するため、必要な型をここで定義またはFFmpegから直接取得を試みる
-// @ffmpeg/ffmpegのバージョンによってパスが異なる場合があるため、ProgressEventは手動定義で安全策をとる
-interface FFmpegProgressEvent {
-  progress: number;
-  time: number;
-}
-
-// FFmpegのインスタンスはコンポーネント外で保持（シングルトン）
-let ffmpegInstance: FFmpeg | null = null;
-
 // Zodスキーマ
 const VideoFormatSchema = z.enum(["mp4", "webm"]);
 export type VideoFormat = z.infer<typeof VideoFormatSchema>;
+export type { VideoPreset };
 
 // バリデーションチェック用関数
 export function validateVideoFormat(format: string): boolean {
   return VideoFormatSchema.safeParse(format).success;
 }
 
-interface ConvertOptions {
+export type VideoJobStatus = 'pending' | 'converting' | 'done' | 'error';
+
+export interface VideoJob {
+  id: number;
   file: File;
+  status: VideoJobStatus;
+  progress: number;
+  url?: string;
+  format?: VideoFormat;
+  newSize?: number;
+  mode?: VideoJobMode;
+  engine?: MediaEngine;
+  // WebCodecs から ffmpeg.wasm に切り替えた理由
+  fallbackReason?: string;
+}
+
+interface ConvertOptions {
   outputFormat: VideoFormat;
+  preset: VideoPreset;
 }
 
 interface UseVideoConverterReturn {
   isLoaded: boolean;
   isLoading: boolean;
   isConverting: boolean;
-  progress: number;
+  jobs: VideoJob[];
   error: string | null;
-  loadFFmpeg: () => Promise<void>;
-  convertVideo: (options: ConvertOptions) => Promise<Blob | null>;
+  enginePreference: EnginePreference;
+  setEnginePreference: (preference: EnginePreference) => void;
+  webCodecsAvailable: boolean;
+  loadEngine: () => Promise<void>;
+  addFiles: (files: File[]) => void;
+  removeJob: (id: number) => void;
+  clearJobs: () => void;
+  convertAll: (options: ConvertOptions) => Promise<void>;
 }
 
 export function useVideoConverter(): UseVideoConverterReturn {
   const [isLoaded, setIsLoaded] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [isConverting, setIsConverting] = useState(false);
-  const [progress, setProgress] = useState(0);
+  const [jobs, setJobs] = useState<VideoJob[]>([]);
   const [error, setError] = useState<string | null>(null);
+  const { preference, setPreference, webCodecsAvailable } = useMediaEngine();
 
   // コンポーネントがアンマウントされたかどうかを追跡
   const isMounted = useRef(true);
+  const nextJobId = useRef(0);
+
+  // アンマウント時に残っているダウンロード用URLを解放する
+  const jobsRef = useRef<VideoJob[]>([]);
+
+  useEffect(() => {
+    jobsRef.current = jobs;
+  }, [jobs]);
 
   useEffect(() => {
     return () => {
       isMounted.current = false;
+      jobsRef.current.forEach((job) => job.url && URL.revokeObjectURL(job.url));
     };
   }, []);
 
-  const loadFFmpeg = useCallback(async () => {
-    if (ffmpegInstance && ffmpegInstance.loaded) {
+  // WebCodecs を使う場合は ffmpeg.wasm（約30MB）をロードせずにすぐ使えるようにする
+  // WebCodecs で扱えないファイルが来たときは、video-queue がその時点で ffmpeg をロードする
+  const loadEngine = useCallback(async () => {
+    if (prefersWebCodecs(preference) || getLoadedFFmpeg()) {
       setIsLoaded(true);
       return;
     }
@@ -65,16 +92,8 @@ export function useVideoConverter(): UseVideoConverterReturn {
     setError(null);
 
     try {
-      const ffmpeg = new FFmpeg();
-      ffmpegInstance = ffmpeg;
-
-      // coreURL, wasmURLのロード
-      const baseURL = 'https://unpkg.com/@ffmpeg/core@0.12.6/dist/umd';
-
-      await ffmpeg.load({
-        coreURL: await toBlobURL(`${baseURL}/ffmpeg-core.js`, 'text/javascript'),
-        wasmURL: await toBlobURL(`${baseURL}/ffmpeg-core.wasm`, 'application/wasm'),
-      });
+      // 動画ラボ・音声ラボで共有するインスタンス（同一オリジンのコアを使用）
+      await getFFmpeg();
 
       if (isMounted.current) {
         setIsLoaded(true);
@@ -89,76 +108,109 @@ export function useVideoConverter(): UseVideoConverterReturn {
         setIsLoading(false);
       }
     }
-  }, [isLoading]);
-
-  const convertVideo = useCallback(async ({ file, outputFormat }: ConvertOptions): Promise<Blob | null> => {
-    if (!ffmpegInstance || !ffmpegInstance.loaded) {
-      setError("FFmpegがロードされていません。");
-      return null;
-    }
-
-    setIsConverting(true);
-    setProgress(0);
-    setError(null);
+  }, [isLoading, preference]);
 
-    // プログレスハンドラーの定義
-    const handleProgress = ({ progress }: FFmpegProgressEvent) => {
-      if (isMounted.current) {
-        setProgress(Math.round(progress * 100));
-      }
-    };
-
-    // エラーハンドラー（ログからエラーを検知する場合などに使用可だが、今回はシンプルに）
-    // const handleLog = ({ message }: LogEvent) => { console.log(message); };
-
-    try {
-      const ffmpeg = ffmpegInstance;
-
-      // リスナー登録
-      ffmpeg.on('progress', handleProgress);
-      // ffmpeg.on('log', handleLog);
+  const addFiles = useCallback((files: File[]) => {
+    setJobs((prev) => [
+      ...prev,
+      ...files.map((file) => ({ id: nextJobId.current++, file, status: 'pending' as const, progress: 0 })),
+    ]);
+  }, []);
 
-      const inputFileName = 'input_video';
-      const outputFileName = `output.${outputFormat}`;
+  const removeJob = useCallback((id: number) => {
+    const url = jobsRef.current.find((job) => job.id === id)?.url;
+    if (url) URL.revokeObjectURL(url);
+    setJobs((prev) => prev.filter((job) => job.id !== id));
+  }, []);
 
-      await ffmpeg.writeFile(inputFileName, await fetchFile(file));
+  const clearJobs = useCallback(() => {
+    jobsRef.current.forEach((job) => job.url && URL.revokeObjectURL(job.url));
+    setJobs([]);
+  }, []);
 
-      await ffmpeg.exec(['-i', inputFileName, outputFileName]);
+  const updateJob = useCallback((id: number, patch: Partial<VideoJob>) => {
+    if (!isMounted.current) return;
+    setJobs((prev) => prev.map((job) => (job.id === id ? { ...job, ...patch } : job)));
+  }, []);
 
-      const data = await ffmpeg.readFile(outputFileName);
+  // 未変換・失敗したファイルをまとめてキューに積む（WebCodecs ワーカー、または FFmpeg インスタンスのプールで並列に処理）
+  // すべて変換済みなら、現在の設定で全ファイルを変換し直す
+  const convertAll = useCallback(async ({ outputFormat, preset }: ConvertOptions) => {
+    const remaining = jobs.filter((job) => job.status === 'pending' || job.status === 'error');
+    const targets = remaining.length > 0 ? remaining : jobs.filter((job) => job.status === 'done');
+    if (targets.length === 0) return;
+    targets.forEach((job) => job.url && URL.revokeObjectURL(job.url));
 
-      await ffmpeg.deleteFile(inputFileName);
-      await ffmpeg.deleteFile(outputFileName);
+    setIsConverting(true);
+    setError(null);
 
-      const mimeType = outputFormat === 'mp4' ? 'video/mp4' : 'video/webm';
-      return new Blob([data as unknown as BlobPart], { type: mimeType });
+    let failed = 0;
+
+    await Promise.all(targets.map(async (job) => {
+      updateJob(job.id, {
+        status: 'converting',
+        progress: 0,
+        url: undefined,
+        newSize: undefined,
+        mode: undefined,
+        engine: undefined,
+        fallbackReason: undefined,
+      });
 
-    } catch (err) {
-      console.error("Video conversion failed:", err);
-      if (isMounted.current) {
-        setError("動画の変換中にエラーが発生しました。");
-      }
-      return null;
-    } finally {
-      // リスナー解除（メモリリーク防止）
-      if (ffmpegInstance) {
-        ffmpegInstance.off('progress', handleProgress);
-        // ffmpegInstance.off('log', handleLog);
+      let lastProgress = 0;
+      const handleProgress = (progress: number) => {
+        // 進捗イベントは頻繁に来るので、1%単位で変わったときだけ再描画する
+        const percent = Math.round(progress * 100);
+        if (percent === lastProgress) return;
+        lastProgress = percent;
+        updateJob(job.id, { progress: percent });
+      };
+
+      try {
+        const result = await convertVideo(job.file, { format: outputFormat, preset }, handleProgress);
+        const url = URL.createObjectURL(result.blob);
+        if (!isMounted.current) {
+          URL.revokeObjectURL(url);
+          return;
+        }
+        updateJob(job.id, {
+          status: 'done',
+          progress: 100,
+          url,
+          format: outputFormat,
+          newSize: result.newSize,
+          mode: result.mode,
+          engine: result.engine,
+          fallbackReason: result.fallbackReason,
+        });
+      } catch (err) {
+        console.error("Video conversion failed:", err);
+        failed++;
+        updateJob(job.id, { status: 'error' });
       }
+    }));
 
-      if (isMounted.current) {
-        setIsConverting(false);
+    if (isMounted.current) {
+      if (failed > 0) {
+        setError("動画の変換中にエラーが発生しました。");
       }
+      setIsConverting(false);
     }
-  }, []);
+  }, [jobs, updateJob]);
 
   return {
     isLoaded,
     isLoading,
     isConverting,
-    progress,
+    jobs,
     error,
-    loadFFmpeg,
-    convertVideo
+    enginePreference: preference,
+    setEnginePreference: setPreference,
+    webCodecsAvailable,
+    loadEngine,
+    addFiles,
+    removeJob,
+    clearJobs,
+    convertAll
   };
 }
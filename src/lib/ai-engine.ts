@@ -0,0 +1,181 @@
+// 背景削除モデルを載せたワーカーをモジュール単位で1つだけ持つ
+// ページを移動してもワーカー（とロード済みのモデル）は残るので、2回目以降の AI ラボは即座に使える
+import { TRANSFORMERS_VERSION } from './engine-assets';
+import { startRun, type StageTiming } from './perf';
+
+// scripts/fetch-onnx-wasm.mjs が public/transformers/<version>/ に onnxruntime-web の wasm を配置する
+export { TRANSFORMERS_VERSION };
+
+export type AiModelVariant = 'quantized' | 'full';
+
+export interface AiLoadProgress {
+  status: string;
+  file?: string;
+  progress?: number;
+}
+
+type WorkerResponse =
+  | { type: 'progress'; data: AiLoadProgress }
+  | { type: 'ready'; variant: AiModelVariant }
+  | { type: 'complete'; id: number; blob: Blob; timings: StageTiming[]; wasmMemory: number | null }
+  | { type: 'error'; id?: number; variant?: AiModelVariant; message: string };
+
+type CompleteMessage = Extract<WorkerResponse, { type: 'complete' }>;
+
+interface PendingJob {
+  resolve: (message: CompleteMessage) => void;
+  reject: (error: Error) => void;
+}
+
+// バッチでは、ワーカーが1枚を推論している間に次の1枚をデコードしておく
+const BATCH_IN_FLIGHT = 2;
+
+class AiEngine {
+  private worker: Worker | null = null;
+  private variant: AiModelVariant | null = null;
+  private loading: { variant: AiModelVariant; promise: Promise<void> } | null = null;
+  private loadCallbacks = new Map<AiModelVariant, { resolve: () => void; reject: (error: Error) => void }>();
+  private onProgress: ((progress: AiLoadProgress) => void) | null = null;
+  private pending = new Map<number, PendingJob>();
+  private nextId = 0;
+
+  get loadedVariant(): AiModelVariant | null {
+    return this.variant;
+  }
+
+  private getWorker(): Worker {
+    if (!this.worker) {
+      this.worker = new Worker(new URL('../workers/ai.worker.ts', import.meta.url), {
+        type: 'module'
+      });
+      this.worker.onmessage = (event: MessageEvent<WorkerResponse>) => this.handleMessage(event.data);
+    }
+    return this.worker;
+  }
+
+  private handleMessage(message: WorkerResponse) {
+    switch (message.type) {
+      case 'progress':
+        this.onProgress?.(message.data);
+        break;
+      case 'ready':
+        this.variant = message.variant;
+        this.loadCallbacks.get(message.variant)?.resolve();
+        this.loadCallbacks.delete(message.variant);
+        break;
+      case 'complete':
+        this.pending.get(message.id)?.resolve(message);
+        this.pending.delete(message.id);
+        break;
+      case 'error': {
+        const error = new Error(message.message);
+        if (message.variant) {
+          this.loadCallbacks.get(message.variant)?.reject(error);
+          this.loadCallbacks.delete(message.variant);
+        } else if (message.id !== undefined) {
+          this.pending.get(message.id)?.reject(error);
+          this.pending.delete(message.id);
+        }
+        break;
+      }
+    }
+  }
+
+  // モデルのロード（同じバリアントなら1回だけ。別のバリアントを選ぶと差し替える）
+  load(variant: AiModelVariant, onProgress?: (progress: AiLoadProgress) => void): Promise<void> {
+    this.onProgress = onProgress ?? null;
+    if (this.variant === variant) return Promise.resolve();
+    if (this.loading?.variant === variant) return this.loading.promise;
+
+    const worker = this.getWorker();
+    const mark = `ai-model-load-start-${variant}`;
+    performance.mark(mark);
+    const perf = startRun('ai-model', variant);
+    const promise = perf
+      .stage('load', () => new Promise<void>((resolve, reject) => {
+        this.loadCallbacks.set(variant, { resolve, reject });
+        worker.postMessage({ type: 'init', variant, wasmPaths: `/transformers/${TRANSFORMERS_VERSION}/` });
+      }))
+      .then(
+        () => {
+          performance.measure('ai-model-load', { start: mark, detail: { variant } });
+          perf.end();
+        },
+        (error) => {
+          perf.end(false);
+          throw error;
+        }
+      )
+      .finally(() => {
+        if (this.loading?.promise === promise) this.loading = null;
+      });
+    this.loading = { variant, promise };
+    return promise;
+  }
+
+  // ImageBitmap は転送する（ワーカーへのコピーなし）。デコードはブラウザがメインスレッド外で行う
+  private send(bitmap: ImageBitmap): Promise<CompleteMessage> {
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.getWorker().postMessage({ type: 'process', id, bitmap }, [bitmap]);
+    });
+  }
+
+  // 1枚分の計測（decode はメインスレッド側の createImageBitmap、残りはワーカーが返した時間）
+  private async process(image: Blob): Promise<Blob> {
+    const perf = startRun('ai', this.variant);
+    try {
+      const bitmap = await perf.stage('decode', () => createImageBitmap(image));
+      const { blob, timings, wasmMemory } = await this.send(bitmap);
+      perf.record(timings);
+      perf.memory(wasmMemory);
+      perf.bytes(image.size, blob.size);
+      perf.end();
+      return blob;
+    } catch (error) {
+      perf.end(false);
+      throw error;
+    }
+  }
+
+  removeBackground(image: Blob): Promise<Blob> {
+    return this.process(image);
+  }
+
+  removeBackgroundBatch(
+    images: Blob[],
+    onResult: (index: number, result: Blob | null, error?: Error) => void
+  ): Promise<void> {
+    return new Promise((resolve) => {
+      let next = 0;
+      let finished = 0;
+
+      const launch = () => {
+        while (next - finished < BATCH_IN_FLIGHT && next < images.length) {
+          const index = next++;
+          this.process(images[index])
+            .then(
+              (blob) => onResult(index, blob),
+              (error) => onResult(index, null, error instanceof Error ? error : new Error(String(error)))
+            )
+            .finally(() => {
+              finished++;
+              if (finished === images.length) resolve();
+              else launch();
+            });
+        }
+      };
+
+      if (images.length === 0) resolve();
+      else launch();
+    });
+  }
+}
+
+let engine: AiEngine | null = null;
+
+export function getAiEngine(): AiEngine {
+  if (!engine) engine = new AiEngine();
+  return engine;
+}
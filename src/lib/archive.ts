@@ -0,0 +1,113 @@
+import type { ZipOptions } from './zip';
+
+export interface ZipProgress {
+  index: number;
+  done: number;
+  total: number;
+}
+
+type WorkerResponse =
+  | { type: 'chunk'; chunk: Uint8Array }
+  | { type: 'progress'; index: number; done: number; total: number }
+  | { type: 'complete'; size: number }
+  | { type: 'error'; message: string };
+
+type SaveFilePicker = (options?: {
+  suggestedName?: string;
+  types?: { description?: string; accept: Record<string, string[]> }[];
+}) => Promise<FileSystemFileHandle>;
+
+// File System Access API（保存先へ直接書き込める）が使えるか
+export function supportsDirectWrite(): boolean {
+  return typeof window !== 'undefined' && 'showSaveFilePicker' in window;
+}
+
+export async function pickSaveFile(suggestedName: string): Promise<FileSystemFileHandle> {
+  const picker = (window as unknown as { showSaveFilePicker: SaveFilePicker }).showSaveFilePicker;
+  return picker({
+    suggestedName,
+    types: [{ description: 'ZIP archive', accept: { 'application/zip': ['.zip'] } }],
+  });
+}
+
+// 保存先を選べない環境用: チャンクを受け取るたびに Blob にして、最後に1つの Blob にまとめる
+// （大きな Blob はブラウザがディスクへ退避できるので、JS のヒープには残らない）
+export function blobSink(type: string): { writable: WritableStream<Uint8Array>; result: () => Blob } {
+  const parts: Blob[] = [];
+  return {
+    writable: new WritableStream<Uint8Array>({
+      write(chunk) {
+        parts.push(new Blob([chunk as unknown as BlobPart]));
+      },
+    }),
+    result: () => new Blob(parts, { type }),
+  };
+}
+
+// 同じ名前のファイルが複数あると上書きされるので、2つ目以降に連番を付ける
+export function uniqueNames(files: File[]): string[] {
+  const used = new Set<string>();
+  return files.map((file) => {
+    const dot = file.name.lastIndexOf('.');
+    const base = dot > 0 ? file.name.slice(0, dot) : file.name;
+    const ext = dot > 0 ? file.name.slice(dot) : '';
+    let name = file.name;
+    for (let n = 1; used.has(name); n++) name = `${base}-${n}${ext}`;
+    used.add(name);
+    return name;
+  });
+}
+
+// ワーカーでZIPを作り、writable へ順に書き込む。アーカイブのサイズを返す
+export function createZipArchive(
+  files: File[],
+  options: ZipOptions,
+  writable: WritableStream<Uint8Array>,
+  onProgress?: (progress: ZipProgress) => void
+): Promise<number> {
+  const worker = new Worker(new URL('../workers/zip.worker.ts', import.meta.url), {
+    type: 'module'
+  });
+  const writer = writable.getWriter();
+
+  return new Promise((resolve, reject) => {
+    let writing = Promise.resolve();
+
+    const fail = (error: Error) => {
+      worker.terminate();
+      writer.abort(error).catch(() => {});
+      reject(error);
+    };
+
+    worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+      const message = event.data;
+      switch (message.type) {
+        case 'chunk':
+          // 書き込みが終わってから ack を返す（ワーカー側の送信を書き込み速度に合わせる）
+          writing = writing
+            .then(() => writer.write(message.chunk))
+            .then(() => worker.postMessage({ type: 'ack' }))
+            .catch(fail);
+          break;
+        case 'progress':
+          onProgress?.(message);
+          break;
+        case 'complete':
+          writing
+            .then(() => writer.close())
+            .then(() => {
+              worker.terminate();
+              resolve(message.size);
+            })
+            .catch(fail);
+          break;
+        case 'error':
+          fail(new Error(message.message));
+          break;
+      }
+    };
+    worker.onerror = (event) => fail(new Error(event.message));
+
+    worker.postMessage({ type: 'start', files, names: uniqueNames(files), options });
+  });
+}
@@ -0,0 +1,498 @@
+// 音声だけのコンテナ（WAV・MP3・ADTS・Ogg）の読み書き（WebCodecs で変換するときに使う）
+// MP3・ADTS はフレームヘッダーを順に辿り、Ogg はページからパケットを組み立てる
+
+import {
+  BlobBuilder,
+  BlobReader,
+  StreamReader,
+  UnsupportedMediaError,
+  aacCodec,
+  fourcc,
+  type Demuxer,
+  type MediaSample,
+  type MediaTrack,
+} from './media-container';
+
+// --- WAV ---
+
+// WAV の PCM は AudioDecoder を通さず、そのまま AudioData にする（codec は 'pcm-<AudioData の形式>'）
+const PCM_FRAMES_PER_SAMPLE = 4096;
+
+export async function openWav(reader: BlobReader): Promise<Demuxer> {
+  const header = await reader.read(0, 12);
+  if (fourcc(header, 0) !== 'RIFF' || fourcc(header, 8) !== 'WAVE') throw new UnsupportedMediaError('wav: not a RIFF/WAVE file');
+
+  let pos = 12;
+  let format = 0;
+  let channels = 0;
+  let sampleRate = 0;
+  let bitsPerSample = 0;
+  let dataStart = -1;
+  let dataSize = 0;
+  while (pos + 8 <= reader.size) {
+    const chunk = await reader.read(pos, 8);
+    const view = new DataView(chunk.buffer);
+    const id = fourcc(chunk, 0);
+    const size = view.getUint32(4, true);
+    if (id === 'fmt ') {
+      const fmt = await reader.read(pos + 8, Math.min(size, 40));
+      const fmtView = new DataView(fmt.buffer);
+      format = fmtView.getUint16(0, true);
+      channels = fmtView.getUint16(2, true);
+      sampleRate = fmtView.getUint32(4, true);
+      bitsPerSample = fmtView.getUint16(14, true);
+      // WAVE_FORMAT_EXTENSIBLE は SubFormat の先頭2バイトが実際の形式
+      if (format === 0xfffe && fmt.length >= 26) format = fmtView.getUint16(24, true);
+    } else if (id === 'data') {
+      dataStart = pos + 8;
+      // サイズが 0 や 0xFFFFFFFF（書き込み途中・4GB 超）のときはファイル末尾まで
+      dataSize = size === 0 || size === 0xffffffff ? reader.size - dataStart : Math.min(size, reader.size - dataStart);
+      break;
+    }
+    pos += 8 + size + (size & 1);
+  }
+  if (dataStart < 0 || channels === 0) throw new UnsupportedMediaError('wav: missing fmt or data chunk');
+
+  const pcm =
+    format === 1 && bitsPerSample === 8 ? 'u8'
+    : format === 1 && bitsPerSample === 16 ? 's16'
+    : format === 1 && bitsPerSample === 24 ? 's24'
+    : format === 1 && bitsPerSample === 32 ? 's32'
+    : format === 3 && bitsPerSample === 32 ? 'f32'
+    : null;
+  if (!pcm) throw new UnsupportedMediaError(`wav: format ${format}/${bitsPerSample}bit`);
+
+  const frameBytes = (bitsPerSample / 8) * channels;
+  const frames = Math.floor(dataSize / frameBytes);
+  const duration = (frames / sampleRate) * 1e6;
+  const track: MediaTrack = { id: 1, kind: 'audio', codec: `pcm-${pcm}`, sampleRate, channels, duration };
+
+  async function* samples(): AsyncGenerator<MediaSample> {
+    const stream = new StreamReader(reader, dataStart);
+    for (let frame = 0; frame < frames; frame += PCM_FRAMES_PER_SAMPLE) {
+      const count = Math.min(PCM_FRAMES_PER_SAMPLE, frames - frame);
+      yield {
+        track: 1,
+        data: (await stream.take(count * frameBytes)).slice(),
+        timestamp: (frame / sampleRate) * 1e6,
+        decodeTimestamp: (frame / sampleRate) * 1e6,
+        duration: (count / sampleRate) * 1e6,
+        key: true,
+      };
+    }
+  }
+
+  return { format: 'wav', tracks: [track], duration, samples };
+}
+
+// 16bit PCM の WAV。サンプルを溜めて、最後にサイズの入ったヘッダーを先頭に付ける
+export class WavWriter {
+  private data = new BlobBuilder();
+
+  constructor(private sampleRate: number, private channels: number) {}
+
+  // インターリーブ済みの 16bit PCM（リトルエンディアン）
+  push(pcm: Uint8Array) {
+    this.data.push(pcm);
+  }
+
+  finalize(): Blob {
+    const size = Math.min(this.data.size, 0xffffffff - 36);
+    const header = new Uint8Array(44);
+    const view = new DataView(header.buffer);
+    header.set([0x52, 0x49, 0x46, 0x46], 0); // 'RIFF'
+    view.setUint32(4, 36 + size, true);
+    header.set([0x57, 0x41, 0x56, 0x45, 0x66, 0x6d, 0x74, 0x20], 8); // 'WAVEfmt '
+    view.setUint32(16, 16, true);
+    view.setUint16(20, 1, true);
+    view.setUint16(22, this.channels, true);
+    view.setUint32(24, this.sampleRate, true);
+    view.setUint32(28, this.sampleRate * this.channels * 2, true);
+    view.setUint16(32, this.channels * 2, true);
+    view.setUint16(34, 16, true);
+    header.set([0x64, 0x61, 0x74, 0x61], 36); // 'data'
+    view.setUint32(40, size, true);
+    return this.data.toBlob('audio/wav', [header]);
+  }
+}
+
+// --- MP3 ---
+
+const MP3_BITRATES = [
+  // MPEG-1 Layer 1, 2, 3
+  [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+  [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+  [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+  // MPEG-2 / 2.5 Layer 1, 2・3
+  [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+  [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+];
+const MP3_SAMPLE_RATES = [44100, 48000, 32000];
+
+interface Mp3Frame {
+  size: number;
+  samples: number;
+  sampleRate: number;
+  channels: number;
+}
+
+function parseMp3Header(bytes: Uint8Array, pos: number): Mp3Frame | null {
+  if (bytes[pos] !== 0xff || (bytes[pos + 1] & 0xe0) !== 0xe0) return null;
+  const version = (bytes[pos + 1] >> 3) & 0x03; // 0: 2.5, 2: 2, 3: 1
+  const layer = (bytes[pos + 1] >> 1) & 0x03; // 1: III, 2: II, 3: I
+  const bitrateIndex = bytes[pos + 2] >> 4;
+  const rateIndex = (bytes[pos + 2] >> 2) & 0x03;
+  if (version === 1 || layer === 0 || bitrateIndex === 0 || bitrateIndex === 15 || rateIndex === 3) return null;
+
+  const mpeg1 = version === 3;
+  const table = mpeg1 ? 3 - layer : layer === 3 ? 3 : 4;
+  const bitrate = MP3_BITRATES[table][bitrateIndex] * 1000;
+  const sampleRate = MP3_SAMPLE_RATES[rateIndex] / (mpeg1 ? 1 : version === 2 ? 2 : 4);
+  const padding = (bytes[pos + 2] >> 1) & 1;
+  const channels = bytes[pos + 3] >> 6 === 3 ? 1 : 2;
+
+  if (layer === 3) {
+    return { size: Math.floor((12 * bitrate) / sampleRate + padding) * 4, samples: 384, sampleRate, channels };
+  }
+  const samples = layer === 2 ? 1152 : mpeg1 ? 1152 : 576;
+  return { size: Math.floor(((samples / 8) * bitrate) / sampleRate) + padding, samples, sampleRate, channels };
+}
+
+export async function openMp3(reader: BlobReader): Promise<Demuxer> {
+  let start = 0;
+  const id3 = await reader.read(0, 10);
+  if (id3[0] === 0x49 && id3[1] === 0x44 && id3[2] === 0x33) {
+    // ID3v2 のサイズは 7bit ずつの synchsafe 整数
+    start = 10 + ((id3[6] << 21) | (id3[7] << 14) | (id3[8] << 7) | id3[9]) + (id3[5] & 0x10 ? 10 : 0);
+  }
+
+  // 最初のフレーム（ヘッダーの直後に次のフレームが続くものを本物とみなす）
+  const probe = await reader.read(start, 64 * 1024);
+  let first: Mp3Frame | null = null;
+  let offset = 0;
+  for (; offset + 4 < probe.length; offset++) {
+    const frame = parseMp3Header(probe, offset);
+    if (frame && (offset + frame.size + 4 > probe.length || parseMp3Header(probe, offset + frame.size))) {
+      first = frame;
+      break;
+    }
+  }
+  if (!first) throw new UnsupportedMediaError('mp3: no frame sync');
+  start += offset;
+
+  // Xing / Info フレームがあれば総フレーム数から長さが分かる（このフレーム自体は無音なので飛ばす）
+  const firstFrame = probe.subarray(offset, offset + first.size);
+  const text = new TextDecoder('latin1').decode(firstFrame);
+  let duration = 0;
+  const tag = Math.max(text.indexOf('Xing'), text.indexOf('Info'));
+  if (tag >= 0) {
+    const view = new DataView(firstFrame.buffer, firstFrame.byteOffset + tag);
+    if (view.getUint32(4) & 1) duration = (view.getUint32(8) * first.samples * 1e6) / first.sampleRate;
+    start += first.size;
+  } else {
+    // 固定ビットレートとして見積もる
+    duration = (((reader.size - start) / first.size) * first.samples * 1e6) / first.sampleRate;
+  }
+
+  const track: MediaTrack = { id: 1, kind: 'audio', codec: 'mp3', sampleRate: first.sampleRate, channels: first.channels, duration };
+
+  async function* samples(): AsyncGenerator<MediaSample> {
+    const stream = new StreamReader(reader, start);
+    let time = 0;
+    while (!stream.eof) {
+      const header = await stream.peek(4);
+      if (header.length < 4) return;
+      const frame = parseMp3Header(header, 0);
+      if (!frame) {
+        // 途中のゴミ（ID3v1 タグなど）は1バイトずつ読み飛ばす
+        stream.skip(1);
+        continue;
+      }
+      const data = (await stream.take(frame.size)).slice();
+      if (data.length < frame.size) return;
+      const frameDuration = (frame.samples / frame.sampleRate) * 1e6;
+      yield { track: 1, data, timestamp: time, decodeTimestamp: time, duration: frameDuration, key: true };
+      time += frameDuration;
+    }
+  }
+
+  return { format: 'mp3', tracks: [track], duration, samples };
+}
+
+// --- ADTS（AAC） ---
+
+const AAC_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350];
+
+export async function openAdts(reader: BlobReader): Promise<Demuxer> {
+  const header = await reader.read(0, 7);
+  if (header[0] !== 0xff || (header[1] & 0xf6) !== 0xf0) throw new UnsupportedMediaError('adts: no frame sync');
+  const profile = header[2] >> 6;
+  const rateIndex = (header[2] >> 2) & 0x0f;
+  const channels = ((header[2] & 0x01) << 2) | (header[3] >> 6);
+  const sampleRate = AAC_SAMPLE_RATES[rateIndex];
+  if (!sampleRate) throw new UnsupportedMediaError('adts: invalid sample rate');
+
+  // AudioSpecificConfig（objectType 5bit, rateIndex 4bit, channels 4bit）
+  const objectType = profile + 1;
+  const config = new Uint8Array([(objectType << 3) | (rateIndex >> 1), ((rateIndex & 1) << 7) | (channels << 3)]);
+  const frameDuration = (1024 / sampleRate) * 1e6;
+  const firstLength = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5);
+  const duration = firstLength > 0 ? (reader.size / firstLength) * frameDuration : 0;
+
+  const track: MediaTrack = { id: 1, kind: 'audio', codec: aacCodec(config), description: config, sampleRate, channels, duration };
+
+  async function* samples(): AsyncGenerator<MediaSample> {
+    const stream = new StreamReader(reader);
+    let time = 0;
+    while (!stream.eof) {
+      const head = await stream.peek(9);
+      if (head.length < 7 || head[0] !== 0xff || (head[1] & 0xf6) !== 0xf0) return;
+      const length = ((head[3] & 0x03) << 11) | (head[4] << 3) | (head[5] >> 5);
+      const headerSize = head[1] & 0x01 ? 7 : 9; // protection_absent でなければ CRC が付く
+      const frame = await stream.take(length);
+      if (frame.length < length || length <= headerSize) return;
+      // description を渡すので、デコーダーにはヘッダーを除いた生の AAC を渡す
+      yield { track: 1, data: frame.slice(headerSize), timestamp: time, decodeTimestamp: time, duration: frameDuration, key: true };
+      time += frameDuration;
+    }
+  }
+
+  return { format: 'adts', tracks: [track], duration, samples };
+}
+
+// --- Ogg ---
+
+// Ogg の CRC（多項式 0x04C11DB7、反転なし）
+const OGG_CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let i = 0; i < 256; i++) {
+    let r = i << 24;
+    for (let j = 0; j < 8; j++) r = r & 0x80000000 ? (r << 1) ^ 0x04c11db7 : r << 1;
+    table[i] = r >>> 0;
+  }
+  return table;
+})();
+
+function oggCrc(bytes: Uint8Array): number {
+  let crc = 0;
+  for (let i = 0; i < bytes.length; i++) crc = ((crc << 8) ^ OGG_CRC_TABLE[((crc >>> 24) ^ bytes[i]) & 0xff]) >>> 0;
+  return crc;
+}
+
+interface OggPacket {
+  data: Uint8Array;
+  granule: number; // そのパケットでページが終わる場合だけ有効（それ以外は -1）
+}
+
+async function* oggPackets(reader: BlobReader, serial: { value: number | null }): AsyncGenerator<OggPacket> {
+  const stream = new StreamReader(reader);
+  let partial: Uint8Array[] = [];
+  while (!stream.eof) {
+    const header = await stream.peek(27);
+    if (header.length < 27 || fourcc(header, 0) !== 'OggS') return;
+    const view = new DataView(header.buffer, header.byteOffset, 27);
+    const granule = view.getUint32(6, true) + view.getInt32(10, true) * 0x100000000;
+    const pageSerial = view.getUint32(14, true);
+    const segments = header[26];
+    stream.skip(27);
+    const lacing = (await stream.take(segments)).slice();
+    const bodySize = lacing.reduce((sum, value) => sum + value, 0);
+    const body = (await stream.take(bodySize)).slice();
+
+    // 最初の論理ストリームだけを読む（音声だけの Ogg を想定）
+    serial.value ??= pageSerial;
+    if (pageSerial !== serial.value) continue;
+
+    let pos = 0;
+    let size = 0;
+    for (let i = 0; i < segments; i++) {
+      size += lacing[i];
+      if (lacing[i] === 255) continue;
+      partial.push(body.subarray(pos, pos + size));
+      pos += size;
+      size = 0;
+      const data = partial.length === 1 ? partial[0] : concat(partial);
+      partial = [];
+      // このページで最後に終わるパケットかどうか
+      const last = !lacing.subarray(i + 1).some((value) => value < 255);
+      yield { data, granule: last ? granule : -1 };
+    }
+    if (size > 0) partial.push(body.subarray(pos, pos + size));
+  }
+}
+
+function concat(parts: Uint8Array[]): Uint8Array {
+  const result = new Uint8Array(parts.reduce((sum, part) => sum + part.length, 0));
+  let offset = 0;
+  parts.forEach((part) => {
+    result.set(part, offset);
+    offset += part.length;
+  });
+  return result;
+}
+
+// Opus パケットの長さ（TOC バイトからフレームの長さと数を求める。48kHz のサンプル数）
+export function opusPacketSamples(packet: Uint8Array): number {
+  if (packet.length === 0) return 0;
+  const config = packet[0] >> 3;
+  const frameSize =
+    config < 12 ? [480, 960, 1920, 2880][config & 3]
+    : config < 16 ? [480, 960][config & 1]
+    : [120, 240, 480, 960][config & 3];
+  const code = packet[0] & 3;
+  const frames = code === 0 ? 1 : code === 3 ? (packet[1] ?? 0) & 0x3f : 2;
+  return frameSize * frames;
+}
+
+// Vorbis のヘッダー3つを Xiph のレーシングでまとめる（WebCodecs と Matroska の CodecPrivate の形式）
+function xiphLace(packets: Uint8Array[]): Uint8Array {
+  const sizes: number[] = [packets.length - 1];
+  packets.slice(0, -1).forEach((packet) => {
+    let size = packet.length;
+    while (size >= 255) {
+      sizes.push(255);
+      size -= 255;
+    }
+    sizes.push(size);
+  });
+  return concat([new Uint8Array(sizes), ...packets]);
+}
+
+export async function openOgg(reader: BlobReader): Promise<Demuxer> {
+  const serial = { value: null as number | null };
+  const headerPackets: Uint8Array[] = [];
+  let codec: 'opus' | 'vorbis' | null = null;
+  let sampleRate = 48000;
+  let channels = 2;
+  let preSkip = 0;
+
+  for await (const packet of oggPackets(reader, serial)) {
+    headerPackets.push(packet.data.slice());
+    const first = headerPackets[0];
+    if (headerPackets.length === 1) {
+      const magic = new TextDecoder('latin1').decode(first.subarray(0, 8));
+      if (magic === 'OpusHead') {
+        codec = 'opus';
+        channels = first[9];
+        preSkip = first[10] | (first[11] << 8);
+      } else if (magic.slice(1, 7) === 'vorbis' && first[0] === 1) {
+        codec = 'vorbis';
+        channels = first[11];
+        sampleRate = new DataView(first.buffer, first.byteOffset).getUint32(12, true);
+      } else {
+        throw new UnsupportedMediaError('ogg: only Opus and Vorbis are supported');
+      }
+    }
+    // Opus はヘッダー2つ（OpusHead・OpusTags）、Vorbis は3つ
+    if (headerPackets.length === (codec === 'opus' ? 2 : 3)) break;
+  }
+  if (!codec) throw new UnsupportedMediaError('ogg: no stream');
+
+  // 長さは最後のページのグラニュール位置から分かる
+  const tail = await reader.read(Math.max(0, reader.size - 65307), 65307);
+  let lastGranule = 0;
+  for (let i = tail.length - 27; i >= 0; i--) {
+    if (tail[i] === 0x4f && tail[i + 1] === 0x67 && tail[i + 2] === 0x67 && tail[i + 3] === 0x53) {
+      const view = new DataView(tail.buffer, tail.byteOffset + i);
+      lastGranule = view.getUint32(6, true) + view.getInt32(10, true) * 0x100000000;
+      break;
+    }
+  }
+  const duration = (Math.max(0, lastGranule - preSkip) / sampleRate) * 1e6;
+
+  const description = codec === 'opus' ? headerPackets[0] : xiphLace(headerPackets);
+  const headerCount = headerPackets.length;
+  const track: MediaTrack = { id: 1, kind: 'audio', codec, description, sampleRate, channels, duration };
+
+  async function* samples(): AsyncGenerator<MediaSample> {
+    let index = 0;
+    // Opus は pre-skip の分だけ負の時刻から始める（捨てられるサンプル）
+    let time = codec === 'opus' ? (-preSkip / 48000) * 1e6 : 0;
+    for await (const packet of oggPackets(reader, { value: serial.value })) {
+      if (index++ < headerCount) continue;
+      let duration = 0;
+      if (codec === 'opus') {
+        duration = (opusPacketSamples(packet.data) / 48000) * 1e6;
+      } else if (packet.granule >= 0) {
+        // Vorbis のパケット長はモード次第なので、ページ末のグラニュール位置で時刻を合わせる
+        duration = Math.max(0, (packet.granule / sampleRate) * 1e6 - time);
+      }
+      yield { track: 1, data: packet.data, timestamp: time, decodeTimestamp: time, duration, key: true };
+      time += duration;
+    }
+  }
+
+  return { format: 'ogg', tracks: [track], duration, samples };
+}
+
+// Ogg Opus の書き出し。最後のページに EOS フラグを付けるため、ページを1つ手元に残しておく
+export class OggOpusWriter {
+  private data = new BlobBuilder();
+  private packets: Uint8Array[] = [];
+  private packetBytes = 0;
+  private granule = 0;
+  private sequence = 0;
+  // グラニュール位置は pre-skip も含めたサンプル数（エンコーダーの出力は pre-skip 分から始まる）
+  private pending: { packets: Uint8Array[]; granule: number } | null = null;
+  private readonly serial = Math.floor(Math.random() * 0xffffffff);
+
+  constructor(head: Uint8Array) {
+    this.writePage([head], 0, 0x02);
+    const vendor = new TextEncoder().encode('Lumina');
+    const tags = new Uint8Array(8 + 4 + vendor.length + 4);
+    const view = new DataView(tags.buffer);
+    tags.set(new TextEncoder().encode('OpusTags'));
+    view.setUint32(8, vendor.length, true);
+    tags.set(vendor, 12);
+    view.setUint32(12 + vendor.length, 0, true); // コメントなし
+    this.writePage([tags], 0, 0);
+  }
+
+  push(packet: Uint8Array) {
+    this.packets.push(packet);
+    this.packetBytes += packet.length;
+    this.granule += opusPacketSamples(packet);
+    // 1ページは 255 セグメントまで。おおよそ 1 秒（50 パケット）ごとにページを閉じる
+    const segments = this.packets.reduce((sum, p) => sum + Math.floor(p.length / 255) + 1, 0);
+    if (this.packets.length >= 50 || segments > 200 || this.packetBytes > 60000) this.closePage();
+  }
+
+  private closePage() {
+    if (this.packets.length === 0) return;
+    if (this.pending) this.writePage(this.pending.packets, this.pending.granule, 0);
+    this.pending = { packets: this.packets, granule: this.granule };
+    this.packets = [];
+    this.packetBytes = 0;
+  }
+
+  finalize(): Blob {
+    this.closePage();
+    if (this.pending) this.writePage(this.pending.packets, this.pending.granule, 0x04);
+    this.pending = null;
+    return this.data.toBlob('audio/ogg');
+  }
+
+  private writePage(packets: Uint8Array[], granule: number, flags: number) {
+    const lacing: number[] = [];
+    packets.forEach((packet) => {
+      let size = packet.length;
+      while (size >= 255) {
+        lacing.push(255);
+        size -= 255;
+      }
+      lacing.push(size);
+    });
+    const header = new Uint8Array(27 + lacing.length);
+    const view = new DataView(header.buffer);
+    header.set([0x4f, 0x67, 0x67, 0x53, 0, flags]);
+    view.setUint32(6, granule % 0x100000000, true);
+    view.setUint32(10, Math.floor(granule / 0x100000000), true);
+    view.setUint32(14, this.serial, true);
+    view.setUint32(18, this.sequence++, true);
+    header[26] = lacing.length;
+    header.set(lacing, 27);
+    const page = concat([header, ...packets]);
+    new DataView(page.buffer).setUint32(22, oggCrc(page), true);
+    this.data.push(page);
+  }
+}
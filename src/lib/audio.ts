@@ -1,34 +1,89 @@
-import { FFmpeg } from '@ffmpeg/ffmpeg';
-import { fetchFile, toBlobURL } from '@ffmpeg/util';
+import type { FFmpeg } from '@ffmpeg/ffmpeg';
+import { getFFmpeg } from './ffmpeg-engine';
+import { startRun } from './perf';
+
+export type AudioOutputFormat = 'mp3' | 'wav' | 'aac' | 'ogg';
+
+const MIME_TYPES: Record<AudioOutputFormat, string> = {
+  mp3: 'audio/mpeg',
+  wav: 'audio/wav',
+  aac: 'audio/aac',
+  ogg: 'audio/ogg',
+};
+
+// 音声ラボの ffmpeg.wasm による変換（WebCodecs で変換できない形式・ブラウザ用。media-engine から呼ぶ）
+export async function convertAudioWithFFmpeg(
+  file: File,
+  outputFormat: AudioOutputFormat,
+  onProgress?: (progress: number) => void
+): Promise<Blob> {
+  // 動画ラボ・音声ラボで共有するインスタンス（WebCodecs を使う場合はここで初めてロードする）
+  const ffmpeg = await getFFmpeg();
+  const handleProgress = ({ progress }: { progress: number }) => onProgress?.(progress);
+  const perf = startRun('audio', outputFormat);
+
+  try {
+    ffmpeg.on('progress', handleProgress);
+
+    // 拡張子を取得
+    const ext = file.name.split('.').pop() || 'tmp';
+    const inputFileName = `input.${ext}`;
+    const outputFileName = `output.${outputFormat}`;
+
+    await perf.stage('read', async () => {
+      const { fetchFile } = await import('@ffmpeg/util');
+      await ffmpeg.writeFile(inputFileName, await fetchFile(file));
+    });
 
-export class AudioProcessor {
-  private ffmpeg: FFmpeg | null = null;
-  private loaded: boolean = false;
+    // コマンド構築
+    // オーディオ変換用の基本的なパラメータ
+    const args = ['-i', inputFileName];
 
-  async load(onProgress: (p: number) => void) {
-    if (this.loaded && this.ffmpeg) return;
-
-    if (!this.ffmpeg) {
-      this.ffmpeg = new FFmpeg();
+    if (outputFormat === 'mp3') {
+      args.push('-acodec', 'libmp3lame', '-q:a', '2');
+    } else if (outputFormat === 'aac') {
+      args.push('-acodec', 'aac', '-b:a', '192k');
     }
 
-    const baseURL = 'https://unpkg.com/@ffmpeg/core@0.12.6/dist/umd';
+    args.push(outputFileName);
 
-    this.ffmpeg.on('progress', ({ progress }) => {
-      onProgress(progress);
-    });
+    // デコードとエンコードは ffmpeg の1回の exec で行われる
+    await perf.stage('encode', () => ffmpeg.exec(args));
 
-    await this.ffmpeg.load({
-      coreURL: await toBlobURL(`${baseURL}/ffmpeg-core.js`, 'text/javascript'),
-      wasmURL: await toBlobURL(`${baseURL}/ffmpeg-core.wasm`, 'application/wasm'),
+    const data = await perf.stage('write', async () => {
+      const output = await ffmpeg.readFile(outputFileName);
+      await ffmpeg.deleteFile(inputFileName);
+      await ffmpeg.deleteFile(outputFileName);
+      return output;
     });
 
+    const blob = new Blob([data as unknown as BlobPart], { type: MIME_TYPES[outputFormat] });
+    perf.bytes(file.size, blob.size);
+    perf.end(true, { engine: 'ffmpeg' });
+    return blob;
+  } catch (err) {
+    perf.end(false, { engine: 'ffmpeg' });
+    throw err;
+  } finally {
+    ffmpeg.off('progress', handleProgress);
+  }
+}
+
+export class AudioProcessor {
+  private ffmpeg: FFmpeg | null = null;
+  private loaded: boolean = false;
+
+  async load() {
+    if (this.loaded && this.ffmpeg) return;
+
+    // 動画ラボ・音声ラボと共有するインスタンス
+    this.ffmpeg = await getFFmpeg();
     this.loaded = true;
   }
 
   async convertToMp3(file: File, onProgress: (p: number) => void): Promise<Blob> {
     if (!this.loaded || !this.ffmpeg) {
-      await this.load((p) => {});
+      await this.load();
     }
 
     if (!this.ffmpeg) throw new Error("FFmpegが読み込まれていません");
@@ -36,14 +91,22 @@ export class AudioProcessor {
     const inputName = `input_${file.name.replace(/\s/g, '_')}`;
     const outputName = 'output.mp3';
 
+    const handleProgress = ({ progress }: { progress: number }) => onProgress(progress);
+    this.ffmpeg.on('progress', handleProgress);
+
+    const { fetchFile } = await import('@ffmpeg/util');
     await this.ffmpeg.writeFile(inputName, await fetchFile(file));
 
     // MP3変換 (192k)
-    await this.ffmpeg.exec([
-      '-i', inputName,
-      '-b:a', '192k',
-      outputName
-    ]);
+    try {
+      await this.ffmpeg.exec([
+        '-i', inputName,
+        '-b:a', '192k',
+        outputName
+      ]);
+    } finally {
+      this.ffmpeg.off('progress', handleProgress);
+    }
 
     const data = await this.ffmpeg.readFile(outputName);
 
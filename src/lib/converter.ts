@@ -1,7 +1,15 @@
-// import heic2any from "heic2any";  <-- これを削除して、下で動的に読み込みます
+import { isHeic } from "./heic";
+import { getImageWorkerPool } from "./image-pool";
+import { startRun } from "./perf";
 
 export type OutputFormat = "image/webp" | "image/jpeg" | "image/png";
 
+declare global {
+  interface Window {
+    __luminaImage?: { convertToWebP: typeof convertToWebP };
+  }
+}
+
 // ファイルの拡張子を取得
 function getExtension(mimeType: string): string {
   switch (mimeType) {
@@ -17,41 +25,37 @@ export async function convertToWebP(
   quality: number = 0.8,
   targetFormat: OutputFormat = "image/webp"
 ): Promise<{ blob: Blob; url: string; originalSize: number; newSize: number }> {
-  
-  return new Promise(async (resolve, reject) => {
-    let sourceBlob: Blob = file;
+  // HEICは<img>で読めないので、中間のJPEGを作らずにワーカーでタイルから直接エンコードする
+  if (isHeic(file)) {
+    const { blob, originalSize, newSize } = await getImageWorkerPool().convert(file, { format: targetFormat, quality });
+    return { blob, url: URL.createObjectURL(blob), originalSize, newSize };
+  }
 
-    // 🍏 HEICの場合、ここで動的にライブラリを読み込む！（サーバーでのエラー回避）
-    if (file.name.toLowerCase().endsWith(".heic") || file.type === "image/heic") {
-      try {
-        // 👇 ここが修正ポイント！使う直前に読み込む
-        const heic2any = (await import("heic2any")).default;
-        
-        const result = await heic2any({
-          blob: file,
-          toType: "image/jpeg",
-          quality: 1.0
-        });
-        sourceBlob = Array.isArray(result) ? result[0] : result;
-      } catch (e) {
-        console.error("HEIC conversion failed", e);
-        reject(new Error("HEIC conversion failed"));
-        return;
-      }
-    }
+  return new Promise((resolve, reject) => {
+    // コールバックが続くので、各段階の開始時刻を stageStart に持ち回って計る
+    const perf = startRun('image', targetFormat);
+    const fail = (error: unknown) => {
+      perf.end(false);
+      reject(error);
+    };
 
     const reader = new FileReader();
+    let stageStart = performance.now();
     
     reader.onload = (event) => {
+      perf.measure('read', stageStart);
+      stageStart = performance.now();
       const img = new Image();
       img.onload = () => {
+        perf.measure('decode', stageStart);
+        stageStart = performance.now();
         const canvas = document.createElement('canvas');
         canvas.width = img.width;
         canvas.height = img.height;
         
         const ctx = canvas.getContext('2d');
         if (!ctx) {
-          reject(new Error('Canvas context not found'));
+          fail(new Error('Canvas context not found'));
           return;
         }
         
@@ -62,13 +66,18 @@ export async function convertToWebP(
         }
         
         ctx.drawImage(img, 0, 0);
+        perf.measure('compute', stageStart);
+        stageStart = performance.now();
         
         canvas.toBlob(
           (blob) => {
+            perf.measure('encode', stageStart);
             if (!blob) {
-              reject(new Error('Conversion failed'));
+              fail(new Error('Conversion failed'));
               return;
             }
+            perf.bytes(file.size, blob.size);
+            perf.end();
             const url = URL.createObjectURL(blob);
             resolve({
               blob,
@@ -85,11 +94,18 @@ export async function convertToWebP(
       img.src = event.target?.result as string;
     };
     
-    reader.onerror = (error) => reject(error);
-    reader.readAsDataURL(sourceBlob);
+    reader.onerror = (error) => fail(error);
+    reader.readAsDataURL(file);
   });
 }
 
+// window.__luminaImage を用意する（何度呼んでもよい）
+// verification/bench_image_batch.py が、エディタの UI を通さずにメインスレッドの変換を直接呼ぶのに使う
+export function installImageApi() {
+  if (typeof window === 'undefined' || window.__luminaImage) return;
+  window.__luminaImage = { convertToWebP };
+}
+
 export function formatBytes(bytes: number, decimals = 2) {
   if (!+bytes) return '0 Bytes';
   const k = 1024;
@@ -0,0 +1,41 @@
+// ファイルの先頭バイトから形式を判定して、対応するデマルチプレクサを開く
+// 拡張子や MIME タイプは当てにしない（.mov の中身が MP4、.m4a が ADTS ということもある）
+
+import { openAdts, openMp3, openOgg, openWav } from './audio-containers';
+import { BlobReader, UnsupportedMediaError, fourcc, type ContainerFormat, type Demuxer } from './media-container';
+import { openMp4 } from './mp4';
+import { openWebm } from './webm';
+
+export function sniffContainer(head: Uint8Array): ContainerFormat | null {
+  if (head.length >= 12 && fourcc(head, 4) === 'ftyp') return 'mp4';
+  // ftyp の無い古い QuickTime
+  if (head.length >= 8 && ['moov', 'mdat', 'wide', 'free'].includes(fourcc(head, 4))) return 'mp4';
+  if (head.length >= 4 && head[0] === 0x1a && head[1] === 0x45 && head[2] === 0xdf && head[3] === 0xa3) return 'webm';
+  if (head.length >= 12 && fourcc(head, 0) === 'RIFF' && fourcc(head, 8) === 'WAVE') return 'wav';
+  if (head.length >= 4 && fourcc(head, 0) === 'OggS') return 'ogg';
+  if (head.length >= 3 && head[0] === 0x49 && head[1] === 0x44 && head[2] === 0x33) return 'mp3'; // ID3
+  if (head.length >= 2 && head[0] === 0xff && (head[1] & 0xf6) === 0xf0) return 'adts';
+  if (head.length >= 2 && head[0] === 0xff && (head[1] & 0xe0) === 0xe0) return 'mp3';
+  return null;
+}
+
+export async function openDemuxer(file: Blob): Promise<Demuxer> {
+  const reader = new BlobReader(file);
+  const format = sniffContainer(await reader.read(0, 16));
+  switch (format) {
+    case 'mp4':
+      return openMp4(reader);
+    case 'webm':
+      return openWebm(reader);
+    case 'wav':
+      return openWav(reader);
+    case 'ogg':
+      return openOgg(reader);
+    case 'mp3':
+      return openMp3(reader);
+    case 'adts':
+      return openAdts(reader);
+    default:
+      throw new UnsupportedMediaError('unknown container');
+  }
+}
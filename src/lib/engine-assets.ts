@@ -0,0 +1,112 @@
+// 重いランタイム資産（FFmpeg コア・Tesseract・onnxruntime-web の wasm・背景削除モデル）の一覧
+// Service Worker（src/service-worker）がアイドル時にこの一覧をバージョン付きのキャッシュへ先読みし、
+// next.config.ts の runtimeCaching も同じキャッシュ名から配信するので、一度温まればオフラインでも各ツールが動く
+// next.config.ts と Service Worker からも読むため、このファイルは他のモジュールに依存させない
+
+// scripts/fetch-*.mjs の VERSION と揃えること
+export const FFMPEG_CORE_VERSION = '0.12.6';
+export const TESSERACT_VERSION = '7.0.0';
+export const LANG_DATA_VERSION = '4.0.0_best_int';
+export const TRANSFORMERS_VERSION = '2.17.2';
+
+// 背景削除のモデル（ai.worker が読み込む）
+export const MODEL_ID = 'Xenova/modnet';
+// モデルの重みは Hugging Face の main を指すので、差し替えたいときはこの番号を上げて古いキャッシュを捨てる
+const MODEL_CACHE_VERSION = 1;
+
+export const ENGINE_CACHE_PREFIX = 'lumina-engine-';
+
+// バージョンをキャッシュ名に含める（更新後は Service Worker の activate で古い名前のキャッシュを消す）
+export const ENGINE_CACHES = {
+  ffmpeg: `${ENGINE_CACHE_PREFIX}ffmpeg-${FFMPEG_CORE_VERSION}`,
+  tesseract: `${ENGINE_CACHE_PREFIX}tesseract-${TESSERACT_VERSION}-${LANG_DATA_VERSION}`,
+  onnx: `${ENGINE_CACHE_PREFIX}onnx-${TRANSFORMERS_VERSION}`,
+  model: `${ENGINE_CACHE_PREFIX}modnet-v${MODEL_CACHE_VERSION}`,
+} as const;
+
+// バージョンなしの名前で使っていた以前のキャッシュ（transformers-cache は transformers.js の既定）
+export const LEGACY_ENGINE_CACHES = ['ffmpeg-core', 'tesseract-data', 'onnx-runtime', 'transformers-cache'];
+
+export type EngineGroupId = 'tesseract' | 'onnx' | 'model' | 'ffmpeg';
+
+export interface EngineAsset {
+  url: string;
+  bytes: number; // 容量の見積もりに使う目安のサイズ
+}
+
+export interface EngineAssetGroup {
+  id: EngineGroupId;
+  cacheName: string;
+  assets: EngineAsset[];
+}
+
+export type EngineWarmupState = 'cached' | 'skipped' | 'failed';
+
+// ページ → Service Worker: 先読みの依頼
+export interface EngineWarmupRequest {
+  type: 'WARM_ENGINES';
+  isolated: boolean;
+}
+
+// Service Worker → ページ: 先読みの結果（グループごと）
+export interface EngineWarmupReport {
+  type: 'ENGINE_WARMUP';
+  groups: Partial<Record<EngineGroupId, EngineWarmupState>>;
+  usage: number | null;
+  quota: number | null;
+}
+
+const MB = 1024 * 1024;
+
+/**
+ * 先読みするグループを小さい順に返す（容量が足りないときに、使えるエンジンをできるだけ多く残すため）
+ * isolated は crossOriginIsolated。FFmpeg と onnxruntime-web は、それで選ばれるバリアントだけを取る
+ */
+export function engineAssetGroups(isolated: boolean): EngineAssetGroup[] {
+  const tesseract = `/tesseract/${TESSERACT_VERSION}`;
+  const onnx = `/transformers/${TRANSFORMERS_VERSION}`;
+  const ffmpeg = `/ffmpeg/${FFMPEG_CORE_VERSION}/${isolated ? 'mt' : 'st'}`;
+  const model = `https://huggingface.co/${MODEL_ID}/resolve/main`;
+
+  return [
+    {
+      id: 'tesseract',
+      cacheName: ENGINE_CACHES.tesseract,
+      assets: [
+        { url: `${tesseract}/worker.min.js`, bytes: 0.1 * MB },
+        // tesseract.js は対応していれば relaxed SIMD、なければ SIMD 版のコアを選ぶ
+        { url: `${tesseract}/core/tesseract-core-relaxedsimd-lstm.wasm.js`, bytes: 3.9 * MB },
+        { url: `${tesseract}/core/tesseract-core-simd-lstm.wasm.js`, bytes: 3.9 * MB },
+        { url: `${tesseract}/lang/${LANG_DATA_VERSION}/eng.traineddata.gz`, bytes: 2.9 * MB },
+        { url: `${tesseract}/lang/${LANG_DATA_VERSION}/jpn.traineddata.gz`, bytes: 2.4 * MB },
+      ],
+    },
+    {
+      id: 'onnx',
+      cacheName: ENGINE_CACHES.onnx,
+      assets: [
+        { url: `${onnx}/ort-wasm-simd.wasm`, bytes: 10.3 * MB },
+        ...(isolated ? [{ url: `${onnx}/ort-wasm-simd-threaded.wasm`, bytes: 10.8 * MB }] : []),
+      ],
+    },
+    {
+      // transformers.js がキャッシュを引くキー（リモートの URL）のまま保存する。既定の quantized 版だけ
+      id: 'model',
+      cacheName: ENGINE_CACHES.model,
+      assets: [
+        { url: `${model}/config.json`, bytes: 0 },
+        { url: `${model}/preprocessor_config.json`, bytes: 0 },
+        { url: `${model}/onnx/model_quantized.onnx`, bytes: 6.6 * MB },
+      ],
+    },
+    {
+      id: 'ffmpeg',
+      cacheName: ENGINE_CACHES.ffmpeg,
+      assets: [
+        { url: `${ffmpeg}/ffmpeg-core.js`, bytes: 0.1 * MB },
+        { url: `${ffmpeg}/ffmpeg-core.wasm`, bytes: 32 * MB },
+        ...(isolated ? [{ url: `${ffmpeg}/ffmpeg-core.worker.js`, bytes: 0 }] : []),
+      ],
+    },
+  ];
+}
@@ -0,0 +1,63 @@
+// 最初のアイドル時に、Service Worker へエンジン資産の先読みを頼む（src/service-worker が実際に取りに行く）
+// 結果は window.__luminaEngineWarmup に置く（verification/verify_safety.py が完了を待つのに使う）
+import type { EngineWarmupReport, EngineWarmupRequest } from './engine-assets';
+
+declare global {
+  interface Window {
+    __luminaEngineWarmup?: EngineWarmupReport;
+  }
+}
+
+// ページの読み込みが落ち着いてから。アイドルが来なくてもこれだけ待てば頼む
+const IDLE_TIMEOUT = 10000;
+
+let requested = false;
+
+async function requestWarmup() {
+  // 開発サーバーでは next-pwa が無効なので、登録がなければ何もしない
+  // 初回訪問ではまだインストール中のことがあるので、有効になるのを待つ
+  if (!(await navigator.serviceWorker.getRegistration())) return;
+  const worker = (await navigator.serviceWorker.ready).active;
+  if (!worker) return;
+
+  navigator.serviceWorker.addEventListener('message', (event: MessageEvent<EngineWarmupReport>) => {
+    if (event.data?.type === 'ENGINE_WARMUP') window.__luminaEngineWarmup = event.data;
+  });
+  const message: EngineWarmupRequest = { type: 'WARM_ENGINES', isolated: window.crossOriginIsolated };
+  worker.postMessage(message);
+}
+
+/**
+ * 先読みを予約する（1ページの寿命で1回だけ）。戻り値は予約の取り消し
+ * データセーバーが有効なときは、使うかわからない数十MBを取りに行かない
+ */
+export function scheduleEngineWarmup(): () => void {
+  if (requested || typeof window === 'undefined' || !('serviceWorker' in navigator)) return () => {};
+  const connection = (navigator as Navigator & { connection?: { saveData?: boolean } }).connection;
+  if (connection?.saveData) return () => {};
+
+  const idleSupported = typeof window.requestIdleCallback === 'function';
+  let handle: number | null = null;
+  let cancelled = false;
+  const run = () => {
+    if (cancelled) return;
+    requested = true;
+    requestWarmup().catch((error) => console.warn('Engine warmup request failed:', error));
+  };
+  const idle = () => {
+    if (cancelled) return;
+    handle = idleSupported ? window.requestIdleCallback(run, { timeout: IDLE_TIMEOUT }) : window.setTimeout(run, IDLE_TIMEOUT);
+  };
+
+  if (document.readyState === 'complete') idle();
+  else window.addEventListener('load', idle, { once: true });
+
+  return () => {
+    cancelled = true;
+    window.removeEventListener('load', idle);
+    if (handle !== null) {
+      if (idleSupported) window.cancelIdleCallback(handle);
+      else window.clearTimeout(handle);
+    }
+  };
+}
@@ -0,0 +1,100 @@
+import type { FFmpeg } from '@ffmpeg/ffmpeg';
+import { FFMPEG_CORE_VERSION } from './engine-assets';
+import { startRun } from './perf';
+
+export { FFMPEG_CORE_VERSION };
+
+// scripts/fetch-ffmpeg-core.mjs が public/ffmpeg/<version>/ に配置するコア
+// 同一オリジン配信なので toBlobURL は不要。URLが安定しているため、
+// Service Worker のキャッシュと V8 の WebAssembly コードキャッシュ
+// （コンパイル済みモジュールの再利用）がそのまま効く。バージョンは engine-assets.ts で管理する。
+
+export type FFmpegCoreFlavor = 'st' | 'mt';
+
+// 動画ラボと音声ラボで1つのインスタンスを共有する（約30MBのwasmを二重に読まない）
+let ffmpegInstance: FFmpeg | null = null;
+let loadPromise: Promise<FFmpeg> | null = null;
+let loadedFlavor: FFmpegCoreFlavor | null = null;
+
+// マルチスレッド版は SharedArrayBuffer が必要
+// （next.config.ts の COOP/COEP ヘッダーで crossOriginIsolated になっている場合のみ）
+export function preferredFlavor(): FFmpegCoreFlavor {
+  if (typeof window === 'undefined') return 'st';
+  return window.crossOriginIsolated && typeof SharedArrayBuffer !== 'undefined' ? 'mt' : 'st';
+}
+
+export function coreURLs(flavor: FFmpegCoreFlavor) {
+  const base = `/ffmpeg/${FFMPEG_CORE_VERSION}/${flavor}`;
+  return {
+    coreURL: `${base}/ffmpeg-core.js`,
+    wasmURL: `${base}/ffmpeg-core.wasm`,
+    ...(flavor === 'mt' ? { workerURL: `${base}/ffmpeg-core.worker.js` } : {}),
+  };
+}
+
+// 共有インスタンスとは別の FFmpeg を新しくロードする（動画ラボの並列キュー用）
+// コアは同じURLなので、2つ目以降はキャッシュ済みのwasmから起動する
+// @ffmpeg/ffmpeg 自体もここで初めて読み込む（ページの初期表示に含めない）
+export async function createFFmpeg(flavor: FFmpegCoreFlavor = preferredFlavor()): Promise<FFmpeg> {
+  const { FFmpeg } = await import('@ffmpeg/ffmpeg');
+  const ffmpeg = new FFmpeg();
+  const perf = startRun('ffmpeg', flavor);
+  performance.mark('ffmpeg-load-start');
+  try {
+    await perf.stage('load', () => ffmpeg.load(coreURLs(flavor)));
+  } catch (err) {
+    perf.end(false);
+    throw err;
+  }
+  performance.measure('ffmpeg-load', { start: 'ffmpeg-load-start', detail: { flavor } });
+  perf.end();
+  return ffmpeg;
+}
+
+async function load(flavor: FFmpegCoreFlavor): Promise<FFmpeg> {
+  const ffmpeg = await createFFmpeg(flavor);
+  ffmpegInstance = ffmpeg;
+  loadedFlavor = flavor;
+  return ffmpeg;
+}
+
+// 共有インスタンスを取得（初回のみロード。同時に呼ばれても1回だけ）
+export function getFFmpeg(flavor: FFmpegCoreFlavor = preferredFlavor()): Promise<FFmpeg> {
+  if (!loadPromise) {
+    loadPromise = load(flavor).catch((err) => {
+      // 失敗したら次回やり直せるようにする
+      loadPromise = null;
+      throw err;
+    });
+  }
+  return loadPromise;
+}
+
+// ロード済みならインスタンスを返す（未ロードなら null）
+export function getLoadedFFmpeg(): FFmpeg | null {
+  return ffmpegInstance && ffmpegInstance.loaded ? ffmpegInstance : null;
+}
+
+export function getLoadedFlavor(): FFmpegCoreFlavor | null {
+  return loadedFlavor;
+}
+
+let mountId = 0;
+
+// File を WORKERFS でマウントして入力パスを返す
+// writeFile(fetchFile(file)) と違い、wasm のメモリへ丸ごとコピーせず
+// FFmpeg が読んだ分だけワーカー内で File から同期的に読み出す
+export async function mountInput(ffmpeg: FFmpeg, file: File): Promise<{ path: string; release: () => Promise<void> }> {
+  const { FFFSType } = await import('@ffmpeg/ffmpeg');
+  const dir = `/input-${mountId++}`;
+  await ffmpeg.createDir(dir);
+  await ffmpeg.mount(FFFSType.WORKERFS, { files: [file] }, dir);
+
+  return {
+    path: `${dir}/${file.name}`,
+    release: async () => {
+      await ffmpeg.unmount(dir);
+      await ffmpeg.deleteDir(dir);
+    },
+  };
+}
@@ -0,0 +1,151 @@
+// HEIC（iPhone の写真）のデコード（image-pool から使う）
+// 中間の JPEG を作らずに、コンテナから HEVC のタイルを取り出して image.worker で直接キャンバスに並べる
+// WebCodecs が HEVC をデコードできればワーカーの中で、できなければ ffmpeg.wasm の hevc デコーダーで全タイルを RGBA にする
+// heic2any（libheif を JPEG 経由で使う）は、対応していない構成と、比較・不具合の切り分け用に残している
+
+import { getFFmpeg } from './ffmpeg-engine';
+import { annexB, parseHeif, type HeifImage } from './heif';
+import { UnsupportedMediaError } from './media-container';
+
+// auto: WebCodecs → ffmpeg.wasm の順で直接デコード / heic2any: 常に heic2any（ベンチマークの比較用）
+export type HeicDecoderPreference = 'auto' | 'heic2any';
+
+export type HeicDecoder = 'webcodecs' | 'ffmpeg' | 'heic2any';
+
+const PREFERENCE_KEY = 'lumina-heic-decoder';
+
+export function getHeicDecoderPreference(): HeicDecoderPreference {
+  if (typeof window === 'undefined') return 'auto';
+  try {
+    if (window.localStorage.getItem(PREFERENCE_KEY) === 'heic2any') return 'heic2any';
+  } catch {
+    // localStorage が使えない環境では既定のまま
+  }
+  return 'auto';
+}
+
+export function isHeic(file: File): boolean {
+  return file.name.toLowerCase().endsWith('.heic') || file.type === 'image/heic';
+}
+
+// HEICはブラウザで直接デコードできないため、一度JPEGに変換する（直接デコードできない場合の経路）
+export async function heicToJpeg(file: Blob): Promise<Blob> {
+  // サーバー側で読み込まれないように、使う直前に読み込む
+  const heic2any = (await import('heic2any')).default;
+
+  const result = await heic2any({
+    blob: file,
+    toType: 'image/jpeg',
+    quality: 1.0,
+  });
+  return Array.isArray(result) ? result[0] : result;
+}
+
+// image.worker に渡すもの。hevc はワーカーの WebCodecs でデコードし、rgba はデコード済みのタイルを並べるだけ
+export type HeifSource =
+  | { kind: 'hevc'; image: HeifImage }
+  | { kind: 'rgba'; image: HeifImage; pixels: Uint8Array }; // タイルの順に tileWidth × tileHeight × 4 バイトずつ
+
+export interface DecodedHeic {
+  decoder: HeicDecoder;
+  // heic2any のときは JPEG、それ以外は image.worker に渡す HeifSource
+  source: Blob | HeifSource;
+  transfer: Transferable[];
+}
+
+// isConfigSupported はコーデック文字列ごとに結果を覚えておく（同じ機種の写真は同じ hvcC を持つ）
+const webCodecsSupport = new Map<string, Promise<boolean>>();
+
+function webCodecsCanDecode(image: HeifImage): Promise<boolean> {
+  if (typeof VideoDecoder === 'undefined') return Promise.resolve(false);
+  let supported = webCodecsSupport.get(image.codec);
+  if (!supported) {
+    supported = VideoDecoder.isConfigSupported({
+      codec: image.codec,
+      description: image.config,
+      codedWidth: image.tileWidth,
+      codedHeight: image.tileHeight,
+    })
+      .then((result) => result.supported === true)
+      .catch(() => false);
+    webCodecsSupport.set(image.codec, supported);
+  }
+  return supported;
+}
+
+// nclx の matrix_coefficients → swscale の in_color_matrix
+const SWS_MATRIX: Record<number, string> = { 1: 'bt709', 5: 'bt601', 6: 'bt601', 9: 'bt2020' };
+
+let nextFile = 0;
+
+/**
+ * 全タイルを1本の HEVC ストリームにして、ffmpeg.wasm の1回の exec で RGBA にする
+ * タイルは全てキーフレームなので、マルチスレッド版のコアではフレームスレッドで並列にデコードされる
+ */
+async function decodeWithFFmpeg(image: HeifImage): Promise<Uint8Array> {
+  const ffmpeg = await getFFmpeg();
+  const id = nextFile++;
+  const input = `heif-${id}.hevc`;
+  const output = `heif-${id}.rgba`;
+
+  // HEVC の VUI に色の情報がなければ swscale は BT.601 の limited とみなすので、nclx があればそちらに合わせる
+  const filter = image.color
+    ? [
+        '-vf',
+        `scale=in_range=${image.color.fullRange ? 'full' : 'limited'}` +
+          (SWS_MATRIX[image.color.matrix] ? `:in_color_matrix=${SWS_MATRIX[image.color.matrix]}` : ''),
+      ]
+    : [];
+
+  await ffmpeg.writeFile(input, annexB(image.config, image.tiles.map((tile) => tile.data)));
+  try {
+    const code = await ffmpeg.exec([
+      '-f', 'hevc', '-i', input,
+      ...filter,
+      '-fps_mode', 'passthrough',
+      '-f', 'rawvideo', '-pix_fmt', 'rgba',
+      output,
+    ]);
+    if (code !== 0) throw new Error(`FFmpeg HEVC decode failed (exit ${code})`);
+    const pixels = (await ffmpeg.readFile(output)) as Uint8Array;
+    const expected = image.tiles.length * image.tileWidth * image.tileHeight * 4;
+    if (pixels.length !== expected) throw new Error(`FFmpeg decoded ${pixels.length} bytes, expected ${expected}`);
+    return pixels;
+  } finally {
+    await ffmpeg.deleteFile(input).catch(() => {});
+    await ffmpeg.deleteFile(output).catch(() => {});
+  }
+}
+
+async function viaHeic2any(file: Blob): Promise<DecodedHeic> {
+  return { decoder: 'heic2any', source: await heicToJpeg(file), transfer: [] };
+}
+
+export interface DecodeHeicOptions {
+  // false なら WebCodecs を使わない（ワーカーでのデコードが失敗したときのやり直し用）
+  webcodecs?: boolean;
+}
+
+/**
+ * image.worker に渡せる形にする。直接デコードできる場合は、元のファイルのバッファを
+ * そのままワーカーへ移す（タイルは subarray なので、コピーはデコード結果の分だけ）
+ */
+export async function decodeHeic(file: Blob, { webcodecs = true }: DecodeHeicOptions = {}): Promise<DecodedHeic> {
+  if (getHeicDecoderPreference() === 'heic2any') return viaHeic2any(file);
+
+  const data = new Uint8Array(await file.arrayBuffer());
+  let image: HeifImage;
+  try {
+    image = parseHeif(data);
+  } catch (error) {
+    if (!(error instanceof UnsupportedMediaError)) throw error;
+    console.warn('HEIC layout not supported by the direct decoder, falling back to heic2any:', error.message);
+    return viaHeic2any(file);
+  }
+
+  if (webcodecs && (await webCodecsCanDecode(image))) {
+    return { decoder: 'webcodecs', source: { kind: 'hevc', image }, transfer: [data.buffer] };
+  }
+  const pixels = await decodeWithFFmpeg(image);
+  return { decoder: 'ffmpeg', source: { kind: 'rgba', image, pixels }, transfer: [data.buffer, pixels.buffer] };
+}
@@ -0,0 +1,410 @@
+// HEIF（iPhone の HEIC）のコンテナを読む（ワーカーからも使う純粋関数）
+// 主画像が grid なら、タイル（それぞれ独立した HEVC の1枚）の位置とデータ・hvcC・回転と反転を返す
+// タイルのデータは元のバッファの subarray のまま（コピーしない）。デコードは image.worker（WebCodecs）か heic.ts（ffmpeg.wasm）
+
+import { UnsupportedMediaError, fourcc, hevcCodec } from './media-container';
+
+export interface Box {
+  type: string;
+  start: number;
+  body: number;
+  end: number;
+}
+
+export function readUint(view: DataView, offset: number, size: number): number {
+  switch (size) {
+    case 0:
+      return 0;
+    case 1:
+      return view.getUint8(offset);
+    case 2:
+      return view.getUint16(offset);
+    case 4:
+      return view.getUint32(offset);
+    case 8:
+      return view.getUint32(offset) * 2 ** 32 + view.getUint32(offset + 4);
+    default:
+      throw new Error(`Unsupported field size ${size}`);
+  }
+}
+
+export function readBoxes(data: Uint8Array, view: DataView, start: number, end: number): Box[] {
+  const boxes: Box[] = [];
+  let pos = start;
+  while (pos + 8 <= end) {
+    let size = view.getUint32(pos);
+    let body = pos + 8;
+    if (size === 1) {
+      size = readUint(view, pos + 8, 8);
+      body = pos + 16;
+    } else if (size === 0) {
+      size = end - pos;
+    }
+    if (size < body - pos || pos + size > end) throw new Error('Invalid HEIF box');
+    boxes.push({ type: fourcc(data, pos + 4), start: pos, body, end: pos + size });
+    pos += size;
+  }
+  return boxes;
+}
+
+export interface ItemLocation {
+  constructionMethod: number; // 0: ファイル内の位置 / 1: idat の中の位置
+  extents: { offset: number; length: number }[]; // base_offset を足した位置
+}
+
+// iloc からアイテムごとの位置を読む
+export function readItemLocations(data: Uint8Array, view: DataView, iloc: Box): Map<number, ItemLocation> {
+  const locations = new Map<number, ItemLocation>();
+  const version = data[iloc.body];
+  let p = iloc.body + 4;
+  const offsetSize = data[p] >> 4;
+  const lengthSize = data[p] & 0x0f;
+  const baseOffsetSize = data[p + 1] >> 4;
+  const indexSize = version === 1 || version === 2 ? data[p + 1] & 0x0f : 0;
+  p += 2;
+  const count = version < 2 ? view.getUint16(p) : view.getUint32(p);
+  p += version < 2 ? 2 : 4;
+
+  for (let i = 0; i < count; i++) {
+    const id = version < 2 ? view.getUint16(p) : view.getUint32(p);
+    p += version < 2 ? 2 : 4;
+    let constructionMethod = 0;
+    if (version === 1 || version === 2) {
+      constructionMethod = view.getUint16(p) & 0x0f;
+      p += 2;
+    }
+    p += 2; // data_reference_index
+    const baseOffset = readUint(view, p, baseOffsetSize);
+    p += baseOffsetSize;
+    const extentCount = view.getUint16(p);
+    p += 2;
+    const extents = [];
+    for (let e = 0; e < extentCount; e++) {
+      p += indexSize;
+      const offset = readUint(view, p, offsetSize);
+      p += offsetSize;
+      const length = readUint(view, p, lengthSize);
+      p += lengthSize;
+      extents.push({ offset: baseOffset + offset, length });
+    }
+    locations.set(id, { constructionMethod, extents });
+  }
+  return locations;
+}
+
+// アイテムの中身。extent が1つならコピーせずに返す（長さ0の extent はファイル末尾まで）
+export function itemBytes(data: Uint8Array, location: ItemLocation, idat?: Box): Uint8Array {
+  const origin = location.constructionMethod === 0 ? 0 : location.constructionMethod === 1 && idat ? idat.body : -1;
+  if (origin < 0) throw new UnsupportedMediaError(`heif: construction method ${location.constructionMethod}`);
+  const limit = location.constructionMethod === 1 && idat ? idat.end : data.length;
+  const parts = location.extents.map(({ offset, length }) => {
+    const start = origin + offset;
+    const end = length === 0 ? limit : start + length;
+    if (end > limit) throw new Error('HEIF item outside the file');
+    return data.subarray(start, end);
+  });
+  if (parts.length === 1) return parts[0];
+  const joined = new Uint8Array(parts.reduce((sum, part) => sum + part.length, 0));
+  let offset = 0;
+  for (const part of parts) {
+    joined.set(part, offset);
+    offset += part.length;
+  }
+  return joined;
+}
+
+// iinf: アイテム ID → アイテムの種類（hvc1・grid・Exif など）
+function readItemTypes(data: Uint8Array, view: DataView, iinf: Box): Map<number, string> {
+  const types = new Map<number, string>();
+  const version = data[iinf.body];
+  const entries = iinf.body + 4 + (version === 0 ? 2 : 4);
+  for (const infe of readBoxes(data, view, entries, iinf.end)) {
+    if (infe.type !== 'infe' || data[infe.body] < 2) continue;
+    const infeVersion = data[infe.body];
+    let p = infe.body + 4;
+    const id = infeVersion === 2 ? view.getUint16(p) : view.getUint32(p);
+    p += (infeVersion === 2 ? 2 : 4) + 2;
+    types.set(id, fourcc(data, p));
+  }
+  return types;
+}
+
+// iref: 参照元 ID → 参照の種類 → 参照先 ID（並び順のまま）
+function readReferences(data: Uint8Array, view: DataView, iref: Box): Map<number, Map<string, number[]>> {
+  const references = new Map<number, Map<string, number[]>>();
+  const idSize = data[iref.body] === 0 ? 2 : 4;
+  for (const reference of readBoxes(data, view, iref.body + 4, iref.end)) {
+    let p = reference.body;
+    const from = readUint(view, p, idSize);
+    p += idSize;
+    const count = view.getUint16(p);
+    p += 2;
+    const to = [];
+    for (let i = 0; i < count; i++, p += idSize) to.push(readUint(view, p, idSize));
+    if (!references.has(from)) references.set(from, new Map());
+    references.get(from)!.set(reference.type, to);
+  }
+  return references;
+}
+
+// iprp: アイテム ID → 関連付けられたプロパティ（ipma の順番のまま。回転・反転はこの順に適用する）
+function readProperties(data: Uint8Array, view: DataView, iprp: Box): Map<number, Box[]> {
+  const children = readBoxes(data, view, iprp.body, iprp.end);
+  const ipco = children.find((box) => box.type === 'ipco');
+  const properties = ipco ? readBoxes(data, view, ipco.body, ipco.end) : [];
+  const associations = new Map<number, Box[]>();
+  for (const ipma of children.filter((box) => box.type === 'ipma')) {
+    const version = data[ipma.body];
+    const wideIndex = (data[ipma.body + 3] & 1) === 1;
+    let p = ipma.body + 4;
+    const count = view.getUint32(p);
+    p += 4;
+    for (let i = 0; i < count; i++) {
+      const id = version < 1 ? view.getUint16(p) : view.getUint32(p);
+      p += version < 1 ? 2 : 4;
+      const n = data[p++];
+      const boxes = associations.get(id) ?? [];
+      for (let j = 0; j < n; j++) {
+        // 先頭ビットは essential フラグ、残りが ipco 内の1始まりの番号
+        const index = wideIndex ? view.getUint16(p) & 0x7fff : data[p] & 0x7f;
+        p += wideIndex ? 2 : 1;
+        if (index > 0 && properties[index - 1]) boxes.push(properties[index - 1]);
+      }
+      associations.set(id, boxes);
+    }
+  }
+  return associations;
+}
+
+// --- 向き（irot・imir） ---
+
+export type HeifTransform = { rotate: 90 | 180 | 270 } | { flip: 'x' | 'y' };
+
+// 描画用のアフィン変換（canvas の setTransform と同じ a b c d e f）と、変換後の大きさ
+export interface Orientation {
+  matrix: [number, number, number, number, number, number];
+  width: number;
+  height: number;
+}
+
+/**
+ * transforms を順に適用したときの変換行列。irot は反時計回り、imir の x は左右反転（縦軸で反転）
+ * 回転も反転もなければ単位行列
+ */
+export function orientation(transforms: HeifTransform[], width: number, height: number): Orientation {
+  // [a, b, c, d, e, f]: x' = a*x + c*y + e, y' = b*x + d*y + f
+  let m: Orientation['matrix'] = [1, 0, 0, 1, 0, 0];
+  let w = width;
+  let h = height;
+  for (const transform of transforms) {
+    let op: Orientation['matrix'];
+    if ('flip' in transform) {
+      op = transform.flip === 'x' ? [-1, 0, 0, 1, w, 0] : [1, 0, 0, -1, 0, h];
+    } else if (transform.rotate === 90) {
+      op = [0, -1, 1, 0, 0, w];
+      [w, h] = [h, w];
+    } else if (transform.rotate === 180) {
+      op = [-1, 0, 0, -1, w, h];
+    } else {
+      op = [0, 1, -1, 0, h, 0];
+      [w, h] = [h, w];
+    }
+    // op ∘ m
+    m = [
+      op[0] * m[0] + op[2] * m[1],
+      op[1] * m[0] + op[3] * m[1],
+      op[0] * m[2] + op[2] * m[3],
+      op[1] * m[2] + op[3] * m[3],
+      op[0] * m[4] + op[2] * m[5] + op[4],
+      op[1] * m[4] + op[3] * m[5] + op[5],
+    ];
+  }
+  return { matrix: m, width: w, height: h };
+}
+
+// --- 色空間（colr の nclx） ---
+
+export interface HeifColor {
+  primaries: number;
+  transfer: number;
+  matrix: number;
+  fullRange: boolean;
+}
+
+// H.273 の番号 → WebCodecs の名前（TypeScript の DOM 型にある分だけ。ほかは省いて、ビットストリームの VUI に任せる）
+const PRIMARIES: Record<number, VideoColorPrimaries> = { 1: 'bt709', 5: 'bt470bg', 6: 'smpte170m' };
+const TRANSFER: Record<number, VideoTransferCharacteristics> = { 1: 'bt709', 6: 'smpte170m', 13: 'iec61966-2-1' };
+const MATRIX: Record<number, VideoMatrixCoefficients> = { 0: 'rgb', 1: 'bt709', 5: 'bt470bg', 6: 'smpte170m' };
+
+export function videoColorSpace(color: HeifColor): VideoColorSpaceInit {
+  return {
+    primaries: PRIMARIES[color.primaries] ?? null,
+    transfer: TRANSFER[color.transfer] ?? null,
+    matrix: MATRIX[color.matrix] ?? null,
+    fullRange: color.fullRange,
+  };
+}
+
+// --- 画像全体 ---
+
+export interface HeifTile {
+  x: number;
+  y: number;
+  data: Uint8Array; // 長さ付きの NAL ユニット（hvcC の lengthSizeMinusOne + 1 バイト）
+}
+
+export interface HeifImage {
+  width: number; // グリッドなら出力の大きさ（右端・下端のタイルはここで切り取る）
+  height: number;
+  tileWidth: number;
+  tileHeight: number;
+  codec: string; // WebCodecs のコーデック文字列
+  config: Uint8Array; // hvcC（HEVCDecoderConfigurationRecord）。全タイル共通
+  color: HeifColor | null;
+  transforms: HeifTransform[];
+  tiles: HeifTile[];
+}
+
+// data が HEIC（HEVC の静止画）なら主画像を読む。AVIF や対応していない構成は UnsupportedMediaError
+export function parseHeif(data: Uint8Array): HeifImage {
+  const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+  const meta = readBoxes(data, view, 0, data.length).find((box) => box.type === 'meta');
+  if (!meta) throw new UnsupportedMediaError('heif: no meta box');
+  const children = readBoxes(data, view, meta.body + 4, meta.end);
+  const find = (type: string) => children.find((box) => box.type === type);
+  const pitm = find('pitm');
+  const iinf = find('iinf');
+  const iloc = find('iloc');
+  const iprp = find('iprp');
+  if (!pitm || !iinf || !iloc || !iprp) throw new UnsupportedMediaError('heif: incomplete meta box');
+  const idat = find('idat');
+
+  const primary = data[pitm.body] === 0 ? view.getUint16(pitm.body + 4) : view.getUint32(pitm.body + 4);
+  const types = readItemTypes(data, view, iinf);
+  const locations = readItemLocations(data, view, iloc);
+  const properties = readProperties(data, view, iprp);
+  const iref = find('iref');
+  const references = iref ? readReferences(data, view, iref) : new Map<number, Map<string, number[]>>();
+  const property = (id: number, type: string) => properties.get(id)?.find((box) => box.type === type);
+  const size = (id: number) => {
+    const ispe = property(id, 'ispe');
+    if (!ispe) throw new UnsupportedMediaError('heif: missing ispe');
+    return { width: view.getUint32(ispe.body + 4), height: view.getUint32(ispe.body + 8) };
+  };
+  const bytes = (id: number) => {
+    const location = locations.get(id);
+    if (!location) throw new UnsupportedMediaError(`heif: item ${id} has no location`);
+    return itemBytes(data, location, idat);
+  };
+
+  let tileIds: number[];
+  let columns = 1;
+  let width: number;
+  let height: number;
+  const primaryType = types.get(primary);
+  if (primaryType === 'hvc1') {
+    tileIds = [primary];
+    ({ width, height } = size(primary));
+  } else if (primaryType === 'grid') {
+    // ImageGrid: version, flags（bit0 で 32bit）, rows - 1, columns - 1, 出力の幅・高さ
+    const grid = bytes(primary);
+    const gridView = new DataView(grid.buffer, grid.byteOffset, grid.byteLength);
+    const fieldSize = grid[1] & 1 ? 4 : 2;
+    const rows = grid[2] + 1;
+    columns = grid[3] + 1;
+    width = readUint(gridView, 4, fieldSize);
+    height = readUint(gridView, 4 + fieldSize, fieldSize);
+    tileIds = references.get(primary)?.get('dimg') ?? [];
+    if (tileIds.length !== rows * columns) throw new UnsupportedMediaError('heif: grid tile count mismatch');
+    if (tileIds.some((id) => types.get(id) !== 'hvc1')) throw new UnsupportedMediaError('heif: grid of non-HEVC tiles');
+  } else {
+    throw new UnsupportedMediaError(`heif: primary item type ${primaryType ?? 'unknown'}`);
+  }
+
+  const hvcC = property(tileIds[0], 'hvcC');
+  if (!hvcC) throw new UnsupportedMediaError('heif: missing hvcC');
+  const config = data.subarray(hvcC.body, hvcC.end);
+  const tile = size(tileIds[0]);
+
+  // 向きは主画像（grid）に付いたものを適用する
+  const transforms: HeifTransform[] = [];
+  for (const box of properties.get(primary) ?? []) {
+    if (box.type === 'irot') {
+      const angle = (data[box.body] & 3) * 90;
+      if (angle) transforms.push({ rotate: angle as 90 | 180 | 270 });
+    } else if (box.type === 'imir') {
+      transforms.push({ flip: data[box.body] & 1 ? 'y' : 'x' });
+    }
+  }
+
+  const colr = [...(properties.get(primary) ?? []), ...(properties.get(tileIds[0]) ?? [])].find(
+    (box) => box.type === 'colr' && fourcc(data, box.body) === 'nclx'
+  );
+  const color = colr
+    ? {
+        primaries: view.getUint16(colr.body + 4),
+        transfer: view.getUint16(colr.body + 6),
+        matrix: view.getUint16(colr.body + 8),
+        fullRange: (data[colr.body + 10] & 0x80) !== 0,
+      }
+    : null;
+
+  return {
+    width,
+    height,
+    tileWidth: tile.width,
+    tileHeight: tile.height,
+    codec: hevcCodec('hvc1', config),
+    config,
+    color,
+    transforms,
+    tiles: tileIds.map((id, index) => ({
+      x: (index % columns) * tile.width,
+      y: Math.floor(index / columns) * tile.height,
+      data: bytes(id),
+    })),
+  };
+}
+
+const START_CODE = new Uint8Array([0, 0, 0, 1]);
+
+/**
+ * hvcC のパラメータセットとタイルを、スタートコード区切りの HEVC エレメンタリーストリーム（Annex B）にする
+ * ffmpeg の hevc デマクサーに渡して、全タイルを1本のストリームとしてデコードさせるため
+ */
+export function annexB(config: Uint8Array, samples: Uint8Array[]): Uint8Array {
+  const view = new DataView(config.buffer, config.byteOffset, config.byteLength);
+  const lengthSize = (config[21] & 3) + 1;
+  const parts: Uint8Array[] = [];
+
+  // hvcC: 22バイトの固定部分の後に、NAL の種類ごとの配列（VPS・SPS・PPS・SEI）
+  let p = 23;
+  for (let array = 0; array < config[22]; array++) {
+    const count = view.getUint16(p + 1);
+    p += 3;
+    for (let i = 0; i < count; i++) {
+      const length = view.getUint16(p);
+      parts.push(START_CODE, config.subarray(p + 2, p + 2 + length));
+      p += 2 + length;
+    }
+  }
+
+  for (const sample of samples) {
+    const sampleView = new DataView(sample.buffer, sample.byteOffset, sample.byteLength);
+    for (let q = 0; q + lengthSize <= sample.length; ) {
+      const length = readUint(sampleView, q, lengthSize);
+      q += lengthSize;
+      if (q + length > sample.length) throw new Error('HEIF tile NAL unit outside the sample');
+      parts.push(START_CODE, sample.subarray(q, q + length));
+      q += length;
+    }
+  }
+
+  const stream = new Uint8Array(parts.reduce((sum, part) => sum + part.length, 0));
+  let offset = 0;
+  for (const part of parts) {
+    stream.set(part, offset);
+    offset += part.length;
+  }
+  return stream;
+}
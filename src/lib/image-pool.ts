@@ -0,0 +1,119 @@
+import type { OutputFormat } from "./constants";
+import { decodeHeic, isHeic, type DecodeHeicOptions, type HeicDecoder, type HeifSource } from "./heic";
+import { startRun, type PerfRun, type StageTiming } from "./perf";
+import { WorkerPool } from "./worker-pool";
+
+export interface ImageJobOptions {
+  format: OutputFormat;
+  quality: number;
+}
+
+export interface ImageJobResult {
+  blob: Blob;
+  width: number;
+  height: number;
+  originalSize: number;
+  newSize: number;
+}
+
+type WorkerResponse =
+  | { type: 'complete'; id: number; blob: Blob; width: number; height: number; timings: StageTiming[] }
+  | { type: 'error'; id: number; message: string };
+
+interface Job {
+  file: File;
+  options: ImageJobOptions;
+  heic?: DecodeHeicOptions;
+  perf?: PerfRun;
+  heicDecoder?: HeicDecoder;
+}
+
+// image.worker のプール
+export class ImageWorkerPool extends WorkerPool<Job, ImageJobResult, WorkerResponse> {
+  async convert(file: File, options: ImageJobOptions): Promise<ImageJobResult> {
+    const job: Job = { file, options };
+    try {
+      return await this.enqueue(job);
+    } catch (error) {
+      // isConfigSupported が通っても、ワーカーでのタイルのデコードが失敗することがある（ハードウェアデコーダーの制限など）
+      // その場合は WebCodecs を使わずに（ffmpeg.wasm か heic2any で）やり直す
+      if (job.heicDecoder !== 'webcodecs') throw error;
+      console.warn('WebCodecs failed to decode the HEIC tiles, retrying without it:', error);
+      return this.enqueue({ file, options, heic: { webcodecs: false } });
+    }
+  }
+
+  protected createWorker(): Worker {
+    return new Worker(new URL('../workers/image.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+  }
+
+  protected async post(worker: Worker, job: Job, id: number) {
+    // キューで待っていた時間は含めず、ワーカーに渡す時点から計る
+    const perf = (job.perf = startRun('image', job.options.format));
+    // HEICはcreateImageBitmapでデコードできないので、heic.ts でタイルを取り出して（またはデコードして）から渡す
+    // （ワーカーが空いた時点で展開するので、同時に展開されるのはプールサイズ分だけ）
+    let source: Blob | HeifSource = job.file;
+    let transfer: Transferable[] = [];
+    if (isHeic(job.file)) {
+      const decoded = await perf.stage('decode', () => decodeHeic(job.file, job.heic));
+      ({ source, transfer } = decoded);
+      job.heicDecoder = decoded.decoder;
+    }
+    worker.postMessage({
+      id,
+      file: source,
+      format: job.options.format,
+      quality: job.options.quality
+    }, transfer);
+  }
+
+  protected receive(message: WorkerResponse, job: Job): ImageJobResult {
+    const detail = job.heicDecoder ? { decoder: job.heicDecoder } : null;
+    if (message.type === 'error') {
+      job.perf?.end(false, detail);
+      throw new Error(message.message);
+    }
+    job.perf?.record(message.timings);
+    job.perf?.bytes(job.file.size, message.blob.size);
+    job.perf?.end(true, detail);
+    return {
+      blob: message.blob,
+      width: message.width,
+      height: message.height,
+      originalSize: job.file.size,
+      newSize: message.blob.size
+    };
+  }
+
+  protected failed(job: Job) {
+    job.perf?.end(false, job.heicDecoder ? { decoder: job.heicDecoder } : null);
+  }
+}
+
+// ページ間で使い回すため、プールはモジュール単位で1つだけ作る（ブラウザでのみ生成）
+let pool: ImageWorkerPool | null = null;
+
+export function getImageWorkerPool(): ImageWorkerPool {
+  if (!pool) {
+    pool = new ImageWorkerPool();
+  }
+  return pool;
+}
+
+export async function convertBatch(
+  files: File[],
+  options: ImageJobOptions,
+  onResult: (index: number, result: ImageJobResult | null, error?: Error) => void
+): Promise<void> {
+  const workerPool = getImageWorkerPool();
+
+  await Promise.all(files.map(async (file, index) => {
+    try {
+      onResult(index, await workerPool.convert(file, options));
+    } catch (error) {
+      onResult(index, null, error instanceof Error ? error : new Error(String(error)));
+    }
+  }));
+}
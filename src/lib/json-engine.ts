@@ -0,0 +1,160 @@
+import type { JsonOutputMode, JsonSyntaxError } from './json-stream';
+
+// 表示用に折り返す1行の最大バイト数（圧縮した JSON は改行がないので、1行ずつ描画できるように折り返す）
+export const ROW_BYTES = 2000;
+
+type WorkerResponse =
+  | { type: 'chunk'; id: number; bytes: Uint8Array; rows: Uint32Array }
+  | { type: 'progress'; id: number; read: number; total: number }
+  | { type: 'done'; id: number; bytes: number; rows: number }
+  | { type: 'error'; id: number; error: JsonSyntaxError | null; message?: string };
+
+export type JsonRunResult =
+  | { ok: true; bytes: number; rows: number; ms: number }
+  | { ok: false; error: JsonSyntaxError | null; message?: string };
+
+/**
+ * ワーカーから届く UTF-8 の出力チャンクと行の開始位置を溜めて、見えている行だけをデコードする
+ * 出力全体を1つの文字列にはしない（コピー・ダウンロード時のみ）
+ */
+export class JsonOutputBuffer {
+  private chunks: Uint8Array[] = [];
+  private starts: number[] = [];
+  private offsets = new Uint32Array(1024);
+  rowCount = 1;
+  bytes = 0;
+  private decoder = new TextDecoder();
+
+  append(bytes: Uint8Array, rows: Uint32Array) {
+    this.chunks.push(bytes);
+    this.starts.push(this.bytes);
+    this.bytes += bytes.length;
+    if (this.rowCount + rows.length > this.offsets.length) {
+      const grown = new Uint32Array(Math.max(this.offsets.length * 2, this.rowCount + rows.length));
+      grown.set(this.offsets.subarray(0, this.rowCount));
+      this.offsets = grown;
+    }
+    this.offsets.set(rows, this.rowCount);
+    this.rowCount += rows.length;
+  }
+
+  row(index: number): string {
+    const start = this.offsets[index];
+    const end = index + 1 < this.rowCount ? this.offsets[index + 1] : this.bytes;
+    const text = this.decoder.decode(this.slice(start, end));
+    return text.endsWith('\n') ? text.slice(0, -1) : text;
+  }
+
+  text(): string {
+    return this.decoder.decode(this.slice(0, this.bytes));
+  }
+
+  blob(): Blob {
+    return new Blob(this.chunks as BlobPart[], { type: 'application/json' });
+  }
+
+  private slice(start: number, end: number): Uint8Array {
+    if (start >= end) return new Uint8Array(0);
+    // start を含むチャンクを二分探索
+    let low = 0;
+    let high = this.starts.length - 1;
+    while (low < high) {
+      const mid = (low + high + 1) >> 1;
+      if (this.starts[mid] <= start) low = mid;
+      else high = mid - 1;
+    }
+    const from = start - this.starts[low];
+    if (from + end - start <= this.chunks[low].length) return this.chunks[low].subarray(from, from + end - start);
+    // 行がチャンクをまたぐ
+    const joined = new Uint8Array(end - start);
+    let written = 0;
+    for (let i = low; written < joined.length; i++) {
+      const part = this.chunks[i].subarray(i === low ? from : 0, (i === low ? from : 0) + joined.length - written);
+      joined.set(part, written);
+      written += part.length;
+    }
+    return joined;
+  }
+}
+
+/**
+ * デブラボの JSON 整形・圧縮・検証（ワーカーで実行）
+ * 処理は1つずつで、新しく run すると前の処理は取り消す
+ */
+export class JsonEngine {
+  private worker: Worker;
+  private nextId = 0;
+  private active: {
+    id: number;
+    mode: JsonOutputMode;
+    output: JsonOutputBuffer;
+    onChunk: () => void;
+    onProgress: (fraction: number) => void;
+    resolve: (result: JsonRunResult | null) => void;
+  } | null = null;
+
+  constructor() {
+    this.worker = new Worker(new URL('../workers/json.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+    this.worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+      const message = event.data;
+      const active = this.active;
+      if (!active || message.id !== active.id) return;
+      switch (message.type) {
+        case 'chunk':
+          active.output.append(message.bytes, message.rows);
+          active.onChunk();
+          break;
+        case 'progress':
+          active.onProgress(message.total ? message.read / message.total : 1);
+          break;
+        case 'done': {
+          const measure = performance.measure('json-process', {
+            start: `json-process-start-${active.id}`,
+            detail: { mode: active.mode, bytes: message.bytes, rows: message.rows }
+          });
+          this.active = null;
+          active.resolve({ ok: true, bytes: message.bytes, rows: message.rows, ms: measure.duration });
+          break;
+        }
+        case 'error':
+          this.active = null;
+          active.resolve({ ok: false, error: message.error, message: message.message });
+          break;
+      }
+    };
+  }
+
+  /**
+   * source（入力欄の文字列、または開いたファイル）を処理する。出力は output に少しずつ追加され、そのたびに onChunk が呼ばれる
+   * 後から別の run を始めた場合や cancel した場合は null で終わる
+   */
+  run(
+    mode: JsonOutputMode,
+    source: string | Blob,
+    output: JsonOutputBuffer,
+    onChunk: () => void,
+    onProgress: (fraction: number) => void
+  ): Promise<JsonRunResult | null> {
+    this.cancel();
+    const id = this.nextId++;
+    performance.mark(`json-process-start-${id}`);
+    return new Promise((resolve) => {
+      this.active = { id, mode, output, onChunk, onProgress, resolve };
+      this.worker.postMessage({ type: 'run', id, mode, source, rowBytes: ROW_BYTES });
+    });
+  }
+
+  cancel() {
+    if (!this.active) return;
+    this.worker.postMessage({ type: 'cancel', id: this.active.id });
+    this.active.resolve(null);
+    this.active = null;
+  }
+
+  terminate() {
+    this.cancel();
+    this.worker.terminate();
+  }
+}
@@ -0,0 +1,364 @@
+// デブラボの JSON 処理（ワーカーから使う純粋関数）
+// JSON.parse でオブジェクトを作らず、文字を順に読んで検証しながら整形・圧縮する（入力は何回に分けて渡してもよい）
+
+export type JsonOutputMode = 'format' | 'minify' | 'validate';
+
+export type JsonErrorCode = 'unexpectedCharacter' | 'unexpectedEnd' | 'invalidEscape' | 'controlCharacter' | 'invalidNumber';
+
+export interface JsonSyntaxError {
+  code: JsonErrorCode;
+  line: number; // 1始まり
+  column: number; // 1始まり（UTF-16 の文字単位）
+  offset: number; // 入力の先頭からの文字数
+  found: string | null; // 問題の文字（入力の終わりなら null）
+}
+
+export class JsonStreamError extends Error {
+  readonly detail: JsonSyntaxError;
+
+  constructor(detail: JsonSyntaxError) {
+    super(`${detail.code} at line ${detail.line}, column ${detail.column}`);
+    this.detail = detail;
+  }
+}
+
+// 字句の状態
+const BETWEEN = 0;
+const STRING = 1;
+const ESCAPE = 2;
+const UNICODE = 3;
+const NUMBER = 4;
+const LITERAL = 5;
+
+// 次に来てよいもの
+const VALUE = 0;
+const VALUE_OR_CLOSE = 1; // '[' の直後
+const KEY = 2; // オブジェクト内の ',' の直後
+const KEY_OR_CLOSE = 3; // '{' の直後
+const COLON = 4;
+const COMMA_OR_CLOSE = 5;
+const END = 6; // トップレベルの値の後（空白のみ）
+
+// 数値の状態（ZERO / INT / FRAC / EXP_DIGITS で終われる）
+const N_MINUS = 0;
+const N_ZERO = 1;
+const N_INT = 2;
+const N_DOT = 3;
+const N_FRAC = 4;
+const N_EXP = 5;
+const N_EXP_SIGN = 6;
+const N_EXP_DIGITS = 7;
+
+const OBJECT = 0;
+const ARRAY = 1;
+
+function isDigit(code: number): boolean {
+  return code >= 0x30 && code <= 0x39;
+}
+
+function isHex(code: number): boolean {
+  return isDigit(code) || (code >= 0x41 && code <= 0x46) || (code >= 0x61 && code <= 0x66);
+}
+
+function describeChar(chunk: string, index: number): string {
+  const code = chunk.codePointAt(index)!;
+  return code < 0x20 ? `U+${code.toString(16).toUpperCase().padStart(4, '0')}` : String.fromCodePoint(code);
+}
+
+/**
+ * 少しずつ渡される JSON を検証し、整形（インデント2、JSON.stringify(value, null, 2) と同じ改行位置）または圧縮して out に渡す
+ * 文字列・数値・リテラルは入力のまま出力する（数値の正規化やエスケープの書き換えはしない）
+ * 構文エラーは JsonStreamError（行・列つき）を投げる
+ */
+export class JsonStreamFormatter {
+  private lex = BETWEEN;
+  private expect = VALUE;
+  private stack: number[] = [];
+  private pendingOpen = false; // '{' / '[' の直後（空なら改行せずに閉じる）
+  private isKey = false;
+  private numberState = N_MINUS;
+  private literal = '';
+  private literalPos = 0;
+  private unicodeLeft = 0;
+  private offset = 0; // 今のチャンクの先頭の位置
+  private line = 1;
+  private lineStart = 0;
+  private indents: string[] = [''];
+  private chunk = '';
+  private copyFrom = -1; // 入力をそのまま出力している範囲の始まり（今のチャンク内の位置）
+  private readonly output: boolean;
+  private readonly pretty: boolean;
+
+  constructor(mode: JsonOutputMode, private readonly out: (text: string) => void) {
+    this.output = mode !== 'validate';
+    this.pretty = mode === 'format';
+  }
+
+  write(chunk: string) {
+    const n = chunk.length;
+    let i = 0;
+    this.chunk = chunk;
+    // 前のチャンクから続いているトークンは先頭から出力する
+    this.copyFrom = this.lex === BETWEEN ? -1 : 0;
+
+    while (i < n) {
+      const c = chunk.charCodeAt(i);
+      switch (this.lex) {
+        case BETWEEN:
+          if (c === 0x20 || c === 0x09 || c === 0x0d) {
+            this.cut(i);
+            i++;
+          } else if (c === 0x0a) {
+            this.cut(i);
+            i++;
+            this.line++;
+            this.lineStart = this.offset + i;
+          } else if (c === 0x22) {
+            if (this.expect === KEY || this.expect === KEY_OR_CLOSE) {
+              this.isKey = true;
+            } else {
+              this.requireValue(chunk, i);
+              this.isKey = false;
+            }
+            this.beforeValue(i);
+            this.lex = STRING;
+            this.copy(i++);
+          } else if (c === 0x2d || isDigit(c)) {
+            this.requireValue(chunk, i);
+            this.beforeValue(i);
+            this.lex = NUMBER;
+            this.numberState = c === 0x2d ? N_MINUS : c === 0x30 ? N_ZERO : N_INT;
+            this.copy(i++);
+          } else if (c === 0x74 || c === 0x66 || c === 0x6e) {
+            this.requireValue(chunk, i);
+            this.beforeValue(i);
+            this.lex = LITERAL;
+            this.literal = c === 0x74 ? 'true' : c === 0x66 ? 'false' : 'null';
+            this.literalPos = 1;
+            this.copy(i++);
+          } else if (c === 0x7b || c === 0x5b) {
+            this.requireValue(chunk, i);
+            this.beforeValue(i);
+            this.copy(i);
+            this.stack.push(c === 0x7b ? OBJECT : ARRAY);
+            this.pendingOpen = true;
+            this.expect = c === 0x7b ? KEY_OR_CLOSE : VALUE_OR_CLOSE;
+            i++;
+          } else if (c === 0x7d || c === 0x5d) {
+            const kind = c === 0x7d ? OBJECT : ARRAY;
+            const empty = kind === OBJECT ? this.expect === KEY_OR_CLOSE : this.expect === VALUE_OR_CLOSE;
+            if (!empty && !(this.expect === COMMA_OR_CLOSE && this.stack[this.stack.length - 1] === kind)) {
+              this.fail('unexpectedCharacter', chunk, i);
+            }
+            this.stack.pop();
+            if (this.pretty && !this.pendingOpen) this.insert(i, `\n${this.indent(this.stack.length)}`);
+            this.copy(i);
+            this.pendingOpen = false;
+            this.valueDone();
+            i++;
+          } else if (c === 0x2c) {
+            if (this.expect !== COMMA_OR_CLOSE) this.fail('unexpectedCharacter', chunk, i);
+            if (this.pretty) {
+              this.insert(i, `,\n${this.indent(this.stack.length)}`);
+            } else {
+              this.copy(i);
+            }
+            this.expect = this.stack[this.stack.length - 1] === OBJECT ? KEY : VALUE;
+            i++;
+          } else if (c === 0x3a) {
+            if (this.expect !== COLON) this.fail('unexpectedCharacter', chunk, i);
+            if (this.pretty) {
+              this.insert(i, ': ');
+            } else {
+              this.copy(i);
+            }
+            this.expect = VALUE;
+            i++;
+          } else {
+            this.fail('unexpectedCharacter', chunk, i);
+          }
+          break;
+
+        case STRING: {
+          // 引用符・バックスラッシュ・制御文字まで一気に進める
+          let j = i;
+          let d = c;
+          while (d !== 0x22 && d !== 0x5c && d >= 0x20) {
+            if (++j === n) break;
+            d = chunk.charCodeAt(j);
+          }
+          i = j;
+          if (i === n) break;
+          if (d === 0x22) {
+            i++;
+            this.lex = BETWEEN;
+            if (this.isKey) {
+              this.expect = COLON;
+            } else {
+              this.valueDone();
+            }
+          } else if (d === 0x5c) {
+            i++;
+            this.lex = ESCAPE;
+          } else {
+            this.fail('controlCharacter', chunk, i);
+          }
+          break;
+        }
+
+        case ESCAPE:
+          if (c === 0x75) {
+            this.lex = UNICODE;
+            this.unicodeLeft = 4;
+          } else if (c === 0x22 || c === 0x5c || c === 0x2f || c === 0x62 || c === 0x66 || c === 0x6e || c === 0x72 || c === 0x74) {
+            this.lex = STRING;
+          } else {
+            this.fail('invalidEscape', chunk, i);
+          }
+          i++;
+          break;
+
+        case UNICODE:
+          if (!isHex(c)) this.fail('invalidEscape', chunk, i);
+          if (--this.unicodeLeft === 0) this.lex = STRING;
+          i++;
+          break;
+
+        case NUMBER: {
+          const next = this.nextNumberState(c);
+          if (next >= 0) {
+            this.numberState = next;
+            i++;
+          } else if (this.numberComplete()) {
+            // 数値の次の文字は区切りとして読み直す
+            this.lex = BETWEEN;
+            this.valueDone();
+          } else {
+            this.fail('invalidNumber', chunk, i);
+          }
+          break;
+        }
+
+        case LITERAL:
+          if (c !== this.literal.charCodeAt(this.literalPos)) this.fail('unexpectedCharacter', chunk, i);
+          i++;
+          if (++this.literalPos === this.literal.length) {
+            this.lex = BETWEEN;
+            this.valueDone();
+          }
+          break;
+      }
+    }
+
+    // チャンクをまたぐトークンは、ここまでの分を先に出力する
+    this.cut(n);
+    this.chunk = '';
+    this.offset += n;
+  }
+
+  // 入力の終わり。値が閉じていなければ unexpectedEnd
+  end() {
+    if (this.lex === NUMBER) {
+      if (!this.numberComplete()) this.fail('invalidNumber', '', 0);
+      this.lex = BETWEEN;
+      this.valueDone();
+    }
+    if (this.lex !== BETWEEN || this.expect !== END) this.fail('unexpectedEnd', '', 0);
+  }
+
+  private nextNumberState(c: number): number {
+    switch (this.numberState) {
+      case N_MINUS:
+        return c === 0x30 ? N_ZERO : isDigit(c) ? N_INT : -1;
+      case N_ZERO:
+        return c === 0x2e ? N_DOT : c === 0x65 || c === 0x45 ? N_EXP : -1;
+      case N_INT:
+        return isDigit(c) ? N_INT : c === 0x2e ? N_DOT : c === 0x65 || c === 0x45 ? N_EXP : -1;
+      case N_DOT:
+        return isDigit(c) ? N_FRAC : -1;
+      case N_FRAC:
+        return isDigit(c) ? N_FRAC : c === 0x65 || c === 0x45 ? N_EXP : -1;
+      case N_EXP:
+        return c === 0x2b || c === 0x2d ? N_EXP_SIGN : isDigit(c) ? N_EXP_DIGITS : -1;
+      default:
+        return isDigit(c) ? N_EXP_DIGITS : -1;
+    }
+  }
+
+  private numberComplete(): boolean {
+    const state = this.numberState;
+    return state === N_ZERO || state === N_INT || state === N_FRAC || state === N_EXP_DIGITS;
+  }
+
+  private requireValue(chunk: string, index: number) {
+    if (this.expect !== VALUE && this.expect !== VALUE_OR_CLOSE) this.fail('unexpectedCharacter', chunk, index);
+  }
+
+  // 値（またはキー）の直前。開き括弧の直後なら改行してインデントする
+  private beforeValue(index: number) {
+    if (this.pendingOpen) {
+      if (this.pretty) this.insert(index, `\n${this.indent(this.stack.length)}`);
+      this.pendingOpen = false;
+    }
+  }
+
+  private valueDone() {
+    this.expect = this.stack.length === 0 ? END : COMMA_OR_CLOSE;
+  }
+
+  private indent(depth: number): string {
+    return (this.indents[depth] ??= '  '.repeat(depth));
+  }
+
+  // 出力は入力の連続した範囲をまとめて切り出す（トークンごとに分けない）
+  private copy(index: number) {
+    if (this.copyFrom === -1) this.copyFrom = index;
+  }
+
+  private cut(index: number) {
+    if (this.copyFrom === -1) return;
+    if (this.output && index > this.copyFrom) this.out(this.chunk.slice(this.copyFrom, index));
+    this.copyFrom = -1;
+  }
+
+  private insert(index: number, text: string) {
+    this.cut(index);
+    if (this.output) this.out(text);
+  }
+
+  // chunk が空なら入力の終わりの位置で報告する
+  private fail(code: JsonErrorCode, chunk: string, index: number): never {
+    const offset = this.offset + index;
+    throw new JsonStreamError({
+      code,
+      line: this.line,
+      column: offset - this.lineStart + 1,
+      offset,
+      found: index < chunk.length ? describeChar(chunk, index) : null,
+    });
+  }
+}
+
+/**
+ * UTF-8 の出力チャンクから表示用の行の開始位置（出力全体でのバイト位置）を rows に追加する
+ * 改行ごとに1行。改行のない長い行は rowBytes ごとに、マルチバイト文字の途中を避けて折り返す
+ * base はこのチャンクの先頭のバイト位置、rowStart は今の行の開始位置。戻り値は次のチャンクに渡す rowStart
+ */
+export function scanRows(bytes: Uint8Array, base: number, rowStart: number, rowBytes: number, rows: number[]): number {
+  let start = rowStart - base; // このチャンク内での位置（前のチャンクから続く行なら負）
+  let position = 0;
+  while (true) {
+    const newline = bytes.indexOf(0x0a, position);
+    const end = newline === -1 ? bytes.length : newline + 1;
+    while (end - start > rowBytes) {
+      let cut = start + rowBytes;
+      while (cut > 0 && (bytes[cut] & 0xc0) === 0x80) cut--;
+      rows.push(base + cut);
+      start = cut;
+    }
+    if (newline === -1) break;
+    start = position = newline + 1;
+    rows.push(base + start);
+  }
+  return base + start;
+}
@@ -0,0 +1,330 @@
+// 動画・音声コンテナの読み書きで共有する型と入出力ヘルパー
+// デマルチプレクサはファイル全体を読み込まず、必要な範囲だけ Blob.slice で読む
+// 時刻はすべてマイクロ秒（WebCodecs の timestamp と同じ単位）
+
+export type TrackKind = 'video' | 'audio';
+
+export type ContainerFormat = 'mp4' | 'webm' | 'mp3' | 'adts' | 'ogg' | 'wav';
+
+export interface MediaTrack {
+  id: number;
+  kind: TrackKind;
+  // WebCodecs のコーデック文字列（'avc1.64001f'、'vp8'、'opus'、'mp4a.40.2' など）
+  // 非圧縮 PCM は 'pcm-s16' のように表す（デコーダーを通さずに AudioData にする）
+  codec: string;
+  // avcC・hvcC・av1C・AudioSpecificConfig・OpusHead・Vorbis のヘッダーなど（デコーダーの description）
+  description?: Uint8Array;
+  width?: number;
+  height?: number;
+  sampleRate?: number;
+  channels?: number;
+  frameRate?: number; // 映像トラックのみ（分かる場合）
+  // MP4 の tkhd の表示行列（9要素、ファイルの固定小数点のまま）。スマートフォンの縦向き動画は回転が入っている
+  matrix?: number[];
+  duration: number; // 不明なら 0
+}
+
+export interface MediaSample {
+  track: number;
+  data: Uint8Array;
+  // 表示時刻。Opus の先頭パケットは pre-skip の分だけ負になる（MP4 の edit list と同じ扱い）
+  timestamp: number;
+  decodeTimestamp: number;
+  duration: number;
+  key: boolean;
+}
+
+export interface Demuxer {
+  format: ContainerFormat;
+  tracks: MediaTrack[];
+  duration: number;
+  // デコード順。同じファイルを読むので、同時に2回は回さない
+  samples(): AsyncGenerator<MediaSample>;
+}
+
+// 書き出すトラックの設定（エンコーダーの出力を使う場合、description は最初のチャンクで分かる）
+export interface OutputTrack {
+  kind: TrackKind;
+  codec: string;
+  description?: Uint8Array;
+  width?: number;
+  height?: number;
+  sampleRate?: number;
+  channels?: number;
+  matrix?: number[]; // 表示行列（MP4 のみ書ける。省略時は単位行列）
+}
+
+export interface OutputSample {
+  data: Uint8Array;
+  timestamp: number;
+  decodeTimestamp?: number; // 省略時は timestamp と同じ（エンコーダーの出力は B フレームを含まない）
+  duration: number;
+  key: boolean;
+}
+
+// コンテナごとに再エンコードなしで格納できるコーデック（名前は ffmpeg のコーデック名）
+export const COPYABLE_CODECS: Record<'mp4' | 'webm', { video: string[]; audio: string[] }> = {
+  mp4: { video: ['h264', 'hevc', 'av1', 'mpeg4'], audio: ['aac', 'mp3'] },
+  webm: { video: ['vp8', 'vp9', 'av1'], audio: ['opus', 'vorbis'] },
+};
+
+// WebCodecs のコーデック文字列を ffmpeg のコーデック名にそろえる（COPYABLE_CODECS を引くため）
+export function codecFamily(codec: string): string {
+  if (codec.startsWith('avc1') || codec.startsWith('avc3')) return 'h264';
+  if (codec.startsWith('hvc1') || codec.startsWith('hev1')) return 'hevc';
+  if (codec.startsWith('av01')) return 'av1';
+  if (codec.startsWith('vp09')) return 'vp9';
+  if (codec.startsWith('mp4a.40')) return 'aac';
+  return codec; // vp8・opus・vorbis・mp3・flac・pcm-*
+}
+
+// tkhd・mvhd の単位行列（a b u / c d v / x y w。u v w だけ 2.30、ほかは 16.16 の固定小数点）
+export const IDENTITY_MATRIX = [0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000];
+
+export function isIdentityMatrix(matrix: number[] | undefined): boolean {
+  return !matrix || matrix.every((value, i) => value === IDENTITY_MATRIX[i]);
+}
+
+export class UnsupportedMediaError extends Error {
+  constructor(message: string) {
+    super(message);
+    this.name = 'UnsupportedMediaError';
+  }
+}
+
+// Blob の範囲読み込み
+export class BlobReader {
+  constructor(readonly blob: Blob) {}
+
+  get size(): number {
+    return this.blob.size;
+  }
+
+  async read(offset: number, length: number): Promise<Uint8Array> {
+    const end = Math.min(this.blob.size, offset + length);
+    if (end <= offset) return new Uint8Array(0);
+    return new Uint8Array(await this.blob.slice(offset, end).arrayBuffer());
+  }
+}
+
+// 先頭から順に読むためのバッファ付きリーダー（WebM・MP3・Ogg のように中身を順に辿る形式用）
+export class StreamReader {
+  private buffer = new Uint8Array(0);
+  private bufferStart = 0;
+
+  constructor(private reader: BlobReader, public position = 0, private chunkSize = 4 << 20) {}
+
+  get size(): number {
+    return this.reader.size;
+  }
+
+  get eof(): boolean {
+    return this.position >= this.reader.size;
+  }
+
+  // position から length バイトを用意して返す（ファイル末尾では短くなる）
+  async peek(length: number): Promise<Uint8Array> {
+    const offset = this.position - this.bufferStart;
+    if (offset < 0 || offset + length > this.buffer.length) {
+      const available = this.reader.size - this.position;
+      const want = Math.min(available, Math.max(length, this.chunkSize));
+      this.buffer = await this.reader.read(this.position, want);
+      this.bufferStart = this.position;
+      return this.buffer.subarray(0, Math.min(length, this.buffer.length));
+    }
+    return this.buffer.subarray(offset, offset + length);
+  }
+
+  async take(length: number): Promise<Uint8Array> {
+    const bytes = await this.peek(length);
+    this.position += bytes.length;
+    return bytes;
+  }
+
+  skip(length: number) {
+    this.position += length;
+  }
+}
+
+// 出力を溜める。一定量ごとに Blob にまとめる（大きな Blob はブラウザがディスクへ退避できる）
+export class BlobBuilder {
+  private blobs: Blob[] = [];
+  private pending: Uint8Array[] = [];
+  private pendingBytes = 0;
+  size = 0;
+
+  constructor(private flushBytes = 32 << 20) {}
+
+  push(bytes: Uint8Array) {
+    if (bytes.length === 0) return;
+    this.pending.push(bytes);
+    this.pendingBytes += bytes.length;
+    this.size += bytes.length;
+    if (this.pendingBytes >= this.flushBytes) this.flush();
+  }
+
+  private flush() {
+    if (this.pending.length === 0) return;
+    this.blobs.push(new Blob(this.pending as BlobPart[]));
+    this.pending = [];
+    this.pendingBytes = 0;
+  }
+
+  toBlob(type: string, head: Uint8Array[] = [], tail: Uint8Array[] = []): Blob {
+    this.flush();
+    return new Blob([...head, ...this.blobs, ...tail] as BlobPart[], { type });
+  }
+}
+
+// ビッグエンディアンの可変長バイト列を組み立てる
+export class ByteWriter {
+  private bytes: Uint8Array;
+  private view: DataView;
+  length = 0;
+
+  constructor(capacity = 256) {
+    this.bytes = new Uint8Array(capacity);
+    this.view = new DataView(this.bytes.buffer);
+  }
+
+  private ensure(extra: number) {
+    if (this.length + extra <= this.bytes.length) return;
+    let capacity = this.bytes.length * 2;
+    while (capacity < this.length + extra) capacity *= 2;
+    const next = new Uint8Array(capacity);
+    next.set(this.bytes.subarray(0, this.length));
+    this.bytes = next;
+    this.view = new DataView(next.buffer);
+  }
+
+  u8(value: number): this {
+    this.ensure(1);
+    this.view.setUint8(this.length, value);
+    this.length += 1;
+    return this;
+  }
+
+  u16(value: number): this {
+    this.ensure(2);
+    this.view.setUint16(this.length, value);
+    this.length += 2;
+    return this;
+  }
+
+  u24(value: number): this {
+    return this.u8((value >>> 16) & 0xff).u16(value & 0xffff);
+  }
+
+  u32(value: number): this {
+    this.ensure(4);
+    this.view.setUint32(this.length, value >>> 0);
+    this.length += 4;
+    return this;
+  }
+
+  i32(value: number): this {
+    this.ensure(4);
+    this.view.setInt32(this.length, value);
+    this.length += 4;
+    return this;
+  }
+
+  u64(value: number): this {
+    return this.u32(Math.floor(value / 0x100000000)).u32(value % 0x100000000);
+  }
+
+  f64(value: number): this {
+    this.ensure(8);
+    this.view.setFloat64(this.length, value);
+    this.length += 8;
+    return this;
+  }
+
+  ascii(text: string): this {
+    for (let i = 0; i < text.length; i++) this.u8(text.charCodeAt(i));
+    return this;
+  }
+
+  bytesOf(data: Uint8Array): this {
+    this.ensure(data.length);
+    this.bytes.set(data, this.length);
+    this.length += data.length;
+    return this;
+  }
+
+  zeros(count: number): this {
+    this.ensure(count);
+    this.bytes.fill(0, this.length, this.length + count);
+    this.length += count;
+    return this;
+  }
+
+  finish(): Uint8Array {
+    return this.bytes.slice(0, this.length);
+  }
+}
+
+export function fourcc(bytes: Uint8Array, offset: number): string {
+  return String.fromCharCode(bytes[offset], bytes[offset + 1], bytes[offset + 2], bytes[offset + 3]);
+}
+
+export function hex2(value: number): string {
+  return value.toString(16).padStart(2, '0');
+}
+
+// --- コーデック文字列と設定 ---
+
+export function av1Codec(av1C: Uint8Array): string {
+  const profile = av1C[1] >> 5;
+  const level = av1C[1] & 0x1f;
+  const tier = av1C[2] >> 7 ? 'H' : 'M';
+  const highBitDepth = (av1C[2] >> 6) & 1;
+  const twelveBit = (av1C[2] >> 5) & 1;
+  const bitDepth = twelveBit ? 12 : highBitDepth ? 10 : 8;
+  return `av01.${profile}.${String(level).padStart(2, '0')}${tier}.${String(bitDepth).padStart(2, '0')}`;
+}
+
+function reverseBits32(value: number): number {
+  let result = 0;
+  for (let i = 0; i < 32; i++) {
+    result = (result << 1) | ((value >>> i) & 1);
+  }
+  return result >>> 0;
+}
+
+// MP4 の hvc1 / hev1 トラックと HEIF のタイルで共通
+export function hevcCodec(type: string, hvcC: Uint8Array): string {
+  const view = new DataView(hvcC.buffer, hvcC.byteOffset);
+  const space = ['', 'A', 'B', 'C'][hvcC[1] >> 6];
+  const tier = (hvcC[1] >> 5) & 1 ? 'H' : 'L';
+  const profile = hvcC[1] & 0x1f;
+  const compatibility = reverseBits32(view.getUint32(2)).toString(16);
+  const constraints = Array.from(hvcC.subarray(6, 12));
+  while (constraints.length > 0 && constraints[constraints.length - 1] === 0) constraints.pop();
+  const suffix = constraints.map((b) => `.${b.toString(16).toUpperCase()}`).join('');
+  return `${type}.${space}${profile}.${compatibility}.${tier}${hvcC[12]}${suffix}`;
+}
+
+export function aacCodec(config: Uint8Array | undefined): string {
+  if (!config || config.length === 0) return 'mp4a.40.2';
+  let objectType = config[0] >> 3;
+  if (objectType === 31) objectType = 32 + (((config[0] & 0x07) << 3) | (config[1] >> 5));
+  return `mp4a.40.${objectType}`;
+}
+
+// エンコーダーが description を返さない場合の OpusHead（pre-skip は libopus の既定値）
+// OpusHead の pre-skip（48kHz でのサンプル数）。OpusHead が無ければ opusHead() の既定値
+export function opusPreSkip(head: Uint8Array | undefined): number {
+  return head && head.length >= 12 ? new DataView(head.buffer, head.byteOffset).getUint16(10, true) : 312;
+}
+
+export function opusHead(channels: number, inputSampleRate: number, preSkip = 312): Uint8Array {
+  const head = new Uint8Array(19);
+  const view = new DataView(head.buffer);
+  head.set([0x4f, 0x70, 0x75, 0x73, 0x48, 0x65, 0x61, 0x64, 1, channels]);
+  view.setUint16(10, preSkip, true);
+  view.setUint32(12, inputSampleRate, true);
+  view.setInt16(16, 0, true);
+  head[18] = 0; // mono / stereo 以外（マッピングファミリー 1）は扱わない
+  return head;
+}
@@ -0,0 +1,201 @@
+// 動画・音声変換のエンジン選択
+// WebCodecs が使えるブラウザでは webcodecs.worker で変換し、対応していない形式や途中のエラーだけ
+// ffmpeg.wasm（video-queue / audio.ts）に切り替える。どちらで変換したかは結果の engine と perf の detail に残す
+
+import { convertAudioWithFFmpeg, type AudioOutputFormat } from './audio';
+import { UnsupportedMediaError } from './media-container';
+import { startRun, type PerfRun, type StageTiming } from './perf';
+import type { TranscodeOptions, TranscodeResult } from './transcode';
+import { getVideoJobQueue, type VideoJobOptions, type VideoJobResult } from './video-queue';
+import { WorkerPool } from './worker-pool';
+
+export type MediaEngine = 'webcodecs' | 'ffmpeg';
+
+// auto: WebCodecs を優先 / ffmpeg: 常に ffmpeg.wasm（比較や不具合の切り分け用）
+export type EnginePreference = 'auto' | 'ffmpeg';
+
+const PREFERENCE_KEY = 'lumina-media-engine';
+
+// localStorage に保存できない環境（プライベートモードなど）では、このページの間だけ覚えておく
+let memoryPreference: EnginePreference | null = null;
+const preferenceListeners = new Set<() => void>();
+
+export function getEnginePreference(): EnginePreference {
+  if (typeof window === 'undefined') return 'auto';
+  try {
+    const stored = window.localStorage.getItem(PREFERENCE_KEY);
+    if (stored === 'auto' || stored === 'ffmpeg') return stored;
+  } catch {
+    // 読めない場合は memoryPreference を使う
+  }
+  return memoryPreference ?? 'auto';
+}
+
+export function setEnginePreference(preference: EnginePreference) {
+  memoryPreference = preference;
+  try {
+    window.localStorage.setItem(PREFERENCE_KEY, preference);
+  } catch {
+    // 保存できなくても memoryPreference で足りる
+  }
+  preferenceListeners.forEach((listener) => listener());
+}
+
+// useSyncExternalStore 用（他のタブで変えた場合も storage イベントで反映する）
+export function subscribeEnginePreference(listener: () => void): () => void {
+  preferenceListeners.add(listener);
+  window.addEventListener('storage', listener);
+  return () => {
+    preferenceListeners.delete(listener);
+    window.removeEventListener('storage', listener);
+  };
+}
+
+export function supportsWebCodecs(): boolean {
+  return (
+    typeof window !== 'undefined' &&
+    typeof Worker !== 'undefined' &&
+    typeof VideoEncoder !== 'undefined' &&
+    typeof VideoDecoder !== 'undefined' &&
+    typeof AudioEncoder !== 'undefined' &&
+    typeof AudioDecoder !== 'undefined'
+  );
+}
+
+// 最初に WebCodecs を試すかどうか（false なら ffmpeg.wasm を先にロードしておく）
+export function prefersWebCodecs(preference: EnginePreference = getEnginePreference()): boolean {
+  return preference === 'auto' && supportsWebCodecs();
+}
+
+type WorkerResponse =
+  | { type: 'progress'; id: number; progress: number }
+  | ({ type: 'complete'; id: number; timings: StageTiming[] } & TranscodeResult)
+  | { type: 'unsupported' | 'error'; id: number; message: string; timings: StageTiming[] };
+
+interface Job {
+  file: Blob;
+  options: TranscodeOptions;
+  tool: string;
+  onProgress?: (progress: number) => void;
+  perf?: PerfRun;
+}
+
+// ハードウェアエンコーダーの同時セッション数には上限があるので、並列数は小さくする
+export function defaultWebCodecsPoolSize(): number {
+  const cores = typeof navigator !== 'undefined' && navigator.hardwareConcurrency ? navigator.hardwareConcurrency : 4;
+  return Math.min(2, Math.max(1, Math.floor(cores / 4)));
+}
+
+// webcodecs.worker のプール
+export class WebCodecsPool extends WorkerPool<Job, TranscodeResult, WorkerResponse> {
+  constructor(size: number = defaultWebCodecsPoolSize()) {
+    super(size);
+  }
+
+  convert(
+    file: Blob,
+    options: TranscodeOptions,
+    tool: string,
+    onProgress?: (progress: number) => void
+  ): Promise<TranscodeResult> {
+    return this.enqueue({ file, options, tool, onProgress });
+  }
+
+  protected createWorker(): Worker {
+    return new Worker(new URL('../workers/webcodecs.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+  }
+
+  protected post(worker: Worker, job: Job, id: number) {
+    // キューで待っていた時間は含めず、ワーカーに渡す時点から計る
+    job.perf = startRun(job.tool, `${job.options.container}/${job.options.preset}`);
+    worker.postMessage({ id, file: job.file, options: job.options });
+  }
+
+  protected receive(message: WorkerResponse, job: Job): TranscodeResult | undefined {
+    if (message.type === 'progress') {
+      job.onProgress?.(message.progress);
+      return undefined;
+    }
+
+    job.perf?.record(message.timings);
+    if (message.type !== 'complete') {
+      job.perf?.end(false, { engine: 'webcodecs', fallback: message.message });
+      throw message.type === 'unsupported' ? new UnsupportedMediaError(message.message) : new Error(message.message);
+    }
+    const { blob, mode, frames, videoCodec, audioCodec } = message;
+    const result: TranscodeResult = { blob, mode, frames, videoCodec, audioCodec };
+    job.perf?.bytes(job.file.size, result.blob.size);
+    job.perf?.end(true, { mode: result.mode, engine: 'webcodecs', frames: result.frames });
+    return result;
+  }
+
+  protected failed(job: Job, error: Error) {
+    job.perf?.end(false, { engine: 'webcodecs', fallback: `worker crashed: ${error.message}` });
+  }
+}
+
+// ページ間で使い回すため、プールはモジュール単位で1つだけ作る（ブラウザでのみ生成）
+let pool: WebCodecsPool | null = null;
+
+export function getWebCodecsPool(): WebCodecsPool {
+  if (!pool) {
+    pool = new WebCodecsPool();
+  }
+  return pool;
+}
+
+// ffmpeg に切り替えた理由（UnsupportedMediaError はコーデック・コンテナの非対応、それ以外は変換中のエラー）
+function fallbackReason(error: unknown): string {
+  if (error instanceof UnsupportedMediaError) return error.message;
+  return `error: ${error instanceof Error ? error.message : String(error)}`;
+}
+
+export interface EngineResult {
+  engine: MediaEngine;
+  // WebCodecs を試してから ffmpeg に切り替えた場合の理由
+  fallbackReason?: string;
+}
+
+export async function convertVideo(
+  file: File,
+  options: VideoJobOptions,
+  onProgress?: (progress: number) => void
+): Promise<VideoJobResult> {
+  let reason: string | undefined;
+  if (prefersWebCodecs()) {
+    try {
+      const result = await getWebCodecsPool().convert(file, { container: options.format, preset: options.preset }, 'video', onProgress);
+      return { blob: result.blob, mode: result.mode, originalSize: file.size, newSize: result.blob.size, engine: 'webcodecs' };
+    } catch (error) {
+      reason = fallbackReason(error);
+      console.warn('WebCodecs conversion failed, falling back to FFmpeg:', reason);
+      onProgress?.(0);
+    }
+  }
+  const result = await getVideoJobQueue().convert(file, options, onProgress);
+  return { ...result, fallbackReason: reason };
+}
+
+export async function convertAudio(
+  file: File,
+  format: AudioOutputFormat,
+  onProgress?: (progress: number) => void
+): Promise<{ blob: Blob } & EngineResult> {
+  let reason: string | undefined;
+  // WebCodecs には MP3 のエンコーダーが無い
+  if (prefersWebCodecs() && format === 'mp3') reason = 'audio-encoder: mp3';
+  else if (prefersWebCodecs()) {
+    try {
+      const result = await getWebCodecsPool().convert(file, { container: format, preset: 'quality' }, 'audio', onProgress);
+      return { blob: result.blob, engine: 'webcodecs' };
+    } catch (error) {
+      reason = fallbackReason(error);
+      console.warn('WebCodecs conversion failed, falling back to FFmpeg:', reason);
+      onProgress?.(0);
+    }
+  }
+  const blob = await convertAudioWithFFmpeg(file, format, onProgress);
+  return { blob, engine: 'ffmpeg', fallbackReason: reason };
+}
@@ -0,0 +1,432 @@
+// 画像のメタデータ（Exif・XMP・IPTC・コメント・テキスト）をバイナリのまま取り除く（ワーカーから使う純粋関数）
+// 画素データは再エンコードせず、残す部分は元のバッファの subarray のまま返す（コピーしない）
+import { readBoxes, readItemLocations, type Box } from './heif';
+import { crc32 } from './zip';
+
+export type ImageContainer = 'jpeg' | 'png' | 'webp' | 'heif';
+export type MetadataKind = 'exif' | 'xmp' | 'iptc' | 'comment' | 'text' | 'other';
+
+export interface RemovedMetadata {
+  kind: MetadataKind;
+  bytes: number;
+}
+
+export interface StripResult {
+  container: ImageContainer | null; // null なら対応していない形式（そのまま返す）
+  parts: Uint8Array[]; // 出力（new Blob(parts) でつなぐ）
+  removed: RemovedMetadata[];
+}
+
+export interface StripOptions {
+  // Exif の向き（Orientation）だけは残す。消すとスマホの縦写真が横向きで表示される
+  keepOrientation: boolean;
+}
+
+const DEFAULT_OPTIONS: StripOptions = { keepOrientation: true };
+
+const encoder = new TextEncoder();
+
+function startsWith(data: Uint8Array, offset: number, text: string): boolean {
+  if (offset + text.length > data.length) return false;
+  for (let i = 0; i < text.length; i++) {
+    if (data[offset + i] !== text.charCodeAt(i)) return false;
+  }
+  return true;
+}
+
+function fourcc(data: Uint8Array, offset: number): string {
+  return String.fromCharCode(data[offset], data[offset + 1], data[offset + 2], data[offset + 3]);
+}
+
+export function detectContainer(data: Uint8Array): ImageContainer | null {
+  if (data[0] === 0xff && data[1] === 0xd8 && data[2] === 0xff) return 'jpeg';
+  if (startsWith(data, 0, '\x89PNG\r\n\x1a\n')) return 'png';
+  if (startsWith(data, 0, 'RIFF') && startsWith(data, 8, 'WEBP')) return 'webp';
+  if (startsWith(data, 4, 'ftyp')) {
+    const size = new DataView(data.buffer, data.byteOffset, data.byteLength).getUint32(0);
+    const brands = [];
+    for (let offset = 8; offset + 4 <= Math.min(size, data.length); offset += 4) {
+      if (offset !== 12) brands.push(fourcc(data, offset)); // 12 はマイナーバージョン
+    }
+    if (brands.some((brand) => ['mif1', 'msf1', 'heic', 'heix', 'heim', 'heis', 'avif', 'avis'].includes(brand))) return 'heif';
+  }
+  return null;
+}
+
+// Exif（TIFF 形式）の IFD0 から Orientation を読む
+function readOrientation(tiff: Uint8Array): number | null {
+  if (tiff.length < 8) return null;
+  const little = tiff[0] === 0x49 && tiff[1] === 0x49;
+  if (!little && !(tiff[0] === 0x4d && tiff[1] === 0x4d)) return null;
+  const view = new DataView(tiff.buffer, tiff.byteOffset, tiff.byteLength);
+  const ifd = view.getUint32(4, little);
+  if (ifd + 2 > tiff.length) return null;
+  const count = view.getUint16(ifd, little);
+  for (let i = 0; i < count; i++) {
+    const entry = ifd + 2 + i * 12;
+    if (entry + 12 > tiff.length) break;
+    if (view.getUint16(entry, little) !== 0x0112) continue;
+    const value = view.getUint16(entry + 2, little) === 3 ? view.getUint16(entry + 8, little) : 0;
+    return value >= 1 && value <= 8 ? value : null;
+  }
+  return null;
+}
+
+// Orientation だけを持つ最小の Exif（ビッグエンディアンの TIFF、IFD0 にエントリ1つ）
+function orientationTiff(orientation: number): Uint8Array {
+  const tiff = new Uint8Array(26);
+  const view = new DataView(tiff.buffer);
+  tiff.set([0x4d, 0x4d, 0x00, 0x2a]);
+  view.setUint32(4, 8);
+  view.setUint16(8, 1);
+  view.setUint16(10, 0x0112);
+  view.setUint16(12, 3);
+  view.setUint32(14, 1);
+  view.setUint16(18, orientation);
+  view.setUint32(22, 0);
+  return tiff;
+}
+
+// 残す範囲を連続している限り1つの subarray にまとめる
+class Parts {
+  readonly parts: Uint8Array[] = [];
+  readonly removed: RemovedMetadata[] = [];
+  private keepFrom: number;
+
+  constructor(private readonly data: Uint8Array, start = 0) {
+    this.keepFrom = start;
+  }
+
+  drop(start: number, end: number, kind: MetadataKind) {
+    this.flush(start);
+    this.keepFrom = end;
+    this.removed.push({ kind, bytes: end - start });
+  }
+
+  // start〜end を bytes に置き換える（bytes は元の範囲の subarray でもよい。その位置で parts が区切られる）
+  replace(start: number, end: number, bytes: Uint8Array) {
+    this.flush(start);
+    this.parts.push(bytes);
+    this.keepFrom = end;
+  }
+
+  // end 以降（末尾の余計なデータ）は捨てる
+  finish(end: number): Uint8Array[] {
+    this.flush(end);
+    if (end < this.data.length) this.removed.push({ kind: 'other', bytes: this.data.length - end });
+    return this.parts;
+  }
+
+  private flush(end: number) {
+    if (end > this.keepFrom) this.parts.push(this.data.subarray(this.keepFrom, end));
+    this.keepFrom = Math.max(this.keepFrom, end);
+  }
+}
+
+// ---- JPEG: APPn / COM セグメント単位で取り除く ----
+
+function jpegSegmentKind(marker: number, data: Uint8Array, payload: number): MetadataKind | null {
+  switch (marker) {
+    case 0xe0: // APP0: JFIF は残す（JFXX のサムネイルは消す）
+      return startsWith(data, payload, 'JFIF\0') ? null : 'other';
+    case 0xe1:
+      if (startsWith(data, payload, 'Exif\0')) return 'exif';
+      if (startsWith(data, payload, 'http://ns.adobe.com/')) return 'xmp';
+      return 'other';
+    case 0xe2: // APP2: ICC プロファイルは色の再現に必要なので残す（MPF・FlashPix は消す）
+      return startsWith(data, payload, 'ICC_PROFILE\0') ? null : 'other';
+    case 0xed: // APP13: Photoshop の IRB（IPTC）
+      return 'iptc';
+    case 0xee: // APP14: Adobe（色変換の指定）は残す
+      return null;
+    case 0xfe:
+      return 'comment';
+    default:
+      return marker >= 0xe3 && marker <= 0xef ? 'other' : null;
+  }
+}
+
+function stripJpeg(data: Uint8Array, options: StripOptions): StripResult {
+  const parts = new Parts(data);
+  parts.replace(0, 2, data.subarray(0, 2));
+  let orientation: number | null = null;
+  let end = data.length;
+  let pos = 2;
+
+  while (pos + 1 < data.length) {
+    if (data[pos] !== 0xff) throw new Error(`Invalid JPEG marker at ${pos}`);
+    const marker = data[pos + 1];
+    if (marker === 0xff) {
+      pos++; // 埋め草
+      continue;
+    }
+    if (marker === 0xd9) {
+      end = pos + 2;
+      break;
+    }
+    if (marker === 0x01 || (marker >= 0xd0 && marker <= 0xd8)) {
+      pos += 2;
+      continue;
+    }
+    if (pos + 4 > data.length) throw new Error('Truncated JPEG segment');
+    const segmentEnd = pos + 2 + ((data[pos + 2] << 8) | data[pos + 3]);
+    if (segmentEnd > data.length) throw new Error('Truncated JPEG segment');
+
+    if (marker === 0xda) {
+      // SOS の後の圧縮データは、次のマーカー（0xFF00 と RSTn 以外）まで飛ばす
+      let p = segmentEnd;
+      while (true) {
+        p = data.indexOf(0xff, p);
+        if (p === -1 || p + 1 >= data.length) {
+          p = data.length;
+          break;
+        }
+        const next = data[p + 1];
+        if (next === 0x00 || (next >= 0xd0 && next <= 0xd7)) p += 2;
+        else if (next === 0xff) p++;
+        else break;
+      }
+      pos = p;
+      continue;
+    }
+
+    const kind = jpegSegmentKind(marker, data, pos + 4);
+    if (kind) {
+      if (kind === 'exif' && orientation === null) orientation = readOrientation(data.subarray(pos + 10, segmentEnd));
+      parts.drop(pos, segmentEnd, kind);
+    }
+    pos = segmentEnd;
+  }
+
+  // EOI より後ろ（MPF の2枚目の画像など。それぞれに Exif がある）も捨てる
+  const result = parts.finish(end);
+  if (options.keepOrientation && orientation && orientation !== 1) {
+    const tiff = orientationTiff(orientation);
+    const segment = new Uint8Array(4 + 6 + tiff.length);
+    segment.set([0xff, 0xe1, (segment.length - 2) >> 8, (segment.length - 2) & 0xff]);
+    segment.set(encoder.encode('Exif\0\0'), 4);
+    segment.set(tiff, 10);
+    result.splice(1, 0, segment);
+  }
+  return { container: 'jpeg', parts: result, removed: parts.removed };
+}
+
+// ---- PNG: チャンク単位で取り除く ----
+
+function pngChunk(type: string, payload: Uint8Array): Uint8Array {
+  const chunk = new Uint8Array(12 + payload.length);
+  const view = new DataView(chunk.buffer);
+  view.setUint32(0, payload.length);
+  chunk.set(encoder.encode(type), 4);
+  chunk.set(payload, 8);
+  view.setUint32(8 + payload.length, crc32(chunk.subarray(4, 8 + payload.length)));
+  return chunk;
+}
+
+function stripPng(data: Uint8Array, options: StripOptions): StripResult {
+  const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+  if (fourcc(data, 12) !== 'IHDR') throw new Error('PNG without IHDR');
+  // 署名と IHDR の直後（Orientation を入れ直す位置）で区切る
+  const afterHeader = 8 + 12 + view.getUint32(8);
+  const parts = new Parts(data);
+  parts.replace(0, afterHeader, data.subarray(0, afterHeader));
+  let orientation: number | null = null;
+  let end = data.length;
+  let pos = afterHeader;
+
+  while (pos + 12 <= data.length) {
+    const chunkEnd = pos + 12 + view.getUint32(pos);
+    if (chunkEnd > data.length) throw new Error('Truncated PNG chunk');
+    const type = fourcc(data, pos + 4);
+    if (type === 'eXIf') {
+      if (orientation === null) orientation = readOrientation(data.subarray(pos + 8, chunkEnd - 4));
+      parts.drop(pos, chunkEnd, 'exif');
+    } else if (type === 'iTXt' && startsWith(data, pos + 8, 'XML:com.adobe.xmp\0')) {
+      parts.drop(pos, chunkEnd, 'xmp');
+    } else if (type === 'tEXt' || type === 'zTXt' || type === 'iTXt') {
+      parts.drop(pos, chunkEnd, 'text');
+    } else if (type === 'tIME' || type === 'caBX') {
+      parts.drop(pos, chunkEnd, 'other');
+    }
+    pos = chunkEnd;
+    if (type === 'IEND') {
+      end = pos;
+      break;
+    }
+  }
+
+  const result = parts.finish(end);
+  if (options.keepOrientation && orientation && orientation !== 1) {
+    result.splice(1, 0, pngChunk('eXIf', orientationTiff(orientation)));
+  }
+  return { container: 'png', parts: result, removed: parts.removed };
+}
+
+// ---- WebP: RIFF のチャンク単位で取り除き、VP8X のフラグと RIFF のサイズを直す ----
+
+function stripWebp(data: Uint8Array, options: StripOptions): StripResult {
+  const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+  const end = Math.min(data.length, 8 + view.getUint32(4, true));
+  const parts = new Parts(data, 12);
+  let header: Uint8Array | null = null;
+  let orientation: number | null = null;
+  let pos = 12;
+
+  while (pos + 8 <= end) {
+    const size = view.getUint32(pos + 4, true);
+    const chunkEnd = pos + 8 + size + (size & 1);
+    if (chunkEnd > end + (size & 1)) throw new Error('Truncated WebP chunk');
+    const type = fourcc(data, pos);
+    if (type === 'EXIF') {
+      // 先頭に JPEG と同じ "Exif\0\0" が付いているファイルもある
+      const payload = pos + 8 + (startsWith(data, pos + 8, 'Exif\0\0') ? 6 : 0);
+      if (orientation === null) orientation = readOrientation(data.subarray(payload, pos + 8 + size));
+      parts.drop(pos, Math.min(chunkEnd, end), 'exif');
+    } else if (type === 'XMP ') {
+      parts.drop(pos, Math.min(chunkEnd, end), 'xmp');
+    } else if (type === 'VP8X') {
+      // 拡張ヘッダーの Exif(0x08)・XMP(0x04) フラグを下ろす（このチャンクだけコピー）
+      header = data.slice(pos, chunkEnd);
+      header[8] &= ~0x0c;
+      parts.replace(pos, chunkEnd, header);
+    }
+    pos = chunkEnd;
+  }
+
+  // 末尾の余り（RIFF の外）は removed に含める
+  const result = parts.finish(Math.min(pos, end));
+  // Exif を持てるのは VP8X のある拡張形式だけ。Orientation の Exif は仕様どおり画像データの後ろに置く
+  if (header && options.keepOrientation && orientation && orientation !== 1) {
+    const tiff = orientationTiff(orientation);
+    const chunk = new Uint8Array(8 + tiff.length);
+    chunk.set(encoder.encode('EXIF'));
+    new DataView(chunk.buffer).setUint32(4, tiff.length, true);
+    chunk.set(tiff, 8);
+    result.push(chunk);
+    header[8] |= 0x08;
+  }
+  let size = 4;
+  for (const part of result) size += part.length;
+  const riff = new Uint8Array(12);
+  riff.set(data.subarray(0, 12));
+  new DataView(riff.buffer).setUint32(4, size, true);
+  result.unshift(riff);
+  return { container: 'webp', parts: result, removed: parts.removed };
+}
+
+// ---- HEIF / AVIF: Exif・XMP アイテムの中身をゼロで埋める ----
+// アイテムを取り除くと mdat 内の他のアイテム（画像タイル）の位置がずれて iloc を書き直す必要があるので、
+// 位置はそのままにして中身だけ消す
+
+function readCString(data: Uint8Array, offset: number, end: number): [string, number] {
+  let stop = offset;
+  while (stop < end && data[stop] !== 0) stop++;
+  return [new TextDecoder().decode(data.subarray(offset, stop)), stop + 1];
+}
+
+// iinf から Exif / XMP アイテムの ID を集める
+function metadataItems(data: Uint8Array, view: DataView, iinf: Box): Map<number, MetadataKind> {
+  const items = new Map<number, MetadataKind>();
+  const version = data[iinf.body];
+  const entries = iinf.body + 4 + (version === 0 ? 2 : 4);
+  for (const infe of readBoxes(data, view, entries, iinf.end)) {
+    if (infe.type !== 'infe') continue;
+    const infeVersion = data[infe.body];
+    if (infeVersion < 2) continue;
+    let p = infe.body + 4;
+    const id = infeVersion === 2 ? view.getUint16(p) : view.getUint32(p);
+    p += (infeVersion === 2 ? 2 : 4) + 2;
+    const itemType = fourcc(data, p);
+    p += 4;
+    if (itemType === 'Exif') {
+      items.set(id, 'exif');
+    } else if (itemType === 'mime') {
+      const [, afterName] = readCString(data, p, infe.end);
+      const [contentType] = readCString(data, afterName, infe.end);
+      if (contentType === 'application/rdf+xml') items.set(id, 'xmp');
+    }
+  }
+  return items;
+}
+
+// iloc から対象アイテムのファイル内の範囲を求める
+function itemRanges(
+  data: Uint8Array,
+  view: DataView,
+  iloc: Box,
+  idat: Box | undefined,
+  items: Map<number, MetadataKind>
+): { start: number; end: number; kind: MetadataKind }[] {
+  const ranges: { start: number; end: number; kind: MetadataKind }[] = [];
+  for (const [id, location] of readItemLocations(data, view, iloc)) {
+    const kind = items.get(id);
+    if (!kind) continue;
+    // construction_method 0 はファイル内の位置、1 は idat の中の位置
+    const origin = location.constructionMethod === 0 ? 0 : location.constructionMethod === 1 && idat ? idat.body : -1;
+    if (origin < 0) continue;
+    for (const { offset, length } of location.extents) {
+      if (length === 0) continue;
+      const start = origin + offset;
+      if (start + length > data.length) throw new Error('HEIF item outside the file');
+      ranges.push({ start, end: start + length, kind });
+    }
+  }
+  return ranges;
+}
+
+const XMP_UUID = 'be7acfcb97a942e89c71999491e3afac';
+
+function stripHeif(data: Uint8Array): StripResult {
+  const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+  const ranges: { start: number; end: number; kind: MetadataKind }[] = [];
+
+  for (const box of readBoxes(data, view, 0, data.length)) {
+    if (box.type === 'meta') {
+      const children = readBoxes(data, view, box.body + 4, box.end);
+      const iinf = children.find((child) => child.type === 'iinf');
+      const iloc = children.find((child) => child.type === 'iloc');
+      if (!iinf || !iloc) continue;
+      const items = metadataItems(data, view, iinf);
+      if (items.size > 0) {
+        ranges.push(...itemRanges(data, view, iloc, children.find((child) => child.type === 'idat'), items));
+      }
+    } else if (box.type === 'uuid' && box.body + 16 <= box.end) {
+      const uuid = Array.from(data.subarray(box.body, box.body + 16), (b) => b.toString(16).padStart(2, '0')).join('');
+      if (uuid === XMP_UUID) ranges.push({ start: box.body + 16, end: box.end, kind: 'xmp' });
+    }
+  }
+
+  ranges.sort((a, b) => a.start - b.start);
+  const parts: Uint8Array[] = [];
+  const removed: RemovedMetadata[] = [];
+  let pos = 0;
+  for (const range of ranges) {
+    const start = Math.max(range.start, pos);
+    if (range.end <= start) continue;
+    if (start > pos) parts.push(data.subarray(pos, start));
+    parts.push(new Uint8Array(range.end - start));
+    removed.push({ kind: range.kind, bytes: range.end - start });
+    pos = range.end;
+  }
+  if (pos < data.length) parts.push(data.subarray(pos));
+  return { container: 'heif', parts, removed };
+}
+
+/**
+ * 画像からメタデータを取り除く。対応していない形式はそのまま返す
+ * 壊れたファイルは Error を投げる
+ */
+export function stripMetadata(data: Uint8Array, options: StripOptions = DEFAULT_OPTIONS): StripResult {
+  switch (detectContainer(data)) {
+    case 'jpeg':
+      return stripJpeg(data, options);
+    case 'png':
+      return stripPng(data, options);
+    case 'webp':
+      return stripWebp(data, options);
+    case 'heif':
+      return stripHeif(data);
+    default:
+      return { container: null, parts: [data], removed: [] };
+  }
+}
@@ -0,0 +1,848 @@
+// MP4 / MOV の読み書き（WebCodecs で変換するときのコンテナ処理）
+// 読み込み: moov のサンプルテーブルからサンプルの位置と時刻を組み立て、mdat は必要な範囲だけ読む
+// 書き出し: サンプルを順に mdat へ積み、最後に moov を作って先頭側に置く（faststart の形になる）
+// フラグメント MP4（moof）は扱わない（UnsupportedMediaError で ffmpeg に任せる）
+
+import {
+  BlobBuilder,
+  BlobReader,
+  ByteWriter,
+  IDENTITY_MATRIX,
+  UnsupportedMediaError,
+  aacCodec,
+  av1Codec,
+  fourcc,
+  hex2,
+  hevcCodec,
+  isIdentityMatrix,
+  opusHead,
+  type Demuxer,
+  type MediaSample,
+  type MediaTrack,
+  type OutputSample,
+  type OutputTrack,
+} from './media-container';
+
+interface Box {
+  type: string;
+  start: number; // ボックス先頭
+  dataStart: number; // ヘッダーの直後
+  end: number;
+}
+
+function readBoxHeader(bytes: Uint8Array, pos: number, limit: number, base = 0): Box | null {
+  if (pos + 8 > limit) return null;
+  const view = new DataView(bytes.buffer, bytes.byteOffset);
+  let size = view.getUint32(pos);
+  const type = fourcc(bytes, pos + 4);
+  let header = 8;
+  if (size === 1) {
+    if (pos + 16 > limit) return null;
+    size = view.getUint32(pos + 8) * 0x100000000 + view.getUint32(pos + 12);
+    header = 16;
+  } else if (size === 0) {
+    size = limit - pos; // ファイル末尾まで
+  }
+  if (size < header) return null;
+  return { type, start: base + pos, dataStart: base + pos + header, end: base + pos + size };
+}
+
+// bytes の [start, end) にある子ボックス
+function children(bytes: Uint8Array, start: number, end: number): Box[] {
+  const boxes: Box[] = [];
+  for (let pos = start; pos < end; ) {
+    const box = readBoxHeader(bytes, pos, end);
+    if (!box || box.end > end) break;
+    boxes.push(box);
+    pos = box.end;
+  }
+  return boxes;
+}
+
+function child(bytes: Uint8Array, parent: Box, type: string): Box | undefined {
+  return children(bytes, parent.dataStart, parent.end).find((box) => box.type === type);
+}
+
+function path(bytes: Uint8Array, parent: Box, ...types: string[]): Box | undefined {
+  let box: Box | undefined = parent;
+  for (const type of types) {
+    box = box && child(bytes, box, type);
+  }
+  return box;
+}
+
+// --- コーデック文字列 ---
+
+function avcCodec(avcC: Uint8Array): string {
+  return `avc1.${hex2(avcC[1])}${hex2(avcC[2])}${hex2(avcC[3])}`;
+}
+
+function vp9Codec(vpcC: Uint8Array): string {
+  // vpcC は FullBox（version・flags の4バイトの後に profile・level・bitDepth）
+  return `vp09.${String(vpcC[4]).padStart(2, '0')}.${String(vpcC[5]).padStart(2, '0')}.${String(vpcC[6] >> 4).padStart(2, '0')}`;
+}
+
+// MPEG-4 の記述子（タグ + 可変長サイズ）
+function readDescriptor(bytes: Uint8Array, pos: number): { tag: number; start: number; end: number } {
+  const tag = bytes[pos++];
+  let size = 0;
+  for (let i = 0; i < 4; i++) {
+    const b = bytes[pos++];
+    size = (size << 7) | (b & 0x7f);
+    if (!(b & 0x80)) break;
+  }
+  return { tag, start: pos, end: pos + size };
+}
+
+// esds から objectTypeIndication と DecoderSpecificInfo（AAC なら AudioSpecificConfig）を取り出す
+function parseEsds(esds: Uint8Array): { objectType: number; config?: Uint8Array } {
+  let pos = 4; // FullBox
+  const es = readDescriptor(esds, pos);
+  if (es.tag !== 0x03) return { objectType: 0 };
+  pos = es.start + 2;
+  const flags = esds[pos++];
+  if (flags & 0x80) pos += 2;
+  if (flags & 0x40) pos += 1 + esds[pos];
+  if (flags & 0x20) pos += 2;
+  const decoderConfig = readDescriptor(esds, pos);
+  if (decoderConfig.tag !== 0x04) return { objectType: 0 };
+  const objectType = esds[decoderConfig.start];
+  pos = decoderConfig.start + 13;
+  if (pos < decoderConfig.end) {
+    const specific = readDescriptor(esds, pos);
+    if (specific.tag === 0x05) return { objectType, config: esds.slice(specific.start, specific.end) };
+  }
+  return { objectType };
+}
+
+// dOps（MP4 の Opus 設定、ビッグエンディアン）を OpusHead（リトルエンディアン）に直す
+function dOpsToOpusHead(dOps: Uint8Array): Uint8Array {
+  const view = new DataView(dOps.buffer, dOps.byteOffset, dOps.byteLength);
+  const head = new Uint8Array(19 + Math.max(0, dOps.length - 11));
+  const out = new DataView(head.buffer);
+  head.set([0x4f, 0x70, 0x75, 0x73, 0x48, 0x65, 0x61, 0x64, 1]); // 'OpusHead', version 1
+  head[9] = dOps[1];
+  out.setUint16(10, view.getUint16(2), true);
+  out.setUint32(12, view.getUint32(4), true);
+  out.setInt16(16, view.getInt16(8), true);
+  head[18] = dOps[10];
+  head.set(dOps.subarray(11), 19);
+  return head;
+}
+
+// OpusHead から dOps を作る（書き出し用）
+function opusHeadToDOps(head: Uint8Array): Uint8Array {
+  const view = new DataView(head.buffer, head.byteOffset, head.byteLength);
+  const writer = new ByteWriter()
+    .u8(0)
+    .u8(head[9])
+    .u16(view.getUint16(10, true))
+    .u32(view.getUint32(12, true))
+    .u16(view.getInt16(16, true) & 0xffff)
+    .u8(head[18]);
+  if (head[18] !== 0) writer.bytesOf(head.subarray(19));
+  return writer.finish();
+}
+
+// --- 読み込み ---
+
+interface SampleTable {
+  offsets: Float64Array;
+  sizes: Uint32Array;
+  dts: Float64Array; // トラックの timescale 単位
+  cts: Float64Array;
+  keys: Uint8Array | null; // null なら全サンプルがキーフレーム（stss なし）
+}
+
+interface Mp4Track extends MediaTrack {
+  timescale: number;
+  shift: number; // 編集リストによるずれ（timescale 単位、表示時刻から引く）
+  table: SampleTable;
+}
+
+function parseSampleTable(bytes: Uint8Array, stbl: Box): SampleTable | null {
+  const view = new DataView(bytes.buffer, bytes.byteOffset);
+
+  const stsz = child(bytes, stbl, 'stsz');
+  const stz2 = child(bytes, stbl, 'stz2');
+  let sizes: Uint32Array;
+  if (stsz) {
+    const fixed = view.getUint32(stsz.dataStart + 4);
+    const count = view.getUint32(stsz.dataStart + 8);
+    sizes = new Uint32Array(count);
+    for (let i = 0; i < count; i++) sizes[i] = fixed || view.getUint32(stsz.dataStart + 12 + i * 4);
+  } else if (stz2) {
+    const fieldSize = bytes[stz2.dataStart + 7];
+    const count = view.getUint32(stz2.dataStart + 8);
+    sizes = new Uint32Array(count);
+    const base = stz2.dataStart + 12;
+    for (let i = 0; i < count; i++) {
+      if (fieldSize === 4) sizes[i] = i % 2 === 0 ? bytes[base + (i >> 1)] >> 4 : bytes[base + (i >> 1)] & 0x0f;
+      else if (fieldSize === 8) sizes[i] = bytes[base + i];
+      else sizes[i] = view.getUint16(base + i * 2);
+    }
+  } else {
+    return null;
+  }
+  const count = sizes.length;
+
+  // チャンクの位置
+  const stco = child(bytes, stbl, 'stco');
+  const co64 = child(bytes, stbl, 'co64');
+  const chunkBox = stco ?? co64;
+  if (!chunkBox) return null;
+  const chunkCount = view.getUint32(chunkBox.dataStart + 4);
+  const chunkOffsets = new Float64Array(chunkCount);
+  for (let i = 0; i < chunkCount; i++) {
+    chunkOffsets[i] = stco
+      ? view.getUint32(chunkBox.dataStart + 8 + i * 4)
+      : view.getUint32(chunkBox.dataStart + 8 + i * 8) * 0x100000000 + view.getUint32(chunkBox.dataStart + 12 + i * 8);
+  }
+
+  // チャンクごとのサンプル数（stsc）からサンプルの位置を求める
+  const stsc = child(bytes, stbl, 'stsc');
+  if (!stsc) return null;
+  const entries = view.getUint32(stsc.dataStart + 4);
+  const offsets = new Float64Array(count);
+  let sample = 0;
+  for (let e = 0; e < entries && sample < count; e++) {
+    const entry = stsc.dataStart + 8 + e * 12;
+    const firstChunk = view.getUint32(entry) - 1;
+    const perChunk = view.getUint32(entry + 4);
+    const lastChunk = e + 1 < entries ? view.getUint32(entry + 12) - 1 : chunkCount;
+    for (let chunk = firstChunk; chunk < lastChunk && sample < count; chunk++) {
+      let offset = chunkOffsets[chunk];
+      for (let i = 0; i < perChunk && sample < count; i++) {
+        offsets[sample] = offset;
+        offset += sizes[sample++];
+      }
+    }
+  }
+
+  // デコード時刻（stts）と表示時刻のずれ（ctts）
+  const stts = child(bytes, stbl, 'stts');
+  if (!stts) return null;
+  const dts = new Float64Array(count);
+  let time = 0;
+  sample = 0;
+  const sttsEntries = view.getUint32(stts.dataStart + 4);
+  for (let e = 0; e < sttsEntries && sample < count; e++) {
+    const sampleCount = view.getUint32(stts.dataStart + 8 + e * 8);
+    const delta = view.getUint32(stts.dataStart + 12 + e * 8);
+    for (let i = 0; i < sampleCount && sample < count; i++) {
+      dts[sample++] = time;
+      time += delta;
+    }
+  }
+  while (sample < count) dts[sample++] = time;
+
+  const cts = new Float64Array(dts);
+  const ctts = child(bytes, stbl, 'ctts');
+  if (ctts) {
+    const version = bytes[ctts.dataStart];
+    const cttsEntries = view.getUint32(ctts.dataStart + 4);
+    sample = 0;
+    for (let e = 0; e < cttsEntries && sample < count; e++) {
+      const sampleCount = view.getUint32(ctts.dataStart + 8 + e * 8);
+      const offset = version === 0 ? view.getUint32(ctts.dataStart + 12 + e * 8) : view.getInt32(ctts.dataStart + 12 + e * 8);
+      for (let i = 0; i < sampleCount && sample < count; i++, sample++) cts[sample] += offset;
+    }
+  }
+
+  const stss = child(bytes, stbl, 'stss');
+  let keys: Uint8Array | null = null;
+  if (stss) {
+    keys = new Uint8Array(count);
+    const keyCount = view.getUint32(stss.dataStart + 4);
+    for (let i = 0; i < keyCount; i++) {
+      const index = view.getUint32(stss.dataStart + 8 + i * 4) - 1;
+      if (index < count) keys[index] = 1;
+    }
+  }
+
+  return { offsets, sizes, dts, cts, keys };
+}
+
+function parseSampleEntry(bytes: Uint8Array, stsd: Box, kind: 'video' | 'audio'): Partial<MediaTrack> & { codec: string } {
+  const entry = readBoxHeader(bytes, stsd.dataStart + 8, stsd.end);
+  if (!entry) return { codec: 'unknown' };
+  const view = new DataView(bytes.buffer, bytes.byteOffset);
+  const type = entry.type;
+
+  if (kind === 'video') {
+    const width = view.getUint16(entry.dataStart + 24);
+    const height = view.getUint16(entry.dataStart + 26);
+    const boxes = children(bytes, entry.dataStart + 78, entry.end);
+    const config = (name: string) => {
+      const box = boxes.find((b) => b.type === name);
+      return box ? bytes.slice(box.dataStart, box.end) : undefined;
+    };
+    if (type === 'avc1' || type === 'avc3') {
+      const avcC = config('avcC');
+      // avc3 はパラメータセットがサンプル側にある（description なしでデコーダーに渡す）
+      return { codec: avcC ? avcCodec(avcC) : 'avc1.42001f', description: type === 'avc1' ? avcC : undefined, width, height };
+    }
+    if (type === 'hvc1' || type === 'hev1') {
+      const hvcC = config('hvcC');
+      return { codec: hvcC ? hevcCodec(type, hvcC) : type, description: hvcC, width, height };
+    }
+    if (type === 'av01') {
+      const av1C = config('av1C');
+      return { codec: av1C ? av1Codec(av1C) : 'av01.0.08M.08', description: av1C, width, height };
+    }
+    if (type === 'vp09') {
+      const vpcC = config('vpcC');
+      return { codec: vpcC ? vp9Codec(vpcC) : 'vp09.00.10.08', width, height };
+    }
+    if (type === 'vp08') return { codec: 'vp8', width, height };
+    return { codec: `unknown:${type}`, width, height };
+  }
+
+  // AudioSampleEntry（QuickTime の version 1 / 2 は拡張フィールドが続く）
+  const version = view.getUint16(entry.dataStart + 8);
+  let channels = view.getUint16(entry.dataStart + 16);
+  let sampleRate = view.getUint32(entry.dataStart + 24) / 65536;
+  let childStart = entry.dataStart + 28;
+  if (version === 1) childStart += 16;
+  if (version === 2) {
+    sampleRate = view.getFloat64(entry.dataStart + 32);
+    channels = view.getUint32(entry.dataStart + 40);
+    childStart += 36;
+  }
+  let boxes = children(bytes, childStart, entry.end);
+  // QuickTime では esds が wave の中にあることがある
+  const wave = boxes.find((b) => b.type === 'wave');
+  if (wave) boxes = boxes.concat(children(bytes, wave.dataStart, wave.end));
+  const find = (name: string) => boxes.find((b) => b.type === name);
+
+  if (type === 'mp4a') {
+    const esds = find('esds');
+    const { objectType, config } = esds ? parseEsds(bytes.subarray(esds.dataStart, esds.end)) : { objectType: 0x40, config: undefined };
+    if (objectType === 0x69 || objectType === 0x6b) return { codec: 'mp3', sampleRate, channels };
+    return { codec: aacCodec(config), description: config, sampleRate, channels };
+  }
+  if (type === 'Opus') {
+    const dOps = find('dOps');
+    return { codec: 'opus', description: dOps ? dOpsToOpusHead(bytes.subarray(dOps.dataStart, dOps.end)) : undefined, sampleRate: 48000, channels };
+  }
+  if (type === '.mp3') return { codec: 'mp3', sampleRate, channels };
+  if (type === 'fLaC') {
+    const dfLa = find('dfLa');
+    // WebCodecs の FLAC の description は 'fLaC' + メタデータブロック
+    const description = dfLa
+      ? new Uint8Array([0x66, 0x4c, 0x61, 0x43, ...bytes.subarray(dfLa.dataStart + 4, dfLa.end)])
+      : undefined;
+    return { codec: 'flac', description, sampleRate, channels };
+  }
+  return { codec: `unknown:${type}`, sampleRate, channels };
+}
+
+// moov を探す（先頭8バイトずつ辿るだけなので、mdat が大きくても読み込まない）
+async function findTopLevel(reader: BlobReader): Promise<{ moov?: Box; fragmented: boolean }> {
+  let pos = 0;
+  let moov: Box | undefined;
+  let fragmented = false;
+  while (pos + 8 <= reader.size) {
+    const header = await reader.read(pos, 16);
+    const box = readBoxHeader(header, 0, Math.min(16, reader.size - pos), pos);
+    if (!box) break;
+    // サイズ 0 はファイル末尾まで
+    if (new DataView(header.buffer).getUint32(0) === 0) box.end = reader.size;
+    if (box.type === 'moov') moov = box;
+    if (box.type === 'moof') fragmented = true;
+    if (box.end <= pos) break;
+    pos = box.end;
+  }
+  return { moov, fragmented };
+}
+
+export async function openMp4(reader: BlobReader): Promise<Demuxer> {
+  const { moov: moovBox, fragmented } = await findTopLevel(reader);
+  if (!moovBox) throw new UnsupportedMediaError('mp4: moov not found');
+  if (fragmented) throw new UnsupportedMediaError('mp4: fragmented');
+
+  const moovBytes = await reader.read(moovBox.start, moovBox.end - moovBox.start);
+  const moov = readBoxHeader(moovBytes, 0, moovBytes.length)!;
+  const view = new DataView(moovBytes.buffer);
+  if (child(moovBytes, moov, 'mvex')) throw new UnsupportedMediaError('mp4: fragmented');
+
+  const mvhd = child(moovBytes, moov, 'mvhd');
+  const movieTimescale = mvhd ? view.getUint32(mvhd.dataStart + (moovBytes[mvhd.dataStart] === 1 ? 20 : 12)) : 1000;
+
+  const tracks: Mp4Track[] = [];
+  for (const trak of children(moovBytes, moov.dataStart, moov.end).filter((box) => box.type === 'trak')) {
+    const tkhd = child(moovBytes, trak, 'tkhd');
+    const mdhd = path(moovBytes, trak, 'mdia', 'mdhd');
+    const hdlr = path(moovBytes, trak, 'mdia', 'hdlr');
+    const stbl = path(moovBytes, trak, 'mdia', 'minf', 'stbl');
+    const stsd = stbl && child(moovBytes, stbl, 'stsd');
+    if (!tkhd || !mdhd || !hdlr || !stbl || !stsd) continue;
+
+    const handler = fourcc(moovBytes, hdlr.dataStart + 8);
+    const kind = handler === 'vide' ? 'video' : handler === 'soun' ? 'audio' : null;
+    if (!kind) continue;
+
+    const v1 = moovBytes[mdhd.dataStart] === 1;
+    const timescale = view.getUint32(mdhd.dataStart + (v1 ? 20 : 12));
+    const mediaDuration = v1
+      ? view.getUint32(mdhd.dataStart + 24) * 0x100000000 + view.getUint32(mdhd.dataStart + 28)
+      : view.getUint32(mdhd.dataStart + 16);
+    const tkhdV1 = moovBytes[tkhd.dataStart] === 1;
+    const id = view.getUint32(tkhd.dataStart + (tkhdV1 ? 20 : 12));
+    // 表示行列は duration の後の reserved・layer・alternate_group・volume（16バイト）に続く
+    const matrixStart = tkhd.dataStart + (tkhdV1 ? 52 : 40);
+    const matrix = Array.from({ length: 9 }, (_, i) => view.getInt32(matrixStart + i * 4));
+
+    const table = parseSampleTable(moovBytes, stbl);
+    if (!table || table.sizes.length === 0) continue;
+
+    // 編集リスト: 先頭の空の編集は開始の遅れ、最初の通常の編集の media_time は先頭のずれ
+    let shift = 0;
+    const elst = path(moovBytes, trak, 'edts', 'elst');
+    if (elst) {
+      const version = moovBytes[elst.dataStart];
+      const entries = view.getUint32(elst.dataStart + 4);
+      const entrySize = version === 1 ? 20 : 12;
+      let delay = 0;
+      for (let e = 0; e < entries; e++) {
+        const pos = elst.dataStart + 8 + e * entrySize;
+        const segmentDuration = version === 1 ? view.getUint32(pos) * 0x100000000 + view.getUint32(pos + 4) : view.getUint32(pos);
+        const mediaTime = version === 1 ? view.getInt32(pos + 8) * 0x100000000 + view.getUint32(pos + 12) : view.getInt32(pos + 4);
+        if (mediaTime === -1) {
+          delay += (segmentDuration * timescale) / movieTimescale;
+          continue;
+        }
+        shift = mediaTime - delay;
+        break;
+      }
+    }
+
+    const entry = parseSampleEntry(moovBytes, stsd, kind);
+    const seconds = mediaDuration / timescale;
+    tracks.push({
+      id,
+      kind,
+      timescale,
+      shift,
+      table,
+      duration: seconds * 1e6,
+      frameRate: kind === 'video' && seconds > 0 ? table.sizes.length / seconds : undefined,
+      matrix: kind === 'video' && !isIdentityMatrix(matrix) ? matrix : undefined,
+      ...entry,
+    });
+  }
+
+  if (tracks.length === 0) throw new UnsupportedMediaError('mp4: no audio or video track');
+  const duration = Math.max(...tracks.map((track) => track.duration));
+
+  return {
+    format: 'mp4',
+    tracks: tracks.map(publicTrack),
+    duration,
+    samples: () => readSamples(reader, tracks),
+  };
+}
+
+function publicTrack(track: Mp4Track): MediaTrack {
+  const { id, kind, codec, description, width, height, sampleRate, channels, frameRate, matrix, duration } = track;
+  return { id, kind, codec, description, width, height, sampleRate, channels, frameRate, matrix, duration };
+}
+
+// 各トラックのサンプルをファイル上の位置の順に並べ、隣り合うものはまとめて読む
+async function* readSamples(reader: BlobReader, tracks: Mp4Track[]): AsyncGenerator<MediaSample> {
+  const total = tracks.reduce((sum, track) => sum + track.table.sizes.length, 0);
+  const order = new Float64Array(total * 2); // [offset, track * 2^32 + index] の組
+  let n = 0;
+  tracks.forEach((track, t) => {
+    for (let i = 0; i < track.table.sizes.length; i++) {
+      order[n * 2] = track.table.offsets[i];
+      order[n * 2 + 1] = t * 0x100000000 + i;
+      n++;
+    }
+  });
+  const indices = Array.from({ length: total }, (_, i) => i).sort((a, b) => order[a * 2] - order[b * 2] || order[a * 2 + 1] - order[b * 2 + 1]);
+
+  const READ_SIZE = 4 << 20;
+  let bufferStart = 0;
+  let buffer = new Uint8Array(0);
+
+  for (const i of indices) {
+    const offset = order[i * 2];
+    const t = Math.floor(order[i * 2 + 1] / 0x100000000);
+    const index = order[i * 2 + 1] % 0x100000000;
+    const track = tracks[t];
+    const size = track.table.sizes[index];
+
+    if (offset < bufferStart || offset + size > bufferStart + buffer.length) {
+      bufferStart = offset;
+      buffer = await reader.read(offset, Math.max(size, READ_SIZE));
+      if (buffer.length < size) throw new Error('mp4: sample beyond end of file');
+    }
+    const { timescale, shift, table } = track;
+    const next = index + 1 < table.dts.length ? table.dts[index + 1] : table.dts[index] + (index > 0 ? table.dts[index] - table.dts[index - 1] : 0);
+    yield {
+      track: track.id,
+      // バッファは次の読み込みで置き換わるので、サンプルはそのまま参照してよい（slice しない）
+      data: buffer.subarray(offset - bufferStart, offset - bufferStart + size),
+      timestamp: ((table.cts[index] - shift) / timescale) * 1e6,
+      decodeTimestamp: ((table.dts[index] - shift) / timescale) * 1e6,
+      duration: ((next - table.dts[index]) / timescale) * 1e6,
+      key: table.keys ? table.keys[index] === 1 : true,
+    };
+  }
+}
+
+// --- 書き出し ---
+
+interface MuxTrack {
+  config: OutputTrack;
+  timescale: number;
+  sizes: number[];
+  dts: number[]; // timescale 単位
+  cts: number[];
+  keys: number[]; // キーフレームのサンプル番号（1始まり）
+  chunks: { offset: number; samples: number }[];
+  firstTimestamp: number | null; // 最初のデコード時刻（マイクロ秒）
+  start: number; // 最初の表示時刻（マイクロ秒）
+  lastDuration: number;
+}
+
+const VIDEO_TIMESCALE = 90000;
+const MOVIE_TIMESCALE = 1000;
+
+function box(type: string, ...parts: Uint8Array[]): Uint8Array {
+  const size = 8 + parts.reduce((sum, part) => sum + part.length, 0);
+  const writer = new ByteWriter(size).u32(size).ascii(type);
+  parts.forEach((part) => writer.bytesOf(part));
+  return writer.finish();
+}
+
+function fullBox(type: string, version: number, flags: number, ...parts: Uint8Array[]): Uint8Array {
+  return box(type, new ByteWriter(4).u8(version).u24(flags).finish(), ...parts);
+}
+
+function descriptor(tag: number, ...parts: Uint8Array[]): Uint8Array {
+  const size = parts.reduce((sum, part) => sum + part.length, 0);
+  const writer = new ByteWriter(size + 5).u8(tag);
+  // サイズは常に4バイト（0x80 の継続ビット付き）で書く
+  writer.u8(0x80 | ((size >> 21) & 0x7f)).u8(0x80 | ((size >> 14) & 0x7f)).u8(0x80 | ((size >> 7) & 0x7f)).u8(size & 0x7f);
+  parts.forEach((part) => writer.bytesOf(part));
+  return writer.finish();
+}
+
+function esds(objectType: number, config: Uint8Array | undefined): Uint8Array {
+  const decoderConfig = new ByteWriter().u8(objectType).u8(0x15).u24(0).u32(0).u32(0).finish();
+  return fullBox(
+    'esds',
+    0,
+    0,
+    descriptor(
+      0x03,
+      new ByteWriter().u16(0).u8(0).finish(),
+      descriptor(0x04, decoderConfig, ...(config ? [descriptor(0x05, config)] : [])),
+      descriptor(0x06, new Uint8Array([0x02]))
+    )
+  );
+}
+
+function vpcC(codec: string): Uint8Array {
+  const [, profile = '0', level = '10', bitDepth = '8'] = codec.split('.');
+  return fullBox(
+    'vpcC',
+    1,
+    0,
+    new ByteWriter()
+      .u8(Number(profile))
+      .u8(Number(level))
+      .u8((Number(bitDepth) << 4) | (1 << 1)) // 4:2:0（colocated でない）
+      .u8(1)
+      .u8(1)
+      .u8(1) // BT.709
+      .u16(0)
+      .finish()
+  );
+}
+
+function sampleEntry(track: MuxTrack): Uint8Array {
+  const { config } = track;
+  if (config.kind === 'video') {
+    const visual = new ByteWriter()
+      .zeros(6)
+      .u16(1) // data_reference_index
+      .zeros(16)
+      .u16(config.width ?? 0)
+      .u16(config.height ?? 0)
+      .u32(0x00480000)
+      .u32(0x00480000)
+      .u32(0)
+      .u16(1)
+      .zeros(32)
+      .u16(0x0018)
+      .u16(0xffff)
+      .finish();
+    const codec = config.codec;
+    if (codec.startsWith('avc1') || codec.startsWith('avc3')) {
+      if (!config.description) throw new UnsupportedMediaError('mp4: missing avcC');
+      return box('avc1', visual, box('avcC', config.description));
+    }
+    if (codec.startsWith('hvc1') || codec.startsWith('hev1')) {
+      if (!config.description) throw new UnsupportedMediaError('mp4: missing hvcC');
+      return box('hvc1', visual, box('hvcC', config.description));
+    }
+    if (codec.startsWith('av01')) {
+      if (!config.description) throw new UnsupportedMediaError('mp4: missing av1C');
+      return box('av01', visual, box('av1C', config.description));
+    }
+    if (codec.startsWith('vp09')) return box('vp09', visual, vpcC(codec));
+    throw new UnsupportedMediaError(`mp4: cannot store ${codec}`);
+  }
+
+  const audio = (type: string, ...extra: Uint8Array[]) =>
+    box(
+      type,
+      new ByteWriter()
+        .zeros(6)
+        .u16(1)
+        .zeros(8)
+        .u16(config.channels ?? 2)
+        .u16(16)
+        .u32(0)
+        .u32(Math.min(0xffff, config.codec === 'opus' ? 48000 : config.sampleRate ?? 48000) * 65536)
+        .finish(),
+      ...extra
+    );
+  if (config.codec.startsWith('mp4a')) return audio('mp4a', esds(0x40, config.description));
+  if (config.codec === 'mp3') return audio('mp4a', esds(0x6b, undefined));
+  if (config.codec === 'opus') return audio('Opus', box('dOps', opusHeadToDOps(config.description ?? opusHead(config.channels ?? 2, config.sampleRate ?? 48000))));
+  throw new UnsupportedMediaError(`mp4: cannot store ${config.codec}`);
+}
+
+// ランレングスで [count, value] の組にまとめる
+function runs(values: number[]): [number, number][] {
+  const result: [number, number][] = [];
+  for (const value of values) {
+    const last = result[result.length - 1];
+    if (last && last[1] === value) last[0]++;
+    else result.push([1, value]);
+  }
+  return result;
+}
+
+export class Mp4Muxer {
+  private tracks: MuxTrack[] = [];
+  private data = new BlobBuilder();
+  private lastTrack = -1;
+
+  addTrack(config: OutputTrack): number {
+    this.tracks.push({
+      config,
+      // Opus は入力のサンプルレートによらず 48kHz で数える
+      timescale: config.kind === 'video' ? VIDEO_TIMESCALE : config.codec === 'opus' ? 48000 : config.sampleRate ?? 48000,
+      sizes: [],
+      dts: [],
+      cts: [],
+      keys: [],
+      chunks: [],
+      firstTimestamp: null,
+      start: Infinity,
+      lastDuration: 0,
+    });
+    return this.tracks.length - 1;
+  }
+
+  addSample(index: number, sample: OutputSample) {
+    const track = this.tracks[index];
+    const decodeTimestamp = sample.decodeTimestamp ?? sample.timestamp;
+    if (track.firstTimestamp === null) track.firstTimestamp = decodeTimestamp;
+    // B フレームがあっても、表示順の先頭は最初の数サンプルのどれか
+    if (track.sizes.length < 16) track.start = Math.min(track.start, sample.timestamp);
+    const toUnits = (us: number) => Math.round(((us - track.firstTimestamp!) * track.timescale) / 1e6);
+
+    track.sizes.push(sample.data.length);
+    track.dts.push(Math.max(toUnits(decodeTimestamp), track.dts.length > 0 ? track.dts[track.dts.length - 1] : 0));
+    track.cts.push(toUnits(sample.timestamp));
+    if (sample.key) track.keys.push(track.sizes.length);
+    track.lastDuration = Math.max(1, Math.round((sample.duration * track.timescale) / 1e6));
+
+    // 同じトラックのサンプルが続いている間は1つのチャンクにまとめる
+    const lastChunk = track.chunks[track.chunks.length - 1];
+    if (this.lastTrack === index && lastChunk) lastChunk.samples++;
+    else track.chunks.push({ offset: this.data.size, samples: 1 });
+    this.lastTrack = index;
+    this.data.push(sample.data);
+  }
+
+  finalize(type: string): Blob {
+    const ftyp = box(
+      'ftyp',
+      new ByteWriter().ascii('isom').u32(0x200).ascii('isom').ascii('iso2').ascii('avc1').ascii('mp41').finish()
+    );
+    const dataSize = this.data.size;
+    const largeMdat = dataSize + 8 > 0xffffffff;
+    const mdatHeader = largeMdat
+      ? new ByteWriter().u32(1).ascii('mdat').u64(dataSize + 16).finish()
+      : new ByteWriter().u32(dataSize + 8).ascii('mdat').finish();
+
+    // moov のサイズはチャンク位置の値に依存しないので、一度作って大きさを測ってから位置を確定する
+    const use64 = ftyp.length + mdatHeader.length + dataSize + (1 << 24) > 0xffffffff;
+    const probe = this.moov(0, use64);
+    const base = ftyp.length + probe.length + mdatHeader.length;
+    const moov = this.moov(base, use64);
+
+    return this.data.toBlob(type, [ftyp, moov, mdatHeader]);
+  }
+
+  private moov(base: number, use64: boolean): Uint8Array {
+    const durations = this.tracks.map((track) => this.mediaDuration(track));
+    const movieDuration = Math.max(
+      0,
+      ...this.tracks.map((track, i) => Math.round((durations[i] / track.timescale) * MOVIE_TIMESCALE + this.delay(track)))
+    );
+
+    const mvhd = fullBox(
+      'mvhd',
+      0,
+      0,
+      new ByteWriter()
+        .u32(0)
+        .u32(0)
+        .u32(MOVIE_TIMESCALE)
+        .u32(movieDuration)
+        .u32(0x00010000)
+        .u16(0x0100)
+        .zeros(10)
+        .finish(),
+      this.matrix(IDENTITY_MATRIX),
+      new ByteWriter().zeros(24).u32(this.tracks.length + 1).finish()
+    );
+
+    return box('moov', mvhd, ...this.tracks.map((track, i) => this.trak(track, i + 1, durations[i], base, use64)));
+  }
+
+  private matrix(values: number[]): Uint8Array {
+    const writer = new ByteWriter(36);
+    values.forEach((value) => writer.i32(value));
+    return writer.finish();
+  }
+
+  private mediaDuration(track: MuxTrack): number {
+    if (track.dts.length === 0) return 0;
+    return track.dts[track.dts.length - 1] + track.lastDuration;
+  }
+
+  // トラックの開始の遅れ（movie timescale 単位）
+  private delay(track: MuxTrack): number {
+    const first = Math.min(...this.tracks.map((t) => t.start));
+    return !Number.isFinite(track.start) ? 0 : Math.round(((track.start - first) * MOVIE_TIMESCALE) / 1e6);
+  }
+
+  private trak(track: MuxTrack, id: number, duration: number, base: number, use64: boolean): Uint8Array {
+    const { config } = track;
+    const video = config.kind === 'video';
+    const movieDuration = Math.round((duration / track.timescale) * MOVIE_TIMESCALE);
+
+    const tkhd = fullBox(
+      'tkhd',
+      0,
+      3, // enabled | in_movie
+      new ByteWriter()
+        .u32(0)
+        .u32(0)
+        .u32(id)
+        .u32(0)
+        .u32(movieDuration + this.delay(track))
+        .zeros(8)
+        .u16(0)
+        .u16(0)
+        .u16(video ? 0 : 0x0100)
+        .u16(0)
+        .finish(),
+      // 入力の回転（縦向きの動画など）はサンプルに焼き込まず、表示行列のまま引き継ぐ
+      this.matrix(config.matrix ?? IDENTITY_MATRIX),
+      new ByteWriter()
+        .u32((video ? config.width ?? 0 : 0) * 65536)
+        .u32((video ? config.height ?? 0 : 0) * 65536)
+        .finish()
+    );
+
+    // 先頭の B フレームで表示時刻が 0 より後ろにずれる分と、他のトラックより遅れて始まる分を編集リストで表す
+    const firstCts = track.cts.length > 0 ? Math.min(...track.cts.slice(0, 16)) : 0;
+    const delay = this.delay(track);
+    const edits = new ByteWriter();
+    let editCount = 0;
+    if (delay > 0) {
+      edits.u32(delay).i32(-1).u32(0x00010000);
+      editCount++;
+    }
+    edits.u32(movieDuration).i32(firstCts).u32(0x00010000);
+    editCount++;
+    const edts = box('edts', fullBox('elst', 0, 0, new ByteWriter().u32(editCount).finish(), edits.finish()));
+
+    const mdhd = fullBox(
+      'mdhd',
+      0,
+      0,
+      new ByteWriter().u32(0).u32(0).u32(track.timescale).u32(duration).u16(0x55c4).u16(0).finish() // 言語 'und'
+    );
+    const hdlr = fullBox(
+      'hdlr',
+      0,
+      0,
+      new ByteWriter().u32(0).ascii(video ? 'vide' : 'soun').zeros(12).ascii(video ? 'VideoHandler' : 'SoundHandler').u8(0).finish()
+    );
+    const mediaHeader = video
+      ? fullBox('vmhd', 0, 1, new ByteWriter().zeros(8).finish())
+      : fullBox('smhd', 0, 0, new ByteWriter().zeros(4).finish());
+    const dinf = box('dinf', fullBox('dref', 0, 0, new ByteWriter().u32(1).finish(), fullBox('url ', 0, 1)));
+
+    const minf = box('minf', mediaHeader, dinf, this.stbl(track, base, use64));
+    return box('trak', tkhd, edts, box('mdia', mdhd, hdlr, minf));
+  }
+
+  private stbl(track: MuxTrack, base: number, use64: boolean): Uint8Array {
+    const count = track.sizes.length;
+    const stsd = fullBox('stsd', 0, 0, new ByteWriter().u32(1).finish(), sampleEntry(track));
+
+    const deltas = track.dts.map((dts, i) => (i + 1 < count ? track.dts[i + 1] - dts : track.lastDuration));
+    const sttsRuns = runs(deltas);
+    const stts = new ByteWriter().u32(sttsRuns.length);
+    sttsRuns.forEach(([n, delta]) => stts.u32(n).u32(delta));
+
+    const parts = [stsd, fullBox('stts', 0, 0, stts.finish())];
+
+    const offsets = track.cts.map((cts, i) => cts - track.dts[i]);
+    if (offsets.some((offset) => offset !== 0)) {
+      const cttsRuns = runs(offsets);
+      const ctts = new ByteWriter().u32(cttsRuns.length);
+      cttsRuns.forEach(([n, offset]) => ctts.u32(n).i32(offset));
+      parts.push(fullBox('ctts', 1, 0, ctts.finish()));
+    }
+
+    if (track.config.kind === 'video' && track.keys.length < count) {
+      const stss = new ByteWriter().u32(track.keys.length);
+      track.keys.forEach((index) => stss.u32(index));
+      parts.push(fullBox('stss', 0, 0, stss.finish()));
+    }
+
+    const stsc = new ByteWriter();
+    let stscEntries = 0;
+    let previous = -1;
+    track.chunks.forEach((chunk, i) => {
+      if (chunk.samples === previous) return;
+      stsc.u32(i + 1).u32(chunk.samples).u32(1);
+      stscEntries++;
+      previous = chunk.samples;
+    });
+    parts.push(fullBox('stsc', 0, 0, new ByteWriter().u32(stscEntries).finish(), stsc.finish()));
+
+    const stsz = new ByteWriter().u32(0).u32(count);
+    track.sizes.forEach((size) => stsz.u32(size));
+    parts.push(fullBox('stsz', 0, 0, stsz.finish()));
+
+    const chunkOffsets = new ByteWriter().u32(track.chunks.length);
+    track.chunks.forEach((chunk) => (use64 ? chunkOffsets.u64(base + chunk.offset) : chunkOffsets.u32(base + chunk.offset)));
+    parts.push(fullBox(use64 ? 'co64' : 'stco', 0, 0, chunkOffsets.finish()));
+
+    return box('stbl', ...parts);
+  }
+}
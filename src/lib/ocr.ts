@@ -1,26 +1,185 @@
-import Tesseract from 'tesseract.js';
+import type { Worker as TesseractWorker } from 'tesseract.js';
+import { LANG_DATA_VERSION, TESSERACT_VERSION } from './engine-assets';
+import { startRun, type PerfRun } from './perf';
+
+export { LANG_DATA_VERSION, TESSERACT_VERSION };
+
+// scripts/fetch-tesseract-data.mjs が public/tesseract/<version>/ に配置するファイル
+// 同一オリジン・バージョン付きパスなので Service Worker のキャッシュ（CacheFirst）に載り、オフラインでも使える
+export const OCR_LANGUAGES = 'eng+jpn'; // 英語と日本語
+
+export function tesseractPaths() {
+  const base = `/tesseract/${TESSERACT_VERSION}`;
+  return {
+    workerPath: `${base}/worker.min.js`,
+    corePath: `${base}/core`,
+    langPath: `${base}/lang/${LANG_DATA_VERSION}`,
+    workerBlobURL: false,
+    // 言語データは Service Worker がキャッシュするので、IndexedDB に二重に保存しない
+    cacheMethod: 'none',
+  };
+}
+
+// 1ワーカーあたり言語データ込みで100MB以上使うので、コア数の半分（最大4）に抑える
+export function defaultOcrPoolSize(): number {
+  if (typeof navigator === 'undefined' || !navigator.hardwareConcurrency) return 2;
+  return Math.max(1, Math.min(4, Math.floor(navigator.hardwareConcurrency / 2)));
+}
+
+interface Job {
+  image: Blob;
+  onProgress?: (progress: number) => void;
+  resolve: (text: string) => void;
+  reject: (error: Error) => void;
+}
+
+interface Slot {
+  worker: Promise<TesseractWorker>;
+  // いま処理中のページの進捗コールバック（logger はワーカー作成時にしか渡せないため）
+  onProgress: ((progress: number) => void) | null;
+}
+
+/**
+ * 使い回す Tesseract ワーカーのプール
+ * ワーカーは必要になった時に作り（最大 size 個）、言語データの読み込みと初期化は1ワーカーにつき1回だけ
+ */
+export class OcrPool {
+  private slots: Slot[] = [];
+  private idle: Slot[] = [];
+  private queue: Job[] = [];
+
+  constructor(private size: number = defaultOcrPoolSize()) {}
+
+  private spawn(): Slot {
+    // tesseract.js は最初の OCR の時に読み込む（テキストラボの初期表示に含めない）
+    const worker = import('tesseract.js').then(({ createWorker, OEM }) =>
+      createWorker(OCR_LANGUAGES, OEM.LSTM_ONLY, {
+        ...tesseractPaths(),
+        logger: (m) => {
+          if (m.status === 'recognizing text') {
+            // 0〜1の数値を送る
+            slot.onProgress?.(m.progress);
+          }
+        },
+      })
+    );
+    const slot: Slot = { worker, onProgress: null };
+    this.slots.push(slot);
+    return slot;
+  }
+
+  recognize(image: Blob, onProgress?: (progress: number) => void): Promise<string> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ image, onProgress, resolve, reject });
+      this.pump();
+    });
+  }
+
+  private pump() {
+    while (this.queue.length > 0) {
+      let slot = this.idle.pop();
+      if (!slot) {
+        if (this.slots.length >= this.size) return;
+        slot = this.spawn();
+      }
+      this.run(slot, this.queue.shift()!);
+    }
+  }
+
+  private async run(slot: Slot, job: Job) {
+    slot.onProgress = job.onProgress ?? null;
+    // load はワーカーの初期化待ち（初期化済みならほぼ0）。画像のデコードは recognize の中で行われる
+    const perf = startRun('ocr');
+    try {
+      const worker = await perf.stage('load', () => slot.worker).catch((error) => {
+        // 初期化に失敗したワーカーは捨てる（次のジョブで作り直す）
+        this.slots = this.slots.filter((s) => s !== slot);
+        throw error;
+      });
+      const { data } = await perf.stage('compute', () => worker.recognize(job.image));
+      perf.bytes(job.image.size, new TextEncoder().encode(data.text).length);
+      perf.end();
+      job.resolve(data.text);
+    } catch (error) {
+      perf.end(false);
+      job.reject(error instanceof Error ? error : new Error(String(error)));
+    } finally {
+      slot.onProgress = null;
+      if (this.slots.includes(slot)) this.idle.push(slot);
+      this.pump();
+    }
+  }
+
+  async terminate() {
+    const slots = this.slots;
+    this.slots = [];
+    this.idle = [];
+    await Promise.all(slots.map((slot) => slot.worker.then((w) => w.terminate()).catch(() => {})));
+  }
+}
+
+let sharedPool: OcrPool | null = null;
+
+// ページをまたいで1つのプールを使い回す（2回目以降は初期化済みのワーカーで即座に認識する）
+export function getOcrPool(): OcrPool {
+  if (!sharedPool) sharedPool = new OcrPool();
+  return sharedPool;
+}
 
 export async function recognizeText(
-  file: File, 
+  file: File,
   onProgress: (progress: number) => void
 ): Promise<string> {
-  return new Promise(async (resolve, reject) => {
-    try {
-      const result = await Tesseract.recognize(
-        file,
-        'eng+jpn', // 英語と日本語
-        {
-          logger: (m) => {
-            if (m.status === 'recognizing text') {
-              // 0〜1の数値を送る
-              onProgress(m.progress);
-            }
-          },
-        }
-      );
-      resolve(result.data.text);
-    } catch (error) {
-      reject(error);
+  return getOcrPool().recognize(file, onProgress);
+}
+
+// スキャンPDFの各ページから、ページ全体の画像（JPEG）を取り出す
+// PDFを描画するのではなく埋め込まれた画像をそのまま使うので、画像のないページは null
+export async function extractPdfPageImages(file: File): Promise<(Blob | null)[]> {
+  const perf = startRun('ocr-pdf');
+  try {
+    const images = await extractPageImages(file, perf);
+    perf.bytes(file.size, images.reduce((sum, image) => sum + (image?.size ?? 0), 0));
+    perf.end(true, { pages: images.length });
+    return images;
+  } catch (error) {
+    perf.end(false);
+    throw error;
+  }
+}
+
+async function extractPageImages(file: File, perf: PerfRun): Promise<(Blob | null)[]> {
+  const { PDFDocument, PDFDict, PDFName, PDFArray, PDFNumber, PDFRawStream } = await perf.stage('load', () => import('pdf-lib'));
+  const bytes = await perf.stage('read', () => file.arrayBuffer());
+  const doc = await perf.stage('decode', () => PDFDocument.load(bytes, { ignoreEncryption: true, updateMetadata: false }));
+
+  const isJpeg = (stream: InstanceType<typeof PDFRawStream>) => {
+    const filter = stream.dict.lookup(PDFName.of('Filter'));
+    if (filter instanceof PDFName) return filter === PDFName.of('DCTDecode');
+    if (filter instanceof PDFArray) return filter.size() === 1 && filter.lookup(0) === PDFName.of('DCTDecode');
+    return false;
+  };
+  const numberOf = (dict: InstanceType<typeof PDFDict>, key: string) => {
+    const value = dict.lookup(PDFName.of(key));
+    return value instanceof PDFNumber ? value.asNumber() : 0;
+  };
+
+  return perf.stage('compute', () => doc.getPages().map((page) => {
+    const xObjects = page.node.Resources()?.lookupMaybe(PDFName.of('XObject'), PDFDict);
+    if (!xObjects) return null;
+
+    let best: InstanceType<typeof PDFRawStream> | null = null;
+    let bestArea = 0;
+    for (const [name] of xObjects.entries()) {
+      const stream = xObjects.lookup(name);
+      if (!(stream instanceof PDFRawStream)) continue;
+      if (stream.dict.lookup(PDFName.of('Subtype')) !== PDFName.of('Image') || !isJpeg(stream)) continue;
+      const area = numberOf(stream.dict, 'Width') * numberOf(stream.dict, 'Height');
+      if (area > bestArea) {
+        best = stream;
+        bestArea = area;
+      }
     }
-  });
-}
\ No newline at end of file
+    return best ? new Blob([best.contents as unknown as BlobPart], { type: 'image/jpeg' }) : null;
+  }));
+}
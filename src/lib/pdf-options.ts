@@ -0,0 +1,12 @@
+// PDF結合の設定（pdf-lib を読み込まずに画面側から使えるよう、pdf-utils から分けている）
+export interface MergeOptions {
+  // オブジェクトストリームでまとめる（小さくなるが保存時の処理とメモリが増える）
+  useObjectStreams: boolean;
+  // 省メモリモード：ファイルごとにコピー済みオブジェクトを書き出して解放する
+  incremental: boolean;
+}
+
+export const DEFAULT_MERGE_OPTIONS: MergeOptions = {
+  useObjectStreams: true,
+  incremental: false,
+};
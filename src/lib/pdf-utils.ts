@@ -1,19 +1,157 @@
-import { PDFDocument } from 'pdf-lib';
+import {
+  PDFDocument,
+  PDFCrossRefSection,
+  PDFHeader,
+  PDFName,
+  PDFObject,
+  PDFRef,
+  PDFTrailer,
+  PDFTrailerDict,
+} from 'pdf-lib';
+import { DEFAULT_MERGE_OPTIONS, type MergeOptions } from './pdf-options';
+import { StageClock } from './perf';
 
-export async function mergePDFs(files: File[]): Promise<{ blob: Blob; filename: string; count: number }> {
-  // 空のPDFドキュメントを作成
-  const mergedPdf = await PDFDocument.create();
-
-  for (const file of files) {
-    const arrayBuffer = await file.arrayBuffer();
-    const pdf = await PDFDocument.load(arrayBuffer);
-    
-    const copiedPages = await mergedPdf.copyPages(pdf, pdf.getPageIndices());
-    copiedPages.forEach((page) => mergedPdf.addPage(page));
+export { DEFAULT_MERGE_OPTIONS, type MergeOptions } from './pdf-options';
+
+export interface MergeProgress {
+  index: number;
+  pages: number;
+  totalPages: number;
+}
+
+const encoder = new TextEncoder();
+
+function indirectObjectBytes(ref: PDFRef, object: PDFObject): Uint8Array {
+  const head = encoder.encode(`${ref.objectNumber} ${ref.generationNumber} obj\n`);
+  const tail = encoder.encode('\nendobj\n\n');
+  const bytes = new Uint8Array(head.length + object.sizeInBytes() + tail.length);
+  bytes.set(head, 0);
+  const end = object.copyBytesInto(bytes, head.length);
+  bytes.set(tail, head.length + end);
+  return bytes;
+}
+
+function serialize(item: { sizeInBytes(): number; copyBytesInto(buffer: Uint8Array, offset: number): number }): Uint8Array {
+  const bytes = new Uint8Array(item.sizeInBytes());
+  item.copyBytesInto(bytes, 0);
+  return bytes;
+}
+
+// 1ファイルずつ読み込んでページをコピーし、ソースはすぐに手放す
+// （ループの外にソースの参照を残さないので、コピー後はGCで回収できる）
+async function appendFile(merged: PDFDocument, file: Blob, clock: StageClock): Promise<number> {
+  const bytes = await clock.time('read', () => file.arrayBuffer());
+  const source = await clock.time('decode', () => PDFDocument.load(bytes, { updateMetadata: false }));
+  return clock.time('compute', async () => {
+    const pages = await merged.copyPages(source, source.getPageIndices());
+    pages.forEach((page) => merged.addPage(page));
+    return pages.length;
+  });
+}
+
+// すべてのページを1つのドキュメントに集めてから保存する（pdf-lib の通常の save）
+// clock を渡すと、読み込み・解析・ページのコピー・書き出しの時間をそこに記録する
+export async function mergeToBytes(
+  files: Blob[],
+  options: MergeOptions,
+  onProgress?: (progress: MergeProgress) => void,
+  clock: StageClock = new StageClock()
+): Promise<Uint8Array> {
+  const merged = await PDFDocument.create();
+  let totalPages = 0;
+
+  for (let index = 0; index < files.length; index++) {
+    const pages = await appendFile(merged, files[index], clock);
+    totalPages += pages;
+    onProgress?.({ index, pages, totalPages });
   }
 
-  const pdfBytes = await mergedPdf.save();
-  
+  return clock.time('encode', () => merged.save({ useObjectStreams: options.useObjectStreams }));
+}
+
+// 省メモリモード：ファイルを1つ追加するたびに、コピーしたオブジェクトを
+// PDFのバイト列として onChunk に渡し、ドキュメントのコンテキストから削除する。
+// 最後まで保持するのはカタログ・ページツリー・Info だけなので、
+// メモリ使用量は「最大のソース1つ分」程度に収まる。
+// xref はオブジェクトストリームを使わない従来形式で書き出す。
+export async function mergeIncremental(
+  files: Blob[],
+  onChunk: (chunk: Uint8Array) => void,
+  onProgress?: (progress: MergeProgress) => void,
+  clock: StageClock = new StageClock()
+): Promise<number> {
+  const merged = await PDFDocument.create();
+  const { context } = merged;
+  const { Root, Info } = context.trailerInfo;
+  const retained = new Set([Root, Info, merged.catalog.get(PDFName.of('Pages'))]
+    .filter((ref): ref is PDFRef => ref instanceof PDFRef));
+
+  const offsets: [PDFRef, number][] = [];
+  let offset = 0;
+  const emit = (bytes: Uint8Array) => {
+    onChunk(bytes);
+    offset += bytes.length;
+  };
+
+  const flush = (includeRetained: boolean) => {
+    const parts: Uint8Array[] = [];
+    let size = 0;
+    for (const [ref, object] of context.enumerateIndirectObjects()) {
+      if (!includeRetained && retained.has(ref)) continue;
+      const bytes = indirectObjectBytes(ref, object);
+      offsets.push([ref, offset + size]);
+      parts.push(bytes);
+      size += bytes.length;
+      context.delete(ref);
+    }
+    if (size === 0) return;
+
+    // 小さなオブジェクトを1つずつ渡さず、ファイル単位の1チャンクにまとめる
+    const chunk = new Uint8Array(size);
+    let position = 0;
+    for (const part of parts) {
+      chunk.set(part, position);
+      position += part.length;
+    }
+    emit(chunk);
+  };
+
+  emit(serialize(PDFHeader.forVersion(1, 7)));
+  emit(encoder.encode('\n\n'));
+
+  let totalPages = 0;
+  for (let index = 0; index < files.length; index++) {
+    const pages = await appendFile(merged, files[index], clock);
+    totalPages += pages;
+    await clock.time('encode', () => flush(false));
+    onProgress?.({ index, pages, totalPages });
+  }
+
+  const size = context.largestObjectNumber + 1;
+  await clock.time('encode', () => {
+    flush(true);
+
+    const xref = PDFCrossRefSection.create();
+    offsets
+      .sort(([a], [b]) => a.objectNumber - b.objectNumber)
+      .forEach(([ref, objectOffset]) => xref.addEntry(ref, objectOffset));
+    const xrefOffset = offset;
+    emit(serialize(xref));
+    emit(encoder.encode('\n'));
+    const trailer = context.obj({ Size: size });
+    if (Root) trailer.set(PDFName.of('Root'), Root);
+    if (Info) trailer.set(PDFName.of('Info'), Info);
+    emit(serialize(PDFTrailerDict.of(trailer)));
+    emit(encoder.encode('\n'));
+    emit(serialize(PDFTrailer.forLastCrossRefSectionOffset(xrefOffset)));
+  });
+
+  return totalPages;
+}
+
+export async function mergePDFs(files: File[]): Promise<{ blob: Blob; filename: string; count: number }> {
+  const pdfBytes = await mergeToBytes(files, DEFAULT_MERGE_OPTIONS);
+
   // 👇 ESLintを黙らせる
   // eslint-disable-next-line @typescript-eslint/no-explicit-any
   const blob = new Blob([pdfBytes as any], { type: 'application/pdf' });
@@ -23,4 +161,4 @@ export async function mergePDFs(files: File[]): Promise<{ blob: Blob; filename:
     filename: 'merged_document.pdf',
     count: files.length
   };
-}
\ No newline at end of file
+}
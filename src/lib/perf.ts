@@ -0,0 +1,297 @@
+// 変換処理の段階ごとの計測（User Timing）
+// measure 名は `lumina:<tool>:<stage>`（段階）と `lumina:<tool>`（1回の処理全体）で、detail に run 番号などを入れる
+// ワーカーからも読み込めるように、window に触るのは installPerfApi だけにしている
+
+export type PerfStage = 'load' | 'read' | 'decode' | 'compute' | 'encode' | 'write';
+
+export const PERF_PREFIX = 'lumina:';
+
+// このモジュールより前からある measure（ベンチマークが名前で読んでいるので残している）
+const LEGACY_MEASURES = ['ffmpeg-load', 'ai-model-load', 'json-process'];
+
+// ワーカー内で計った段階。時刻は performance.timeOrigin + performance.now()（ミリ秒の絶対時刻）
+// ワーカーとメインスレッドでは timeOrigin が違うので、絶対時刻にしてから受け渡す
+export interface StageTiming {
+  stage: PerfStage;
+  start: number;
+  end: number;
+}
+
+export interface PerfRunSummary {
+  run: number;
+  tool: string;
+  label: string | null;
+  ok: boolean;
+  start: number; // このドキュメントの timeOrigin からのミリ秒
+  duration: number;
+  stages: Partial<Record<PerfStage, number>>; // 段階ごとの合計ミリ秒（同じ段階が何度あっても足し合わせる）
+  bytesIn: number;
+  bytesOut: number;
+  wasmMemory: number | null; // 計れない経路（ffmpeg.wasm・tesseract.js は内部のワーカーで wasm を持つ）では null
+  detail: Record<string, unknown> | null;
+}
+
+export interface PerfCounters {
+  runs: number;
+  failures: number;
+  bytesIn: number;
+  bytesOut: number;
+  wasmMemoryPeak: number | null;
+  stages: Partial<Record<PerfStage, number>>;
+}
+
+export interface PerfEntry {
+  name: string;
+  start: number;
+  duration: number;
+  detail: unknown;
+}
+
+export interface LuminaPerfApi {
+  version: 1;
+  runs(): PerfRunSummary[];
+  entries(): PerfEntry[];
+  counters(): Record<string, PerfCounters>;
+  clear(): void;
+  // 以後の measure を1件ずつ受け取る（buffered なので、それまでの分も最初に届く）。戻り値で購読をやめる
+  subscribe(listener: (entry: PerfEntry) => void): () => void;
+}
+
+declare global {
+  interface Window {
+    __luminaPerf?: LuminaPerfApi;
+  }
+}
+
+export function perfNow(): number {
+  return performance.timeOrigin + performance.now();
+}
+
+// ワーカー側: 段階ごとの時刻を集めて、結果のメッセージと一緒にメインスレッドへ返す
+export class StageClock {
+  readonly timings: StageTiming[] = [];
+
+  async time<T>(stage: PerfStage, fn: () => T | Promise<T>): Promise<T> {
+    const start = perfNow();
+    try {
+      return await fn();
+    } finally {
+      this.timings.push({ stage, start, end: perfNow() });
+    }
+  }
+}
+
+// 記録した run は直近の分だけ持つ（長時間のバッチでもメモリが増え続けないように）
+const MAX_RUNS = 500;
+let runs: PerfRunSummary[] = [];
+let counters: Record<string, PerfCounters> = {};
+let nextRun = 0;
+
+export class PerfRun {
+  readonly run = nextRun++;
+  private readonly start = performance.now();
+  private stages: Partial<Record<PerfStage, number>> = {};
+  private bytesIn = 0;
+  private bytesOut = 0;
+  private wasmMemory: number | null = null;
+  private ended = false;
+
+  constructor(readonly tool: string, readonly label: string | null = null) {}
+
+  async stage<T>(stage: PerfStage, fn: () => T | Promise<T>): Promise<T> {
+    const start = performance.now();
+    try {
+      return await fn();
+    } finally {
+      this.measure(stage, start);
+    }
+  }
+
+  // コールバック形式の処理など、stage で包めない区間用（start は performance.now() の値）
+  measure(stage: PerfStage, start: number, end: number = performance.now()) {
+    performance.measure(`${PERF_PREFIX}${this.tool}:${stage}`, {
+      start,
+      end,
+      detail: { run: this.run, tool: this.tool, stage, label: this.label },
+    });
+    this.stages[stage] = (this.stages[stage] ?? 0) + (end - start);
+  }
+
+  // ワーカーで計った段階を、このドキュメントの時間軸に直して記録する
+  record(timings: StageTiming[] | undefined) {
+    timings?.forEach(({ stage, start, end }) =>
+      this.measure(stage, start - performance.timeOrigin, end - performance.timeOrigin)
+    );
+  }
+
+  bytes(bytesIn: number, bytesOut: number) {
+    this.bytesIn += bytesIn;
+    this.bytesOut += bytesOut;
+  }
+
+  memory(bytes: number | null | undefined) {
+    if (bytes == null) return;
+    this.wasmMemory = Math.max(this.wasmMemory ?? 0, bytes);
+  }
+
+  end(ok = true, detail: Record<string, unknown> | null = null) {
+    if (this.ended) return;
+    this.ended = true;
+    const end = performance.now();
+    performance.measure(`${PERF_PREFIX}${this.tool}`, {
+      start: this.start,
+      end,
+      // PerformanceObserver だけで run を組み立て直せるように、バイト数などもここに載せる
+      detail: {
+        run: this.run,
+        tool: this.tool,
+        label: this.label,
+        ok,
+        bytesIn: this.bytesIn,
+        bytesOut: this.bytesOut,
+        wasmMemory: this.wasmMemory,
+        ...detail,
+      },
+    });
+
+    runs.push({
+      run: this.run,
+      tool: this.tool,
+      label: this.label,
+      ok,
+      start: this.start,
+      duration: end - this.start,
+      stages: this.stages,
+      bytesIn: this.bytesIn,
+      bytesOut: this.bytesOut,
+      wasmMemory: this.wasmMemory,
+      detail,
+    });
+    if (runs.length > MAX_RUNS) runs = runs.slice(-MAX_RUNS);
+
+    const counter = (counters[this.tool] ??= {
+      runs: 0,
+      failures: 0,
+      bytesIn: 0,
+      bytesOut: 0,
+      wasmMemoryPeak: null,
+      stages: {},
+    });
+    counter.runs++;
+    if (!ok) counter.failures++;
+    counter.bytesIn += this.bytesIn;
+    counter.bytesOut += this.bytesOut;
+    if (this.wasmMemory !== null) counter.wasmMemoryPeak = Math.max(counter.wasmMemoryPeak ?? 0, this.wasmMemory);
+    for (const [stage, ms] of Object.entries(this.stages) as [PerfStage, number][]) {
+      counter.stages[stage] = (counter.stages[stage] ?? 0) + ms;
+    }
+  }
+}
+
+export function startRun(tool: string, label: string | null = null): PerfRun {
+  installPerfApi();
+  return new PerfRun(tool, label);
+}
+
+// WebAssembly.Memory を数える。instantiate / instantiateStreaming を包んで、
+// import・export された Memory を覚えておく（WeakRef なので解放は妨げない）
+const memories = new Set<WeakRef<WebAssembly.Memory>>();
+let tracking = false;
+
+function collectMemories(...namespaces: unknown[]) {
+  for (const namespace of namespaces) {
+    if (!namespace || typeof namespace !== 'object') continue;
+    for (const value of Object.values(namespace)) {
+      if (value instanceof WebAssembly.Memory) memories.add(new WeakRef(value));
+      // imports は { env: { memory } } のように1段ネストしている
+      else if (value && typeof value === 'object' && !(value instanceof WebAssembly.Instance)) {
+        for (const inner of Object.values(value)) {
+          if (inner instanceof WebAssembly.Memory) memories.add(new WeakRef(inner));
+        }
+      }
+    }
+  }
+}
+
+export function trackWasmMemory() {
+  if (tracking || typeof WebAssembly === 'undefined') return;
+  tracking = true;
+
+  const instantiate = WebAssembly.instantiate;
+  WebAssembly.instantiate = (async (source: BufferSource | WebAssembly.Module, imports?: WebAssembly.Imports) => {
+    const result = await instantiate(source as BufferSource, imports);
+    const instance = result instanceof WebAssembly.Instance ? result : result.instance;
+    collectMemories(imports, instance.exports);
+    return result;
+  }) as typeof WebAssembly.instantiate;
+
+  const instantiateStreaming = WebAssembly.instantiateStreaming;
+  if (instantiateStreaming) {
+    WebAssembly.instantiateStreaming = async (source, imports) => {
+      const result = await instantiateStreaming(source, imports);
+      collectMemories(imports, result.instance.exports);
+      return result;
+    };
+  }
+}
+
+// いま生きている WebAssembly.Memory の合計バイト数（trackWasmMemory 前に作られたものは含まない）
+export function wasmMemoryBytes(): number | null {
+  if (!tracking) return null;
+  // import した Memory をそのまま export するモジュールもあるので、同じものは1回だけ数える
+  const live = new Set<WebAssembly.Memory>();
+  for (const ref of memories) {
+    const memory = ref.deref();
+    if (memory) live.add(memory);
+    else memories.delete(ref);
+  }
+  let total = 0;
+  live.forEach((memory) => (total += memory.buffer.byteLength));
+  return total;
+}
+
+function isPerfMeasure(name: string): boolean {
+  return name.startsWith(PERF_PREFIX) || LEGACY_MEASURES.includes(name);
+}
+
+function toEntry(entry: PerformanceEntry): PerfEntry {
+  return {
+    name: entry.name,
+    start: entry.startTime,
+    duration: entry.duration,
+    detail: (entry as PerformanceMeasure).detail ?? null,
+  };
+}
+
+// window.__luminaPerf を用意する（何度呼んでもよい）。verification/ のスクリプトはここから計測結果を読む
+export function installPerfApi() {
+  if (typeof window === 'undefined' || window.__luminaPerf) return;
+
+  window.__luminaPerf = {
+    version: 1,
+    runs: () => runs.map((run) => ({ ...run, stages: { ...run.stages } })),
+    entries: () =>
+      performance
+        .getEntriesByType('measure')
+        .filter((entry) => isPerfMeasure(entry.name))
+        .map(toEntry),
+    counters: () => JSON.parse(JSON.stringify(counters)),
+    clear: () => {
+      runs = [];
+      counters = {};
+      const names = new Set(performance.getEntriesByType('measure').map((entry) => entry.name));
+      names.forEach((name) => {
+        if (isPerfMeasure(name)) performance.clearMeasures(name);
+      });
+    },
+    subscribe: (listener) => {
+      const observer = new PerformanceObserver((list) => {
+        list.getEntries().forEach((entry) => {
+          if (isPerfMeasure(entry.name)) listener(toEntry(entry));
+        });
+      });
+      observer.observe({ type: 'measure', buffered: true });
+      return () => observer.disconnect();
+    },
+  };
+}
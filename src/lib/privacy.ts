@@ -1,35 +1,79 @@
-import piexif from "piexifjs";
+import type { ImageContainer, RemovedMetadata } from "./metadata";
+import { WorkerPool } from "./worker-pool";
 
-export async function removeExif(file: File): Promise<Blob> {
-  return new Promise((resolve, reject) => {
-    // JPEG以外はそのまま返す（Exif操作はJPEGがメインのため）
-    if (file.type !== "image/jpeg" && file.type !== "image/jpg") {
-      resolve(file);
-      return;
-    }
+export interface CleanResult {
+  blob: Blob;
+  container: ImageContainer | null; // null は対応していない形式（そのまま返した）
+  removed: RemovedMetadata[];
+  originalSize: number;
+  newSize: number;
+}
+
+type WorkerResponse =
+  | { type: 'complete'; id: number; blob: Blob; container: ImageContainer | null; removed: RemovedMetadata[] }
+  | { type: 'error'; id: number; message: string };
+
+interface Job {
+  file: File;
+  keepOrientation: boolean;
+}
+
+// メタデータ削除ワーカー（metadata.worker）のプール
+export class MetadataWorkerPool extends WorkerPool<Job, CleanResult, WorkerResponse> {
+  strip(file: File, keepOrientation = true): Promise<CleanResult> {
+    return this.enqueue({ file, keepOrientation });
+  }
+
+  protected createWorker(): Worker {
+    return new Worker(new URL('../workers/metadata.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+  }
+
+  protected post(worker: Worker, job: Job, id: number) {
+    // File は構造化クローンでも中身をコピーしない
+    worker.postMessage({ id, file: job.file, keepOrientation: job.keepOrientation });
+  }
 
-    const reader = new FileReader();
-    reader.onload = (e) => {
-      try {
-        const dataURL = e.target?.result as string;
-        // ここでExifを削除
-        const cleanDataURL = piexif.remove(dataURL);
-        
-        // DataURLをBlobに戻す処理
-        const byteString = atob(cleanDataURL.split(',')[1]);
-        const mimeString = cleanDataURL.split(',')[0].split(':')[1].split(';')[0];
-        const ab = new ArrayBuffer(byteString.length);
-        const ia = new Uint8Array(ab);
-        for (let i = 0; i < byteString.length; i++) {
-          ia[i] = byteString.charCodeAt(i);
-        }
-        const blob = new Blob([ab], { type: mimeString });
-        resolve(blob);
-      } catch (error) {
-        reject(error);
-      }
+  protected receive(message: WorkerResponse, job: Job): CleanResult {
+    if (message.type === 'error') throw new Error(message.message);
+    return {
+      blob: message.blob,
+      container: message.container,
+      removed: message.removed,
+      originalSize: job.file.size,
+      newSize: message.blob.size
     };
-    reader.onerror = (error) => reject(error);
-    reader.readAsDataURL(file);
-  });
-}
\ No newline at end of file
+  }
+}
+
+let pool: MetadataWorkerPool | null = null;
+
+export function getMetadataWorkerPool(): MetadataWorkerPool {
+  if (!pool) {
+    pool = new MetadataWorkerPool();
+  }
+  return pool;
+}
+
+// 1枚だけメタデータを取り除く（JPEG・PNG・WebP・HEIC/AVIF 以外はそのまま返す）
+export async function removeExif(file: File): Promise<Blob> {
+  const result = await getMetadataWorkerPool().strip(file);
+  return result.blob;
+}
+
+export async function removeMetadataBatch(
+  files: File[],
+  onResult: (index: number, result: CleanResult | null, error?: Error) => void,
+  keepOrientation = true
+): Promise<void> {
+  const workerPool = getMetadataWorkerPool();
+
+  await Promise.all(files.map(async (file, index) => {
+    try {
+      onResult(index, await workerPool.strip(file, keepOrientation));
+    } catch (error) {
+      onResult(index, null, error instanceof Error ? error : new Error(String(error)));
+    }
+  }));
+}
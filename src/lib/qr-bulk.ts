@@ -0,0 +1,268 @@
+// QR マスターの一括モード: CSV / 1行1件のリストから qr.worker のプールでコードを描き、ZIP にまとめる
+// ワーカーが CRC と圧縮まで済ませたエントリを返し、描き終わったバッチから順に ZipWriter へ流す
+// （全コードを同時にメモリに持たず、メインスレッドは書き込むだけ）
+
+import { startRun, type StageTiming } from './perf';
+import type { QrItem, QrStyle } from './qr-render';
+import { defaultPoolSize, WorkerPool } from './worker-pool';
+import { ZipWriter, type PreparedEntry } from './zip';
+
+export type { QrItem, QrOutputFormat, QrStyle } from './qr-render';
+
+// 1回のメッセージで描くコード数（メッセージの往復を減らしつつ、進捗が細かく出る程度）
+const BATCH_SIZE = 100;
+
+export interface QrFailure {
+  name: string;
+  message: string;
+}
+
+export interface QrBulkProgress {
+  done: number;
+  total: number;
+}
+
+export interface QrBulkResult {
+  count: number;
+  failed: QrFailure[];
+  size: number;
+}
+
+// --- リストの読み込み ---
+
+const CONTENT_COLUMNS = ['content', 'url', 'text', 'data', 'value', 'link', 'qr', '内容', 'テキスト'];
+const NAME_COLUMNS = ['name', 'filename', 'file', 'id', 'label', '名前', 'ファイル名'];
+
+// 引用符付きのフィールド（区切り文字や改行を含む）に対応した CSV / TSV の読み込み
+export function parseCsv(text: string, delimiter = detectDelimiter(text)): string[][] {
+  const rows: string[][] = [];
+  let row: string[] = [];
+  let field = '';
+  let quoted = false;
+
+  for (let i = 0; i < text.length; i++) {
+    const c = text[i];
+    if (quoted) {
+      if (c === '"') {
+        if (text[i + 1] === '"') {
+          field += '"';
+          i++;
+        } else {
+          quoted = false;
+        }
+      } else {
+        field += c;
+      }
+    } else if (c === '"' && field === '') {
+      quoted = true;
+    } else if (c === delimiter) {
+      row.push(field);
+      field = '';
+    } else if (c === '\n' || c === '\r') {
+      if (c === '\r' && text[i + 1] === '\n') i++;
+      row.push(field);
+      rows.push(row);
+      row = [];
+      field = '';
+    } else {
+      field += c;
+    }
+  }
+  if (field !== '' || row.length > 0) {
+    row.push(field);
+    rows.push(row);
+  }
+  return rows.filter((cells) => cells.some((cell) => cell.trim() !== ''));
+}
+
+// 1行目（引用符の外）で一番多い区切り文字
+function detectDelimiter(text: string): string {
+  const counts = new Map<string, number>([[',', 0], ['\t', 0], [';', 0]]);
+  let quoted = false;
+  for (const c of text) {
+    if (c === '"') quoted = !quoted;
+    else if (!quoted && (c === '\n' || c === '\r')) break;
+    else if (!quoted && counts.has(c)) counts.set(c, counts.get(c)! + 1);
+  }
+  return [...counts].reduce((best, entry) => (entry[1] > best[1] ? entry : best))[0];
+}
+
+// ZIP 内のファイル名に使えない文字を置き換える
+function safeName(name: string): string {
+  return name.trim().replace(/[\\/:*?"<>|\u0000-\u001f]/g, '_').slice(0, 120);
+}
+
+function withNames(entries: { name: string | null; content: string }[]): QrItem[] {
+  const digits = String(entries.length).length;
+  const used = new Set<string>();
+  return entries.map(({ name, content }, index) => {
+    const base = (name && safeName(name)) || `qr-${String(index + 1).padStart(Math.max(digits, 4), '0')}`;
+    let unique = base;
+    for (let n = 1; used.has(unique); n++) unique = `${base}-${n}`;
+    used.add(unique);
+    return { name: unique, content };
+  });
+}
+
+/**
+ * 1行1件のリスト、または CSV / TSV を読み込む
+ * CSV の1行目に content / url などの見出しがあればその列を内容、name / filename などの列をファイル名にする
+ * 見出しがなければ1列目が内容、2列目（あれば）がファイル名
+ */
+export function parseQrList(text: string, csv: boolean): QrItem[] {
+  const source = text.replace(/^\uFEFF/, '');
+  if (!csv) {
+    return withNames(
+      source
+        .split(/\r?\n/)
+        .map((line) => line.trim())
+        .filter(Boolean)
+        .map((content) => ({ name: null, content }))
+    );
+  }
+
+  const rows = parseCsv(source);
+  if (rows.length === 0) return [];
+  const header = rows[0].map((cell) => cell.trim().toLowerCase());
+  let contentColumn = header.findIndex((cell) => CONTENT_COLUMNS.includes(cell));
+  let nameColumn = header.findIndex((cell) => NAME_COLUMNS.includes(cell));
+  let body = rows.slice(1);
+  if (contentColumn < 0) {
+    contentColumn = 0;
+    nameColumn = rows[0].length > 1 ? 1 : -1;
+    body = rows;
+  }
+  return withNames(
+    body
+      .map((cells) => ({ name: nameColumn >= 0 ? cells[nameColumn] ?? null : null, content: (cells[contentColumn] ?? '').trim() }))
+      .filter((entry) => entry.content)
+  );
+}
+
+// 拡張子か、見出しらしい1行目で CSV かどうかを決める
+export function looksLikeCsv(text: string, fileName?: string): boolean {
+  if (fileName) return /\.(csv|tsv)$/i.test(fileName);
+  const firstLine = text.replace(/^\uFEFF/, '').split(/\r?\n/, 1)[0] ?? '';
+  return parseCsv(firstLine)[0]?.some((cell) => CONTENT_COLUMNS.includes(cell.trim().toLowerCase())) ?? false;
+}
+
+// --- ワーカープール ---
+
+type WorkerResponse =
+  | { type: 'complete'; id: number; entries: PreparedEntry[]; failed: QrFailure[]; timings: StageTiming[] }
+  | { type: 'error'; id: number; message: string };
+
+interface BatchResult {
+  entries: PreparedEntry[];
+  failed: QrFailure[];
+  timings: StageTiming[];
+}
+
+interface Batch {
+  styleId: number;
+  style: QrStyle;
+  items: QrItem[];
+}
+
+// qr.worker のプール（1つのワーカーは同時に1バッチだけ描く）
+export class QrWorkerPool extends WorkerPool<Batch, BatchResult, WorkerResponse> {
+  render(items: QrItem[], style: QrStyle, styleId: number): Promise<BatchResult> {
+    return this.enqueue({ styleId, style, items });
+  }
+
+  protected createWorker(): Worker {
+    return new Worker(new URL('../workers/qr.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+  }
+
+  protected post(worker: Worker, batch: Batch, id: number) {
+    // ロゴの Blob は構造化クローンでも中身をコピーしない
+    worker.postMessage({ id, styleId: batch.styleId, style: batch.style, items: batch.items });
+  }
+
+  protected receive(message: WorkerResponse): BatchResult {
+    if (message.type === 'error') throw new Error(message.message);
+    return { entries: message.entries, failed: message.failed, timings: message.timings };
+  }
+}
+
+// ページ間で使い回すため、プールはモジュール単位で1つだけ作る（ブラウザでのみ生成）
+let pool: QrWorkerPool | null = null;
+let nextStyleId = 0;
+
+export function getQrWorkerPool(): QrWorkerPool {
+  if (!pool) {
+    pool = new QrWorkerPool();
+  }
+  return pool;
+}
+
+/**
+ * items を描いて ZIP にし、writable へ順に書き込む
+ * isCancelled が true になったら次のバッチから止める
+ */
+export async function createQrZip(
+  items: QrItem[],
+  style: QrStyle,
+  writable: WritableStream<Uint8Array>,
+  onProgress?: (progress: QrBulkProgress) => void,
+  isCancelled: () => boolean = () => false
+): Promise<QrBulkResult> {
+  const workerPool = getQrWorkerPool();
+  const styleId = nextStyleId++;
+  const perf = startRun('qr', `${style.format}/${style.size}`);
+  const writer = writable.getWriter();
+  const zip = new ZipWriter((chunk) => writer.write(chunk));
+  // ワーカー数の2倍までバッチを先に渡しておく（終わった Blob が溜まりすぎないように）
+  const inFlight = Math.max(2, defaultPoolSize() * 2);
+  const batches: QrItem[][] = [];
+  for (let i = 0; i < items.length; i += BATCH_SIZE) batches.push(items.slice(i, i + BATCH_SIZE));
+
+  const failed: QrFailure[] = [];
+  let count = 0;
+  let done = 0;
+  let next = 0;
+  let writing = Promise.resolve();
+  const pending = new Set<Promise<void>>();
+
+  const submit = () => {
+    const batch = batches[next++];
+    const task: Promise<void> = workerPool.render(batch, style, styleId).then((result) => {
+      perf.record(result.timings);
+      failed.push(...result.failed);
+      // ZIP への書き込みは1本の鎖にして、終わったバッチから順に追加する
+      writing = writing.then(async () => {
+        const now = Date.now();
+        for (const entry of result.entries) {
+          await zip.addPrepared(entry, now);
+          perf.bytes(0, entry.data.length);
+        }
+        count += result.entries.length;
+        done += batch.length;
+        onProgress?.({ done, total: items.length });
+      });
+      return writing;
+    });
+    pending.add(task);
+    task.finally(() => pending.delete(task)).catch(() => {});
+  };
+
+  try {
+    while (next < batches.length || pending.size > 0) {
+      while (next < batches.length && pending.size < inFlight && !isCancelled()) submit();
+      if (pending.size === 0) break;
+      await Promise.race(pending);
+    }
+    if (isCancelled()) throw new DOMException('QR generation cancelled', 'AbortError');
+
+    const size = await zip.finish();
+    await writer.close();
+    perf.end(true, { codes: count, failed: failed.length });
+    return { count, failed, size };
+  } catch (error) {
+    perf.end(false, { codes: count, failed: failed.length });
+    await writer.abort(error).catch(() => {});
+    throw error;
+  }
+}
@@ -0,0 +1,157 @@
+// QR コードの一括生成（qr.worker から使う）
+// qrcode でモジュールの行列だけを作り、PNG は OffscreenCanvas、SVG は文字列で組み立てて、どちらもバイト列で返す
+// ロゴ（背景で縁取りしたもの）と色はスタイルごとに一度だけ用意して、全コードで使い回す
+
+import { create } from 'qrcode';
+
+export type QrOutputFormat = 'png' | 'svg';
+
+export interface QrStyle {
+  format: QrOutputFormat;
+  size: number; // 出力の一辺（px）
+  fgColor: string;
+  bgColor: string;
+  logo: Blob | null;
+}
+
+export interface QrItem {
+  name: string; // 拡張子なしのファイル名
+  content: string;
+}
+
+// 単体モードのプレビュー（QRCodeSVG）と同じ見た目にする: 余白4モジュール、誤り訂正 H、ロゴは 256px 中 48px
+const MARGIN = 4;
+const LOGO_RATIO = 48 / 256;
+
+const encoder = new TextEncoder();
+
+interface Matrix {
+  size: number;
+  data: Uint8Array;
+}
+
+export function qrMatrix(content: string): Matrix {
+  const { modules } = create(content, { errorCorrectionLevel: 'H' });
+  return { size: modules.size, data: modules.data };
+}
+
+function escapeXml(text: string): string {
+  return text.replace(/[&<>"']/g, (c) => `&#${c.charCodeAt(0)};`);
+}
+
+function readAsDataUrl(blob: Blob): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const reader = new FileReader();
+    reader.onload = () => resolve(reader.result as string);
+    reader.onerror = () => reject(reader.error);
+    reader.readAsDataURL(blob);
+  });
+}
+
+// '#rrggbb' を ImageData の Uint32Array 表現（リトルエンディアンなので ABGR の順）にする
+function packColor(hex: string): number {
+  const value = parseInt(hex.slice(1, 7), 16);
+  return ((0xff << 24) | ((value & 0xff) << 16) | (value & 0xff00) | ((value >> 16) & 0xff)) >>> 0;
+}
+
+export class QrRenderer {
+  private logoTile: OffscreenCanvas | null = null;
+  private logoSvg = '';
+  private logoSize = 0;
+  private fg: number;
+  private bg: number;
+  private moduleCanvas: OffscreenCanvas | null = null;
+  private output: OffscreenCanvas | null = null;
+
+  constructor(readonly style: QrStyle) {
+    this.fg = packColor(style.fgColor);
+    this.bg = packColor(style.bgColor);
+  }
+
+  // ロゴを一度だけデコードし、背景色で縁取った状態に合成しておく
+  async init() {
+    const { logo, size, bgColor, format } = this.style;
+    if (!logo) return;
+    const bitmap = await createImageBitmap(logo);
+    this.logoSize = Math.round(size * LOGO_RATIO);
+    // 縦横比を保ってロゴの枠に収める
+    const scale = Math.min(this.logoSize / bitmap.width, this.logoSize / bitmap.height);
+    const width = bitmap.width * scale;
+    const height = bitmap.height * scale;
+    const offset = (size - this.logoSize) / 2;
+
+    if (format === 'png') {
+      this.logoTile = new OffscreenCanvas(this.logoSize, this.logoSize);
+      const ctx = this.logoTile.getContext('2d')!;
+      ctx.fillStyle = bgColor;
+      ctx.fillRect(0, 0, this.logoSize, this.logoSize);
+      ctx.drawImage(bitmap, (this.logoSize - width) / 2, (this.logoSize - height) / 2, width, height);
+    } else {
+      const href = await readAsDataUrl(logo);
+      this.logoSvg =
+        `<rect x="${offset}" y="${offset}" width="${this.logoSize}" height="${this.logoSize}" fill="${escapeXml(bgColor)}"/>` +
+        `<image href="${href}" x="${offset + (this.logoSize - width) / 2}" y="${offset + (this.logoSize - height) / 2}" ` +
+        `width="${width}" height="${height}" preserveAspectRatio="xMidYMid meet"/>`;
+    }
+    bitmap.close();
+  }
+
+  render(matrix: Matrix): Promise<Uint8Array> | Uint8Array {
+    return this.style.format === 'png' ? this.renderPng(matrix) : this.renderSvg(matrix);
+  }
+
+  // 1モジュール1px の画像を作り、ぼかさずに出力サイズへ拡大する
+  private async renderPng({ size: modules, data }: Matrix): Promise<Uint8Array> {
+    const { size } = this.style;
+    const total = modules + MARGIN * 2;
+    if (!this.moduleCanvas || this.moduleCanvas.width !== total) this.moduleCanvas = new OffscreenCanvas(total, total);
+    const moduleCtx = this.moduleCanvas.getContext('2d')!;
+    const image = moduleCtx.createImageData(total, total);
+    const pixels = new Uint32Array(image.data.buffer);
+    pixels.fill(this.bg);
+    for (let y = 0; y < modules; y++) {
+      const row = (y + MARGIN) * total + MARGIN;
+      for (let x = 0; x < modules; x++) {
+        if (data[y * modules + x]) pixels[row + x] = this.fg;
+      }
+    }
+    moduleCtx.putImageData(image, 0, 0);
+
+    this.output ??= new OffscreenCanvas(size, size);
+    const ctx = this.output.getContext('2d')!;
+    ctx.imageSmoothingEnabled = false;
+    ctx.drawImage(this.moduleCanvas, 0, 0, size, size);
+    if (this.logoTile) {
+      const offset = Math.round((size - this.logoSize) / 2);
+      ctx.drawImage(this.logoTile, offset, offset);
+    }
+    const blob = await this.output.convertToBlob({ type: 'image/png' });
+    return new Uint8Array(await blob.arrayBuffer());
+  }
+
+  // 横に続く暗いモジュールを1つの矩形にまとめる（qrcode.react の SVG と同じ考え方）
+  private renderSvg({ size: modules, data }: Matrix): Uint8Array {
+    const { size, fgColor, bgColor } = this.style;
+    const total = modules + MARGIN * 2;
+    let path = '';
+    for (let y = 0; y < modules; y++) {
+      let x = 0;
+      while (x < modules) {
+        if (!data[y * modules + x]) {
+          x++;
+          continue;
+        }
+        const start = x;
+        while (x < modules && data[y * modules + x]) x++;
+        path += `M${start + MARGIN} ${y + MARGIN}h${x - start}v1h${start - x}z`;
+      }
+    }
+    const svg =
+      `<svg xmlns="http://www.w3.org/2000/svg" width="${size}" height="${size}" viewBox="0 0 ${size} ${size}" shape-rendering="crispEdges">` +
+      `<rect width="${size}" height="${size}" fill="${escapeXml(bgColor)}"/>` +
+      `<path transform="scale(${size / total})" fill="${escapeXml(fgColor)}" d="${path}"/>` +
+      this.logoSvg +
+      `</svg>`;
+    return encoder.encode(svg);
+  }
+}
@@ -0,0 +1,179 @@
+import { encodeDuration, reserveDuration } from './webm';
+
+// 録画はこの間隔でチャンクに区切り、届いたそばから OPFS へ書き出す
+export const RECORDING_TIMESLICE_MS = 1000;
+
+export const RECORDINGS_DIRECTORY = 'recordings';
+
+export interface Recording {
+  file: File;
+  // OPFS 上のファイル。シェルフへはこのハンドルを移動して渡す（メモリ録画の場合は null）
+  handle: FileSystemFileHandle | null;
+}
+
+type WorkerResponse =
+  | { type: 'opened' }
+  | { type: 'progress'; bytes: number }
+  | { type: 'finished'; size: number }
+  | { type: 'error'; message: string };
+
+// OPFS の同期アクセスハンドル（ワーカーでのその場書き込み）が使えるか
+export function supportsDiskRecording(): boolean {
+  return (
+    typeof navigator !== 'undefined' &&
+    typeof navigator.storage?.getDirectory === 'function' &&
+    typeof FileSystemFileHandle !== 'undefined' &&
+    'createSyncAccessHandle' in FileSystemFileHandle.prototype
+  );
+}
+
+async function getRecordingsDirectory(): Promise<FileSystemDirectoryHandle> {
+  const root = await navigator.storage.getDirectory();
+  return root.getDirectoryHandle(RECORDINGS_DIRECTORY, { create: true });
+}
+
+// 前回のセッションで保存されずに残った録画を消す
+// 別のタブで録画中のファイルはロックされていて削除に失敗するので、そのまま残る
+async function removeStaleRecordings(dir: FileSystemDirectoryHandle) {
+  const names: string[] = [];
+  for await (const name of (dir as unknown as { keys(): AsyncIterable<string> }).keys()) names.push(name);
+  await Promise.all(names.map((name) => dir.removeEntry(name).catch(() => {})));
+}
+
+export async function discardRecording(recording: Recording | null) {
+  if (!recording?.handle) return;
+  const dir = await getRecordingsDirectory();
+  await dir.removeEntry(recording.handle.name).catch(() => {});
+}
+
+/**
+ * MediaRecorder を timeslice 付きで動かし、チャンクをワーカー経由で OPFS のファイルへ追記する
+ * 録画の長さに関係なく、メモリに残るのは書き込み待ちのチャンクだけ
+ * OPFS が使えない環境ではメモリにチャンクを溜める（従来どおり）
+ */
+export class DiskRecorder {
+  private recorder: MediaRecorder;
+  private worker: Worker | null = null;
+  private chunks: Blob[] = [];
+  private name: string;
+  private startedAt = 0;
+  private result: Promise<Recording> | null = null;
+
+  constructor(stream: MediaStream, mimeType: string, private onBytes?: (bytes: number) => void) {
+    this.recorder = new MediaRecorder(stream, { mimeType });
+    this.name = `screen-recording-${Date.now()}.webm`;
+  }
+
+  get state() {
+    return this.recorder.state;
+  }
+
+  async start(): Promise<void> {
+    if (supportsDiskRecording()) {
+      try {
+        await removeStaleRecordings(await getRecordingsDirectory());
+        this.worker = await this.openWorker();
+      } catch (e) {
+        console.warn("Disk recording unavailable, recording in memory", e);
+        this.worker?.terminate();
+        this.worker = null;
+      }
+    }
+
+    let recordedBytes = 0;
+    this.recorder.ondataavailable = (e) => {
+      if (e.data.size === 0) return;
+      if (this.worker) {
+        // Blob は参照だけが渡る。中身はワーカーが読んでそのまま書き込む
+        this.worker.postMessage({ type: 'chunk', blob: e.data });
+      } else {
+        this.chunks.push(e.data);
+        recordedBytes += e.data.size;
+        this.onBytes?.(recordedBytes);
+      }
+    };
+
+    this.startedAt = performance.now();
+    this.recorder.start(RECORDING_TIMESLICE_MS);
+  }
+
+  private openWorker(): Promise<Worker> {
+    const worker = new Worker(new URL('../workers/recorder.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+    return new Promise((resolve, reject) => {
+      worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+        const message = event.data;
+        if (message.type === 'opened') resolve(worker);
+        else if (message.type === 'progress') this.onBytes?.(message.bytes);
+        else if (message.type === 'error') {
+          console.error("Recording write failed:", message.message);
+          reject(new Error(message.message));
+        }
+      };
+      worker.onerror = (event) => reject(new Error(event.message));
+      worker.postMessage({ type: 'open', directory: RECORDINGS_DIRECTORY, name: this.name });
+    });
+  }
+
+  // 停止して、録画ファイルを返す（複数回呼んでも同じ結果）
+  stop(): Promise<Recording> {
+    if (!this.result) {
+      this.result = new Promise<void>((resolve) => {
+        this.recorder.onstop = () => resolve();
+        if (this.recorder.state !== 'inactive') this.recorder.stop();
+        else resolve();
+      }).then(() => {
+        const durationMs = performance.now() - this.startedAt;
+        return this.worker ? this.finishOnDisk(this.worker, durationMs) : this.finishInMemory(durationMs);
+      });
+    }
+    return this.result;
+  }
+
+  private finishOnDisk(worker: Worker, durationMs: number): Promise<Recording> {
+    return new Promise<void>((resolve, reject) => {
+      worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+        const message = event.data;
+        if (message.type === 'progress') this.onBytes?.(message.bytes);
+        else if (message.type === 'finished') resolve();
+        else if (message.type === 'error') reject(new Error(message.message));
+      };
+      worker.postMessage({ type: 'finish', durationMs });
+    })
+      .finally(() => {
+        worker.terminate();
+        this.worker = null;
+      })
+      .then(async () => {
+        const handle = await (await getRecordingsDirectory()).getFileHandle(this.name);
+        const file = await handle.getFile();
+        return { file: new File([file], this.name, { type: 'video/webm' }), handle };
+      });
+  }
+
+  private async finishInMemory(durationMs: number): Promise<Recording> {
+    const [first, ...rest] = this.chunks;
+    this.chunks = [];
+    const parts: BlobPart[] = first ? [first, ...rest] : [];
+    if (first) {
+      const reserved = reserveDuration(new Uint8Array(await first.arrayBuffer()));
+      if (reserved) {
+        reserved.bytes.set(encodeDuration(durationMs, reserved.slot), reserved.slot.offset);
+        parts[0] = reserved.bytes as unknown as BlobPart;
+      }
+    }
+    return { file: new File(parts, this.name, { type: 'video/webm' }), handle: null };
+  }
+
+  // 破棄（書きかけのファイルも消す）
+  async abort() {
+    if (this.recorder.state !== 'inactive') this.recorder.stop();
+    this.worker?.postMessage({ type: 'abort' });
+    this.worker?.terminate();
+    this.worker = null;
+    this.chunks = [];
+    const dir = await getRecordingsDirectory().catch(() => null);
+    await dir?.removeEntry(this.name).catch(() => {});
+  }
+}
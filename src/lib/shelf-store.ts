@@ -0,0 +1,253 @@
+import { openDB, type DBSchema, type IDBPDatabase } from 'idb';
+
+// ファイル本体は Origin Private File System（OPFS）、一覧とサムネイルは IndexedDB に置く
+// メモリに載るのはメタデータと小さなサムネイルだけで、本体は必要になった時にディスクから読む
+
+export interface ShelfRecord {
+  id: string;
+  name: string;
+  type: string;
+  size: number;
+  source: string;
+  timestamp: number;
+  lastUsed: number;
+  thumbnail?: Blob;
+  // OPFS が使えない環境（createWritable 未対応など）では IndexedDB に Blob として保存する
+  blob?: Blob;
+}
+
+export type ShelfItemMeta = Omit<ShelfRecord, 'blob' | 'lastUsed'>;
+
+interface ShelfDB extends DBSchema {
+  items: {
+    key: string;
+    value: ShelfRecord;
+    indexes: { lastUsed: number };
+  };
+}
+
+const DB_NAME = 'lumina-shelf';
+const DIRECTORY = 'shelf';
+
+// LRU で古いものから追い出す条件: 件数の上限と、ブラウザの割り当て容量に対する使用率
+export const SHELF_MAX_ITEMS = 200;
+const QUOTA_RATIO = 0.8;
+
+const THUMBNAIL_SIZE = 96;
+
+let dbPromise: Promise<IDBPDatabase<ShelfDB>> | null = null;
+
+function getDB(): Promise<IDBPDatabase<ShelfDB>> {
+  if (!dbPromise) {
+    dbPromise = openDB<ShelfDB>(DB_NAME, 1, {
+      upgrade(db) {
+        const store = db.createObjectStore('items', { keyPath: 'id' });
+        store.createIndex('lastUsed', 'lastUsed');
+      },
+    });
+  }
+  return dbPromise;
+}
+
+async function getDirectory(): Promise<FileSystemDirectoryHandle | null> {
+  if (typeof navigator === 'undefined' || !navigator.storage?.getDirectory) return null;
+  try {
+    const root = await navigator.storage.getDirectory();
+    return await root.getDirectoryHandle(DIRECTORY, { create: true });
+  } catch {
+    return null;
+  }
+}
+
+// ストリームで書き込むので、大きなファイルでもメモリに丸ごと載せない
+async function writeToDirectory(id: string, file: Blob): Promise<boolean> {
+  const dir = await getDirectory();
+  if (!dir) return false;
+  const handle = await dir.getFileHandle(id, { create: true });
+  if (!('createWritable' in handle)) {
+    await dir.removeEntry(id).catch(() => {});
+    return false;
+  }
+  await file.stream().pipeTo(await handle.createWritable());
+  return true;
+}
+
+function thumbnailDimensions(width: number, height: number) {
+  const scale = Math.min(1, THUMBNAIL_SIZE / Math.max(width, height));
+  return { width: Math.max(1, Math.round(width * scale)), height: Math.max(1, Math.round(height * scale)) };
+}
+
+async function canvasToThumbnail(source: CanvasImageSource, width: number, height: number): Promise<Blob> {
+  const size = thumbnailDimensions(width, height);
+  const canvas = new OffscreenCanvas(size.width, size.height);
+  canvas.getContext('2d')!.drawImage(source, 0, 0, size.width, size.height);
+  return canvas.convertToBlob({ type: 'image/webp', quality: 0.7 });
+}
+
+async function videoFrame(file: Blob): Promise<Blob | undefined> {
+  const url = URL.createObjectURL(file);
+  const video = document.createElement('video');
+  video.muted = true;
+  video.preload = 'metadata';
+  try {
+    await new Promise<void>((resolve, reject) => {
+      video.onloadeddata = () => resolve();
+      video.onerror = () => reject(new Error('video decode failed'));
+      video.src = url;
+    });
+    await new Promise<void>((resolve) => {
+      video.onseeked = () => resolve();
+      video.currentTime = Math.min(0.5, (video.duration || 0) / 2);
+    });
+    return await canvasToThumbnail(video, video.videoWidth, video.videoHeight);
+  } finally {
+    video.removeAttribute('src');
+    video.load();
+    URL.revokeObjectURL(url);
+  }
+}
+
+// サムネイルは追加時に1回だけ作り、IndexedDB に保存して使い回す
+export async function createThumbnail(file: Blob): Promise<Blob | undefined> {
+  if (typeof OffscreenCanvas === 'undefined') return undefined;
+  try {
+    if (file.type.startsWith('image/')) {
+      const bitmap = await createImageBitmap(file);
+      try {
+        return await canvasToThumbnail(bitmap, bitmap.width, bitmap.height);
+      } finally {
+        bitmap.close();
+      }
+    }
+    if (file.type.startsWith('video/')) return await videoFrame(file);
+  } catch {
+    // デコードできない形式はアイコン表示にする
+  }
+  return undefined;
+}
+
+function toMeta(record: ShelfRecord): ShelfItemMeta {
+  const { id, name, type, size, source, timestamp, thumbnail } = record;
+  return { id, name, type, size, source, timestamp, thumbnail };
+}
+
+export async function listItems(): Promise<ShelfItemMeta[]> {
+  const db = await getDB();
+  const records = await db.getAll('items');
+  return records.sort((a, b) => b.timestamp - a.timestamp).map(toMeta);
+}
+
+export async function deleteItem(id: string): Promise<void> {
+  const db = await getDB();
+  await db.delete('items', id);
+  const dir = await getDirectory();
+  await dir?.removeEntry(id).catch(() => {});
+}
+
+// 追加する前に、上限を超える分を最後に使われた時刻が古い順に削除する。削除したIDを返す
+async function evictFor(incomingBytes: number): Promise<string[]> {
+  const db = await getDB();
+  const evicted: string[] = [];
+  let count = await db.count('items');
+  let overQuota = 0;
+
+  if (navigator.storage?.estimate) {
+    const { usage = 0, quota = 0 } = await navigator.storage.estimate();
+    if (quota > 0) overQuota = usage + incomingBytes - quota * QUOTA_RATIO;
+  }
+
+  let cursor = await db.transaction('items').store.index('lastUsed').openCursor();
+  const victims: ShelfRecord[] = [];
+  while (cursor && (count >= SHELF_MAX_ITEMS || overQuota > 0)) {
+    victims.push(cursor.value);
+    count--;
+    overQuota -= cursor.value.size;
+    cursor = await cursor.continue();
+  }
+
+  for (const victim of victims) {
+    await deleteItem(victim.id);
+    evicted.push(victim.id);
+  }
+  return evicted;
+}
+
+async function saveRecord(id: string, file: File, source: string, stored: boolean): Promise<ShelfItemMeta> {
+  const now = Date.now();
+  const record: ShelfRecord = {
+    id,
+    name: file.name,
+    type: file.type,
+    size: file.size,
+    source,
+    timestamp: now,
+    lastUsed: now,
+    thumbnail: await createThumbnail(file),
+    ...(stored ? {} : { blob: file }),
+  };
+
+  const db = await getDB();
+  await db.put('items', record);
+  return toMeta(record);
+}
+
+export async function putItem(file: File, source: string): Promise<{ item: ShelfItemMeta; evicted: string[] }> {
+  const evicted = await evictFor(file.size);
+  const id = crypto.randomUUID();
+  const stored = await writeToDirectory(id, file);
+  return { item: await saveRecord(id, file, source, stored), evicted };
+}
+
+/**
+ * 既に OPFS にあるファイル（録画など）を、コピーせずにシェルフのディレクトリへ移動して登録する
+ * move() が使えない環境では putItem と同じくストリームでコピーする（元のファイルの削除は呼び出し側で行う）
+ */
+export async function moveItem(
+  handle: FileSystemFileHandle,
+  name: string,
+  type: string,
+  source: string
+): Promise<{ item: ShelfItemMeta; evicted: string[] }> {
+  const original = await handle.getFile();
+  const file = new File([original], name, { type, lastModified: original.lastModified });
+  const dir = await getDirectory();
+  const movable = handle as unknown as { move?: (parent: FileSystemDirectoryHandle, name: string) => Promise<void> };
+
+  if (!dir || typeof movable.move !== 'function') {
+    return putItem(file, source);
+  }
+
+  // 移動なので容量は増えない。件数の上限だけ確認する
+  const evicted = await evictFor(0);
+  const id = crypto.randomUUID();
+  await movable.move(dir, id);
+  const moved = await (await dir.getFileHandle(id)).getFile();
+  return { item: await saveRecord(id, new File([moved], name, { type }), source, true), evicted };
+}
+
+// 本体を File として取り出す。OPFS の File はディスク上のデータを参照するだけで、読み込みはしない
+export async function getItemFile(id: string): Promise<File> {
+  const db = await getDB();
+  const record = await db.get('items', id);
+  if (!record) throw new Error(`Shelf item ${id} not found`);
+
+  await db.put('items', { ...record, lastUsed: Date.now() });
+
+  if (record.blob) return new File([record.blob], record.name, { type: record.type });
+  const dir = await getDirectory();
+  if (!dir) throw new Error('Origin Private File System is unavailable');
+  const file = await (await dir.getFileHandle(id)).getFile();
+  return new File([file], record.name, { type: record.type, lastModified: record.timestamp });
+}
+
+export async function clearItems(): Promise<void> {
+  const db = await getDB();
+  await db.clear('items');
+  await removeShelfDirectory();
+}
+
+export async function removeShelfDirectory(): Promise<void> {
+  if (typeof navigator === 'undefined' || !navigator.storage?.getDirectory) return;
+  const root = await navigator.storage.getDirectory();
+  await root.removeEntry(DIRECTORY, { recursive: true }).catch(() => {});
+}
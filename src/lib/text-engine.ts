@@ -0,0 +1,73 @@
+import { describeEdit, type ConversionMode, type TextStats } from './text-stats';
+
+// 表示用に折り返す1行の最大文字数（改行のない巨大なログでも1行ずつ描画できるように）
+export const ROW_CHARS = 2000;
+
+type WorkerResponse =
+  | { type: 'stats'; version: number; stats: TextStats }
+  | { type: 'rows'; id: number; offsets: Uint32Array }
+  | { type: 'converted'; id: number; text: string };
+
+/**
+ * テキストラボの入力欄に1つずつ持つエンジン
+ * 集計はワーカーで行い、キー入力ごとに送るのは編集箇所の差分だけ（全文を数え直すのは貼り付けの失敗時や元に戻す時のみ）
+ */
+export class TextEngine {
+  private worker: Worker;
+  private version = 0;
+  private nextId = 0;
+  private pending = new Map<number, (value: Uint32Array | string) => void>();
+
+  constructor(onStats: (stats: TextStats) => void) {
+    this.worker = new Worker(new URL('../workers/text.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+    this.worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+      const message = event.data;
+      if (message.type === 'stats') {
+        // 古い編集の結果は捨てる（集計はワーカー側で順番に反映済み）
+        if (message.version === this.version) onStats(message.stats);
+      } else {
+        const resolve = this.pending.get(message.id);
+        this.pending.delete(message.id);
+        resolve?.(message.type === 'rows' ? message.offsets : message.text);
+      }
+    };
+  }
+
+  reset(text: string) {
+    this.worker.postMessage({ type: 'reset', version: ++this.version, text });
+  }
+
+  // 入力欄の変更を反映する（差分が求められなければ全文を送る）
+  update(before: string, after: string, selectionStart: number, caret: number, inputType?: string) {
+    const history = inputType === 'historyUndo' || inputType === 'historyRedo' || inputType?.includes('Drop') || inputType === 'deleteByDrag';
+    const edit = history ? null : describeEdit(before, after, selectionStart, caret);
+    if (edit) {
+      this.worker.postMessage({ type: 'edit', version: ++this.version, edit });
+    } else {
+      this.reset(after);
+    }
+  }
+
+  private request<T extends Uint32Array | string>(message: Record<string, unknown>): Promise<T> {
+    const id = this.nextId++;
+    return new Promise((resolve) => {
+      this.pending.set(id, resolve as (value: Uint32Array | string) => void);
+      this.worker.postMessage({ ...message, id });
+    });
+  }
+
+  rows(text: string): Promise<Uint32Array> {
+    return this.request({ type: 'rows', text, maxRowChars: ROW_CHARS });
+  }
+
+  convert(text: string, mode: ConversionMode): Promise<string> {
+    return this.request({ type: 'convert', text, mode });
+  }
+
+  terminate() {
+    this.worker.terminate();
+    this.pending.clear();
+  }
+}
@@ -0,0 +1,164 @@
+// テキストラボの集計・変換（ワーカーとメインスレッドの両方から使う純粋関数）
+
+export interface TextStats {
+  chars: number;
+  words: number;
+  lines: number;
+  noSpace: number;
+}
+
+// 差分で更新できる形の内部カウント
+export interface TextCounts {
+  chars: number;
+  noSpace: number;
+  newlines: number;
+  wordStarts: number; // 直前が空白（または先頭）の非空白文字の数 = 単語数
+}
+
+// 入力欄での1回の編集（prev + removed + next が prev + inserted + next に変わった）
+// prev / next は編集箇所の前後1文字（先頭・末尾なら空文字）
+export interface TextEdit {
+  prev: string;
+  next: string;
+  removed: string;
+  inserted: string;
+}
+
+export type ConversionMode = 'upper' | 'lower' | 'fullToHalf' | 'halfToFull';
+
+export const EMPTY_COUNTS: TextCounts = { chars: 0, noSpace: 0, newlines: 0, wordStarts: 0 };
+
+// 正規表現の \s（= trim() が取り除く文字）と同じ判定
+function isSpace(code: number): boolean {
+  return (
+    (code >= 0x09 && code <= 0x0d) ||
+    code === 0x20 ||
+    code === 0xa0 ||
+    code === 0x1680 ||
+    (code >= 0x2000 && code <= 0x200a) ||
+    code === 0x2028 ||
+    code === 0x2029 ||
+    code === 0x202f ||
+    code === 0x205f ||
+    code === 0x3000 ||
+    code === 0xfeff
+  );
+}
+
+function countWordStarts(segment: string, prev: string): number {
+  let starts = 0;
+  let previousIsSpace = prev === '' || isSpace(prev.charCodeAt(0));
+  for (let i = 0; i < segment.length; i++) {
+    const space = isSpace(segment.charCodeAt(i));
+    if (!space && previousIsSpace) starts++;
+    previousIsSpace = space;
+  }
+  return starts;
+}
+
+export function countText(text: string): TextCounts {
+  let noSpace = 0;
+  let newlines = 0;
+  for (let i = 0; i < text.length; i++) {
+    const code = text.charCodeAt(i);
+    if (code === 0x0a) newlines++;
+    if (!isSpace(code)) noSpace++;
+  }
+  return { chars: text.length, noSpace, newlines, wordStarts: countWordStarts(text, '') };
+}
+
+// 編集前後の差分だけを数えて更新する（全文は見ない）
+export function applyEdit(counts: TextCounts, edit: TextEdit): TextCounts {
+  const removed = countText(edit.removed);
+  const inserted = countText(edit.inserted);
+  // 単語の始まりかどうかは直前の文字で決まるので、編集箇所の直後の1文字も数え直す
+  const wordStartsBefore = countWordStarts(edit.removed + edit.next, edit.prev);
+  const wordStartsAfter = countWordStarts(edit.inserted + edit.next, edit.prev);
+  return {
+    chars: counts.chars - removed.chars + inserted.chars,
+    noSpace: counts.noSpace - removed.noSpace + inserted.noSpace,
+    newlines: counts.newlines - removed.newlines + inserted.newlines,
+    wordStarts: counts.wordStarts - wordStartsBefore + wordStartsAfter,
+  };
+}
+
+// 以前の split ベースの定義（空白だけなら単語数・行数とも0）と同じ値
+export function toStats(counts: TextCounts): TextStats {
+  const empty = counts.noSpace === 0;
+  return {
+    chars: counts.chars,
+    words: empty ? 0 : counts.wordStarts,
+    lines: empty ? 0 : counts.newlines + 1,
+    noSpace: counts.noSpace,
+  };
+}
+
+/**
+ * 入力前の選択範囲と入力後のカーソル位置から、1回の編集を求める
+ * 入力・貼り付け・削除はすべて「選択範囲（または直前・直後の文字）を置き換えてカーソルは挿入文字の末尾」になる
+ * 前後の境界が一致しない場合（元に戻す・ドラッグなど）は null を返すので、全文を数え直す
+ */
+export function describeEdit(before: string, after: string, selectionStart: number, caret: number): TextEdit | null {
+  const start = Math.min(selectionStart, caret);
+  const end = before.length - after.length + caret;
+  if (start < 0 || end < start || end > before.length || caret > after.length) return null;
+
+  const CHECK = 16;
+  if (before.slice(Math.max(0, start - CHECK), start) !== after.slice(Math.max(0, start - CHECK), start)) return null;
+  if (before.slice(end, end + CHECK) !== after.slice(caret, caret + CHECK)) return null;
+
+  return {
+    prev: start > 0 ? before.charAt(start - 1) : '',
+    next: before.charAt(end),
+    removed: before.slice(start, end),
+    inserted: after.slice(start, caret),
+  };
+}
+
+export function convertText(text: string, mode: ConversionMode): string {
+  switch (mode) {
+    case 'upper':
+      return text.toUpperCase();
+    case 'lower':
+      return text.toLowerCase();
+    case 'fullToHalf':
+      return text.replace(/[！-～]/g, s => String.fromCharCode(s.charCodeAt(0) - 0xFEE0));
+    case 'halfToFull':
+      return text.replace(/[!-~]/g, s => String.fromCharCode(s.charCodeAt(0) + 0xFEE0));
+  }
+}
+
+/**
+ * 表示用の行の開始位置（改行ごと。改行のない長い行は maxRowChars ごとに折り返す）
+ * 最後に text.length を番兵として入れるので、行数は length - 1
+ */
+export function rowOffsets(text: string, maxRowChars: number): Uint32Array {
+  let offsets = new Uint32Array(1024);
+  let count = 0;
+  const push = (offset: number) => {
+    if (count === offsets.length) {
+      const grown = new Uint32Array(offsets.length * 2);
+      grown.set(offsets);
+      offsets = grown;
+    }
+    offsets[count++] = offset;
+  };
+
+  push(0);
+  let rowStart = 0;
+  let index = text.indexOf('\n');
+  while (rowStart < text.length) {
+    const lineEnd = index === -1 ? text.length : index + 1;
+    // 長い行は折り返す
+    while (lineEnd - rowStart > maxRowChars) {
+      rowStart += maxRowChars;
+      push(rowStart);
+    }
+    if (lineEnd === text.length) break;
+    rowStart = lineEnd;
+    push(rowStart);
+    index = text.indexOf('\n', rowStart);
+  }
+  if (offsets[count - 1] !== text.length || count === 1) push(text.length);
+  return offsets.slice(0, count);
+}
@@ -0,0 +1,550 @@
+// WebCodecs による変換（webcodecs.worker から呼ぶ）
+// デマルチプレクサ → VideoDecoder / AudioDecoder → VideoEncoder / AudioEncoder → マルチプレクサ を
+// キューの長さで流量を抑えながらつなぐ。ブラウザの（多くはハードウェアの）コーデックを使うので、
+// ffmpeg.wasm より速く、wasm のメモリにファイルを置かない
+// 変換できない組み合わせは、始める前に isConfigSupported で調べて UnsupportedMediaError にする（呼び出し側が ffmpeg に切り替える）
+
+import { OggOpusWriter, WavWriter } from './audio-containers';
+import { openDemuxer } from './demux';
+import {
+  BlobBuilder,
+  COPYABLE_CODECS,
+  UnsupportedMediaError,
+  codecFamily,
+  isIdentityMatrix,
+  opusHead,
+  opusPreSkip,
+  type MediaTrack,
+  type OutputSample,
+  type OutputTrack,
+} from './media-container';
+import { Mp4Muxer } from './mp4';
+import type { StageClock } from './perf';
+import { WebmMuxer } from './webm';
+
+export type TranscodeContainer = 'mp4' | 'webm' | 'wav' | 'ogg' | 'aac';
+
+// video-queue の VideoPreset と同じ意味（音声ラボは常に quality）
+export type TranscodePreset = 'remux' | 'fast' | 'quality';
+
+export interface TranscodeOptions {
+  container: TranscodeContainer;
+  preset: TranscodePreset;
+}
+
+export interface TranscodeResult {
+  blob: Blob;
+  mode: 'copy' | 'partial' | 'encode';
+  frames: number; // 書き出した映像フレーム数
+  videoCodec: string | null;
+  audioCodec: string | null;
+}
+
+const MIME_TYPES: Record<TranscodeContainer, string> = {
+  mp4: 'video/mp4',
+  webm: 'video/webm',
+  wav: 'audio/wav',
+  ogg: 'audio/ogg',
+  aac: 'audio/aac',
+};
+
+// コーデックに溜めるチャンク数の上限（これを超えたらデマルチプレクサからの読み込みを待たせる）
+const MAX_QUEUE = 16;
+// キーフレームの間隔（マイクロ秒）
+const KEYFRAME_INTERVAL = 5_000_000;
+
+interface Sink {
+  addTrack(config: OutputTrack): number;
+  addSample(index: number, sample: OutputSample): void;
+  endTrack?(index: number): void;
+  finalize(type: string): Blob;
+}
+
+// エンコーダーが ADTS で出力するので、そのまま並べるだけ
+class AdtsSink implements Sink {
+  private data = new BlobBuilder();
+
+  addTrack(): number {
+    return 0;
+  }
+
+  addSample(_index: number, sample: OutputSample) {
+    this.data.push(sample.data);
+  }
+
+  finalize(type: string): Blob {
+    return this.data.toBlob(type);
+  }
+}
+
+// OpusHead はエンコーダーの最初の出力で分かるので、書き出しはそこから始める
+class OggSink implements Sink {
+  private writer: OggOpusWriter | null = null;
+  private config: OutputTrack | null = null;
+
+  addTrack(config: OutputTrack): number {
+    this.config = config;
+    return 0;
+  }
+
+  addSample(_index: number, sample: OutputSample) {
+    const config = this.config!;
+    this.writer ??= new OggOpusWriter(config.description ?? opusHead(config.channels ?? 2, config.sampleRate ?? 48000));
+    this.writer.push(sample.data);
+  }
+
+  finalize(): Blob {
+    if (!this.writer) throw new Error('ogg: no audio');
+    return this.writer.finalize();
+  }
+}
+
+// 16bit PCM（インターリーブ済み）のサンプルを受け取る
+// サンプルレート・チャンネル数はデコード結果に合わせて書き換わるので、最初のサンプルで確定する
+class WavSink implements Sink {
+  private writer: WavWriter | null = null;
+  private config: OutputTrack | null = null;
+
+  addTrack(config: OutputTrack): number {
+    this.config = config;
+    return 0;
+  }
+
+  addSample(_index: number, sample: OutputSample) {
+    const config = this.config!;
+    this.writer ??= new WavWriter(config.sampleRate ?? 48000, config.channels ?? 2);
+    this.writer.push(sample.data);
+  }
+
+  finalize(): Blob {
+    if (!this.writer) throw new Error('wav: no audio');
+    return this.writer.finalize();
+  }
+}
+
+function createSink(container: TranscodeContainer): Sink {
+  switch (container) {
+    case 'mp4':
+      return new Mp4Muxer();
+    case 'webm':
+      return new WebmMuxer();
+    case 'aac':
+      return new AdtsSink();
+    case 'ogg':
+      return new OggSink();
+    case 'wav':
+      return new WavSink();
+  }
+}
+
+// --- 設定の選択 ---
+
+// 解像度とフレームレートから H.264 のレベルを選ぶ（足りないと isConfigSupported が false になる）
+function avcLevel(width: number, height: number, frameRate: number): number {
+  const macroblocks = Math.ceil(width / 16) * Math.ceil(height / 16);
+  const rate = macroblocks * frameRate;
+  if (macroblocks <= 1620 && rate <= 40500) return 0x1e; // 3.0
+  if (macroblocks <= 3600 && rate <= 108000) return 0x1f; // 3.1
+  if (macroblocks <= 8192 && rate <= 245760) return 0x28; // 4.0
+  if (macroblocks <= 8704 && rate <= 522240) return 0x2a; // 4.2
+  if (macroblocks <= 22080 && rate <= 589824) return 0x32; // 5.0
+  if (macroblocks <= 36864 && rate <= 983040) return 0x33; // 5.1
+  return 0x34; // 5.2
+}
+
+function videoCandidates(container: 'mp4' | 'webm', preset: TranscodePreset, width: number, height: number, frameRate: number): string[] {
+  if (container === 'mp4') {
+    const level = avcLevel(width, height, frameRate).toString(16);
+    // High → Main → Baseline の順に試す
+    return ['6400', '4d00', '4200'].map((profile) => `avc1.${profile}${level}`);
+  }
+  // ffmpeg の経路と同じく、高速プリセットは VP8、画質優先は VP9
+  return preset === 'quality' ? ['vp09.00.41.08', 'vp8'] : ['vp8', 'vp09.00.41.08'];
+}
+
+function audioCandidates(container: TranscodeContainer): string[] {
+  switch (container) {
+    case 'mp4':
+      // Linux の Chromium などは AAC のエンコーダーを持たないので、MP4 に入る Opus を次の候補にする
+      return ['mp4a.40.2', 'opus'];
+    case 'aac':
+      return ['mp4a.40.2'];
+    default:
+      return ['opus'];
+  }
+}
+
+async function pickVideoEncoder(track: MediaTrack, options: TranscodeOptions): Promise<VideoEncoderConfig> {
+  const width = track.width ?? 0;
+  const height = track.height ?? 0;
+  const frameRate = track.frameRate && Number.isFinite(track.frameRate) ? track.frameRate : 30;
+  const bitsPerPixel = options.preset === 'quality' ? 0.12 : 0.08;
+  for (const codec of videoCandidates(options.container as 'mp4' | 'webm', options.preset, width, height, frameRate)) {
+    const config: VideoEncoderConfig = {
+      codec,
+      width,
+      height,
+      framerate: frameRate,
+      bitrate: Math.round(width * height * frameRate * bitsPerPixel),
+      bitrateMode: 'variable',
+      latencyMode: options.preset === 'fast' ? 'realtime' : 'quality',
+      ...(codec.startsWith('avc1') ? { avc: { format: 'avc' as const } } : {}),
+    };
+    const support = await VideoEncoder.isConfigSupported(config).catch(() => null);
+    if (support?.supported) return config;
+  }
+  throw new UnsupportedMediaError(`video-encoder: ${options.container} ${width}x${height}`);
+}
+
+async function pickAudioEncoder(track: MediaTrack, options: TranscodeOptions): Promise<AudioEncoderConfig> {
+  const bitrate = options.container === 'aac' ? 192_000 : options.preset === 'quality' ? 160_000 : 128_000;
+  for (const codec of audioCandidates(options.container)) {
+    const config: AudioEncoderConfig = {
+      codec,
+      sampleRate: track.sampleRate ?? 48000,
+      numberOfChannels: track.channels ?? 2,
+      bitrate,
+      ...(options.container === 'aac' ? { aac: { format: 'adts' as const } } : {}),
+    };
+    const support = await AudioEncoder.isConfigSupported(config).catch(() => null);
+    if (support?.supported) return config;
+  }
+  throw new UnsupportedMediaError(`audio-encoder: ${options.container} ${track.sampleRate}Hz/${track.channels}ch`);
+}
+
+export function isPcm(track: MediaTrack): boolean {
+  return track.codec.startsWith('pcm-');
+}
+
+async function checkDecoder(track: MediaTrack): Promise<void> {
+  if (track.kind === 'audio' && isPcm(track)) return;
+  const supported =
+    track.kind === 'video'
+      ? await VideoDecoder.isConfigSupported(videoDecoderConfig(track)).then((s) => s.supported, () => false)
+      : await AudioDecoder.isConfigSupported(audioDecoderConfig(track)).then((s) => s.supported, () => false);
+  if (!supported) throw new UnsupportedMediaError(`${track.kind}-decoder: ${track.codec}`);
+}
+
+function videoDecoderConfig(track: MediaTrack): VideoDecoderConfig {
+  return {
+    codec: track.codec,
+    description: track.description,
+    codedWidth: track.width,
+    codedHeight: track.height,
+  };
+}
+
+export function audioDecoderConfig(track: MediaTrack): AudioDecoderConfig {
+  return {
+    codec: track.codec,
+    description: track.description,
+    sampleRate: track.sampleRate ?? 48000,
+    numberOfChannels: track.channels ?? 2,
+  };
+}
+
+// そのまま入れられるか（description が要るコーデックで、それが無いものはコピーしない）
+function canCopy(track: MediaTrack, options: TranscodeOptions): boolean {
+  if (options.preset !== 'remux') return false;
+  if (options.container !== 'mp4' && options.container !== 'webm') return false;
+  const family = codecFamily(track.codec);
+  if (!COPYABLE_CODECS[options.container][track.kind].includes(family)) return false;
+  if (options.container === 'mp4' && ['h264', 'hevc', 'av1', 'aac'].includes(family) && !track.description) return false;
+  if (options.container === 'webm' && family === 'vorbis' && !track.description) return false;
+  return true;
+}
+
+// --- 変換 ---
+
+export function nextDequeue(codec: VideoDecoder | VideoEncoder | AudioDecoder | AudioEncoder): Promise<void> {
+  return new Promise((resolve) => codec.addEventListener('dequeue', () => resolve(), { once: true }));
+}
+
+function copyDescription(description: AllowSharedBufferSource | undefined): Uint8Array | undefined {
+  if (!description) return undefined;
+  return ArrayBuffer.isView(description)
+    ? new Uint8Array(description.buffer.slice(description.byteOffset, description.byteOffset + description.byteLength))
+    : new Uint8Array((description as ArrayBuffer).slice(0));
+}
+
+// AudioData を 16bit PCM（インターリーブ）に直す（WAV の書き出し用）
+function toInterleavedS16(data: AudioData): Uint8Array {
+  const frames = data.numberOfFrames;
+  const channels = data.numberOfChannels;
+  const out = new Int16Array(frames * channels);
+  const plane = new Float32Array(frames);
+  for (let ch = 0; ch < channels; ch++) {
+    data.copyTo(plane, { planeIndex: ch, format: 'f32-planar' });
+    for (let i = 0; i < frames; i++) {
+      const v = Math.max(-1, Math.min(1, plane[i]));
+      out[i * channels + ch] = v < 0 ? v * 0x8000 : v * 0x7fff;
+    }
+  }
+  return new Uint8Array(out.buffer);
+}
+
+// WAV の PCM を AudioData にする（24bit は AudioData に無いので 32bit に広げる）
+export function pcmToAudioData(track: MediaTrack, data: Uint8Array, timestamp: number): AudioData {
+  const channels = track.channels ?? 2;
+  let format = track.codec.slice(4) as AudioSampleFormat | 's24';
+  let bytes = data;
+  if (format === 's24') {
+    const samples = Math.floor(data.length / 3);
+    const widened = new Int32Array(samples);
+    for (let i = 0; i < samples; i++) {
+      widened[i] = ((data[i * 3] << 8) | (data[i * 3 + 1] << 16) | (data[i * 3 + 2] << 24));
+    }
+    bytes = new Uint8Array(widened.buffer);
+    format = 's32';
+  }
+  const bytesPerSample = format === 'u8' ? 1 : format === 's16' ? 2 : 4;
+  return new AudioData({
+    format: format as AudioSampleFormat,
+    sampleRate: track.sampleRate ?? 48000,
+    numberOfChannels: channels,
+    numberOfFrames: bytes.length / bytesPerSample / channels,
+    timestamp,
+    data: bytes,
+  });
+}
+
+interface Lane {
+  track: MediaTrack;
+  output: number;
+  outputConfig: OutputTrack;
+  // サンプルを1つ渡す（コーデックのキューが空くまで待つこともある）
+  push(sample: { data: Uint8Array; timestamp: number; decodeTimestamp: number; duration: number; key: boolean }): Promise<void>;
+  flush(): Promise<void>;
+  close(): void;
+}
+
+export async function transcode(
+  file: Blob,
+  options: TranscodeOptions,
+  onProgress: (progress: number) => void,
+  clock: StageClock
+): Promise<TranscodeResult> {
+  const audioOnly = options.container !== 'mp4' && options.container !== 'webm';
+
+  // 形式の判定と、すべてのコーデックが使えるかの確認（ここで失敗したら何も書き出していない）
+  const { demuxer, plans } = await clock.time('read', async () => {
+    const demuxer = await openDemuxer(file);
+    const video = audioOnly ? undefined : demuxer.tracks.find((track) => track.kind === 'video');
+    const audio = demuxer.tracks.find((track) => track.kind === 'audio');
+    if (!video && !audio) throw new UnsupportedMediaError('no usable track');
+    if (audioOnly && !audio) throw new UnsupportedMediaError('no audio track');
+    // WebM には表示行列がない（回転をフレームに焼き込むのは ffmpeg に任せる）
+    if (video && options.container === 'webm' && !isIdentityMatrix(video.matrix)) {
+      throw new UnsupportedMediaError('webm: rotated video');
+    }
+
+    const plans: { track: MediaTrack; copy: boolean; encoder?: VideoEncoderConfig | AudioEncoderConfig }[] = [];
+    for (const track of [video, audio]) {
+      if (!track) continue;
+      if (canCopy(track, options)) {
+        plans.push({ track, copy: true });
+        continue;
+      }
+      await checkDecoder(track);
+      // WAV は AudioEncoder を使わず、デコードした PCM をそのまま書く
+      const encoder =
+        options.container === 'wav' ? undefined
+        : track.kind === 'video' ? await pickVideoEncoder(track, options)
+        : await pickAudioEncoder(track, options);
+      plans.push({ track, copy: false, encoder });
+    }
+    return { demuxer, plans };
+  });
+
+  const sink = createSink(options.container);
+  let failure: Error | null = null;
+  const fail = (error: unknown) => {
+    failure ??= error instanceof Error ? error : new Error(String(error));
+  };
+  let frames = 0;
+  const duration = demuxer.duration;
+  let lastProgress = 0;
+  const progress = (timestamp: number) => {
+    if (duration <= 0) return;
+    const value = Math.min(1, Math.max(0, timestamp / duration));
+    if (value - lastProgress < 0.01) return;
+    lastProgress = value;
+    onProgress(value);
+  };
+
+  const lanes: Lane[] = plans.map(({ track, copy, encoder }) => {
+    const outputConfig: OutputTrack = {
+      kind: track.kind,
+      codec: copy ? track.codec : options.container === 'wav' ? 'pcm-s16' : encoder!.codec,
+      description: copy ? track.description : undefined,
+      width: track.width,
+      height: track.height,
+      sampleRate: track.sampleRate,
+      channels: track.channels,
+      matrix: track.matrix,
+    };
+    const output = sink.addTrack(outputConfig);
+    const write = (sample: OutputSample) => sink.addSample(output, sample);
+
+    if (copy) {
+      return {
+        track,
+        output,
+        outputConfig,
+        push: async (sample) => {
+          if (track.kind === 'video') frames++;
+          write(sample);
+          progress(sample.timestamp);
+        },
+        flush: async () => {},
+        close: () => {},
+      };
+    }
+
+    if (track.kind === 'video') {
+      const config = encoder as VideoEncoderConfig;
+      const frameDuration = 1e6 / (config.framerate ?? 30);
+      let lastKey = -Infinity;
+      const videoEncoder = new VideoEncoder({
+        output: (chunk, metadata) => {
+          const description = copyDescription(metadata?.decoderConfig?.description);
+          if (description && !outputConfig.description) outputConfig.description = description;
+          const data = new Uint8Array(chunk.byteLength);
+          chunk.copyTo(data);
+          write({ data, timestamp: chunk.timestamp, duration: chunk.duration ?? frameDuration, key: chunk.type === 'key' });
+        },
+        error: fail,
+      });
+      videoEncoder.configure(config);
+      const decoder = new VideoDecoder({
+        output: (frame) => {
+          const keyFrame = frame.timestamp - lastKey >= KEYFRAME_INTERVAL;
+          if (keyFrame) lastKey = frame.timestamp;
+          try {
+            videoEncoder.encode(frame, { keyFrame });
+          } catch (error) {
+            fail(error);
+          } finally {
+            frame.close();
+          }
+          frames++;
+          progress(frame.timestamp);
+        },
+        error: fail,
+      });
+      decoder.configure(videoDecoderConfig(track));
+
+      return {
+        track,
+        output,
+        outputConfig,
+        push: async (sample) => {
+          while (decoder.decodeQueueSize > MAX_QUEUE && !failure) await nextDequeue(decoder);
+          while (videoEncoder.encodeQueueSize > MAX_QUEUE && !failure) await nextDequeue(videoEncoder);
+          decoder.decode(
+            new EncodedVideoChunk({ type: sample.key ? 'key' : 'delta', timestamp: sample.timestamp, duration: sample.duration, data: sample.data })
+          );
+        },
+        flush: async () => {
+          await decoder.flush();
+          await videoEncoder.flush();
+        },
+        close: () => {
+          if (decoder.state !== 'closed') decoder.close();
+          if (videoEncoder.state !== 'closed') videoEncoder.close();
+        },
+      };
+    }
+
+    // 音声
+    let audioEncoder: AudioEncoder | null = null;
+    const handleAudio = (data: AudioData) => {
+      try {
+        if (audioEncoder) {
+          audioEncoder.encode(data);
+        } else {
+          // HE-AAC などはヘッダーと実際の出力でサンプルレートが違うことがある
+          outputConfig.sampleRate = data.sampleRate;
+          outputConfig.channels = data.numberOfChannels;
+          write({ data: toInterleavedS16(data), timestamp: data.timestamp, duration: data.duration, key: true });
+        }
+        progress(data.timestamp);
+      } catch (error) {
+        fail(error);
+      } finally {
+        data.close();
+      }
+    };
+    if (encoder) {
+      audioEncoder = new AudioEncoder({
+        output: (chunk, metadata) => {
+          const description = copyDescription(metadata?.decoderConfig?.description);
+          if (description && !outputConfig.description) outputConfig.description = description;
+          const data = new Uint8Array(chunk.byteLength);
+          chunk.copyTo(data);
+          // Opus の出力は入力と同じ時刻から始まるが、先頭の pre-skip 分は再生時に捨てられるので、その分だけ前へずらす
+          const shift = outputConfig.codec === 'opus' ? (opusPreSkip(outputConfig.description) / 48000) * 1e6 : 0;
+          write({ data, timestamp: chunk.timestamp - shift, duration: chunk.duration ?? 0, key: true });
+        },
+        error: fail,
+      });
+      audioEncoder.configure(encoder as AudioEncoderConfig);
+    }
+    const decoder = isPcm(track) ? null : new AudioDecoder({ output: handleAudio, error: fail });
+    decoder?.configure(audioDecoderConfig(track));
+
+    return {
+      track,
+      output,
+      outputConfig,
+      push: async (sample) => {
+        if (!decoder) {
+          handleAudio(pcmToAudioData(track, sample.data, sample.timestamp));
+        } else {
+          while (decoder.decodeQueueSize > MAX_QUEUE && !failure) await nextDequeue(decoder);
+          decoder.decode(new EncodedAudioChunk({ type: 'key', timestamp: sample.timestamp, duration: sample.duration, data: sample.data }));
+        }
+        while (audioEncoder && audioEncoder.encodeQueueSize > MAX_QUEUE && !failure) await nextDequeue(audioEncoder);
+      },
+      flush: async () => {
+        await decoder?.flush();
+        await audioEncoder?.flush();
+      },
+      close: () => {
+        if (decoder && decoder.state !== 'closed') decoder.close();
+        if (audioEncoder && audioEncoder.state !== 'closed') audioEncoder.close();
+      },
+    };
+  });
+
+  try {
+    await clock.time('encode', async () => {
+      const byTrack = new Map(lanes.map((lane) => [lane.track.id, lane]));
+      for await (const sample of demuxer.samples()) {
+        if (failure) break;
+        await byTrack.get(sample.track)?.push(sample);
+      }
+      if (failure) throw failure;
+      for (const lane of lanes) {
+        await lane.flush();
+        sink.endTrack?.(lane.output);
+      }
+      if (failure) throw failure;
+    });
+
+    const blob = await clock.time('write', () => sink.finalize(MIME_TYPES[options.container]));
+    onProgress(1);
+    const copied = plans.filter((plan) => plan.copy).length;
+    const video = lanes.find((lane) => lane.track.kind === 'video');
+    const audio = lanes.find((lane) => lane.track.kind === 'audio');
+    return {
+      blob,
+      mode: copied === plans.length ? 'copy' : copied > 0 ? 'partial' : 'encode',
+      frames,
+      videoCodec: video?.outputConfig.codec ?? null,
+      audioCodec: audio?.outputConfig.codec ?? null,
+    };
+  } finally {
+    lanes.forEach((lane) => lane.close());
+  }
+}
@@ -0,0 +1,214 @@
+import type { FFmpeg } from '@ffmpeg/ffmpeg';
+import { createFFmpeg, getFFmpeg, mountInput, preferredFlavor } from './ffmpeg-engine';
+import { COPYABLE_CODECS } from './media-container';
+import type { EngineResult } from './media-engine';
+import { startRun } from './perf';
+
+export type VideoFormat = 'mp4' | 'webm';
+
+// remux:   コーデックがそのまま入るストリームはコピー（入らないものだけ高速エンコード）
+// fast:    -preset ultrafast / realtime で再エンコード
+// quality: CRF で画質優先の再エンコード
+export type VideoPreset = 'remux' | 'fast' | 'quality';
+
+// 実際にどう処理したか（copy: 全ストリームをコピー / partial: 一部だけ再エンコード / encode: すべて再エンコード）
+export type VideoJobMode = 'copy' | 'partial' | 'encode';
+
+export interface VideoJobOptions {
+  format: VideoFormat;
+  preset: VideoPreset;
+}
+
+export interface VideoJobResult extends EngineResult {
+  blob: Blob;
+  mode: VideoJobMode;
+  originalSize: number;
+  newSize: number;
+}
+
+interface StreamInfo {
+  video: string | null;
+  audio: string | null;
+}
+
+interface Job {
+  id: number;
+  file: File;
+  options: VideoJobOptions;
+  onProgress?: (progress: number) => void;
+  resolve: (result: VideoJobResult) => void;
+  reject: (error: Error) => void;
+}
+
+const MIME_TYPES: Record<VideoFormat, string> = {
+  mp4: 'video/mp4',
+  webm: 'video/webm',
+};
+
+const ENCODERS: Record<VideoFormat, Record<'fast' | 'quality', { video: string[]; audio: string[] }>> = {
+  mp4: {
+    fast: { video: ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '28'], audio: ['-c:a', 'aac', '-b:a', '128k'] },
+    quality: { video: ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23'], audio: ['-c:a', 'aac', '-b:a', '160k'] },
+  },
+  webm: {
+    // VP9 は wasm だと非常に遅いので、高速プリセットは VP8 の realtime モード
+    fast: { video: ['-c:v', 'libvpx', '-deadline', 'realtime', '-cpu-used', '8', '-crf', '10', '-b:v', '2M'], audio: ['-c:a', 'libopus', '-b:a', '128k'] },
+    quality: { video: ['-c:v', 'libvpx-vp9', '-deadline', 'good', '-cpu-used', '4', '-row-mt', '1', '-crf', '32', '-b:v', '0'], audio: ['-c:a', 'libopus', '-b:a', '160k'] },
+  },
+};
+
+// マルチスレッド版は1インスタンスで複数コアを使うので、並列数は控えめにする
+export function defaultVideoPoolSize(): number {
+  const cores = typeof navigator !== 'undefined' && navigator.hardwareConcurrency ? navigator.hardwareConcurrency : 4;
+  return preferredFlavor() === 'mt'
+    ? Math.min(2, Math.max(1, Math.floor(cores / 4)))
+    : Math.min(3, Math.max(1, Math.floor(cores / 2)));
+}
+
+// `ffmpeg -i` のログからストリームのコーデックを読む（デコードはしないので一瞬で終わる）
+async function probeStreams(ffmpeg: FFmpeg, path: string): Promise<StreamInfo> {
+  const info: StreamInfo = { video: null, audio: null };
+  const handleLog = ({ message }: { message: string }) => {
+    const match = message.match(/Stream #\d+:\d+.*?: (Video|Audio): (\w+)/);
+    if (!match) return;
+    const kind = match[1] === 'Video' ? 'video' : 'audio';
+    if (!info[kind]) info[kind] = match[2];
+  };
+
+  ffmpeg.on('log', handleLog);
+  try {
+    // 出力を指定していないので終了コードは非0になるが、ストリーム情報はログに出る
+    await ffmpeg.exec(['-hide_banner', '-i', path]);
+  } finally {
+    ffmpeg.off('log', handleLog);
+  }
+  return info;
+}
+
+export function buildArgs(
+  input: string,
+  output: string,
+  options: VideoJobOptions,
+  streams: StreamInfo | null
+): { args: string[]; mode: VideoJobMode } {
+  const encoder = ENCODERS[options.format][options.preset === 'quality' ? 'quality' : 'fast'];
+  const copyable = COPYABLE_CODECS[options.format];
+
+  const copyVideo = options.preset === 'remux' && !!streams?.video && copyable.video.includes(streams.video);
+  const copyAudio = options.preset === 'remux' && !!streams?.audio && copyable.audio.includes(streams.audio);
+
+  const args = ['-i', input, '-map', '0:v:0?', '-map', '0:a:0?'];
+  args.push(...(copyVideo ? ['-c:v', 'copy'] : encoder.video));
+  args.push(...(copyAudio ? ['-c:a', 'copy'] : encoder.audio));
+  args.push(output);
+
+  const hasAudio = !!streams?.audio;
+  const mode: VideoJobMode =
+    copyVideo && (copyAudio || !hasAudio) ? 'copy' : copyVideo || copyAudio ? 'partial' : 'encode';
+  return { args, mode };
+}
+
+// FFmpeg インスタンスの小さなプール。1インスタンスは同時に1ジョブだけ処理し、残りはキューで待つ
+// 1つ目は動画ラボ・音声ラボ共有のインスタンスを使い、2つ目以降は並列処理が必要になった時点でロードする
+export class VideoJobQueue {
+  private instances: FFmpeg[] = [];
+  private idle: FFmpeg[] = [];
+  private queue: Job[] = [];
+  private spawning = 0;
+  private nextId = 0;
+
+  constructor(private size: number = defaultVideoPoolSize()) {}
+
+  convert(file: File, options: VideoJobOptions, onProgress?: (progress: number) => void): Promise<VideoJobResult> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, file, options, onProgress, resolve, reject });
+      this.pump();
+    });
+  }
+
+  // まだ開始していないジョブを取り消す（実行中のものは最後まで処理する）
+  clear() {
+    this.queue.forEach((job) => job.reject(new Error('Video queue cleared')));
+    this.queue = [];
+  }
+
+  private spawn() {
+    this.spawning++;
+    const first = this.instances.length === 0 && this.spawning === 1;
+    (first ? getFFmpeg() : createFFmpeg())
+      .then((ffmpeg) => {
+        this.instances.push(ffmpeg);
+        this.idle.push(ffmpeg);
+      })
+      .catch((err) => {
+        // 2つ目以降のロード失敗（メモリ不足など）は、いまあるインスタンスだけで続ける
+        this.size = Math.max(1, this.instances.length);
+        if (this.instances.length === 0) {
+          const error = err instanceof Error ? err : new Error(String(err));
+          this.queue.forEach((job) => job.reject(error));
+          this.queue = [];
+        }
+      })
+      .finally(() => {
+        this.spawning--;
+        this.pump();
+      });
+  }
+
+  private pump() {
+    while (this.queue.length > 0 && this.idle.length > 0) {
+      this.run(this.idle.pop()!, this.queue.shift()!);
+    }
+    while (this.queue.length > this.spawning && this.instances.length + this.spawning < this.size) {
+      this.spawn();
+    }
+  }
+
+  private async run(ffmpeg: FFmpeg, job: Job) {
+    const output = `/output-${job.id}.${job.options.format}`;
+    const handleProgress = ({ progress }: { progress: number }) => {
+      job.onProgress?.(Math.min(1, Math.max(0, progress)));
+    };
+    let input: Awaited<ReturnType<typeof mountInput>> | null = null;
+    // ffmpeg の exec はデコードとエンコードを1回で行うので、両方まとめて encode として計る
+    const perf = startRun('video', `${job.options.format}/${job.options.preset}`);
+
+    try {
+      input = await perf.stage('read', () => mountInput(ffmpeg, job.file));
+      const path = input.path;
+      const streams = job.options.preset === 'remux' ? await perf.stage('read', () => probeStreams(ffmpeg, path)) : null;
+      const { args, mode } = buildArgs(input.path, output, job.options, streams);
+
+      ffmpeg.on('progress', handleProgress);
+      const exitCode = await perf.stage('encode', () => ffmpeg.exec(args));
+      if (exitCode !== 0) throw new Error(`ffmpeg exited with code ${exitCode}`);
+
+      const blob = await perf.stage('write', async () => {
+        const data = await ffmpeg.readFile(output);
+        return new Blob([data as unknown as BlobPart], { type: MIME_TYPES[job.options.format] });
+      });
+      perf.bytes(job.file.size, blob.size);
+      perf.end(true, { mode, engine: 'ffmpeg' });
+      job.resolve({ blob, mode, originalSize: job.file.size, newSize: blob.size, engine: 'ffmpeg' });
+    } catch (err) {
+      perf.end(false, { engine: 'ffmpeg' });
+      job.reject(err instanceof Error ? err : new Error(String(err)));
+    } finally {
+      ffmpeg.off('progress', handleProgress);
+      await ffmpeg.deleteFile(output).catch(() => {});
+      await input?.release().catch(() => {});
+      this.idle.push(ffmpeg);
+      this.pump();
+    }
+  }
+}
+
+// ページを離れても使い回すため、キューはモジュール単位で1つだけ作る（ブラウザでのみ生成）
+let queue: VideoJobQueue | null = null;
+
+export function getVideoJobQueue(): VideoJobQueue {
+  if (!queue) {
+    queue = new VideoJobQueue();
+  }
+  return queue;
+}
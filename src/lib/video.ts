@@ -1,5 +1,5 @@
-import { FFmpeg } from '@ffmpeg/ffmpeg';
-import { fetchFile, toBlobURL } from '@ffmpeg/util';
+import type { FFmpeg } from '@ffmpeg/ffmpeg';
+import { getFFmpeg, mountInput } from './ffmpeg-engine';
 
 export class VideoProcessor {
   // 初期値は null にしておき、サーバー側での起動を防ぐ
@@ -11,27 +11,12 @@ export class VideoProcessor {
     // これでサーバー側でのクラッシュを防ぎます
   }
 
-  // エンジンのロード（初回のみ重い）
-  async load(onProgress: (p: number) => void) {
+  // エンジンのロード（初回のみ重い。動画ラボ・音声ラボと共有）
+  async load() {
     if (this.loaded && this.ffmpeg) return;
 
     // 👇 ここで初めてインスタンス化する（ここはブラウザでしか実行されないため安全）
-    if (!this.ffmpeg) {
-      this.ffmpeg = new FFmpeg();
-    }
-
-    const baseURL = 'https://unpkg.com/@ffmpeg/core@0.12.6/dist/umd';
-    
-    // 進行状況のイベントリスナー
-    this.ffmpeg.on('progress', ({ progress }) => {
-      onProgress(progress);
-    });
-
-    await this.ffmpeg.load({
-      coreURL: await toBlobURL(`${baseURL}/ffmpeg-core.js`, 'text/javascript'),
-      wasmURL: await toBlobURL(`${baseURL}/ffmpeg-core.wasm`, 'application/wasm'),
-    });
-
+    this.ffmpeg = await getFFmpeg();
     this.loaded = true;
   }
 
@@ -39,29 +24,36 @@ export class VideoProcessor {
   async compress(file: File, onProgress: (p: number) => void): Promise<Blob> {
     // ロードされていなければロードする
     if (!this.loaded || !this.ffmpeg) {
-      await this.load((p) => {});
+      await this.load();
     }
     
     // TypeScriptの型ガード（念のため）
     if (!this.ffmpeg) throw new Error("FFmpeg not loaded");
 
-    const inputName = 'input.mp4';
     const outputName = 'output.mp4';
 
-    await this.ffmpeg.writeFile(inputName, await fetchFile(file));
+    // 入力は WORKERFS でマウント（wasm のメモリへコピーしない）
+    const input = await mountInput(this.ffmpeg, file);
+
+    // 進行状況のイベントリスナー（共有インスタンスなので処理後に解除する）
+    const handleProgress = ({ progress }: { progress: number }) => onProgress(progress);
+    this.ffmpeg.on('progress', handleProgress);
 
     // 圧縮コマンド実行 (CRF 28)
-    await this.ffmpeg.exec([
-      '-i', inputName,
-      '-vcodec', 'libx264',
-      '-crf', '28',
-      '-preset', 'ultrafast',
-      outputName
-    ]);
+    try {
+      await this.ffmpeg.exec([
+        '-i', input.path,
+        '-vcodec', 'libx264',
+        '-crf', '28',
+        '-preset', 'ultrafast',
+        outputName
+      ]);
+    } finally {
+      this.ffmpeg.off('progress', handleProgress);
+      await input.release();
+    }
 
     const data = await this.ffmpeg.readFile(outputName);
-    
-    await this.ffmpeg.deleteFile(inputName);
     await this.ffmpeg.deleteFile(outputName);
 
     // eslint-disable-next-line @typescript-eslint/no-explicit-any
@@ -0,0 +1,97 @@
+// 音声ラボの波形（ピーク）を waveform.worker で求める
+// 処理は1つずつで、新しいファイルを渡すと前の処理は取り消す（JsonEngine と同じ）
+
+import { startRun, type PerfRun, type StageTiming } from './perf';
+import type { WaveformPeaks } from './waveform';
+
+type WorkerResponse =
+  | { type: 'progress'; id: number; progress: number }
+  | { type: 'complete'; id: number; peaks: Float32Array; duration: number; cached: boolean; timings: StageTiming[] }
+  | { type: 'unsupported' | 'error'; id: number; message: string; timings: StageTiming[] };
+
+// unsupported: このブラウザではデコードできない形式（WaveSurfer 自身のデコードに任せる）
+export type WaveformResult =
+  | ({ ok: true; cached: boolean } & WaveformPeaks)
+  | { ok: false; unsupported: boolean; message: string };
+
+export class WaveformEngine {
+  private worker: Worker;
+  private nextId = 0;
+  private active: {
+    id: number;
+    file: Blob;
+    perf: PerfRun;
+    onProgress: (progress: number) => void;
+    resolve: (result: WaveformResult | null) => void;
+  } | null = null;
+
+  constructor() {
+    this.worker = new Worker(new URL('../workers/waveform.worker.ts', import.meta.url), {
+      type: 'module'
+    });
+    this.worker.onmessage = (event: MessageEvent<WorkerResponse>) => {
+      const message = event.data;
+      const active = this.active;
+      if (!active || message.id !== active.id) return;
+      if (message.type === 'progress') {
+        active.onProgress(message.progress);
+        return;
+      }
+
+      this.active = null;
+      active.perf.record(message.timings);
+      active.perf.bytes(active.file.size, 0);
+      if (message.type === 'complete') {
+        active.perf.end(true, { cached: message.cached, peaks: message.peaks.length });
+        active.resolve({ ok: true, peaks: message.peaks, duration: message.duration, cached: message.cached });
+      } else {
+        active.perf.end(false, { unsupported: message.type === 'unsupported', message: message.message });
+        active.resolve({ ok: false, unsupported: message.type === 'unsupported', message: message.message });
+      }
+    };
+  }
+
+  /**
+   * file の波形を求める。後から別のファイルを渡した場合や cancel した場合は null で終わる
+   */
+  peaks(file: Blob, onProgress: (progress: number) => void): Promise<WaveformResult | null> {
+    this.cancel();
+    const id = this.nextId++;
+    return new Promise((resolve) => {
+      this.active = { id, file, perf: startRun('waveform'), onProgress, resolve };
+      this.worker.postMessage({ type: 'peaks', id, file });
+    });
+  }
+
+  cancel() {
+    if (!this.active) return;
+    this.worker.postMessage({ type: 'cancel', id: this.active.id });
+    this.active.resolve(null);
+    this.active = null;
+  }
+
+  terminate() {
+    this.cancel();
+    this.worker.terminate();
+  }
+}
+
+// ワーカーとその中の IndexedDB 接続を使い回すため、モジュール単位で1つだけ作る（ブラウザでのみ生成）
+let engine: WaveformEngine | null = null;
+
+export function getWaveformEngine(): WaveformEngine {
+  if (!engine) {
+    engine = new WaveformEngine();
+  }
+  return engine;
+}
+
+// WebCodecs の AudioDecoder と IndexedDB が無いブラウザでは、最初から WaveSurfer のデコードを使う
+export function supportsWaveformWorker(): boolean {
+  return (
+    typeof window !== 'undefined' &&
+    typeof Worker !== 'undefined' &&
+    typeof AudioDecoder !== 'undefined' &&
+    typeof indexedDB !== 'undefined'
+  );
+}
@@ -0,0 +1,231 @@
+// 音声ラボの波形（ピーク）計算とキャッシュ。waveform.worker から使う
+// デコードは少しずつ（WebCodecs の AudioDecoder をストリームで）行い、PCM 全体はメモリに持たない
+// 結果はファイルの中身のハッシュをキーに IndexedDB へ保存し、同じファイルなら次からデコードしない
+
+import { openDB, type DBSchema, type IDBPDatabase } from 'idb';
+import { openDemuxer } from './demux';
+import { UnsupportedMediaError, type MediaTrack } from './media-container';
+import type { StageClock } from './perf';
+import { audioDecoderConfig, isPcm, nextDequeue, pcmToAudioData } from './transcode';
+
+// 1ピークあたりの元のサンプル数（48kHz で約94ピーク/秒。2時間で約68万個・2.7MB）
+export const SAMPLES_PER_PEAK = 512;
+
+export interface WaveformPeaks {
+  // 各区間の振幅の最大値（全チャンネル、0〜1）
+  peaks: Float32Array;
+  duration: number; // 秒
+}
+
+interface WaveformRecord {
+  hash: string;
+  samplesPerPeak: number;
+  duration: number;
+  peaks: ArrayBuffer;
+  lastUsed: number;
+}
+
+interface WaveformDB extends DBSchema {
+  peaks: {
+    key: string;
+    value: WaveformRecord;
+    indexes: { lastUsed: number };
+  };
+}
+
+const DB_NAME = 'lumina-waveforms';
+// 1件は長くても数MBなので、件数だけで LRU にする
+const MAX_ENTRIES = 50;
+const HASH_CHUNK = 8 * 1024 * 1024;
+const MAX_QUEUE = 16;
+
+let dbPromise: Promise<IDBPDatabase<WaveformDB>> | null = null;
+
+function getDB(): Promise<IDBPDatabase<WaveformDB>> {
+  if (!dbPromise) {
+    dbPromise = openDB<WaveformDB>(DB_NAME, 1, {
+      upgrade(db) {
+        const store = db.createObjectStore('peaks', { keyPath: 'hash' });
+        store.createIndex('lastUsed', 'lastUsed');
+      },
+    });
+  }
+  return dbPromise;
+}
+
+function toHex(buffer: ArrayBuffer): string {
+  return Array.from(new Uint8Array(buffer), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+// ファイルの中身の SHA-256。crypto.subtle.digest は全体を一度に渡す必要があるので、
+// 8MB ごとのダイジェストを並べたものをもう一度ハッシュする（メモリに載るのは 8MB だけ）
+export async function hashFile(file: Blob): Promise<string> {
+  const digests = new Uint8Array(Math.max(1, Math.ceil(file.size / HASH_CHUNK)) * 32 + 8);
+  new DataView(digests.buffer).setFloat64(digests.length - 8, file.size);
+  for (let offset = 0, i = 0; offset < file.size; offset += HASH_CHUNK, i++) {
+    const chunk = await file.slice(offset, offset + HASH_CHUNK).arrayBuffer();
+    digests.set(new Uint8Array(await crypto.subtle.digest('SHA-256', chunk)), i * 32);
+  }
+  return toHex(await crypto.subtle.digest('SHA-256', digests));
+}
+
+export async function getCachedPeaks(hash: string): Promise<WaveformPeaks | null> {
+  try {
+    const db = await getDB();
+    const record = await db.get('peaks', hash);
+    if (!record || record.samplesPerPeak !== SAMPLES_PER_PEAK) return null;
+    await db.put('peaks', { ...record, lastUsed: Date.now() });
+    return { peaks: new Float32Array(record.peaks), duration: record.duration };
+  } catch {
+    // IndexedDB が使えない環境（プライベートモードなど）では毎回計算する
+    return null;
+  }
+}
+
+// ピークは呼び出した時点で複製する（呼び出し側はこの後 peaks を転送してよい）
+export async function putCachedPeaks(hash: string, waveform: WaveformPeaks): Promise<void> {
+  const peaks = waveform.peaks.slice().buffer;
+  try {
+    const db = await getDB();
+    await db.put('peaks', { hash, samplesPerPeak: SAMPLES_PER_PEAK, duration: waveform.duration, peaks, lastUsed: Date.now() });
+
+    const tx = db.transaction('peaks', 'readwrite');
+    let excess = (await tx.store.count()) - MAX_ENTRIES;
+    let cursor = await tx.store.index('lastUsed').openCursor();
+    while (cursor && excess > 0) {
+      await cursor.delete();
+      excess--;
+      cursor = await cursor.continue();
+    }
+    await tx.done;
+  } catch (err) {
+    console.warn('Failed to cache waveform peaks:', err);
+  }
+}
+
+// 届いた順にサンプルを SAMPLES_PER_PEAK 個ずつまとめ、振幅の最大値だけを残す
+class PeakAccumulator {
+  private peaks: Float32Array;
+  private length = 0;
+  private current = 0;
+  private filled = 0;
+  private planes: Float32Array[] = [];
+
+  constructor(expectedPeaks: number) {
+    this.peaks = new Float32Array(Math.max(1024, expectedPeaks));
+  }
+
+  push(data: AudioData) {
+    const frames = data.numberOfFrames;
+    const channels = data.numberOfChannels;
+    for (let ch = 0; ch < channels; ch++) {
+      if (!this.planes[ch] || this.planes[ch].length < frames) this.planes[ch] = new Float32Array(frames);
+      data.copyTo(this.planes[ch], { planeIndex: ch, format: 'f32-planar' });
+    }
+    for (let i = 0; i < frames; i++) {
+      let value = this.current;
+      for (let ch = 0; ch < channels; ch++) {
+        const sample = this.planes[ch][i];
+        const magnitude = sample < 0 ? -sample : sample;
+        if (magnitude > value) value = magnitude;
+      }
+      this.current = value;
+      if (++this.filled === SAMPLES_PER_PEAK) this.emit();
+    }
+  }
+
+  finish(): Float32Array {
+    if (this.filled > 0) this.emit();
+    return this.peaks.slice(0, this.length);
+  }
+
+  private emit() {
+    if (this.length === this.peaks.length) {
+      const grown = new Float32Array(this.peaks.length * 2);
+      grown.set(this.peaks);
+      this.peaks = grown;
+    }
+    this.peaks[this.length++] = Math.min(1, this.current);
+    this.current = 0;
+    this.filled = 0;
+  }
+}
+
+async function checkAudioDecoder(track: MediaTrack) {
+  if (isPcm(track)) return;
+  const support = await AudioDecoder.isConfigSupported(audioDecoderConfig(track)).catch(() => null);
+  if (!support?.supported) throw new UnsupportedMediaError(`audio-decoder: ${track.codec}`);
+}
+
+// デコードしながらピークを求める。isCancelled が true になったら途中で止める
+export async function computePeaks(
+  file: Blob,
+  onProgress: (progress: number) => void,
+  isCancelled: () => boolean,
+  clock: StageClock
+): Promise<WaveformPeaks> {
+  const { demuxer, track } = await clock.time('read', async () => {
+    const demuxer = await openDemuxer(file);
+    const track = demuxer.tracks.find((t) => t.kind === 'audio');
+    if (!track) throw new UnsupportedMediaError('no audio track');
+    await checkAudioDecoder(track);
+    return { demuxer, track };
+  });
+
+  const durationUs = demuxer.duration;
+  const sampleRate = track.sampleRate ?? 48000;
+  const accumulator = new PeakAccumulator(Math.ceil(((durationUs / 1e6) * sampleRate) / SAMPLES_PER_PEAK) + 1);
+  // デコード結果の長さ（秒）。HE-AAC（SBR）などはヘッダーの sampleRate と出力のサンプルレートが違うので、AudioData ごとのレートで足す
+  let decodedSeconds = 0;
+  let failure: Error | null = null;
+  let lastProgress = 0;
+
+  const handleAudio = (data: AudioData) => {
+    try {
+      accumulator.push(data);
+      decodedSeconds += data.numberOfFrames / data.sampleRate;
+    } finally {
+      data.close();
+    }
+  };
+
+  await clock.time('decode', async () => {
+    const decoder = isPcm(track)
+      ? null
+      : new AudioDecoder({
+          output: handleAudio,
+          error: (error) => {
+            failure ??= error instanceof Error ? error : new Error(String(error));
+          },
+        });
+    decoder?.configure(audioDecoderConfig(track));
+    try {
+      for await (const sample of demuxer.samples()) {
+        if (sample.track !== track.id) continue;
+        if (failure) throw failure;
+        if (isCancelled()) throw new Error('cancelled');
+        if (!decoder) {
+          handleAudio(pcmToAudioData(track, sample.data, sample.timestamp));
+        } else {
+          while (decoder.decodeQueueSize > MAX_QUEUE && !failure) await nextDequeue(decoder);
+          decoder.decode(new EncodedAudioChunk({ type: 'key', timestamp: sample.timestamp, duration: sample.duration, data: sample.data }));
+        }
+        if (durationUs > 0) {
+          const progress = Math.min(1, Math.max(0, sample.timestamp / durationUs));
+          if (progress - lastProgress >= 0.01) {
+            lastProgress = progress;
+            onProgress(progress);
+          }
+        }
+      }
+      await decoder?.flush();
+      if (failure) throw failure;
+    } finally {
+      if (decoder && decoder.state !== 'closed') decoder.close();
+    }
+  });
+
+  // ヘッダーの長さより実際にデコードできたサンプル数を優先する（VBR の MP3 などでずれることがある）
+  const duration = decodedSeconds > 0 ? decodedSeconds : durationUs / 1e6;
+  return { peaks: accumulator.finish(), duration };
+}
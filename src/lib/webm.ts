@@ -0,0 +1,702 @@
+// MediaRecorder が出力する WebM には Duration が無い（ライブ配信向けの書き方のため）
+// そのままだとシークバーが使えないので、録画の最初のチャンクのヘッダーに
+// Duration 要素の場所を確保しておき、録画終了後にその8バイトだけを書き換える
+// 後半は WebCodecs で変換するときのデマルチプレクサとマルチプレクサ
+
+import {
+  BlobBuilder,
+  BlobReader,
+  ByteWriter,
+  StreamReader,
+  UnsupportedMediaError,
+  aacCodec,
+  av1Codec,
+  opusHead,
+  opusPreSkip,
+  type Demuxer,
+  type MediaSample,
+  type MediaTrack,
+  type OutputSample,
+  type OutputTrack,
+} from './media-container';
+
+const EBML_ID = 0x1a45dfa3;
+const SEGMENT_ID = 0x18538067;
+const SEEK_HEAD_ID = 0x114d9b74;
+const INFO_ID = 0x1549a966;
+const TIMECODE_SCALE_ID = 0x2ad7b1;
+const DURATION_ID = 0x4489;
+
+const DEFAULT_TIMECODE_SCALE = 1_000_000; // ns（= 1ms 単位）
+
+export interface DurationSlot {
+  // Duration（float64）の値が始まる位置（ファイル先頭からのバイト数）
+  offset: number;
+  timecodeScale: number;
+}
+
+interface Element {
+  id: number;
+  dataStart: number;
+  size: number; // サイズ不明（ライブ書き出し）の場合は -1
+}
+
+function readElement(bytes: Uint8Array, pos: number): Element | null {
+  if (pos >= bytes.length) return null;
+  const idLength = Math.clz32(bytes[pos]) - 23;
+  if (idLength < 1 || idLength > 4 || pos + idLength >= bytes.length) return null;
+  let id = 0;
+  for (let i = 0; i < idLength; i++) id = id * 256 + bytes[pos + i];
+
+  const sizePos = pos + idLength;
+  const sizeLength = Math.clz32(bytes[sizePos]) - 23;
+  if (sizeLength < 1 || sizeLength > 8 || sizePos + sizeLength > bytes.length) return null;
+  let size = bytes[sizePos] & (0xff >> sizeLength);
+  let unknown = size === (0xff >> sizeLength);
+  for (let i = 1; i < sizeLength; i++) {
+    const b = bytes[sizePos + i];
+    size = size * 256 + b;
+    unknown = unknown && b === 0xff;
+  }
+  return { id, dataStart: sizePos + sizeLength, size: unknown ? -1 : size };
+}
+
+function readUint(bytes: Uint8Array, start: number, size: number): number {
+  let value = 0;
+  for (let i = 0; i < size; i++) value = value * 256 + bytes[start + i];
+  return value;
+}
+
+/**
+ * 最初のチャンクに Duration（値は 0）を差し込んだ新しいバイト列を返す
+ * Segment のサイズが不明（MediaRecorder の出力）で、Info がチャンク内に収まっている場合のみ対応
+ * 既に Duration がある・SeekHead がある（位置がずれると壊れる）場合は null
+ */
+export function reserveDuration(chunk: Uint8Array): { bytes: Uint8Array; slot: DurationSlot } | null {
+  const ebml = readElement(chunk, 0);
+  if (!ebml || ebml.id !== EBML_ID || ebml.size < 0) return null;
+
+  const segment = readElement(chunk, ebml.dataStart + ebml.size);
+  if (!segment || segment.id !== SEGMENT_ID || segment.size !== -1) return null;
+
+  let pos = segment.dataStart;
+  while (pos < chunk.length) {
+    const child = readElement(chunk, pos);
+    if (!child || child.size < 0 || child.id === SEEK_HEAD_ID) return null;
+    const end = child.dataStart + child.size;
+
+    if (child.id === INFO_ID) {
+      if (end > chunk.length) return null;
+      let timecodeScale = DEFAULT_TIMECODE_SCALE;
+      for (let p = child.dataStart; p < end; ) {
+        const field = readElement(chunk, p);
+        if (!field || field.size < 0) return null;
+        if (field.id === DURATION_ID) return null;
+        if (field.id === TIMECODE_SCALE_ID) timecodeScale = readUint(chunk, field.dataStart, field.size);
+        p = field.dataStart + field.size;
+      }
+
+      // Info のサイズは8バイト長の vint で書き直す（中身が増えても桁が足りるように）
+      const content = chunk.subarray(child.dataStart, end);
+      const newSize = content.length + 11; // Duration: ID(2) + サイズ(1) + float64(8)
+      const header = new Uint8Array(4 + 8);
+      header.set([0x15, 0x49, 0xa9, 0x66, 0x01]);
+      for (let i = 0, v = newSize; i < 7; i++, v = Math.floor(v / 256)) header[11 - i] = v & 0xff;
+
+      const bytes = new Uint8Array(chunk.length + (header.length + newSize) - (end - pos));
+      bytes.set(chunk.subarray(0, pos), 0);
+      bytes.set(header, pos);
+      bytes.set(content, pos + header.length);
+      const durationPos = pos + header.length + content.length;
+      bytes.set([0x44, 0x89, 0x88], durationPos);
+      bytes.set(chunk.subarray(end), durationPos + 11);
+
+      return { bytes, slot: { offset: durationPos + 3, timecodeScale } };
+    }
+    pos = end;
+  }
+  return null;
+}
+
+// Duration の値（TimecodeScale 単位の float64、ビッグエンディアン）
+export function encodeDuration(durationMs: number, slot: DurationSlot): Uint8Array {
+  const bytes = new Uint8Array(8);
+  new DataView(bytes.buffer).setFloat64(0, (durationMs * 1_000_000) / slot.timecodeScale);
+  return bytes;
+}
+
+// --- WebCodecs で変換するときの WebM の読み書き ---
+
+
+const TRACKS_ID = 0x1654ae6b;
+const TRACK_ENTRY_ID = 0xae;
+const TRACK_NUMBER_ID = 0xd7;
+const TRACK_UID_ID = 0x73c5;
+const TRACK_TYPE_ID = 0x83;
+const CODEC_ID_ID = 0x86;
+const CODEC_PRIVATE_ID = 0x63a2;
+const CODEC_DELAY_ID = 0x56aa;
+const SEEK_PRE_ROLL_ID = 0x56bb;
+const DEFAULT_DURATION_ID = 0x23e383;
+const VIDEO_ID = 0xe0;
+const PIXEL_WIDTH_ID = 0xb0;
+const PIXEL_HEIGHT_ID = 0xba;
+const AUDIO_ID = 0xe1;
+const SAMPLING_FREQUENCY_ID = 0xb5;
+const CHANNELS_ID = 0x9f;
+const CLUSTER_ID = 0x1f43b675;
+const TIMECODE_ID = 0xe7;
+const SIMPLE_BLOCK_ID = 0xa3;
+const BLOCK_GROUP_ID = 0xa0;
+const BLOCK_ID = 0xa1;
+const BLOCK_DURATION_ID = 0x9b;
+const REFERENCE_BLOCK_ID = 0xfb;
+const CUES_ID = 0x1c53bb6b;
+const CUE_POINT_ID = 0xbb;
+const CUE_TIME_ID = 0xb3;
+const CUE_TRACK_POSITIONS_ID = 0xb7;
+const CUE_TRACK_ID = 0xf7;
+const CUE_CLUSTER_POSITION_ID = 0xf1;
+const SEEK_ID = 0x4dbb;
+const SEEK_ID_ID = 0x53ab;
+const SEEK_POSITION_ID = 0x53ac;
+const MUXING_APP_ID = 0x4d80;
+const WRITING_APP_ID = 0x5741;
+const DOC_TYPE_ID = 0x4282;
+
+// Segment 直下の要素（サイズ不明の Cluster の終わりはここで判断する）
+const TOP_LEVEL_IDS = new Set([CLUSTER_ID, CUES_ID, INFO_ID, TRACKS_ID, SEEK_HEAD_ID, 0x1043a770, 0x1254c367, 0x1941a469]);
+
+function readFloat(bytes: Uint8Array, start: number, size: number): number {
+  const view = new DataView(bytes.buffer, bytes.byteOffset + start, size);
+  return size === 4 ? view.getFloat32(0) : view.getFloat64(0);
+}
+
+function readString(bytes: Uint8Array, start: number, size: number): string {
+  return new TextDecoder().decode(bytes.subarray(start, start + size)).replace(/\0+$/, '');
+}
+
+interface WebmTrack extends MediaTrack {
+  defaultDuration: number; // マイクロ秒（不明なら 0）
+  codecDelay: number; // マイクロ秒（Opus の pre-skip。ブロックの時刻はこの分だけ後ろにずれている）
+}
+
+function codecFromWebm(codecId: string, codecPrivate: Uint8Array | undefined): { codec: string; description?: Uint8Array } {
+  switch (codecId) {
+    case 'V_VP8':
+      return { codec: 'vp8' };
+    case 'V_VP9':
+      // CodecPrivate の profile は省略されることが多いので、8bit の Profile 0 として扱う
+      return { codec: 'vp09.00.10.08' };
+    case 'V_AV1':
+      return codecPrivate && codecPrivate.length >= 4
+        ? { codec: av1Codec(codecPrivate), description: codecPrivate }
+        : { codec: 'av01.0.08M.08' };
+    case 'V_MPEG4/ISO/AVC':
+      return codecPrivate && codecPrivate.length >= 4
+        ? { codec: `avc1.${[1, 2, 3].map((i) => codecPrivate[i].toString(16).padStart(2, '0')).join('')}`, description: codecPrivate }
+        : { codec: 'unknown:avc' };
+    case 'A_OPUS':
+      return { codec: 'opus', description: codecPrivate };
+    case 'A_VORBIS':
+      return { codec: 'vorbis', description: codecPrivate };
+    case 'A_AAC':
+      return { codec: aacCodec(codecPrivate), description: codecPrivate };
+    case 'A_MPEG/L3':
+      return { codec: 'mp3' };
+    case 'A_FLAC':
+      return { codec: 'flac', description: codecPrivate };
+    default:
+      return { codec: `unknown:${codecId}` };
+  }
+}
+
+function parseTracks(bytes: Uint8Array): WebmTrack[] {
+  const tracks: WebmTrack[] = [];
+  for (let pos = 0; pos < bytes.length; ) {
+    const entry = readElement(bytes, pos);
+    if (!entry || entry.size < 0) break;
+    const end = entry.dataStart + entry.size;
+    if (entry.id === TRACK_ENTRY_ID) {
+      let number = 0;
+      let type = 0;
+      let codecId = '';
+      let codecPrivate: Uint8Array | undefined;
+      let defaultDuration = 0;
+      let codecDelay = 0;
+      let width: number | undefined;
+      let height: number | undefined;
+      let sampleRate: number | undefined;
+      let channels: number | undefined;
+      for (let p = entry.dataStart; p < end; ) {
+        const field = readElement(bytes, p);
+        if (!field || field.size < 0) break;
+        const { id, dataStart, size } = field;
+        if (id === TRACK_NUMBER_ID) number = readUint(bytes, dataStart, size);
+        else if (id === TRACK_TYPE_ID) type = readUint(bytes, dataStart, size);
+        else if (id === CODEC_ID_ID) codecId = readString(bytes, dataStart, size);
+        else if (id === CODEC_PRIVATE_ID) codecPrivate = bytes.slice(dataStart, dataStart + size);
+        else if (id === DEFAULT_DURATION_ID) defaultDuration = readUint(bytes, dataStart, size) / 1000;
+        else if (id === CODEC_DELAY_ID) codecDelay = readUint(bytes, dataStart, size) / 1000;
+        else if (id === VIDEO_ID || id === AUDIO_ID) {
+          for (let q = dataStart; q < dataStart + size; ) {
+            const setting = readElement(bytes, q);
+            if (!setting || setting.size < 0) break;
+            if (setting.id === PIXEL_WIDTH_ID) width = readUint(bytes, setting.dataStart, setting.size);
+            else if (setting.id === PIXEL_HEIGHT_ID) height = readUint(bytes, setting.dataStart, setting.size);
+            else if (setting.id === SAMPLING_FREQUENCY_ID) sampleRate = readFloat(bytes, setting.dataStart, setting.size);
+            else if (setting.id === CHANNELS_ID) channels = readUint(bytes, setting.dataStart, setting.size);
+            q = setting.dataStart + setting.size;
+          }
+        }
+        p = dataStart + size;
+      }
+      const kind = type === 1 ? 'video' : type === 2 ? 'audio' : null;
+      if (kind) {
+        tracks.push({
+          id: number,
+          kind,
+          ...codecFromWebm(codecId, codecPrivate),
+          width,
+          height,
+          sampleRate: kind === 'audio' ? sampleRate ?? 8000 : undefined,
+          channels: kind === 'audio' ? channels ?? 1 : undefined,
+          frameRate: kind === 'video' && defaultDuration > 0 ? 1e6 / defaultDuration : undefined,
+          duration: 0,
+          defaultDuration,
+          codecDelay,
+        });
+      }
+    }
+    pos = end;
+  }
+  return tracks;
+}
+
+// Block / SimpleBlock の中身（レーシングで複数フレームが入っていることがある）
+function parseBlock(data: Uint8Array): { track: number; timecode: number; flags: number; frames: Uint8Array[] } | null {
+  const trackLength = Math.clz32(data[0]) - 23;
+  if (trackLength < 1 || trackLength > 8) return null;
+  let track = data[0] & (0xff >> trackLength);
+  for (let i = 1; i < trackLength; i++) track = track * 256 + data[i];
+  const view = new DataView(data.buffer, data.byteOffset, data.byteLength);
+  const timecode = view.getInt16(trackLength);
+  const flags = data[trackLength + 2];
+  let pos = trackLength + 3;
+
+  const lacing = (flags >> 1) & 0x03;
+  if (lacing === 0) return { track, timecode, flags, frames: [data.subarray(pos)] };
+
+  const count = data[pos++] + 1;
+  const sizes: number[] = [];
+  if (lacing === 1) {
+    // Xiph
+    for (let i = 0; i < count - 1; i++) {
+      let size = 0;
+      let b: number;
+      do {
+        b = data[pos++];
+        size += b;
+      } while (b === 0xff);
+      sizes.push(size);
+    }
+  } else if (lacing === 3) {
+    // EBML（最初は vint、以降は前のサイズとの差分の符号付き vint）
+    const first = readElement(new Uint8Array([0x80, ...data.subarray(pos, pos + 8)]), 0);
+    if (!first) return null;
+    sizes.push(first.size);
+    pos += first.dataStart - 1;
+    for (let i = 1; i < count - 1; i++) {
+      const length = Math.clz32(data[pos]) - 23;
+      let raw = data[pos] & (0xff >> length);
+      for (let j = 1; j < length; j++) raw = raw * 256 + data[pos + j];
+      pos += length;
+      const bias = 2 ** (7 * length - 1) - 1;
+      sizes.push(sizes[i - 1] + raw - bias);
+    }
+  }
+  const remaining = data.length - pos - sizes.reduce((sum, size) => sum + size, 0);
+  if (lacing === 2) {
+    // 固定サイズ
+    const size = (data.length - pos) / count;
+    for (let i = 0; i < count - 1; i++) sizes.push(size);
+    sizes.push(size);
+  } else {
+    sizes.push(remaining);
+  }
+
+  const frames: Uint8Array[] = [];
+  for (const size of sizes) {
+    frames.push(data.subarray(pos, pos + size));
+    pos += size;
+  }
+  return { track, timecode, flags, frames };
+}
+
+export async function openWebm(reader: BlobReader): Promise<Demuxer> {
+  const stream = new StreamReader(reader);
+  const head = await stream.peek(64);
+  const ebml = readElement(head, 0);
+  if (!ebml || ebml.id !== EBML_ID || ebml.size < 0) throw new UnsupportedMediaError('webm: not an EBML file');
+  stream.skip(ebml.dataStart + ebml.size);
+
+  const segmentHeader = await stream.peek(12);
+  const segment = readElement(segmentHeader, 0);
+  if (!segment || segment.id !== SEGMENT_ID) throw new UnsupportedMediaError('webm: segment not found');
+  stream.skip(segment.dataStart);
+  const segmentEnd = segment.size < 0 ? reader.size : stream.position + segment.size;
+
+  // 最初の Cluster まで読んで、Info と Tracks を集める
+  let timecodeScale = DEFAULT_TIMECODE_SCALE;
+  let duration = 0;
+  let tracks: WebmTrack[] = [];
+  while (stream.position < segmentEnd) {
+    const header = await stream.peek(12);
+    const element = readElement(header, 0);
+    if (!element) break;
+    if (element.id === CLUSTER_ID) break;
+    if (element.size < 0) throw new UnsupportedMediaError('webm: unknown-size header element');
+    stream.skip(element.dataStart);
+    if (element.id === INFO_ID || element.id === TRACKS_ID) {
+      const body = (await stream.take(element.size)).slice();
+      if (element.id === TRACKS_ID) tracks = parseTracks(body);
+      else {
+        for (let p = 0; p < body.length; ) {
+          const field = readElement(body, p);
+          if (!field || field.size < 0) break;
+          if (field.id === TIMECODE_SCALE_ID) timecodeScale = readUint(body, field.dataStart, field.size);
+          if (field.id === DURATION_ID) duration = readFloat(body, field.dataStart, field.size);
+          p = field.dataStart + field.size;
+        }
+      }
+    } else {
+      stream.skip(element.size);
+    }
+  }
+  if (tracks.length === 0) throw new UnsupportedMediaError('webm: no audio or video track');
+
+  const durationUs = (duration * timecodeScale) / 1000;
+  tracks.forEach((track) => (track.duration = durationUs));
+  const firstCluster = stream.position;
+
+  return {
+    format: 'webm',
+    tracks,
+    duration: durationUs,
+    samples: () => readClusters(new StreamReader(reader, firstCluster), segmentEnd, tracks, timecodeScale),
+  };
+}
+
+async function* readClusters(stream: StreamReader, segmentEnd: number, tracks: WebmTrack[], timecodeScale: number): AsyncGenerator<MediaSample> {
+  const byNumber = new Map(tracks.map((track) => [track.id, track]));
+  const toUs = (timecode: number) => (timecode * timecodeScale) / 1000;
+
+  function* emit(block: Uint8Array, clusterTime: number, key: boolean | null, blockDuration: number | null) {
+    const parsed = parseBlock(block);
+    if (!parsed) return;
+    const track = byNumber.get(parsed.track);
+    if (!track) return;
+    const isKey = key ?? (parsed.flags & 0x80) !== 0;
+    const frameDuration = parsed.frames.length > 1 || blockDuration === null
+      ? track.defaultDuration
+      : toUs(blockDuration);
+    let timestamp = toUs(clusterTime + parsed.timecode) - track.codecDelay;
+    for (const frame of parsed.frames) {
+      // WebM は表示順に格納するので、デコード時刻は表示時刻と同じとして扱う
+      yield { track: track.id, data: frame, timestamp, decodeTimestamp: timestamp, duration: frameDuration, key: isKey };
+      timestamp += frameDuration;
+    }
+  }
+
+  while (stream.position < segmentEnd) {
+    const header = await stream.peek(12);
+    const element = readElement(header, 0);
+    if (!element) return;
+    stream.skip(element.dataStart);
+    if (element.id !== CLUSTER_ID) {
+      if (element.size < 0) return;
+      stream.skip(element.size);
+      continue;
+    }
+
+    const clusterEnd = element.size < 0 ? segmentEnd : stream.position + element.size;
+    let clusterTime = 0;
+    while (stream.position < clusterEnd) {
+      const childHeader = await stream.peek(12);
+      const field = readElement(childHeader, 0);
+      if (!field) return;
+      // サイズ不明の Cluster は、次の上位要素が現れたところで終わる
+      if (TOP_LEVEL_IDS.has(field.id)) break;
+      if (field.size < 0) throw new Error('webm: unknown-size element inside cluster');
+      stream.skip(field.dataStart);
+
+      if (field.id === TIMECODE_ID) {
+        clusterTime = readUint(await stream.take(field.size), 0, field.size);
+      } else if (field.id === SIMPLE_BLOCK_ID) {
+        yield* emit((await stream.take(field.size)).slice(), clusterTime, null, null);
+      } else if (field.id === BLOCK_GROUP_ID) {
+        const group = (await stream.take(field.size)).slice();
+        let block: Uint8Array | null = null;
+        let blockDuration: number | null = null;
+        let key = true;
+        for (let p = 0; p < group.length; ) {
+          const part = readElement(group, p);
+          if (!part || part.size < 0) break;
+          if (part.id === BLOCK_ID) block = group.subarray(part.dataStart, part.dataStart + part.size);
+          else if (part.id === BLOCK_DURATION_ID) blockDuration = readUint(group, part.dataStart, part.size);
+          else if (part.id === REFERENCE_BLOCK_ID) key = false;
+          p = part.dataStart + part.size;
+        }
+        if (block) yield* emit(block, clusterTime, key, blockDuration);
+      } else {
+        stream.skip(field.size);
+      }
+    }
+    if (element.size >= 0) stream.position = clusterEnd;
+  }
+}
+
+// --- 書き出し ---
+
+function idBytes(id: number): number[] {
+  const bytes: number[] = [];
+  for (let v = id; v > 0; v = Math.floor(v / 256)) bytes.unshift(v & 0xff);
+  return bytes;
+}
+
+function vint(size: number, length = 0): number[] {
+  let bytesNeeded = 1;
+  while (size >= 2 ** (7 * bytesNeeded) - 1) bytesNeeded++;
+  const n = Math.max(bytesNeeded, length);
+  const bytes = new Array<number>(n);
+  let v = size;
+  for (let i = n - 1; i >= 0; i--) {
+    bytes[i] = v % 256;
+    v = Math.floor(v / 256);
+  }
+  bytes[0] |= 0x80 >> (n - 1);
+  return bytes;
+}
+
+function element(id: number, ...parts: Uint8Array[]): Uint8Array {
+  const size = parts.reduce((sum, part) => sum + part.length, 0);
+  const writer = new ByteWriter(size + 12);
+  idBytes(id).forEach((b) => writer.u8(b));
+  vint(size).forEach((b) => writer.u8(b));
+  parts.forEach((part) => writer.bytesOf(part));
+  return writer.finish();
+}
+
+function uintElement(id: number, value: number, width = 0): Uint8Array {
+  const bytes: number[] = [];
+  for (let v = value; v > 0; v = Math.floor(v / 256)) bytes.unshift(v & 0xff);
+  while (bytes.length < Math.max(1, width)) bytes.unshift(0);
+  return element(id, new Uint8Array(bytes));
+}
+
+function floatElement(id: number, value: number): Uint8Array {
+  return element(id, new ByteWriter(8).f64(value).finish());
+}
+
+function stringElement(id: number, value: string): Uint8Array {
+  return element(id, new TextEncoder().encode(value));
+}
+
+const WEBM_CODEC_IDS: [string, string][] = [
+  ['vp8', 'V_VP8'],
+  ['vp09', 'V_VP9'],
+  ['av01', 'V_AV1'],
+  ['opus', 'A_OPUS'],
+  ['vorbis', 'A_VORBIS'],
+];
+
+export function webmCodecId(codec: string): string | null {
+  return WEBM_CODEC_IDS.find(([prefix]) => codec.startsWith(prefix))?.[1] ?? null;
+}
+
+interface WebmMuxTrack {
+  config: OutputTrack;
+  queue: OutputSample[];
+  ended: boolean;
+}
+
+interface CuePoint {
+  time: number; // ミリ秒
+  track: number;
+  position: number; // Cluster 領域の先頭からの位置
+}
+
+// Opus の pre-skip をマイクロ秒で
+function codecDelay(config: OutputTrack): number {
+  return config.codec === 'opus' ? Math.round((opusPreSkip(config.description) * 1e6) / 48000) : 0;
+}
+
+const CLUSTER_MIN_MS = 1000;
+const CLUSTER_MAX_MS = 30000; // SimpleBlock の相対時刻（int16、ミリ秒）に収まる範囲
+const AUDIO_CLUSTER_MS = 5000;
+
+// Segment のサイズ・Cues・Duration は最後に分かるので、Cluster だけを順に溜め、
+// finalize でヘッダー（SeekHead・Info・Tracks）と Cues を前後に付ける
+export class WebmMuxer {
+  private tracks: WebmMuxTrack[] = [];
+  private clusters = new BlobBuilder();
+  private cluster: Uint8Array[] = [];
+  private clusterTime = -1; // ミリ秒
+  private clusterStart = 0;
+  private cues: CuePoint[] = [];
+  private duration = 0; // ミリ秒
+  private origin: number | null = null;
+
+  addTrack(config: OutputTrack): number {
+    if (!webmCodecId(config.codec)) throw new UnsupportedMediaError(`webm: cannot store ${config.codec}`);
+    this.tracks.push({ config, queue: [], ended: false });
+    return this.tracks.length - 1;
+  }
+
+  // トラックごとにキューへ積み、全トラックの時刻が揃った分から時刻順に Cluster へ書く
+  // Opus のブロック時刻は CodecDelay（pre-skip）の分だけ後ろにずらして書く（再生側が差し引く）
+  addSample(index: number, sample: OutputSample) {
+    const delay = codecDelay(this.tracks[index].config);
+    this.tracks[index].queue.push(delay ? { ...sample, timestamp: sample.timestamp + delay } : sample);
+    this.drain(false);
+  }
+
+  // そのトラックにはもうサンプルが来ない（他のトラックのキューを待たせない）
+  endTrack(index: number) {
+    this.tracks[index].ended = true;
+    this.drain(false);
+  }
+
+  private drain(all: boolean) {
+    for (;;) {
+      let next = -1;
+      for (let i = 0; i < this.tracks.length; i++) {
+        const track = this.tracks[i];
+        if (track.queue.length === 0) {
+          if (!all && !track.ended) return;
+          continue;
+        }
+        if (next < 0 || track.queue[0].timestamp < this.tracks[next].queue[0].timestamp) next = i;
+      }
+      if (next < 0) return;
+      this.write(next, this.tracks[next].queue.shift()!);
+    }
+  }
+
+  private write(index: number, sample: OutputSample) {
+    if (this.origin === null) this.origin = sample.timestamp;
+    const time = Math.max(0, Math.round((sample.timestamp - this.origin) / 1000));
+    const hasVideo = this.tracks.some((track) => track.config.kind === 'video');
+    const isVideo = this.tracks[index].config.kind === 'video';
+    const elapsed = time - this.clusterTime;
+
+    const startCluster =
+      this.clusterTime < 0 ||
+      elapsed >= CLUSTER_MAX_MS ||
+      elapsed < 0 ||
+      (hasVideo ? isVideo && sample.key && elapsed >= CLUSTER_MIN_MS : elapsed >= AUDIO_CLUSTER_MS);
+    if (startCluster) {
+      this.flushCluster();
+      this.clusterTime = time;
+      this.clusterStart = this.clusters.size;
+      if (!hasVideo || (isVideo && sample.key)) {
+        this.cues.push({ time, track: index + 1, position: this.clusterStart });
+      }
+    }
+
+    const header = new ByteWriter(4).u8(0x80 | (index + 1)).u16((time - this.clusterTime) & 0xffff).u8(sample.key ? 0x80 : 0).finish();
+    this.cluster.push(element(SIMPLE_BLOCK_ID, header, sample.data));
+    this.duration = Math.max(this.duration, time + sample.duration / 1000);
+  }
+
+  private flushCluster() {
+    if (this.cluster.length === 0) return;
+    const size = this.cluster.reduce((sum, block) => sum + block.length, 0) + uintElement(TIMECODE_ID, this.clusterTime).length;
+    const head = new ByteWriter(16);
+    idBytes(CLUSTER_ID).forEach((b) => head.u8(b));
+    vint(size).forEach((b) => head.u8(b));
+    this.clusters.push(head.finish());
+    this.clusters.push(uintElement(TIMECODE_ID, this.clusterTime));
+    this.cluster.forEach((block) => this.clusters.push(block));
+    this.cluster = [];
+  }
+
+  finalize(type: string): Blob {
+    this.drain(true);
+    this.flushCluster();
+
+    const ebml = element(
+      EBML_ID,
+      uintElement(0x4286, 1),
+      uintElement(0x42f7, 1),
+      uintElement(0x42f2, 4),
+      uintElement(0x42f3, 8),
+      stringElement(DOC_TYPE_ID, 'webm'),
+      uintElement(0x4287, 4),
+      uintElement(0x4285, 2)
+    );
+    const info = element(
+      INFO_ID,
+      uintElement(TIMECODE_SCALE_ID, DEFAULT_TIMECODE_SCALE),
+      stringElement(MUXING_APP_ID, 'Lumina'),
+      stringElement(WRITING_APP_ID, 'Lumina'),
+      floatElement(DURATION_ID, this.duration)
+    );
+    const tracks = element(TRACKS_ID, ...this.tracks.map((track, i) => this.trackEntry(track.config, i + 1)));
+
+    // SeekHead は位置を8バイト固定で書くので、中身の値によらず大きさが決まる
+    const seekHead = (infoAt: number, cuesAt: number) =>
+      element(
+        SEEK_HEAD_ID,
+        ...[
+          [INFO_ID, infoAt],
+          [TRACKS_ID, infoAt + info.length],
+          [CUES_ID, cuesAt],
+        ].map(([id, position]) =>
+          element(SEEK_ID, element(SEEK_ID_ID, new Uint8Array(idBytes(id))), uintElement(SEEK_POSITION_ID, position, 8))
+        )
+      );
+    const infoAt = seekHead(0, 0).length;
+    const clustersAt = infoAt + info.length + tracks.length;
+    const cues = element(
+      CUES_ID,
+      ...this.cues.map((cue) =>
+        element(
+          CUE_POINT_ID,
+          uintElement(CUE_TIME_ID, cue.time),
+          element(CUE_TRACK_POSITIONS_ID, uintElement(CUE_TRACK_ID, cue.track), uintElement(CUE_CLUSTER_POSITION_ID, clustersAt + cue.position))
+        )
+      )
+    );
+    const head = seekHead(infoAt, clustersAt + this.clusters.size);
+
+    const segmentSize = head.length + info.length + tracks.length + this.clusters.size + cues.length;
+    const segmentHeader = new ByteWriter(12);
+    idBytes(SEGMENT_ID).forEach((b) => segmentHeader.u8(b));
+    vint(segmentSize, 8).forEach((b) => segmentHeader.u8(b));
+
+    return this.clusters.toBlob(type, [ebml, segmentHeader.finish(), head, info, tracks], [cues]);
+  }
+
+  private trackEntry(config: OutputTrack, number: number): Uint8Array {
+    const parts = [
+      uintElement(TRACK_NUMBER_ID, number),
+      uintElement(TRACK_UID_ID, number),
+      uintElement(TRACK_TYPE_ID, config.kind === 'video' ? 1 : 2),
+      stringElement(CODEC_ID_ID, webmCodecId(config.codec)!),
+    ];
+    let codecPrivate = config.description;
+    if (config.codec === 'opus') {
+      codecPrivate ??= opusHead(config.channels ?? 2, config.sampleRate ?? 48000);
+      parts.push(uintElement(CODEC_DELAY_ID, codecDelay(config) * 1000), uintElement(SEEK_PRE_ROLL_ID, 80_000_000));
+    }
+    if (config.codec === 'vorbis' && !codecPrivate) throw new UnsupportedMediaError('webm: vorbis without headers');
+    if (codecPrivate) parts.push(element(CODEC_PRIVATE_ID, codecPrivate));
+    parts.push(
+      config.kind === 'video'
+        ? element(VIDEO_ID, uintElement(PIXEL_WIDTH_ID, config.width ?? 0), uintElement(PIXEL_HEIGHT_ID, config.height ?? 0))
+        : element(AUDIO_ID, floatElement(SAMPLING_FREQUENCY_ID, config.sampleRate ?? 48000), uintElement(CHANNELS_ID, config.channels ?? 2))
+    );
+    return element(TRACK_ENTRY_ID, ...parts);
+  }
+}
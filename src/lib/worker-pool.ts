@@ -0,0 +1,133 @@
+// 専用ワーカーのプール（画像変換・メタデータ削除・QR 一括生成・WebCodecs の変換で共通）
+// 各ワーカーは同時に1ジョブだけ処理し、残りはキューで待つ
+// ワーカー自体が落ちた（メモリ不足など）場合は、処理中のジョブを失敗にしてワーカーを作り直す
+
+export function defaultPoolSize(): number {
+  if (typeof navigator === 'undefined' || !navigator.hardwareConcurrency) return 4;
+  return navigator.hardwareConcurrency;
+}
+
+// ワーカーからの返事。id は post で渡した id をそのまま返す
+export interface PoolMessage {
+  type: string;
+  id: number;
+}
+
+interface Task<Job, Result> {
+  id: number;
+  job: Job;
+  resolve: (result: Result) => void;
+  reject: (error: Error) => void;
+}
+
+export abstract class WorkerPool<Job, Result, Message extends PoolMessage> {
+  private workers: Worker[] = [];
+  private idle: Worker[] = [];
+  private running = new Map<Worker, Task<Job, Result>>();
+  private queue: Task<Job, Result>[] = [];
+  private nextId = 0;
+
+  constructor(private size: number = defaultPoolSize()) {}
+
+  // new Worker(new URL(...)) はバンドラーがワーカーを見つけられるよう、サブクラスにそのまま書く
+  protected abstract createWorker(): Worker;
+
+  // ジョブをワーカーに渡す。渡す前の準備（HEIC の展開など）で失敗したら throw する
+  protected abstract post(worker: Worker, job: Job, id: number): void | Promise<void>;
+
+  // 完了なら結果を返し、失敗なら throw する。undefined を返したメッセージは途中経過として扱い、ジョブは終わらない
+  protected abstract receive(message: Message, job: Job): Result | undefined;
+
+  // ワーカーの返事なしにジョブが失敗したとき（post の失敗・ワーカーのクラッシュ）。perf を閉じるなどに使う
+  protected failed?(job: Job, error: Error): void;
+
+  protected enqueue(job: Job): Promise<Result> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, job, resolve, reject });
+      this.pump();
+    });
+  }
+
+  terminate() {
+    this.workers.forEach((worker) => worker.terminate());
+    this.running.forEach((task) => task.reject(new Error('Worker pool terminated')));
+    this.queue.forEach((task) => task.reject(new Error('Worker pool terminated')));
+    this.workers = [];
+    this.idle = [];
+    this.running.clear();
+    this.queue = [];
+  }
+
+  private spawn(): Worker {
+    const worker = this.createWorker();
+
+    worker.onmessage = (event: MessageEvent<Message>) => {
+      const message = event.data;
+      const task = this.running.get(worker);
+      if (!task || task.id !== message.id) return;
+
+      let result: Result | undefined;
+      try {
+        result = this.receive(message, task.job);
+        if (result === undefined) return;
+      } catch (error) {
+        this.release(worker);
+        task.reject(error instanceof Error ? error : new Error(String(error)));
+        return;
+      }
+      this.release(worker);
+      task.resolve(result);
+    };
+
+    worker.onerror = (event) => {
+      event.preventDefault();
+      const task = this.running.get(worker);
+      this.running.delete(worker);
+      this.workers = this.workers.filter((w) => w !== worker);
+      this.idle = this.idle.filter((w) => w !== worker);
+      worker.terminate();
+      if (task) this.fail(task, new Error(event.message || 'Worker crashed'));
+      this.pump();
+    };
+
+    this.workers.push(worker);
+    return worker;
+  }
+
+  // ジョブを終えたワーカーを空きに戻し、次のジョブを渡す
+  private release(worker: Worker) {
+    this.running.delete(worker);
+    this.idle.push(worker);
+    this.pump();
+  }
+
+  private fail(task: Task<Job, Result>, error: Error) {
+    this.failed?.(task.job, error);
+    task.reject(error);
+  }
+
+  private pump() {
+    while (this.queue.length > 0) {
+      let worker = this.idle.pop();
+      if (!worker) {
+        if (this.workers.length >= this.size) return;
+        worker = this.spawn();
+      }
+
+      const task = this.queue.shift()!;
+      this.running.set(worker, task);
+      this.dispatch(worker, task);
+    }
+  }
+
+  private async dispatch(worker: Worker, task: Task<Job, Result>) {
+    try {
+      await this.post(worker, task.job, task.id);
+    } catch (error) {
+      // 準備の途中でワーカーが落ちていれば、onerror ですでに片付いている
+      if (this.running.get(worker) !== task) return;
+      this.release(worker);
+      this.fail(task, error instanceof Error ? error : new Error(String(error)));
+    }
+  }
+}
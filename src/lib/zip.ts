@@ -0,0 +1,494 @@
+
+// ストリーミングZIPの読み書き（JSZip のようにアーカイブ全体をメモリに載せない）
+// 書き込み: エントリごとにデータディスクリプタ付きで逐次出力し、4GBを超えるものは ZIP64 にする
+// 読み込み: 末尾のセントラルディレクトリだけを読んで一覧を作り、中身は必要になった時に展開する
+
+// 0 = 無圧縮(STORE)。6 はブラウザ標準の CompressionStream と同じレベルなのでそちらを使う
+export type CompressionLevel = 0 | 1 | 6 | 9;
+
+export interface ZipOptions {
+  level: CompressionLevel;
+  // 画像・動画・音声・アーカイブなど圧縮済みの形式は STORE にする
+  storeCompressed: boolean;
+}
+
+export const DEFAULT_ZIP_OPTIONS: ZipOptions = {
+  level: 6,
+  storeCompressed: true,
+};
+
+export interface ZipEntry {
+  name: string;
+  dir: boolean;
+  date: Date;
+  method: number;
+  encrypted: boolean;
+  crc: number;
+  compressedSize: number;
+  size: number;
+  offset: number;
+}
+
+const COMPRESSED_EXTENSIONS = /\.(jpe?g|png|gif|webp|avif|hei[cf]|mp4|m4v|mov|webm|mkv|avi|mp3|m4a|aac|ogg|opus|flac|zip|gz|tgz|bz2|xz|7z|rar|zst|pdf|docx|xlsx|pptx|woff2?)$/i;
+const UNCOMPRESSED_MEDIA = /(svg|bmp|tiff|wav|aiff)/;
+
+export function isAlreadyCompressed(file: File): boolean {
+  if (COMPRESSED_EXTENSIONS.test(file.name)) return true;
+  return /^(image|video|audio)\//.test(file.type) && !UNCOMPRESSED_MEDIA.test(file.type);
+}
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+export function crc32(data: Uint8Array, crc = 0): number {
+  let c = crc ^ 0xffffffff;
+  for (let i = 0; i < data.length; i++) {
+    c = CRC_TABLE[(c ^ data[i]) & 0xff] ^ (c >>> 8);
+  }
+  return (c ^ 0xffffffff) >>> 0;
+}
+
+const MAX32 = 0xffffffff;
+const MAX16 = 0xffff;
+// deflate は非圧縮データだとわずかに膨らむので、余裕を持って ZIP64 に切り替える
+const ZIP64_THRESHOLD = 0xf0000000;
+const encoder = new TextEncoder();
+const decoder = new TextDecoder();
+
+function setUint64(view: DataView, offset: number, value: number) {
+  view.setUint32(offset, value % 0x100000000, true);
+  view.setUint32(offset + 4, Math.floor(value / 0x100000000), true);
+}
+
+function getUint64(view: DataView, offset: number): number {
+  return view.getUint32(offset, true) + view.getUint32(offset + 4, true) * 0x100000000;
+}
+
+function dosDateTime(timestamp: number) {
+  const d = new Date(timestamp);
+  const year = Math.max(1980, d.getFullYear());
+  return {
+    time: (d.getHours() << 11) | (d.getMinutes() << 5) | (d.getSeconds() >> 1),
+    date: ((year - 1980) << 9) | ((d.getMonth() + 1) << 5) | d.getDate(),
+  };
+}
+
+function fromDosDateTime(date: number, time: number): Date {
+  return new Date(
+    (date >> 9) + 1980, ((date >> 5) & 0xf) - 1, date & 0x1f,
+    time >> 11, (time >> 5) & 0x3f, (time & 0x1f) * 2
+  );
+}
+
+interface CentralRecord {
+  name: Uint8Array;
+  method: number;
+  time: number;
+  date: number;
+  crc: number;
+  compressedSize: number;
+  size: number;
+  offset: number;
+}
+
+// 圧縮データを push するたびに出力を返す deflate（raw）
+interface Deflater {
+  push(chunk: Uint8Array): Promise<Uint8Array[]>;
+  finish(): Promise<Uint8Array[]>;
+}
+
+// pako はネイティブの CompressionStream が使えないレベル（1・9）の時だけ読み込む
+async function pakoDeflater(level: CompressionLevel): Promise<Deflater> {
+  const { default: pako } = await import('pako');
+  const deflate = new pako.Deflate({ level, raw: true });
+  let output: Uint8Array[] = [];
+  deflate.onData = (chunk: Uint8Array) => output.push(chunk);
+  const take = () => {
+    if (deflate.err) throw new Error(deflate.msg);
+    const chunks = output;
+    output = [];
+    return chunks;
+  };
+  return {
+    push: async (chunk) => {
+      deflate.push(chunk, false);
+      return take();
+    },
+    finish: async () => {
+      deflate.push(new Uint8Array(0), true);
+      return take();
+    },
+  };
+}
+
+// 圧縮と CRC 計算を済ませた1エントリ分のデータ
+// 小さなファイルを大量に作る場合（QR の一括生成など）に、作ったワーカーの中で用意して ZipWriter には書き込みだけを任せる
+export interface PreparedEntry {
+  name: string;
+  method: 0 | 8;
+  crc: number;
+  size: number; // 元のサイズ
+  data: Uint8Array; // method 8 なら deflate（raw）済み
+}
+
+export async function prepareEntry(name: string, bytes: Uint8Array, level: CompressionLevel): Promise<PreparedEntry> {
+  const crc = crc32(bytes);
+  if (level === 0) return { name, method: 0, crc, size: bytes.length, data: bytes };
+
+  if (level === 6 && typeof CompressionStream !== 'undefined') {
+    const stream = new CompressionStream('deflate-raw');
+    const writer = stream.writable.getWriter();
+    writer.write(bytes);
+    writer.close();
+    const data = new Uint8Array(await new Response(stream.readable).arrayBuffer());
+    return { name, method: 8, crc, size: bytes.length, data };
+  }
+
+  const deflater = await pakoDeflater(level);
+  const chunks = [...(await deflater.push(bytes)), ...(await deflater.finish())];
+  const data = new Uint8Array(chunks.reduce((acc, chunk) => acc + chunk.length, 0));
+  let position = 0;
+  for (const chunk of chunks) {
+    data.set(chunk, position);
+    position += chunk.length;
+  }
+  return { name, method: 8, crc, size: bytes.length, data };
+}
+
+export class ZipWriter {
+  private offset = 0;
+  private records: CentralRecord[] = [];
+  private pending: Uint8Array[] = [];
+  private pendingSize = 0;
+
+  // sink はチャンク単位で呼ばれる（小さな書き込みは chunkSize までまとめる）
+  constructor(
+    private sink: (chunk: Uint8Array) => Promise<void>,
+    private chunkSize = 4 * 1024 * 1024
+  ) {}
+
+  private async write(bytes: Uint8Array) {
+    this.pending.push(bytes);
+    this.pendingSize += bytes.length;
+    this.offset += bytes.length;
+    if (this.pendingSize >= this.chunkSize) await this.flush();
+  }
+
+  private async flush() {
+    if (this.pendingSize === 0) return;
+    const chunk = new Uint8Array(this.pendingSize);
+    let position = 0;
+    for (const part of this.pending) {
+      chunk.set(part, position);
+      position += part.length;
+    }
+    this.pending = [];
+    this.pendingSize = 0;
+    await this.sink(chunk);
+  }
+
+  // ローカルヘッダー（サイズとCRCは後ろのデータディスクリプタに書く）
+  private localHeader(nameBytes: Uint8Array, method: number, zip64: boolean, time: number, date: number): Uint8Array {
+    const header = new DataView(new ArrayBuffer(30 + nameBytes.length + (zip64 ? 20 : 0)));
+    header.setUint32(0, 0x04034b50, true);
+    header.setUint16(4, zip64 ? 45 : 20, true);
+    header.setUint16(6, 0x0808, true); // bit 3: データディスクリプタ, bit 11: UTF-8 ファイル名
+    header.setUint16(8, method, true);
+    header.setUint16(10, time, true);
+    header.setUint16(12, date, true);
+    if (zip64) {
+      header.setUint32(18, MAX32, true);
+      header.setUint32(22, MAX32, true);
+    }
+    header.setUint16(26, nameBytes.length, true);
+    header.setUint16(28, zip64 ? 20 : 0, true);
+    new Uint8Array(header.buffer).set(nameBytes, 30);
+    if (zip64) {
+      header.setUint16(30 + nameBytes.length, 0x0001, true);
+      header.setUint16(32 + nameBytes.length, 16, true);
+    }
+    return new Uint8Array(header.buffer);
+  }
+
+  private descriptor(crc: number, compressedSize: number, size: number, zip64: boolean): Uint8Array {
+    const descriptor = new DataView(new ArrayBuffer(zip64 ? 24 : 16));
+    descriptor.setUint32(0, 0x08074b50, true);
+    descriptor.setUint32(4, crc, true);
+    if (zip64) {
+      setUint64(descriptor, 8, compressedSize);
+      setUint64(descriptor, 16, size);
+    } else {
+      descriptor.setUint32(8, compressedSize, true);
+      descriptor.setUint32(12, size, true);
+    }
+    return new Uint8Array(descriptor.buffer);
+  }
+
+  // onBytes には読み込んだ元データのバイト数を渡す（進捗表示用）
+  async addFile(name: string, file: Blob, lastModified: number, level: CompressionLevel, onBytes?: (bytes: number) => void) {
+    const nameBytes = encoder.encode(name);
+    const method = level === 0 ? 0 : 8;
+    const zip64 = file.size >= ZIP64_THRESHOLD;
+    const { time, date } = dosDateTime(lastModified);
+    const offset = this.offset;
+
+    await this.write(this.localHeader(nameBytes, method, zip64, time, date));
+
+    let crc = 0;
+    let size = 0;
+    let compressedSize = 0;
+    const reader = file.stream().getReader();
+
+    if (method === 0) {
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        crc = crc32(value, crc);
+        size += value.length;
+        compressedSize += value.length;
+        await this.write(value);
+        onBytes?.(value.length);
+      }
+    } else if (level === 6 && typeof CompressionStream !== 'undefined') {
+      // 標準レベルはネイティブ実装で圧縮する（pako より大幅に速い）
+      const stream = new CompressionStream('deflate-raw');
+      const input = stream.writable.getWriter();
+      const output = stream.readable.getReader();
+      const drain = (async () => {
+        for (;;) {
+          const { done, value } = await output.read();
+          if (done) break;
+          compressedSize += value.length;
+          await this.write(value);
+        }
+      })();
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        crc = crc32(value, crc);
+        size += value.length;
+        await input.write(value);
+        onBytes?.(value.length);
+      }
+      await input.close();
+      await drain;
+    } else {
+      const deflater = await pakoDeflater(level);
+      const emit = async (chunks: Uint8Array[]) => {
+        for (const chunk of chunks) {
+          compressedSize += chunk.length;
+          await this.write(chunk);
+        }
+      };
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        crc = crc32(value, crc);
+        size += value.length;
+        await emit(await deflater.push(value));
+        onBytes?.(value.length);
+      }
+      await emit(await deflater.finish());
+    }
+
+    await this.write(this.descriptor(crc, compressedSize, size, zip64));
+
+    this.records.push({ name: nameBytes, method, time, date, crc, compressedSize, size, offset });
+  }
+
+  // prepareEntry で圧縮・CRC 計算を済ませたエントリを書く（読み込みも圧縮もしない）
+  async addPrepared(entry: PreparedEntry, lastModified: number) {
+    const nameBytes = encoder.encode(entry.name);
+    const { time, date } = dosDateTime(lastModified);
+    const offset = this.offset;
+    const zip64 = entry.size >= ZIP64_THRESHOLD;
+
+    await this.write(this.localHeader(nameBytes, entry.method, zip64, time, date));
+    await this.write(entry.data);
+    await this.write(this.descriptor(entry.crc, entry.data.length, entry.size, zip64));
+
+    this.records.push({
+      name: nameBytes,
+      method: entry.method,
+      time,
+      date,
+      crc: entry.crc,
+      compressedSize: entry.data.length,
+      size: entry.size,
+      offset,
+    });
+  }
+
+  // セントラルディレクトリと終端レコードを書いて、アーカイブ全体のサイズを返す
+  async finish(): Promise<number> {
+    const cdOffset = this.offset;
+
+    for (const record of this.records) {
+      const zip64Fields: number[] = [];
+      if (record.size >= MAX32) zip64Fields.push(record.size);
+      if (record.compressedSize >= MAX32) zip64Fields.push(record.compressedSize);
+      if (record.offset >= MAX32) zip64Fields.push(record.offset);
+      const extraLength = zip64Fields.length > 0 ? 4 + zip64Fields.length * 8 : 0;
+
+      const entry = new DataView(new ArrayBuffer(46 + record.name.length + extraLength));
+      entry.setUint32(0, 0x02014b50, true);
+      entry.setUint16(4, 45, true);
+      entry.setUint16(6, extraLength > 0 ? 45 : 20, true);
+      entry.setUint16(8, 0x0808, true);
+      entry.setUint16(10, record.method, true);
+      entry.setUint16(12, record.time, true);
+      entry.setUint16(14, record.date, true);
+      entry.setUint32(16, record.crc, true);
+      entry.setUint32(20, Math.min(record.compressedSize, MAX32), true);
+      entry.setUint32(24, Math.min(record.size, MAX32), true);
+      entry.setUint16(28, record.name.length, true);
+      entry.setUint16(30, extraLength, true);
+      entry.setUint32(42, Math.min(record.offset, MAX32), true);
+      new Uint8Array(entry.buffer).set(record.name, 46);
+      if (extraLength > 0) {
+        const extraOffset = 46 + record.name.length;
+        entry.setUint16(extraOffset, 0x0001, true);
+        entry.setUint16(extraOffset + 2, zip64Fields.length * 8, true);
+        zip64Fields.forEach((value, i) => setUint64(entry, extraOffset + 4 + i * 8, value));
+      }
+      await this.write(new Uint8Array(entry.buffer));
+    }
+
+    const cdSize = this.offset - cdOffset;
+    const count = this.records.length;
+
+    if (count >= MAX16 || cdOffset >= MAX32 || cdSize >= MAX32) {
+      const zip64EocdOffset = this.offset;
+      const record = new DataView(new ArrayBuffer(56 + 20));
+      record.setUint32(0, 0x06064b50, true);
+      setUint64(record, 4, 44);
+      record.setUint16(12, 45, true);
+      record.setUint16(14, 45, true);
+      setUint64(record, 24, count);
+      setUint64(record, 32, count);
+      setUint64(record, 40, cdSize);
+      setUint64(record, 48, cdOffset);
+      // ZIP64 終端レコードのロケーター
+      record.setUint32(56, 0x07064b50, true);
+      setUint64(record, 64, zip64EocdOffset);
+      record.setUint32(72, 1, true);
+      await this.write(new Uint8Array(record.buffer));
+    }
+
+    const eocd = new DataView(new ArrayBuffer(22));
+    eocd.setUint32(0, 0x06054b50, true);
+    eocd.setUint16(8, Math.min(count, MAX16), true);
+    eocd.setUint16(10, Math.min(count, MAX16), true);
+    eocd.setUint32(12, Math.min(cdSize, MAX32), true);
+    eocd.setUint32(16, Math.min(cdOffset, MAX32), true);
+    await this.write(new Uint8Array(eocd.buffer));
+
+    await this.flush();
+    return this.offset;
+  }
+}
+
+async function readView(file: Blob, start: number, end: number): Promise<DataView> {
+  return new DataView(await file.slice(start, end).arrayBuffer());
+}
+
+// 末尾の終端レコードとセントラルディレクトリだけを読み、エントリ一覧を返す（中身は読まない）
+export async function readZipIndex(file: Blob): Promise<ZipEntry[]> {
+  const tailSize = Math.min(file.size, 22 + MAX16 + 20);
+  const tail = await readView(file, file.size - tailSize, file.size);
+
+  let eocd = -1;
+  for (let i = tailSize - 22; i >= 0; i--) {
+    if (tail.getUint32(i, true) === 0x06054b50) {
+      eocd = i;
+      break;
+    }
+  }
+  if (eocd < 0) throw new Error('Not a ZIP file');
+
+  let count = tail.getUint16(eocd + 10, true);
+  let cdSize = tail.getUint32(eocd + 12, true);
+  let cdOffset = tail.getUint32(eocd + 16, true);
+
+  if ((count === MAX16 || cdSize === MAX32 || cdOffset === MAX32) && eocd >= 20
+      && tail.getUint32(eocd - 20, true) === 0x07064b50) {
+    const zip64EocdOffset = getUint64(tail, eocd - 20 + 8);
+    const record = await readView(file, zip64EocdOffset, zip64EocdOffset + 56);
+    if (record.getUint32(0, true) !== 0x06064b50) throw new Error('Broken ZIP64 end record');
+    count = getUint64(record, 32);
+    cdSize = getUint64(record, 40);
+    cdOffset = getUint64(record, 48);
+  }
+
+  const cd = await readView(file, cdOffset, cdOffset + cdSize);
+  const bytes = new Uint8Array(cd.buffer);
+  const entries: ZipEntry[] = [];
+  let p = 0;
+
+  for (let i = 0; i < count && p + 46 <= cd.byteLength; i++) {
+    if (cd.getUint32(p, true) !== 0x02014b50) throw new Error('Broken central directory');
+    const flags = cd.getUint16(p + 8, true);
+    const nameLength = cd.getUint16(p + 28, true);
+    const extraLength = cd.getUint16(p + 30, true);
+    const commentLength = cd.getUint16(p + 32, true);
+
+    let compressedSize = cd.getUint32(p + 20, true);
+    let size = cd.getUint32(p + 24, true);
+    let offset = cd.getUint32(p + 42, true);
+
+    // ZIP64 拡張フィールド: 0xFFFFFFFF になっている値だけが、この順で入っている
+    let extra = p + 46 + nameLength;
+    const extraEnd = extra + extraLength;
+    while (extra + 4 <= extraEnd) {
+      const id = cd.getUint16(extra, true);
+      const length = cd.getUint16(extra + 2, true);
+      if (id === 0x0001) {
+        let field = extra + 4;
+        if (size === MAX32) { size = getUint64(cd, field); field += 8; }
+        if (compressedSize === MAX32) { compressedSize = getUint64(cd, field); field += 8; }
+        if (offset === MAX32) { offset = getUint64(cd, field); }
+      }
+      extra += 4 + length;
+    }
+
+    const name = decoder.decode(bytes.subarray(p + 46, p + 46 + nameLength));
+    entries.push({
+      name,
+      dir: name.endsWith('/'),
+      date: fromDosDateTime(cd.getUint16(p + 14, true), cd.getUint16(p + 12, true)),
+      method: cd.getUint16(p + 10, true),
+      encrypted: (flags & 1) !== 0,
+      crc: cd.getUint32(p + 16, true),
+      compressedSize,
+      size,
+      offset,
+    });
+    p = extraEnd + commentLength;
+  }
+
+  return entries;
+}
+
+// エントリを1つだけ展開する。STORE なら元ファイルの slice をそのまま返す（コピーなし）
+export async function extractEntry(file: Blob, entry: ZipEntry, type = ''): Promise<Blob> {
+  if (entry.encrypted) throw new Error('Encrypted entries are not supported');
+
+  const header = await readView(file, entry.offset, entry.offset + 30);
+  if (header.getUint32(0, true) !== 0x04034b50) throw new Error('Broken local header');
+  const start = entry.offset + 30 + header.getUint16(26, true) + header.getUint16(28, true);
+  const data = file.slice(start, start + entry.compressedSize, type);
+
+  if (entry.method === 0) return data;
+  if (entry.method !== 8) throw new Error(`Unsupported compression method ${entry.method}`);
+
+  const stream = data.stream().pipeThrough(new DecompressionStream('deflate-raw'));
+  const blob = await new Response(stream).blob();
+  return type ? new Blob([blob], { type }) : blob;
+}
@@ -1,12 +1,17 @@
 import createMiddleware from 'next-intl/middleware';
+import { NextResponse } from 'next/server';
  
-export default createMiddleware({
+const intlMiddleware = createMiddleware({
   // 対応する言語リスト
   locales: ['en', 'ja'],
  
   // デフォルト言語
   defaultLocale: 'ja'
 });
+
+// 負荷試験（verification/bench_http_load.py）の比較用ビルドでだけ next-intl を外して素通しにする
+// LUMINA_BENCH_NO_I18N はビルド時に埋め込まれる（next.config.ts）ので、通常のビルドではこの分岐ごと消える
+export default process.env.LUMINA_BENCH_NO_I18N === '1' ? () => NextResponse.next() : intlMiddleware;
  
 export const config = {
   // next.jsの内部ファイルや画像ファイル以外すべてにマッチさせる呪文
@@ -0,0 +1,91 @@
+/// <reference lib="webworker" />
+// next-pwa が生成する sw.js に取り込まれるカスタムワーカー（next.config.ts の customWorkerSrc）
+// ページから WARM_ENGINES を受け取ったら engine-assets.ts の一覧をバージョン付きのキャッシュへ先読みし、
+// activate では古いバージョンのキャッシュを消す
+import {
+  ENGINE_CACHE_PREFIX,
+  ENGINE_CACHES,
+  LEGACY_ENGINE_CACHES,
+  engineAssetGroups,
+  type EngineAssetGroup,
+  type EngineWarmupReport,
+  type EngineWarmupRequest,
+} from '../lib/engine-assets';
+
+declare let self: ServiceWorkerGlobalScope;
+
+// 空き容量のうち、先読みに使うのはこの割合まで（ファイル棚の OPFS などの分を残す）
+const QUOTA_SHARE = 0.5;
+
+// 複数のタブから同時に頼まれても、先読みは1本だけ走らせる
+let warming: Promise<EngineWarmupReport> | null = null;
+
+async function estimate(): Promise<{ usage: number | null; quota: number | null }> {
+  if (!navigator.storage?.estimate) return { usage: null, quota: null };
+  const { usage = 0, quota = 0 } = await navigator.storage.estimate();
+  return { usage, quota };
+}
+
+// まだキャッシュにないものだけを順に取る（帯域を使い切らないように1ファイルずつ）
+async function warmGroup(group: EngineAssetGroup): Promise<'cached' | 'skipped'> {
+  const cache = await caches.open(group.cacheName);
+  const missing = [];
+  for (const asset of group.assets) {
+    if (!(await cache.match(asset.url))) missing.push(asset);
+  }
+  if (missing.length === 0) return 'cached';
+
+  const { usage, quota } = await estimate();
+  const bytes = missing.reduce((sum, asset) => sum + asset.bytes, 0);
+  if (usage !== null && quota !== null && bytes > (quota - usage) * QUOTA_SHARE) return 'skipped';
+
+  for (const asset of missing) {
+    const response = await fetch(asset.url);
+    if (!response.ok) throw new Error(`${asset.url}: ${response.status}`);
+    await cache.put(asset.url, response);
+  }
+  return 'cached';
+}
+
+async function warmEngines(isolated: boolean): Promise<EngineWarmupReport> {
+  const groups: EngineWarmupReport['groups'] = {};
+  // 小さいグループから取るので、容量が足りなくなったら残りは飛ばされる
+  for (const group of engineAssetGroups(isolated)) {
+    try {
+      groups[group.id] = await warmGroup(group);
+    } catch (error) {
+      console.warn(`Engine warmup failed for ${group.id}:`, error);
+      groups[group.id] = 'failed';
+    }
+  }
+  return { type: 'ENGINE_WARMUP', groups, ...(await estimate()) };
+}
+
+self.addEventListener('message', (event: ExtendableMessageEvent) => {
+  const request = event.data as EngineWarmupRequest | undefined;
+  if (request?.type !== 'WARM_ENGINES') return;
+
+  warming ??= warmEngines(request.isolated).finally(() => {
+    warming = null;
+  });
+  event.waitUntil(
+    warming.then(async (report) => {
+      const clients = await self.clients.matchAll({ type: 'window' });
+      clients.forEach((client) => client.postMessage(report));
+    })
+  );
+});
+
+// 今のバージョンにないエンジンのキャッシュと、バージョンなしの旧キャッシュを消す
+self.addEventListener('activate', (event: ExtendableEvent) => {
+  const current = new Set<string>(Object.values(ENGINE_CACHES));
+  event.waitUntil(
+    caches.keys().then((names) =>
+      Promise.all(
+        names
+          .filter((name) => (name.startsWith(ENGINE_CACHE_PREFIX) && !current.has(name)) || LEGACY_ENGINE_CACHES.includes(name))
+          .map((name) => caches.delete(name))
+      )
+    )
+  );
+});
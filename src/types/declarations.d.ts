@@ -1 +0,0 @@
-declare module 'piexifjs';
\ No newline at end of file
@@ -1,85 +1,113 @@
-
 import { env, AutoModel, AutoProcessor, RawImage } from '@xenova/transformers';
+import type { AiModelVariant } from '../lib/ai-engine';
+import { ENGINE_CACHES, MODEL_ID } from '../lib/engine-assets';
+import { StageClock, trackWasmMemory, wasmMemoryBytes } from '../lib/perf';
 
 // 環境設定
 env.allowLocalModels = false;
-env.useBrowserCache = true;
+// 重みは transformers.js 既定のキャッシュではなく、Service Worker が先読みするバージョン付きのキャッシュに置く
+// （キーはどちらもリモートの URL。古い版のキャッシュは Service Worker の activate で消える）
+env.useBrowserCache = false;
+env.useCustomCache = true;
 
-// シングルトンパターンでモデルを保持
-class BackgroundRemover {
-  static model: any = null;
-  static processor: any = null;
-  // NOTE: Xenova/modnet is a safe, public model that does not require an API key.
-  // briaai/RMBG-1.4 is superior but may require license acceptance on HF (gated), causing 401 errors without a token.
-  // To ensure "Zero Config" for all users, we switch to Xenova/modnet.
-  static modelId = 'Xenova/modnet';
+// onnxruntime-web の wasm はこのワーカー内でインスタンス化されるので、ここで Memory を数えられる
+trackWasmMemory();
 
-  static async getInstance(progressCallback: (data: any) => void) {
-    if (!this.model || !this.processor) {
-      this.model = await AutoModel.from_pretrained(this.modelId, {
-        progress_callback: progressCallback,
-      });
+// NOTE: Xenova/modnet is a safe, public model that does not require an API key.
+// briaai/RMBG-1.4 is superior but may require license acceptance on HF (gated), causing 401 errors without a token.
+// To ensure "Zero Config" for all users, we switch to Xenova/modnet (MODEL_ID in engine-assets.ts).
 
-      this.processor = await AutoProcessor.from_pretrained(this.modelId, {
-        progress_callback: progressCallback,
-      });
-    }
-    return { model: this.model, processor: this.processor };
+// シングルトンパターンでモデルを保持
+let model: any = null;
+let processor: any = null;
+let loadedVariant: AiModelVariant | null = null;
+
+async function load(variant: AiModelVariant) {
+  if (loadedVariant === variant) return;
+  env.customCache ??= await caches.open(ENGINE_CACHES.model);
+  const progressCallback = (progress: unknown) => {
+    // transformers.jsのprogressオブジェクト: { status: 'progress' | 'done', name: string, file: string, progress: number, loaded: number, total: number }
+    self.postMessage({ type: 'progress', data: progress });
+  };
+
+  // quantized: true は onnx/model_quantized.onnx（int8）、false は onnx/model.onnx（fp32）
+  const nextModel = await AutoModel.from_pretrained(MODEL_ID, {
+    quantized: variant === 'quantized',
+    progress_callback: progressCallback,
+  });
+  if (!processor) {
+    processor = await AutoProcessor.from_pretrained(MODEL_ID, {
+      progress_callback: progressCallback,
+    });
   }
+  await model?.dispose();
+  model = nextModel;
+  loadedVariant = variant;
 }
 
-self.addEventListener('message', async (event) => {
-  const { type, data } = event.data;
-
-  if (type === 'init') {
-    try {
-      await BackgroundRemover.getInstance((progress) => {
-        // transformers.jsのprogressオブジェクト: { status: 'progress' | 'done', name: string, file: string, progress: number, loaded: number, total: number }
-        self.postMessage({ type: 'progress', data: progress });
-      });
-      self.postMessage({ type: 'ready' });
-    } catch (error) {
-      self.postMessage({ type: 'error', data: error });
+async function removeBackground(id: number, bitmap: ImageBitmap) {
+  const clock = new StageClock();
+  const { width, height } = bitmap;
+  const canvas = new OffscreenCanvas(width, height);
+  const ctx = canvas.getContext('2d', { willReadFrequently: true });
+  if (!ctx) throw new Error("Failed to get 2d context");
+
+  const pixels = await clock.time('read', () => {
+    ctx.drawImage(bitmap, 0, 0);
+    bitmap.close();
+    return ctx.getImageData(0, 0, width, height);
+  });
+
+  await clock.time('compute', async () => {
+    const image = new RawImage(pixels.data, width, height, 4);
+    const { pixel_values } = await processor(image.rgb());
+    const { output } = await model({ input: pixel_values });
+
+    // マスクはモデルの解像度で出てくるので、元画像のサイズに戻してからアルファに入れる
+    const mask = await RawImage.fromTensor(output[0].mul(255).to('uint8')).resize(width, height);
+    for (let i = 0; i < mask.data.length; i++) {
+      pixels.data[i * 4 + 3] = mask.data[i];
     }
-  } else if (type === 'process') {
-    try {
-      const { model, processor } = await BackgroundRemover.getInstance(() => {});
-
-      const image = await RawImage.fromURL(data.imageUrl);
-      const { pixel_values } = await processor(image);
-      const { output } = await model({ input: pixel_values });
-
-      // マスク生成と合成
-      // オフスクリーンキャンバスを使用
-      const mask = await RawImage.fromTensor(output[0].mul(255).to('uint8')).resize(image.width, image.height);
-
-      const canvas = new OffscreenCanvas(image.width, image.height);
-      const ctx = canvas.getContext('2d');
-
-      if (!ctx) throw new Error("Failed to get 2d context");
-
-      const maskData = output[0].mul(255).to('uint8').data;
-      const originalData = image.data;
-
-      const newImageData = new ImageData(image.width, image.height);
-
-      for (let i = 0; i < maskData.length; i++) {
-        const offset = i * 4;
-        newImageData.data[offset] = originalData[offset];     // R
-        newImageData.data[offset + 1] = originalData[offset + 1]; // G
-        newImageData.data[offset + 2] = originalData[offset + 2]; // B
-        newImageData.data[offset + 3] = maskData[i];          // A
-      }
-
-      ctx.putImageData(newImageData, 0, 0);
-
-      const blob = await canvas.convertToBlob({ type: 'image/png' });
-
-      self.postMessage({ type: 'complete', data: blob });
+    ctx.putImageData(pixels, 0, 0);
+  });
+
+  // PNG エンコードは待たない（その間に次の画像の前処理・推論を進める）
+  clock.time('encode', () => canvas.convertToBlob({ type: 'image/png' })).then(
+    (blob) => self.postMessage({ type: 'complete', id, blob, timings: clock.timings, wasmMemory: wasmMemoryBytes() }),
+    (error) => self.postMessage({ type: 'error', id, message: String(error) })
+  );
+}
 
-    } catch (error) {
-      console.error(error);
-      self.postMessage({ type: 'error', data: error });
-    }
+// 推論は1枚ずつ順番に行う
+let queue: Promise<void> = Promise.resolve();
+
+self.addEventListener('message', (event) => {
+  const message = event.data;
+
+  if (message.type === 'init') {
+    const variant: AiModelVariant = message.variant;
+    // onnxruntime-web の wasm は CDN ではなく同一オリジン（scripts/fetch-onnx-wasm.mjs）から読む
+    env.backends.onnx.wasm.wasmPaths = message.wasmPaths;
+    queue = queue
+      .then(() => load(variant))
+      .then(
+        () => self.postMessage({ type: 'ready', variant }),
+        (error) => {
+          console.error(error);
+          self.postMessage({ type: 'error', variant, message: String(error) });
+        }
+      );
+  } else if (message.type === 'process') {
+    const { id, bitmap } = message as { id: number; bitmap: ImageBitmap };
+    queue = queue
+      .then(() => {
+        if (!model || !processor) throw new Error("Model is not loaded");
+        return removeBackground(id, bitmap);
+      })
+      .catch((error) => {
+        console.error(error);
+        bitmap.close();
+        self.postMessage({ type: 'error', id, message: String(error) });
+      });
   }
 });
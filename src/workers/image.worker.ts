@@ -0,0 +1,126 @@
+// 画像変換ワーカー: createImageBitmap でデコードし、OffscreenCanvas でエンコードする
+// メインスレッドを一切ブロックせず、data URL (base64) も経由しない
+// HEIC はタイル（HEVC）を WebCodecs でデコードするか、heic.ts がデコードした RGBA をそのままキャンバスに並べる
+import type { HeifSource } from '../lib/heic';
+import { orientation, videoColorSpace, type HeifImage, type Orientation } from '../lib/heif';
+import { StageClock } from '../lib/perf';
+
+interface ConvertRequest {
+  id: number;
+  file: Blob | HeifSource;
+  format: "image/webp" | "image/jpeg" | "image/png";
+  quality: number;
+}
+
+// 1枚の写真のタイルを分け合うデコーダーの数（ハードウェアデコーダーのセッションを使い切らない程度）
+const TILE_DECODERS = 2;
+
+// タイルを受け取った順にキャンバスへ描く。WebCodecs のデコーダーを TILE_DECODERS 個並べて、タイルを交互に割り振る
+async function drawHevcTiles(image: HeifImage, ctx: OffscreenCanvasRenderingContext2D) {
+  const config: VideoDecoderConfig = {
+    codec: image.codec,
+    description: image.config,
+    codedWidth: image.tileWidth,
+    codedHeight: image.tileHeight,
+    optimizeForLatency: true,
+    ...(image.color ? { colorSpace: videoColorSpace(image.color) } : {}),
+  };
+  const lanes = Math.min(TILE_DECODERS, image.tiles.length);
+
+  await Promise.all(Array.from({ length: lanes }, async (_, lane) => {
+    let failure: Error | null = null;
+    const decoder = new VideoDecoder({
+      // timestamp にタイルの番号を入れておき、出てきたフレームの置き場所を引く
+      output: (frame) => {
+        const tile = image.tiles[frame.timestamp];
+        ctx.drawImage(frame, tile.x, tile.y);
+        frame.close();
+      },
+      error: (error) => {
+        failure = error;
+      },
+    });
+    decoder.configure(config);
+    for (let index = lane; index < image.tiles.length; index += lanes) {
+      decoder.decode(new EncodedVideoChunk({ type: 'key', timestamp: index, data: image.tiles[index].data }));
+    }
+    try {
+      await decoder.flush();
+    } finally {
+      if (decoder.state !== 'closed') decoder.close();
+    }
+    if (failure) throw failure;
+  }));
+}
+
+// デコード済みのタイル（RGBA）を並べる
+function drawRgbaTiles(image: HeifImage, pixels: Uint8Array, ctx: OffscreenCanvasRenderingContext2D) {
+  const tileBytes = image.tileWidth * image.tileHeight * 4;
+  image.tiles.forEach((tile, index) => {
+    const data = new Uint8ClampedArray(pixels.buffer, pixels.byteOffset + index * tileBytes, tileBytes);
+    ctx.putImageData(new ImageData(data, image.tileWidth, image.tileHeight), tile.x, tile.y);
+  });
+}
+
+// タイルを並べたキャンバス。右端・下端のはみ出しは、出力のキャンバスへ描くときに切り取る
+async function decodeHeif(source: HeifSource): Promise<OffscreenCanvas> {
+  const { image } = source;
+  const mosaicWidth = Math.max(...image.tiles.map((tile) => tile.x)) + image.tileWidth;
+  const mosaicHeight = Math.max(...image.tiles.map((tile) => tile.y)) + image.tileHeight;
+  const mosaic = new OffscreenCanvas(mosaicWidth, mosaicHeight);
+  const ctx = mosaic.getContext('2d');
+  if (!ctx) throw new Error('Canvas context not found');
+  if (source.kind === 'hevc') await drawHevcTiles(image, ctx);
+  else drawRgbaTiles(image, source.pixels, ctx);
+  return mosaic;
+}
+
+self.addEventListener('message', async (event: MessageEvent<ConvertRequest>) => {
+  const { id, file, format, quality } = event.data;
+  const clock = new StageClock();
+
+  try {
+    let source: ImageBitmap | OffscreenCanvas;
+    // 出力の大きさと、HEIF の回転・反転（imir・irot）を描画に適用する変換
+    let placement: Orientation;
+    if (file instanceof Blob) {
+      source = await clock.time('decode', () => createImageBitmap(file));
+      placement = orientation([], source.width, source.height);
+    } else {
+      source = await clock.time('decode', () => decodeHeif(file));
+      placement = orientation(file.image.transforms, file.image.width, file.image.height);
+    }
+    const { width, height } = placement;
+    const crop = file instanceof Blob ? null : file.image;
+
+    const canvas = new OffscreenCanvas(width, height);
+    await clock.time('compute', () => {
+      const ctx = canvas.getContext('2d');
+      if (!ctx) throw new Error('Canvas context not found');
+
+      // PNG以外の場合、背景を白く塗る
+      if (format !== "image/png") {
+        ctx.fillStyle = "#FFFFFF";
+        ctx.fillRect(0, 0, width, height);
+      }
+
+      ctx.setTransform(...placement.matrix);
+      if (crop) ctx.drawImage(source, 0, 0, crop.width, crop.height, 0, 0, crop.width, crop.height);
+      else ctx.drawImage(source, 0, 0);
+      if (source instanceof ImageBitmap) source.close();
+      // タイルを並べたキャンバスは、エンコードを待たずに手放す
+      else source.width = source.height = 0;
+    });
+
+    const blob = await clock.time('encode', () => canvas.convertToBlob({ type: format, quality }));
+
+    // Blobは構造化クローンでも中身をコピーしない（同じデータへの参照が渡る）
+    self.postMessage({ type: 'complete', id, blob, width, height, timings: clock.timings });
+  } catch (error) {
+    self.postMessage({
+      type: 'error',
+      id,
+      message: error instanceof Error ? error.message : String(error)
+    });
+  }
+});
@@ -0,0 +1,113 @@
+// デブラボのワーカー: 文字列またはファイルを少しずつ読み、検証しながら整形・圧縮した結果を UTF-8 のチャンクで返す
+import { JsonStreamError, JsonStreamFormatter, scanRows, type JsonOutputMode } from '../lib/json-stream';
+
+type JsonRequest =
+  | { type: 'run'; id: number; mode: JsonOutputMode; source: string | Blob; rowBytes: number }
+  | { type: 'cancel'; id: number };
+
+// 文字列の入力を区切る文字数と、出力をまとめて送る文字数
+const INPUT_CHARS = 1 << 20;
+const OUTPUT_CHARS = 1 << 20;
+
+const encoder = new TextEncoder();
+let current = -1;
+
+// 出力を1MB前後ずつ UTF-8 にして、表示用の行の開始位置と一緒に送る
+class ChunkSink {
+  bytes = 0;
+  rows = 1; // 先頭の行（位置0）
+  private text = '';
+  private rowStart = 0;
+
+  constructor(private readonly id: number, private readonly rowBytes: number) {}
+
+  push = (text: string) => {
+    // 細かい断片は配列に集めて join するより連結の方が速い
+    this.text += text;
+    if (this.text.length >= OUTPUT_CHARS) this.flush();
+  };
+
+  flush() {
+    if (!this.text) return;
+    const bytes = encoder.encode(this.text);
+    this.text = '';
+    const rows: number[] = [];
+    this.rowStart = scanRows(bytes, this.bytes, this.rowStart, this.rowBytes, rows);
+    const offsets = new Uint32Array(rows);
+    self.postMessage({ type: 'chunk', id: this.id, bytes, rows: offsets }, { transfer: [bytes.buffer, offsets.buffer] });
+    this.bytes += bytes.length;
+    this.rows += rows.length;
+  }
+}
+
+// 他のメッセージ（cancel や次の run）を受け取れるように、チャンクの合間で処理を譲る
+const channel = new MessageChannel();
+const resumes: (() => void)[] = [];
+channel.port1.onmessage = () => resumes.shift()?.();
+function yieldToMessages(): Promise<void> {
+  return new Promise((resolve) => {
+    resumes.push(resolve);
+    channel.port2.postMessage(null);
+  });
+}
+
+// 入力を文字列のチャンクで返す。read は読んだ量（文字列なら文字数、ファイルならバイト数）
+async function* readChunks(source: string | Blob): AsyncGenerator<{ text: string; read: number }> {
+  if (typeof source === 'string') {
+    let start = 0;
+    while (start < source.length) {
+      let end = Math.min(source.length, start + INPUT_CHARS);
+      // サロゲートペアを分けない
+      const last = source.charCodeAt(end - 1);
+      if (end < source.length && last >= 0xd800 && last <= 0xdbff) end--;
+      yield { text: source.slice(start, end), read: end };
+      start = end;
+    }
+    return;
+  }
+  const reader = source.stream().getReader();
+  const decoder = new TextDecoder();
+  let read = 0;
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    read += value.byteLength;
+    yield { text: decoder.decode(value, { stream: true }), read };
+  }
+  const rest = decoder.decode();
+  if (rest) yield { text: rest, read };
+}
+
+async function run({ id, mode, source, rowBytes }: Extract<JsonRequest, { type: 'run' }>) {
+  const sink = new ChunkSink(id, rowBytes);
+  const formatter = new JsonStreamFormatter(mode, sink.push);
+  const total = typeof source === 'string' ? source.length : source.size;
+  try {
+    for await (const { text, read } of readChunks(source)) {
+      formatter.write(text);
+      self.postMessage({ type: 'progress', id, read, total });
+      await yieldToMessages();
+      if (current !== id) return;
+    }
+    formatter.end();
+    sink.flush();
+    self.postMessage({ type: 'done', id, bytes: sink.bytes, rows: sink.rows });
+  } catch (e) {
+    if (current !== id) return;
+    if (e instanceof JsonStreamError) {
+      self.postMessage({ type: 'error', id, error: e.detail });
+    } else {
+      self.postMessage({ type: 'error', id, error: null, message: e instanceof Error ? e.message : String(e) });
+    }
+  }
+}
+
+self.onmessage = (event: MessageEvent<JsonRequest>) => {
+  const message = event.data;
+  if (message.type === 'cancel') {
+    if (current === message.id) current = -1;
+    return;
+  }
+  current = message.id;
+  run(message);
+};
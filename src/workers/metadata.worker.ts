@@ -0,0 +1,27 @@
+// メタデータ削除ワーカー: ファイルをバイト列のまま読み、Exif・XMP・IPTC などのセグメントだけを取り除く
+// 画素データはデコードも再エンコードもしない（data URL も経由しない）
+import { stripMetadata } from '../lib/metadata';
+
+interface StripRequest {
+  id: number;
+  file: Blob;
+  keepOrientation: boolean;
+}
+
+self.addEventListener('message', async (event: MessageEvent<StripRequest>) => {
+  const { id, file, keepOrientation } = event.data;
+
+  try {
+    const data = new Uint8Array(await file.arrayBuffer());
+    const { container, parts, removed } = stripMetadata(data, { keepOrientation });
+    // 残す部分は data の subarray のまま Blob にする（コピーは Blob の生成時の1回だけ）
+    const blob = new Blob(parts as BlobPart[], { type: file.type });
+    self.postMessage({ type: 'complete', id, blob, container, removed });
+  } catch (error) {
+    self.postMessage({
+      type: 'error',
+      id,
+      message: error instanceof Error ? error.message : String(error)
+    });
+  }
+});
@@ -0,0 +1,46 @@
+// PDF結合ワーカー: pdf-lib の処理をメインスレッドから切り離す
+// 省メモリモードでは、ファイルごとに書き出したバイト列を chunk として転送する
+import { mergeIncremental, mergeToBytes, type MergeOptions } from '../lib/pdf-utils';
+import { StageClock } from '../lib/perf';
+
+interface MergeRequest {
+  files: Blob[];
+  options: MergeOptions;
+}
+
+self.addEventListener('message', async (event: MessageEvent<MergeRequest>) => {
+  const { files, options } = event.data;
+
+  const onProgress = ({ index, pages, totalPages }: { index: number; pages: number; totalPages: number }) => {
+    self.postMessage({ type: 'progress', index, pages, totalPages });
+  };
+
+  // 段階ごとの時間は complete と一緒に返す（メインスレッドの User Timing に載せる）
+  const clock = new StageClock();
+
+  try {
+    if (options.incremental) {
+      const totalPages = await mergeIncremental(
+        files,
+        // ArrayBuffer は転送（コピーせずに所有権をメインスレッドへ移す）
+        (chunk) => self.postMessage({ type: 'chunk', chunk }, { transfer: [chunk.buffer] }),
+        onProgress,
+        clock
+      );
+      self.postMessage({ type: 'complete', totalPages, timings: clock.timings });
+    } else {
+      let totalPages = 0;
+      const bytes = await mergeToBytes(files, options, (progress) => {
+        totalPages = progress.totalPages;
+        onProgress(progress);
+      }, clock);
+      self.postMessage({ type: 'chunk', chunk: bytes }, { transfer: [bytes.buffer] });
+      self.postMessage({ type: 'complete', totalPages, timings: clock.timings });
+    }
+  } catch (error) {
+    self.postMessage({
+      type: 'error',
+      message: error instanceof Error ? error.message : String(error)
+    });
+  }
+});
@@ -0,0 +1,67 @@
+// QR 一括生成ワーカー: まとめて受け取ったコードを描画し、CRC と圧縮まで済ませた ZIP のエントリで返す
+// （メインスレッドは ZIP に書き込むだけにする）。スタイル（色・サイズ・ロゴ）は styleId が変わったときだけ準備し直す
+import { StageClock } from '../lib/perf';
+import { QrRenderer, qrMatrix, type QrItem, type QrStyle } from '../lib/qr-render';
+import { prepareEntry, type PreparedEntry } from '../lib/zip';
+
+interface RenderRequest {
+  id: number;
+  styleId: number;
+  style: QrStyle;
+  items: QrItem[];
+}
+
+let renderer: { styleId: number; ready: Promise<QrRenderer> } | null = null;
+
+function getRenderer(styleId: number, style: QrStyle): Promise<QrRenderer> {
+  if (renderer?.styleId !== styleId) {
+    const instance = new QrRenderer(style);
+    renderer = { styleId, ready: instance.init().then(() => instance) };
+  }
+  return renderer.ready;
+}
+
+self.addEventListener('message', async (event: MessageEvent<RenderRequest>) => {
+  const { id, styleId, style, items } = event.data;
+  const clock = new StageClock();
+
+  try {
+    const qr = await clock.time('load', () => getRenderer(styleId, style));
+
+    // 長すぎる内容などで作れないコードは飛ばして、名前と理由を返す
+    const failed: { name: string; message: string }[] = [];
+    const matrices = await clock.time('compute', () =>
+      items.map((item) => {
+        try {
+          return qrMatrix(item.content);
+        } catch (error) {
+          failed.push({ name: item.name, message: error instanceof Error ? error.message : String(error) });
+          return null;
+        }
+      })
+    );
+
+    // OffscreenCanvas は使い回すので、PNG のエンコードは1枚ずつ待つ
+    // PNG は圧縮済みなので無圧縮、SVG は deflate で格納する
+    const entries: PreparedEntry[] = [];
+    await clock.time('encode', async () => {
+      for (let i = 0; i < items.length; i++) {
+        const matrix = matrices[i];
+        if (!matrix) continue;
+        const bytes = await qr.render(matrix);
+        entries.push(await prepareEntry(`${items[i].name}.${style.format}`, bytes, style.format === 'png' ? 0 : 6));
+      }
+    });
+
+    self.postMessage(
+      { type: 'complete', id, entries, failed, timings: clock.timings },
+      { transfer: entries.map((entry) => entry.data.buffer) }
+    );
+  } catch (error) {
+    self.postMessage({
+      type: 'error',
+      id,
+      message: error instanceof Error ? error.message : String(error)
+    });
+  }
+});
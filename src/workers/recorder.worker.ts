@@ -0,0 +1,78 @@
+// 録画書き込みワーカー: MediaRecorder のチャンクを受け取った順に OPFS のファイルへ追記する
+// 同期アクセスハンドル（ワーカー専用）でその場に書き込むので、メモリにもディスクにも余分なコピーを作らない
+import { encodeDuration, reserveDuration, type DurationSlot } from '../lib/webm';
+
+interface SyncAccessHandle {
+  write(buffer: ArrayBufferView, options?: { at?: number }): number;
+  truncate(size: number): void;
+  flush(): void;
+  close(): void;
+}
+
+type RecorderRequest =
+  | { type: 'open'; directory: string; name: string }
+  | { type: 'chunk'; blob: Blob }
+  | { type: 'finish'; durationMs: number }
+  | { type: 'abort' };
+
+let access: SyncAccessHandle | null = null;
+let position = 0;
+let isFirstChunk = true;
+let durationSlot: DurationSlot | null = null;
+let queue = Promise.resolve();
+
+async function handle(message: RecorderRequest) {
+  switch (message.type) {
+    case 'open': {
+      const root = await navigator.storage.getDirectory();
+      const dir = await root.getDirectoryHandle(message.directory, { create: true });
+      const file = await dir.getFileHandle(message.name, { create: true });
+      access = await (file as unknown as { createSyncAccessHandle(): Promise<SyncAccessHandle> }).createSyncAccessHandle();
+      access.truncate(0);
+      position = 0;
+      isFirstChunk = true;
+      durationSlot = null;
+      self.postMessage({ type: 'opened' });
+      break;
+    }
+    case 'chunk': {
+      if (!access) throw new Error('Recording file is not open');
+      let bytes = new Uint8Array(await message.blob.arrayBuffer());
+      if (isFirstChunk) {
+        // ヘッダーは最初のチャンクに入っている。ここで Duration の場所を確保する
+        const reserved = reserveDuration(bytes);
+        if (reserved) {
+          bytes = reserved.bytes;
+          durationSlot = reserved.slot;
+        }
+        isFirstChunk = false;
+      }
+      position += access.write(bytes, { at: position });
+      self.postMessage({ type: 'progress', bytes: position });
+      break;
+    }
+    case 'finish': {
+      if (!access) throw new Error('Recording file is not open');
+      if (durationSlot) access.write(encodeDuration(message.durationMs, durationSlot), { at: durationSlot.offset });
+      access.flush();
+      access.close();
+      access = null;
+      self.postMessage({ type: 'finished', size: position });
+      break;
+    }
+    case 'abort':
+      access?.close();
+      access = null;
+      break;
+  }
+}
+
+self.addEventListener('message', (event: MessageEvent<RecorderRequest>) => {
+  // チャンクの arrayBuffer() を待つ間に次のメッセージが来ても、書き込み順を崩さない
+  queue = queue.then(() => handle(event.data)).catch((error) => {
+    self.postMessage({
+      type: 'error',
+      message: error instanceof Error ? error.message : String(error)
+    });
+  });
+});
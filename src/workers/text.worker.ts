@@ -0,0 +1,32 @@
+// テキストラボのワーカー: 文字数などの集計（編集差分で更新）、表示用の行分割、全文の変換
+import { EMPTY_COUNTS, applyEdit, convertText, countText, rowOffsets, toStats, type ConversionMode, type TextEdit } from '../lib/text-stats';
+
+type TextRequest =
+  | { type: 'reset'; version: number; text: string }
+  | { type: 'edit'; version: number; edit: TextEdit }
+  | { type: 'rows'; id: number; text: string; maxRowChars: number }
+  | { type: 'convert'; id: number; text: string; mode: ConversionMode };
+
+let counts = EMPTY_COUNTS;
+
+self.onmessage = (event: MessageEvent<TextRequest>) => {
+  const message = event.data;
+  switch (message.type) {
+    case 'reset':
+      counts = countText(message.text);
+      self.postMessage({ type: 'stats', version: message.version, stats: toStats(counts) });
+      break;
+    case 'edit':
+      counts = applyEdit(counts, message.edit);
+      self.postMessage({ type: 'stats', version: message.version, stats: toStats(counts) });
+      break;
+    case 'rows': {
+      const offsets = rowOffsets(message.text, message.maxRowChars);
+      self.postMessage({ type: 'rows', id: message.id, offsets }, { transfer: [offsets.buffer] });
+      break;
+    }
+    case 'convert':
+      self.postMessage({ type: 'converted', id: message.id, text: convertText(message.text, message.mode) });
+      break;
+  }
+};
@@ -0,0 +1,52 @@
+// 音声ラボの波形ワーカー: ファイルのハッシュで IndexedDB のキャッシュを引き、無ければデコードしながらピークを求めて保存する
+// デコードできない形式は unsupported を返し、メインスレッドは WaveSurfer 自身のデコードに切り替える
+import { UnsupportedMediaError } from '../lib/media-container';
+import { StageClock } from '../lib/perf';
+import { computePeaks, getCachedPeaks, hashFile, putCachedPeaks, type WaveformPeaks } from '../lib/waveform';
+
+type WaveformRequest =
+  | { type: 'peaks'; id: number; file: Blob }
+  | { type: 'cancel'; id: number };
+
+let current = -1;
+
+function post(id: number, waveform: WaveformPeaks, cached: boolean, clock: StageClock) {
+  const { peaks, duration } = waveform;
+  self.postMessage({ type: 'complete', id, peaks, duration, cached, timings: clock.timings }, { transfer: [peaks.buffer] });
+}
+
+async function run(id: number, file: Blob) {
+  const clock = new StageClock();
+  const isCancelled = () => current !== id;
+
+  try {
+    const hash = await clock.time('read', () => hashFile(file));
+    const cached = await clock.time('read', () => getCachedPeaks(hash));
+    if (isCancelled()) return;
+    if (cached) {
+      post(id, cached, true, clock);
+      return;
+    }
+
+    const waveform = await computePeaks(file, (progress) => self.postMessage({ type: 'progress', id, progress }), isCancelled, clock);
+    // 保存を待たずに返す（putCachedPeaks は先にピークを複製するので、この後転送してよい）
+    const stored = putCachedPeaks(hash, waveform);
+    post(id, waveform, false, clock);
+    await stored;
+  } catch (error) {
+    if (isCancelled()) return;
+    const message = error instanceof Error ? error.message : String(error);
+    self.postMessage({ type: error instanceof UnsupportedMediaError ? 'unsupported' : 'error', id, message, timings: clock.timings });
+  }
+}
+
+self.addEventListener('message', (event: MessageEvent<WaveformRequest>) => {
+  const request = event.data;
+  if (request.type === 'cancel') {
+    if (current === request.id) current = -1;
+    return;
+  }
+  // 新しいファイルが来たら前の処理は次のサンプルで止まる
+  current = request.id;
+  void run(request.id, request.file);
+});
@@ -0,0 +1,25 @@
+// WebCodecs 変換ワーカー: デマルチプレクス・デコード・エンコード・マルチプレクスをメインスレッドの外で行う
+// コーデックが使えない組み合わせは unsupported を返し、メインスレッドが ffmpeg.wasm に切り替える
+import { UnsupportedMediaError } from '../lib/media-container';
+import { StageClock } from '../lib/perf';
+import { transcode, type TranscodeOptions } from '../lib/transcode';
+
+interface TranscodeRequest {
+  id: number;
+  file: Blob;
+  options: TranscodeOptions;
+}
+
+self.addEventListener('message', async (event: MessageEvent<TranscodeRequest>) => {
+  const { id, file, options } = event.data;
+  const clock = new StageClock();
+
+  try {
+    const result = await transcode(file, options, (progress) => self.postMessage({ type: 'progress', id, progress }), clock);
+    // Blob は構造化クローンでも中身をコピーしない
+    self.postMessage({ type: 'complete', id, ...result, timings: clock.timings });
+  } catch (error) {
+    const message = error instanceof Error ? error.message : String(error);
+    self.postMessage({ type: error instanceof UnsupportedMediaError ? 'unsupported' : 'error', id, message, timings: clock.timings });
+  }
+});
@@ -0,0 +1,61 @@
+// ZIP作成ワーカー: ファイルを1つずつストリームで読み、圧縮しながらチャンクを送る
+// メインスレッドが書き込み終わるたびに ack を返すので、送信中のチャンクは最大 MAX_IN_FLIGHT 個
+import { ZipWriter, isAlreadyCompressed, type ZipOptions } from '../lib/zip';
+
+type ZipRequest =
+  | { type: 'start'; files: File[]; names: string[]; options: ZipOptions }
+  | { type: 'ack' };
+
+const MAX_IN_FLIGHT = 4;
+const PROGRESS_INTERVAL = 4 * 1024 * 1024;
+
+let credits = MAX_IN_FLIGHT;
+const waiting: (() => void)[] = [];
+
+async function send(chunk: Uint8Array) {
+  while (credits === 0) {
+    await new Promise<void>((resolve) => waiting.push(resolve));
+  }
+  credits--;
+  self.postMessage({ type: 'chunk', chunk }, { transfer: [chunk.buffer] });
+}
+
+async function createZip(files: File[], names: string[], options: ZipOptions) {
+  const writer = new ZipWriter(send);
+  const total = files.reduce((acc, file) => acc + file.size, 0);
+  let done = 0;
+  let reported = 0;
+
+  for (let index = 0; index < files.length; index++) {
+    const file = files[index];
+    const level = options.storeCompressed && isAlreadyCompressed(file) ? 0 : options.level;
+    await writer.addFile(names[index], file, file.lastModified, level, (bytes) => {
+      done += bytes;
+      if (done - reported >= PROGRESS_INTERVAL) {
+        reported = done;
+        self.postMessage({ type: 'progress', index, done, total });
+      }
+    });
+    self.postMessage({ type: 'progress', index, done, total });
+  }
+
+  const size = await writer.finish();
+  self.postMessage({ type: 'complete', size });
+}
+
+self.addEventListener('message', (event: MessageEvent<ZipRequest>) => {
+  const message = event.data;
+
+  if (message.type === 'ack') {
+    credits++;
+    waiting.shift()?.();
+    return;
+  }
+
+  createZip(message.files, message.names, message.options).catch((error) => {
+    self.postMessage({
+      type: 'error',
+      message: error instanceof Error ? error.message : String(error)
+    });
+  });
+});
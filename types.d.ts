@@ -1 +1,2 @@
-declare module "@ducanh2912/next-pwa";
\ No newline at end of file
+declare module "@ducanh2912/next-pwa";
+declare module "pako";
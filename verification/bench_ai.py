@@ -0,0 +1,158 @@
+"""Start-up and throughput of AI Lab's background remover, fully offline.
+
+The model is served from a local directory instead of huggingface.co: by
+default the stand-in from fixtures.modnet_fixture() (same input/output
+contract, trivial network), or the real Xenova/modnet files with
+--model-dir. Every other cross-origin request is aborted, so nothing is
+downloaded during the run. Service workers are blocked so that the model
+requests reach the route handler.
+
+  cold    fresh context: ONNX Runtime wasm, model download, session creation
+  cached  reload: the model comes from transformers.js' Cache API storage
+  warm    AI Lab -> Dashboard -> back via client-side navigation; the shared
+          engine keeps the model loaded, so no second "ai-model-load"
+  batch   --images photos dropped at once, per variant; images/second
+
+    python verification/bench_ai.py --images 24 --megapixels 2 --variant both
+    python verification/bench_ai.py --model-dir ~/models/Xenova/modnet
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import image_fixture, modnet_fixture
+from harness import format_seconds
+from next_server import add_server_args, serve
+
+MODEL_PREFIX = "https://huggingface.co/Xenova/modnet/resolve/main/"
+DROPZONE = "ここに画像をドロップ"
+VARIANT_LABELS = {"quantized": "軽量（量子化）", "full": "高精度"}
+
+
+def serve_model_locally(context, model_dir, base_url):
+    """Answers model requests from model_dir and aborts any other cross-origin request."""
+    headers = {"Access-Control-Allow-Origin": "*", "Cross-Origin-Resource-Policy": "cross-origin"}
+    base_host = urlsplit(base_url).netloc
+
+    def block_external(route):
+        if urlsplit(route.request.url).netloc == base_host:
+            route.fallback()
+        else:
+            route.abort()
+
+    def fulfill(route):
+        relative = urlsplit(route.request.url).path.split("/resolve/main/", 1)[1]
+        path = os.path.join(model_dir, *relative.split("/"))
+        if os.path.isfile(path):
+            route.fulfill(path=path, headers=headers)
+        else:
+            route.fulfill(status=404, headers=headers, body="not found")
+
+    # 後から登録したハンドラが優先される
+    context.route("**/*", block_external)
+    context.route(MODEL_PREFIX + "**", fulfill)
+
+
+def load_measures(page):
+    return page.evaluate(
+        "() => performance.getEntriesByName('ai-model-load').map(e => ({ duration: e.duration, variant: e.detail && e.detail.variant }))"
+    )
+
+
+def time_to_dropzone(page, action, timeout):
+    start = time.perf_counter()
+    action()
+    expect(page.get_by_text(DROPZONE)).to_be_visible(timeout=timeout)
+    elapsed = time.perf_counter() - start
+    measures = load_measures(page)
+    return {"to_dropzone": elapsed, "load": measures[-1]["duration"] / 1000 if measures else None, "loads": len(measures)}
+
+
+def run_batch(page, inputs, timeout):
+    count = len(inputs)
+    start = time.perf_counter()
+    page.set_input_files("input[type='file']", inputs)
+    page.get_by_text(f"{count} / {count} 枚完了", exact=True).wait_for(timeout=timeout)
+    elapsed = time.perf_counter() - start
+    results = page.locator("a[download$='-removed-background.png']").count()
+    page.locator("button:has(svg.lucide-x)").first.click()
+    expect(page.get_by_text(DROPZONE)).to_be_visible(timeout=timeout)
+    return {"seconds": elapsed, "images_per_second": count / elapsed, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--megapixels", type=float, default=2)
+    parser.add_argument("--variant", choices=["quantized", "full", "both"], default="both")
+    parser.add_argument("--model-dir", help="directory laid out like the Xenova/modnet repo (default: stand-in model)")
+    parser.add_argument("--timeout", type=int, default=300000, help="ms per step")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    model_dir = os.path.expanduser(args.model_dir) if args.model_dir else modnet_fixture()
+    inputs = [image_fixture(args.megapixels, "jpeg", index) for index in range(args.images)]
+    variants = ["quantized", "full"] if args.variant == "both" else [args.variant]
+    print(f"model from {model_dir}; {args.images} x {args.megapixels} MP")
+
+    results = {"startup": {}, "batch": {}}
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            context = browser.new_context(base_url=base_url, service_workers="block")
+            serve_model_locally(context, model_dir, base_url)
+            page = context.new_page()
+
+            startup = results["startup"]
+            startup["cold"] = time_to_dropzone(page, lambda: page.goto("/ja/tools/ai"), args.timeout)
+            startup["cached"] = time_to_dropzone(page, page.reload, args.timeout)
+
+            def round_trip():
+                page.get_by_role("link", name="Dashboard").first.click()
+                expect(page.get_by_role("link", name="Lumina AI Magic")).to_be_visible(timeout=args.timeout)
+                page.go_back()
+
+            startup["warm"] = time_to_dropzone(page, round_trip, args.timeout)
+            for name, r in startup.items():
+                load = format_seconds(r["load"]) if r["load"] is not None else "-"
+                print(f"{name:<8} dropzone after {format_seconds(r['to_dropzone']):>8}   model load {load:>8}")
+
+            for variant in variants:
+                page.get_by_role("button", name=VARIANT_LABELS[variant], exact=True).click()
+                page.wait_for_function(
+                    "v => performance.getEntriesByName('ai-model-load').some(e => e.detail && e.detail.variant === v)",
+                    arg=variant,
+                    timeout=args.timeout,
+                )
+                expect(page.get_by_text(DROPZONE)).to_be_visible(timeout=args.timeout)
+                r = run_batch(page, inputs, args.timeout)
+                results["batch"][variant] = r
+                print(f"{variant:<10} {format_seconds(r['seconds']):>8}   {r['images_per_second']:.2f} images/s")
+            context.close()
+        finally:
+            browser.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"images": args.images, "megapixels": args.megapixels, "model_dir": model_dir, **results}, f, indent=2)
+
+    failures = []
+    # クライアント側の画面遷移ではモデルを読み直さない（cached でリロードした後の1回だけ）
+    if results["startup"]["warm"]["loads"] != 1:
+        failures.append("warm: the model was loaded again after navigating back to AI Lab")
+    for variant, r in results["batch"].items():
+        if r["results"] != args.images:
+            failures.append(f"{variant}: {r['results']} of {args.images} images produced a result")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Throughput and memory of Archive Lab on multi-GB inputs.
+
+Builds a corpus of --media-files incompressible "video" files and
+--text-files compressible log files (cached in verification/fixtures/),
+then for each compression level:
+
+  1. drops the corpus into the 圧縮 tab and creates the ZIP (direct write
+     off, so the archive comes back as a download),
+  2. validates the download with Python's zipfile: every entry's size and
+     CRC, ZIP64 records when the archive passes 4 GB, and that media files
+     were stored rather than deflated.
+
+The largest archive is then opened in the 解凍 tab to time the central
+directory index and a single-entry extraction; neither may read the whole
+archive into memory. Memory is the renderer processes' RSS growth.
+
+    python verification/bench_archive.py --media-mb 1024 --media-files 4 --text-mb 256 --text-files 2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import bulk_fixture
+from harness import RendererMemorySampler, format_bytes, format_seconds
+from next_server import add_server_args, serve
+
+LEVELS = {"store": "無圧縮", "fast": "高速", "standard": "標準", "max": "最大"}
+DIRECT_WRITE = "保存先へ直接書き込む（省メモリ）"
+
+
+def open_tab(page, name):
+    page.goto("/ja/tools/archive")
+    expect(page.get_by_role("heading", name="アーカイブ・ラボ")).to_be_visible(timeout=30000)
+    page.get_by_role("button", name=name).click()
+
+
+def create_archive(page, sampler, paths, level, timeout, output):
+    open_tab(page, "圧縮 (Creator)")
+    page.set_input_files("input[type='file']", paths)
+    page.get_by_role("button", name=LEVELS[level], exact=True).click()
+    direct = page.get_by_text(DIRECT_WRITE, exact=True)
+    if direct.count() and "bg-amber-600" in (direct.locator("xpath=preceding-sibling::div").get_attribute("class") or ""):
+        direct.click()
+
+    with sampler:
+        start = time.perf_counter()
+        with page.expect_download(timeout=timeout) as download_info:
+            page.get_by_role("button", name="ZIPを作成").click()
+        download_info.value.save_as(output)
+        elapsed = time.perf_counter() - start
+    return elapsed, sampler.growth
+
+
+def validate(path, sources):
+    """Check every entry against its source file; returns stored/deflated counts."""
+    counts = {"stored": 0, "deflated": 0}
+    with zipfile.ZipFile(path) as archive:
+        infos = {info.filename: info for info in archive.infolist()}
+        if len(infos) != len(sources):
+            raise AssertionError(f"{path}: {len(infos)} entries, expected {len(sources)}")
+        bad = archive.testzip()
+        if bad:
+            raise AssertionError(f"{path}: CRC mismatch in {bad}")
+        for source in sources:
+            info = infos[os.path.basename(source)]
+            if info.file_size != os.path.getsize(source):
+                raise AssertionError(f"{info.filename}: size {info.file_size}, expected {os.path.getsize(source)}")
+            if source.endswith(".mp4") and info.compress_type != zipfile.ZIP_STORED:
+                raise AssertionError(f"{info.filename}: media file was deflated")
+            counts["stored" if info.compress_type == zipfile.ZIP_STORED else "deflated"] += 1
+    return counts
+
+
+def open_archive(page, sampler, path, entries, timeout):
+    open_tab(page, "解凍 (Viewer)")
+    with sampler:
+        start = time.perf_counter()
+        page.set_input_files("input[type='file']", path)
+        expect(page.get_by_text(f"{entries} items", exact=False)).to_be_visible(timeout=timeout)
+        index_seconds = time.perf_counter() - start
+
+        # 一覧の最後（テキスト＝deflate 済み）を1件だけ展開する
+        start = time.perf_counter()
+        with page.expect_download(timeout=timeout) as download_info:
+            page.get_by_role("button", name="ダウンロード").last.click()
+        download_info.value.path()
+        extract_seconds = time.perf_counter() - start
+    return index_seconds, extract_seconds, sampler.growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--media-mb", type=int, default=1024, help="size of each media file")
+    parser.add_argument("--media-files", type=int, default=4)
+    parser.add_argument("--text-mb", type=int, default=256, help="size of each log file")
+    parser.add_argument("--text-files", type=int, default=2)
+    parser.add_argument("--levels", default=",".join(LEVELS))
+    parser.add_argument("--heap-budget", type=float, default=512,
+                        help="max renderer RSS growth in MB while creating or opening an archive")
+    parser.add_argument("--timeout", type=int, default=1800000, help="ms per archive")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    levels = [name.strip() for name in args.levels.split(",") if name.strip()]
+    sources = [bulk_fixture(args.media_mb, "media", i) for i in range(args.media_files)]
+    sources += [bulk_fixture(args.text_mb, "text", i) for i in range(args.text_files)]
+    input_bytes = sum(os.path.getsize(path) for path in sources)
+    download_dir = os.path.dirname(sources[0])
+    print(f"{len(sources)} files, {format_bytes(input_bytes)}")
+
+    results = {}
+    failures = []
+    budget = args.heap_budget * 1024 * 1024
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            largest = None
+            for level in levels:
+                context = browser.new_context(base_url=base_url, accept_downloads=True)
+                page = context.new_page()
+                output = os.path.join(download_dir, f"archive_{level}.zip")
+                print(f"{level}...")
+                seconds, growth = create_archive(page, RendererMemorySampler(browser), sources, level,
+                                                 args.timeout, output)
+                context.close()
+                size = os.path.getsize(output)
+                results[level] = {"seconds": seconds, "output_bytes": size, "rss_growth": growth,
+                                  "mb_per_second": input_bytes / 1024 / 1024 / seconds,
+                                  **validate(output, sources)}
+                if largest is None or size > os.path.getsize(largest):
+                    largest = output
+
+            if largest:
+                context = browser.new_context(base_url=base_url, accept_downloads=True)
+                page = context.new_page()
+                print(f"open {os.path.basename(largest)}...")
+                index_seconds, extract_seconds, growth = open_archive(
+                    page, RendererMemorySampler(browser), largest, len(sources), args.timeout)
+                context.close()
+                results["viewer"] = {"archive_bytes": os.path.getsize(largest), "index_seconds": index_seconds,
+                                     "extract_seconds": extract_seconds, "rss_growth": growth}
+        finally:
+            browser.close()
+
+    print()
+    print(f"{'level':<10}{'time':>10}{'MB/s':>10}{'output':>12}{'stored':>8}{'deflated':>10}{'rss growth':>14}")
+    for level in levels:
+        r = results[level]
+        growth = format_bytes(r["rss_growth"]) if r["rss_growth"] is not None else "-"
+        print(f"{level:<10}{format_seconds(r['seconds']):>10}{r['mb_per_second']:>10.1f}"
+              f"{format_bytes(r['output_bytes']):>12}{r['stored']:>8}{r['deflated']:>10}{growth:>14}")
+    viewer = results.get("viewer")
+    if viewer:
+        growth = format_bytes(viewer["rss_growth"]) if viewer["rss_growth"] is not None else "-"
+        print(f"\nviewer: index {format_seconds(viewer['index_seconds'])}, "
+              f"one entry {format_seconds(viewer['extract_seconds'])}, rss growth {growth}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"input_bytes": input_bytes, "files": len(sources), "results": results}, f, indent=2)
+
+    for name, r in results.items():
+        if r["rss_growth"] is not None and r["rss_growth"] > budget:
+            failures.append(f"{name}: renderer grew by {format_bytes(r['rss_growth'])}, budget {format_bytes(budget)}")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Startup time of the shared FFmpeg engine.
+
+Three scenarios, each repeated -n times:
+
+  cold        fresh context: no HTTP/service-worker cache, no compiled wasm
+  warm        same context after the service worker has cached the core
+  cross_tool  Video Lab -> Dashboard -> Audio Lab via client-side links;
+              the engine must be reused, i.e. no second "ffmpeg-load"
+
+Startup is the "ffmpeg-load" User Timing measure recorded by
+lib/ffmpeg-engine.ts; time-to-dropzone and core bytes fetched over the
+network (not from the service worker) are reported alongside. The labs only
+load FFmpeg up front when it is the selected engine (otherwise WebCodecs
+converts and FFmpeg loads on first fallback), so every context here pins the
+engine preference to "ffmpeg".
+
+    python verification/bench_ffmpeg_startup.py -n 3
+"""
+import argparse
+import json
+import sys
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from harness import format_bytes, format_seconds, summarize
+from next_server import add_server_args, serve
+
+VIDEO_DROPZONE = "ここに動画をドロップ"
+AUDIO_DROPZONE = "ここに音声をドロップ"
+
+# lib/media-engine.ts reads this before the labs decide whether to load FFmpeg
+PIN_FFMPEG = "localStorage.setItem('lumina-media-engine', 'ffmpeg')"
+
+
+class CoreTraffic:
+    """Counts bytes of /ffmpeg/ core files that actually hit the network."""
+
+    def __init__(self, page):
+        self.network_bytes = 0
+        self.sw_hits = 0
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        if "/ffmpeg/" not in response.url:
+            return
+        if response.from_service_worker:
+            self.sw_hits += 1
+        else:
+            self.network_bytes += int(response.headers.get("content-length", 0))
+
+
+def load_measures(page):
+    return page.evaluate(
+        "() => performance.getEntriesByName('ffmpeg-load').map(e => ({ duration: e.duration, flavor: e.detail && e.detail.flavor }))"
+    )
+
+
+def open_video_lab(page, timeout):
+    start = time.perf_counter()
+    page.goto("/ja/tools/video")
+    expect(page.get_by_text(VIDEO_DROPZONE)).to_be_visible(timeout=timeout)
+    to_dropzone = time.perf_counter() - start
+    measures = load_measures(page)
+    return {
+        "load": measures[-1]["duration"] / 1000 if measures else None,
+        "flavor": measures[-1]["flavor"] if measures else None,
+        "to_dropzone": to_dropzone,
+    }
+
+
+def run_scenarios(browser, base_url, repetitions, timeout):
+    samples = {"cold": [], "warm": [], "cross_tool": []}
+    for rep in range(repetitions):
+        context = browser.new_context(base_url=base_url)
+        context.add_init_script(PIN_FFMPEG)
+        page = context.new_page()
+        traffic = CoreTraffic(page)
+
+        cold = open_video_lab(page, timeout)
+        cold["network_bytes"] = traffic.network_bytes
+        samples["cold"].append(cold)
+
+        # Let the service worker take control before measuring the warm path.
+        page.evaluate("() => navigator.serviceWorker && navigator.serviceWorker.ready.then(() => true)")
+        traffic.network_bytes = 0
+        warm = open_video_lab(page, timeout)
+        warm["network_bytes"] = traffic.network_bytes
+        samples["warm"].append(warm)
+
+        start = time.perf_counter()
+        page.get_by_role("link", name="Dashboard").first.click()
+        page.get_by_role("link", name="Lumina Audio Lab").click()
+        expect(page.get_by_text(AUDIO_DROPZONE)).to_be_visible(timeout=timeout)
+        samples["cross_tool"].append({
+            "to_dropzone": time.perf_counter() - start,
+            "extra_loads": len(load_measures(page)) - 1,
+        })
+
+        print(f"[{rep + 1}/{repetitions}] cold {format_seconds(cold['load'] or 0)} ({cold['flavor']}, "
+              f"{format_bytes(cold['network_bytes'])} fetched), warm {format_seconds(warm['load'] or 0)} "
+              f"({format_bytes(warm['network_bytes'])} fetched), "
+              f"audio lab reused engine: {samples['cross_tool'][-1]['extra_loads'] == 0}")
+        context.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--repetitions", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=120000, help="ms to wait for the engine")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            samples = run_scenarios(browser, base_url, args.repetitions, args.timeout)
+        finally:
+            browser.close()
+
+    summary = {
+        "cold_load": summarize([s["load"] for s in samples["cold"]]),
+        "warm_load": summarize([s["load"] for s in samples["warm"]]),
+        "cold_to_dropzone": summarize([s["to_dropzone"] for s in samples["cold"]]),
+        "warm_to_dropzone": summarize([s["to_dropzone"] for s in samples["warm"]]),
+        "cross_tool_to_dropzone": summarize([s["to_dropzone"] for s in samples["cross_tool"]]),
+    }
+    print()
+    for key, stats in summary.items():
+        if stats:
+            print(f"{key:<24} median {format_seconds(stats['median']):>8}   p95 {format_seconds(stats['p95']):>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "samples": samples}, f, indent=2)
+
+    reloaded = [s for s in samples["cross_tool"] if s["extra_loads"] != 0]
+    if reloaded:
+        print("Audio Lab loaded its own FFmpeg instead of reusing the shared engine")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
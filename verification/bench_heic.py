@@ -0,0 +1,154 @@
+"""Direct HEIC decoding vs. heic2any in Image Lab.
+
+Converts a locally generated corpus of iPhone-style grid HEICs (512x512 HEVC
+tiles, see fixtures.heic_grid_fixture) one photo at a time through the worker
+pool, once per decoder preference (localStorage 'lumina-heic-decoder'):
+
+  auto      tiles decoded straight to RGBA (WebCodecs in the worker when the
+            browser decodes HEVC, ffmpeg.wasm otherwise) and drawn onto the
+            encode canvas, no intermediate JPEG
+  heic2any  the old path: libheif via heic2any to a quality-1.0 JPEG, which
+            the worker decodes again
+
+Per-photo latency and its decode stage come from the app's own 'image' runs
+(src/lib/perf.ts), which also record which decoder handled the photo. Peak
+renderer RSS is sampled around each photo. The first photo of each mode
+loads the decoder and is reported separately as "cold".
+
+    python verification/bench_heic.py --count 8 --size 12
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+from playwright.sync_api import expect, sync_playwright
+
+from bench_image_convert import set_quality
+from fixtures import heic_grid_fixture
+from harness import RendererMemorySampler, format_bytes, format_seconds
+from next_server import add_server_args, serve
+from perf_report import snapshot
+
+FORMAT_BUTTONS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+DECODERS = ["auto", "heic2any"]
+ZIP_LINK = "a[download='converted-images.zip']"
+
+
+def convert_photo(page, sampler, path, target, quality, timeout):
+    """Drop one HEIC (Image Lab sends it to the batch panel), convert it and close the panel."""
+    with sampler:
+        page.set_input_files("input[type='file']", path)
+        expect(page.get_by_text("0 / 1 完了")).to_be_visible(timeout=timeout)
+        page.get_by_role("button", name=FORMAT_BUTTONS[target], exact=True).click()
+        if target != "png":
+            set_quality(page, quality)
+        page.get_by_role("button", name="すべて変換").click()
+        page.locator(ZIP_LINK).wait_for(timeout=timeout)
+
+    if page.get_by_text("1 / 1 完了").count() == 0:
+        raise AssertionError(f"{os.path.basename(path)} was not converted")
+    # A WebCodecs tile decode that fails in the worker is retried without WebCodecs: two runs, the last one ok
+    runs = [run for run in snapshot(page, clear=True)["runs"] if run["tool"] == "image"]
+    if not runs or len(runs) > 2 or not runs[-1]["ok"]:
+        raise AssertionError(f"{os.path.basename(path)}: expected one successful image run, got {runs}")
+    page.locator("h2", has_text="一括変換").locator("xpath=..").get_by_role("button").click()
+
+    run = runs[-1]
+    return {
+        "seconds": run["duration"] / 1000,
+        "decode": run["stages"].get("decode", 0) / 1000,
+        "decoder": (run["detail"] or {}).get("decoder"),
+        "retried": len(runs) > 1,
+        "output_bytes": run["bytesOut"],
+        "peak_rss": sampler.peak,
+        "rss_growth": sampler.growth,
+    }
+
+
+def run_mode(browser, base_url, decoder, paths, args):
+    context = browser.new_context(base_url=base_url)
+    context.add_init_script(f"localStorage.setItem('lumina-heic-decoder', '{decoder}')")
+    page = context.new_page()
+    try:
+        page.goto("/ja/tools/image")
+        expect(page.get_by_role("heading", name="画像ラボ")).to_be_visible(timeout=30000)
+        sampler = RendererMemorySampler(browser)
+        photos = []
+        for path in paths:
+            photo = convert_photo(page, sampler, path, args.target, args.quality, args.timeout)
+            print(f"  {os.path.basename(path)}: {format_seconds(photo['seconds'])} "
+                  f"(decode {format_seconds(photo['decode'])}, {photo['decoder']}"
+                  + (", after a failed WebCodecs decode" if photo["retried"] else "") + ")"
+                  + (f", peak {format_bytes(photo['peak_rss'])}" if photo["peak_rss"] else ""))
+            photos.append(photo)
+    finally:
+        context.close()
+
+    warm = photos[1:] or photos
+    peaks = [photo["peak_rss"] for photo in photos if photo["peak_rss"]]
+    growths = [photo["rss_growth"] for photo in photos if photo["rss_growth"] is not None]
+    return {
+        "photos": photos,
+        "decoders": sorted({photo["decoder"] for photo in photos if photo["decoder"]}),
+        "cold_seconds": photos[0]["seconds"],
+        "median_seconds": statistics.median(photo["seconds"] for photo in warm),
+        "median_decode": statistics.median(photo["decode"] for photo in warm),
+        "peak_rss": max(peaks) if peaks else None,
+        "peak_growth": max(growths) if growths else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=12, help="megapixels per photo")
+    parser.add_argument("--count", type=int, default=6, help="number of photos")
+    parser.add_argument("--decoders", default=",".join(DECODERS), help="comma-separated subset of auto,heic2any")
+    parser.add_argument("--target", default="webp", choices=list(FORMAT_BUTTONS))
+    parser.add_argument("--quality", type=float, default=0.8)
+    parser.add_argument("--min-speedup", type=float, default=1.0,
+                        help="required heic2any/auto ratio of median per-photo latency")
+    parser.add_argument("--timeout", type=int, default=120000, help="per-photo timeout in ms")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    decoders = [name.strip() for name in args.decoders.split(",") if name.strip()]
+    paths = [heic_grid_fixture(args.size, index) for index in range(args.count)]
+
+    results = {}
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for decoder in decoders:
+                print(f"{decoder}: {len(paths)} x {args.size}MP HEIC -> {args.target}...")
+                results[decoder] = run_mode(browser, base_url, decoder, paths, args)
+        finally:
+            browser.close()
+
+    print()
+    print(f"{'decoder':<10}{'cold':>10}{'median':>10}{'decode':>10}{'peak':>12}{'growth':>12}  used")
+    for decoder, r in results.items():
+        peak = format_bytes(r["peak_rss"]) if r["peak_rss"] else "-"
+        growth = format_bytes(r["peak_growth"]) if r["peak_growth"] is not None else "-"
+        print(f"{decoder:<10}{format_seconds(r['cold_seconds']):>10}{format_seconds(r['median_seconds']):>10}"
+              f"{format_seconds(r['median_decode']):>10}{peak:>12}{growth:>12}  {','.join(r['decoders'])}")
+
+    status = 0
+    if "auto" in results and "heic2any" in results:
+        speedup = results["heic2any"]["median_seconds"] / results["auto"]["median_seconds"]
+        results["speedup"] = speedup
+        print(f"speedup x{speedup:.2f}")
+        if speedup < args.min_speedup:
+            print(f"Direct decoding is not faster than heic2any (required x{args.min_speedup})")
+            status = 1
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
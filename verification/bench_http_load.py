@@ -0,0 +1,311 @@
+"""HTTP load test of `next start`: throughput, latency and errors per route.
+
+An asyncio load generator (standard library only, HTTP/1.1 keep-alive, one
+connection per virtual user) replays a weighted mix of requests:
+
+  locale-redirect  /                          next-intl redirects to /ja
+  home             /<locale>
+  tools            /<locale>/tools/<tool>
+  sitemap          /sitemap.xml               (outside the middleware matcher)
+  robots           /robots.txt                (outside the middleware matcher)
+  og-image         /<locale>/opengraph-image
+
+Concurrency is ramped through --stages; each stage runs for --stage-seconds
+after a short warm-up and reports requests/second, p50/p95/p99 latency and
+the error rate per route. A redirect counts as success only for
+locale-redirect; everything else must answer 200.
+
+The middleware pass isolates the cost of next-intl's createMiddleware. It
+requests the same prerendered locale pages from the server under test and
+from a second, managed baseline server built with LUMINA_BENCH_NO_I18N=1
+(into .next-bench, see next.config.ts), whose middleware passes every
+request straight through. The production build never sets that variable.
+The pass alternates the two servers for --middleware-rounds rounds and
+reports the latency and RPS difference. --no-build reuses .next-bench too.
+
+    python verification/bench_http_load.py --stages 1,8,32,64 --stage-seconds 15
+    python verification/bench_http_load.py --weight tools=80 --weight og-image=0 --no-build
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+from harness import LOCALES, TOOLS, percentile, tool_paths
+from next_server import NextServer, add_server_args, serve
+
+# next.config.ts がこの変数でミドルウェアを素通しにし、出力先を .next-bench に分ける
+BASELINE_ENV = {"LUMINA_BENCH_NO_I18N": "1"}
+BASELINE_DIST_DIR = ".next-bench"
+
+# name -> (path template, weight, expected statuses)
+DEFAULT_MIX = {
+    "locale-redirect": ("/", 10, {301, 302, 303, 307, 308}),
+    "home": ("/{locale}", 10, {200}),
+    "tools": ("/{locale}/tools/{tool}", 55, {200}),
+    "sitemap": ("/sitemap.xml", 5, {200}),
+    "robots": ("/robots.txt", 5, {200}),
+    "og-image": ("/{locale}/opengraph-image", 5, {200}),
+}
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection that reads whole responses (Content-Length or chunked)."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, path, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Accept: text/html,*/*",
+                 "Accept-Language: ja,en;q=0.8", "Connection: keep-alive"]
+        lines += [f"{key}: {value}" for key, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+
+        size = 0
+        if "content-length" in response_headers:
+            size = int(response_headers["content-length"])
+            await self.reader.readexactly(size)
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                chunk_size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(chunk_size + 2)
+                size += chunk_size
+                if chunk_size == 0:
+                    break
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, size, response_headers
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+
+def build_mix(weights):
+    mix = []
+    for name, (template, weight, expected) in DEFAULT_MIX.items():
+        weight = weights.get(name, weight)
+        if weight > 0:
+            mix.append((name, template, weight, expected))
+    if not mix:
+        raise SystemExit("Every route has weight 0")
+    return mix
+
+
+def pick(mix, rng):
+    name, template, _weight, expected = rng.choices(mix, weights=[m[2] for m in mix])[0]
+    path = template.format(locale=rng.choice(LOCALES), tool=rng.choice(TOOLS))
+    return name, path, expected
+
+
+async def virtual_user(host, port, next_request, deadline, samples, timeout):
+    connection = Connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            name, path, expected, headers = next_request()
+            start = time.perf_counter()
+            try:
+                status, size, response_headers = await asyncio.wait_for(connection.request(path, headers), timeout)
+                error = None if status in expected else f"HTTP {status}"
+            except (asyncio.TimeoutError, ConnectionError, OSError, ValueError, IndexError) as e:
+                status, size, response_headers = None, 0, {}
+                error = type(e).__name__
+                await connection.close()
+            samples.append({
+                "route": name,
+                "latency": (time.perf_counter() - start) * 1000,
+                "status": status,
+                "bytes": size,
+                "error": error,
+                "i18n": "hreflang" in response_headers.get("link", ""),
+            })
+    finally:
+        await connection.close()
+
+
+async def run_load(base_url, concurrency, seconds, next_request, timeout):
+    parts = urlsplit(base_url)
+    samples = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[
+        virtual_user(parts.hostname, parts.port or 80, next_request, deadline, samples, timeout)
+        for _ in range(concurrency)
+    ])
+    return samples
+
+
+def summarize_samples(samples, seconds):
+    """{route: {requests, rps, errors, error_rate, p50, p95, p99, bytes}} plus an "all" row."""
+    by_route = {}
+    for sample in samples:
+        by_route.setdefault(sample["route"], []).append(sample)
+    by_route["all"] = samples
+
+    summary = {}
+    for route, group in by_route.items():
+        ok = [s["latency"] for s in group if s["error"] is None]
+        errors = [s["error"] for s in group if s["error"] is not None]
+        summary[route] = {
+            "requests": len(group),
+            "rps": len(group) / seconds,
+            "errors": len(errors),
+            "error_rate": len(errors) / len(group) if group else 0,
+            "error_kinds": sorted(set(errors)),
+            "p50": percentile(ok, 50) if ok else None,
+            "p95": percentile(ok, 95) if ok else None,
+            "p99": percentile(ok, 99) if ok else None,
+            "bytes": sum(s["bytes"] for s in group),
+        }
+    return summary
+
+
+def format_ms(value):
+    return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def print_summary(title, summary):
+    print(title)
+    print(f"  {'route':<16}{'reqs':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>8}")
+    for route, r in summary.items():
+        print(f"  {route:<16}{r['requests']:>8}{r['rps']:>9.1f}{format_ms(r['p50'])} {format_ms(r['p95'])} "
+              f"{format_ms(r['p99'])}{r['error_rate'] * 100:>7.2f}%"
+              + (f"  {', '.join(r['error_kinds'])}" if r["error_kinds"] else ""))
+
+
+async def ramp(base_url, mix, stages, seconds, warmup, timeout, seed):
+    rng = random.Random(seed)
+
+    def next_request():
+        name, path, expected = pick(mix, rng)
+        return name, path, expected, None
+
+    results = []
+    for concurrency in stages:
+        await run_load(base_url, concurrency, warmup, next_request, timeout)
+        samples = await run_load(base_url, concurrency, seconds, next_request, timeout)
+        summary = summarize_samples(samples, seconds)
+        print_summary(f"\nconcurrency {concurrency}", summary)
+        results.append({"concurrency": concurrency, "routes": summary})
+    return results
+
+
+async def middleware_cost(base_url, baseline_url, concurrency, seconds, rounds, timeout, seed):
+    # ロケール付きの静的ページだけを使う（"/" はミドルウェアなしだと 404 になる）
+    paths = [f"/{locale}" for locale in LOCALES] + tool_paths()
+    rng = random.Random(seed)
+    samples = {"with": [], "without": []}
+
+    for _ in range(rounds):
+        for mode, url in (("with", base_url), ("without", baseline_url)):
+
+            def next_request(mode=mode):
+                return mode, rng.choice(paths), {200}, None
+
+            await run_load(url, concurrency, 1, next_request, timeout)
+            samples[mode] += await run_load(url, concurrency, seconds, next_request, timeout)
+
+    summary = summarize_samples(samples["with"] + samples["without"], seconds * rounds)
+    del summary["all"]
+    print_summary(f"\nmiddleware on/off, concurrency {concurrency}", summary)
+
+    on, off = summary["with"], summary["without"]
+    result = {"concurrency": concurrency, "routes": summary}
+    if on["p50"] is not None and off["p50"] is not None:
+        result["p50_cost_ms"] = on["p50"] - off["p50"]
+        result["p95_cost_ms"] = on["p95"] - off["p95"]
+        result["rps_ratio"] = on["rps"] / off["rps"] if off["rps"] else None
+        print(f"  next-intl middleware adds {result['p50_cost_ms']:.2f} ms at p50, "
+              f"{result['p95_cost_ms']:.2f} ms at p95; throughput x{result['rps_ratio']:.2f}")
+
+    # ミドルウェアが付ける hreflang の Link ヘッダーで、比較用のビルドで本当に外れているかを確かめる
+    result["bypass_effective"] = not any(s["i18n"] for s in samples["without"])
+    result["middleware_seen"] = any(s["i18n"] for s in samples["with"])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", default="1,8,32,64", help="comma-separated concurrency levels")
+    parser.add_argument("--stage-seconds", type=float, default=15)
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load before each stage")
+    parser.add_argument("--weight", action="append", default=[], metavar="ROUTE=WEIGHT",
+                        help=f"override a route weight ({', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--middleware-concurrency", type=int, default=16)
+    parser.add_argument("--middleware-seconds", type=float, default=10)
+    parser.add_argument("--middleware-rounds", type=int, default=2)
+    parser.add_argument("--skip-middleware-pass", action="store_true")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds per request")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="per route, any stage")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    weights = {}
+    for item in args.weight:
+        name, _, value = item.partition("=")
+        if name not in DEFAULT_MIX:
+            parser.error(f"unknown route {name!r}")
+        weights[name] = float(value)
+    mix = build_mix(weights)
+    stages = [int(s) for s in args.stages.split(",") if s]
+
+    with serve(args) as base_url:
+        print(f"Load testing {base_url}: stages {stages}, {args.stage_seconds:g}s each")
+        results = {"stages": asyncio.run(ramp(base_url, mix, stages, args.stage_seconds, args.warmup,
+                                               args.timeout, args.seed))}
+        if not args.skip_middleware_pass:
+            with NextServer(build=not args.no_build, env=BASELINE_ENV, dist_dir=BASELINE_DIST_DIR) as baseline:
+                results["middleware"] = asyncio.run(middleware_cost(
+                    base_url, baseline.base_url, args.middleware_concurrency, args.middleware_seconds,
+                    args.middleware_rounds, args.timeout, args.seed))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = []
+    for stage in results["stages"]:
+        for route, r in stage["routes"].items():
+            if route != "all" and r["error_rate"] > args.max_error_rate:
+                failures.append(f"concurrency {stage['concurrency']}: {route} error rate "
+                                f"{r['error_rate'] * 100:.2f}% ({', '.join(r['error_kinds'])})")
+    middleware = results.get("middleware")
+    if middleware and not middleware["bypass_effective"]:
+        failures.append(f"the baseline server still ran next-intl; is {BASELINE_DIST_DIR} older than src/middleware.ts?")
+    if middleware and not middleware["middleware_seen"]:
+        print("note: no hreflang Link header seen with the middleware on; the on/off check is inconclusive")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Serial vs. batch throughput for Image Lab conversions.
+
+Converts the same locally generated corpus twice:
+
+  serial  the main-thread converter (convertToWebP in src/lib/converter.ts:
+          FileReader -> <img> -> canvas.toBlob), called one file at a time
+          through window.__luminaImage so the editor's 500ms UI delay is
+          not included
+  batch   the batch panel (createImageBitmap + OffscreenCanvas in a pool of
+          Web Workers, one per CPU, streamed into a ZIP)
+
+Both modes start the clock when the files are handed to the page and stop
+when every file is converted. Fails unless the batch path is at least
+--min-speedup times faster; by default that is x1.5 when the browser
+reports more than one CPU (navigator.hardwareConcurrency) and x1.0
+otherwise.
+
+    python verification/bench_image_batch.py --count 24 --size 12
+"""
+import argparse
+import json
+import sys
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from bench_image_convert import set_quality
+from fixtures import image_corpus
+from harness import RendererMemorySampler, format_bytes, format_seconds
+from next_server import add_server_args, serve
+
+FORMAT_BUTTONS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+
+
+MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+CONVERT_SERIAL = """async ([input, format, quality]) => {
+  for (const file of input.files) {
+    const result = await window.__luminaImage.convertToWebP(file, quality, format);
+    URL.revokeObjectURL(result.url);
+  }
+  return input.files.length;
+}"""
+
+
+def open_image_lab(context):
+    page = context.new_page()
+    page.goto("/ja/tools/image")
+    expect(page.get_by_role("heading", name="画像ラボ")).to_be_visible(timeout=30000)
+    return page
+
+
+def convert_serial(browser, base_url, paths, target, quality, timeout):
+    """Converts `paths` one after another with the main-thread converter."""
+    context = browser.new_context(base_url=base_url)
+    sampler = RendererMemorySampler(browser)
+    try:
+        page = open_image_lab(context)
+        page.wait_for_function("() => window.__luminaImage !== undefined", timeout=30000)
+        # エディタを開かないよう、アプリのドロップゾーンではなく別に置いた隠し input からファイルを渡す
+        input_handle = page.evaluate_handle(
+            "() => { const el = document.createElement('input');"
+            " el.type = 'file'; el.multiple = true; el.hidden = true; return document.body.appendChild(el); }"
+        )
+        page.set_default_timeout(timeout * len(paths))
+
+        with sampler:
+            start = time.perf_counter()
+            input_handle.as_element().set_input_files(paths)
+            converted = page.evaluate(CONVERT_SERIAL, [input_handle, MIME_TYPES[target], quality])
+            elapsed = time.perf_counter() - start
+
+        if converted != len(paths):
+            raise AssertionError(f"serial run converted {converted} of {len(paths)} files")
+    finally:
+        context.close()
+    return elapsed, sampler.peak
+
+
+def convert_batch(browser, base_url, paths, target, quality, timeout):
+    """Converts `paths` in one batch through the batch panel's worker pool."""
+    context = browser.new_context(base_url=base_url)
+    sampler = RendererMemorySampler(browser)
+    try:
+        page = open_image_lab(context)
+
+        with sampler:
+            start = time.perf_counter()
+            page.set_input_files("input[type='file']", paths)
+            expect(page.get_by_text(f"0 / {len(paths)} 完了")).to_be_visible(timeout=timeout)
+            page.get_by_role("button", name=FORMAT_BUTTONS[target], exact=True).click()
+            if target != "png":
+                set_quality(page, quality)
+            page.get_by_role("button", name="すべて変換").click()
+            page.locator("a[download='converted-images.zip']").wait_for(timeout=timeout * len(paths))
+            elapsed = time.perf_counter() - start
+
+        if page.get_by_text(f"{len(paths)} / {len(paths)} 完了").count() == 0:
+            raise AssertionError("batch finished without converting every file")
+    finally:
+        context.close()
+    return elapsed, sampler.peak
+
+
+def hardware_concurrency(browser):
+    page = browser.new_page()
+    try:
+        return page.evaluate("() => navigator.hardwareConcurrency || 1")
+    finally:
+        page.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=12, help="megapixels per image")
+    parser.add_argument("--count", type=int, default=16, help="number of images")
+    parser.add_argument("--input", default="jpeg", choices=["jpeg", "png", "heic"])
+    parser.add_argument("--target", default="webp", choices=list(FORMAT_BUTTONS))
+    parser.add_argument("--quality", type=float, default=0.8)
+    parser.add_argument("--min-speedup", type=float,
+                        help="required batch/serial ratio (default: 1.5 with more than one CPU, else 1.0)")
+    parser.add_argument("--timeout", type=int, default=120000, help="per-image timeout in ms")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    paths = [path for _mp, _fmt, path in image_corpus([args.size], [args.input], args.count)]
+
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            cpus = hardware_concurrency(browser)
+            print(f"Serial: {len(paths)} x {args.size}MP {args.input} -> {args.target}...")
+            serial_time, serial_peak = convert_serial(browser, base_url, paths, args.target, args.quality, args.timeout)
+            print(f"Batch: {len(paths)} x {args.size}MP {args.input} -> {args.target} ({cpus} CPUs)...")
+            batch_time, batch_peak = convert_batch(browser, base_url, paths, args.target, args.quality, args.timeout)
+        finally:
+            browser.close()
+
+    speedup = serial_time / batch_time
+    min_speedup = args.min_speedup if args.min_speedup is not None else (1.5 if cpus > 1 else 1.0)
+    result = {
+        "images": len(paths),
+        "cpus": cpus,
+        "megapixels": args.size,
+        "serial": {"seconds": serial_time, "images_per_sec": len(paths) / serial_time, "peak_rss": serial_peak},
+        "batch": {"seconds": batch_time, "images_per_sec": len(paths) / batch_time, "peak_rss": batch_peak},
+        "speedup": speedup,
+    }
+    for mode in ["serial", "batch"]:
+        r = result[mode]
+        peak = format_bytes(r["peak_rss"]) if r["peak_rss"] else "-"
+        print(f"{mode:<8}{format_seconds(r['seconds']):>10}{r['images_per_sec']:>8.2f} img/s   peak {peak}")
+    print(f"speedup x{speedup:.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if speedup < min_speedup:
+        print(f"Batch path is not faster than serial (required x{min_speedup})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
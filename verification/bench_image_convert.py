@@ -0,0 +1,168 @@
+"""Throughput benchmark for Image Lab conversions on real-sized photos.
+
+Generates a local corpus of 12-48 MP JPEG/PNG (and HEIC, with pillow-heif)
+images, then drives the /ja/tools/image upload -> convert flow headlessly for
+every target format and quality. For each image it records:
+
+  decode    upload until the preview has decoded (dimensions known)
+  convert   click "変換を実行" until the download link exists
+              (canvas drawImage -> encode, including the page's 500ms delay)
+  peak_rss  peak summed RSS of the renderer processes (needs psutil)
+
+and reports images/sec and latency medians/p95 per (format, quality).
+
+    python verification/bench_image_convert.py --sizes 12,24,48 --inputs jpeg,png
+    python verification/bench_image_convert.py --targets webp --qualities 0.8 --count 3 --output image.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import image_corpus
+from harness import RendererMemorySampler, format_bytes, format_seconds, summarize
+from next_server import add_server_args, serve
+
+FORMAT_BUTTONS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+DOWNLOAD_LINK = "a[download^='converted-image']"
+
+
+def set_quality(page, quality):
+    # Radix slider: Home jumps to the 0.1 minimum, each ArrowRight is one 0.05 step.
+    thumb = page.get_by_role("slider")
+    thumb.focus()
+    thumb.press("Home")
+    for _ in range(round((quality - 0.1) / 0.05)):
+        thumb.press("ArrowRight")
+
+
+def convert_once(page, sampler, path, target, quality, timeout):
+    page.goto("/ja/tools/image")
+    expect(page.get_by_role("heading", name="画像ラボ")).to_be_visible(timeout=30000)
+
+    with sampler:
+        start = time.perf_counter()
+        page.set_input_files("input[type='file']", path)
+        page.wait_for_function(
+            "() => { const el = document.querySelector(\"input[type='number']\"); return el && el.value !== ''; }",
+            timeout=timeout,
+        )
+        decoded = time.perf_counter()
+
+        page.get_by_role("button", name=FORMAT_BUTTONS[target], exact=True).click()
+        if target != "png":
+            set_quality(page, quality)
+
+        convert_start = time.perf_counter()
+        page.get_by_role("button", name="変換を実行").click()
+        page.locator(DOWNLOAD_LINK).wait_for(timeout=timeout)
+        done = time.perf_counter()
+
+    out_size = page.evaluate(
+        "async (sel) => (await (await fetch(document.querySelector(sel).href)).blob()).size",
+        DOWNLOAD_LINK,
+    )
+    return {
+        "decode": decoded - start,
+        "convert": done - convert_start,
+        "total": (decoded - start) + (done - convert_start),
+        "peak_rss": sampler.peak,
+        "output_bytes": out_size,
+    }
+
+
+def run_benchmark(base_url, corpus, targets, qualities, timeout):
+    runs = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            context = browser.new_context(base_url=base_url)
+            page = context.new_page()
+            sampler = RendererMemorySampler(browser)
+            if not sampler.available:
+                print("psutil not installed; peak renderer memory will not be reported.")
+            for target in targets:
+                for quality in (qualities if target != "png" else [1.0]):
+                    for megapixels, fmt, path in corpus:
+                        run = {"target": target, "quality": quality, "megapixels": megapixels,
+                               "input": fmt, "input_bytes": os.path.getsize(path)}
+                        try:
+                            run.update(convert_once(page, sampler, path, target, quality, timeout))
+                            print(f"{fmt} {megapixels}MP -> {target} q={quality}: "
+                                  f"decode {format_seconds(run['decode'])}, convert {format_seconds(run['convert'])}"
+                                  + (f", peak {format_bytes(run['peak_rss'])}" if run["peak_rss"] else ""))
+                        except PlaywrightTimeoutError:
+                            run["error"] = "timed out (the page could not decode or encode this input)"
+                            print(f"{fmt} {megapixels}MP -> {target} q={quality}: {run['error']}")
+                        runs.append(run)
+            context.close()
+        finally:
+            browser.close()
+    return runs
+
+
+def aggregate(runs):
+    groups = {}
+    for run in runs:
+        groups.setdefault(f"{run['target']}@{run['quality']}", []).append(run)
+
+    summary = {}
+    for key, group in groups.items():
+        ok = [r for r in group if "error" not in r]
+        busy = sum(r["total"] for r in ok)
+        peaks = [r["peak_rss"] for r in ok if r["peak_rss"]]
+        summary[key] = {
+            "images": len(ok),
+            "failed": len(group) - len(ok),
+            "images_per_sec": len(ok) / busy if busy else None,
+            "decode": summarize([r["decode"] for r in ok]),
+            "convert": summarize([r["convert"] for r in ok]),
+            "peak_rss": max(peaks) if peaks else None,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'target':<12}{'ok':>4}{'fail':>6}{'img/s':>8}{'convert med':>13}{'convert p95':>13}{'peak rss':>11}")
+    for key, s in summary.items():
+        ips = f"{s['images_per_sec']:.2f}" if s["images_per_sec"] else "-"
+        med = format_seconds(s["convert"]["median"]) if s["convert"] else "-"
+        p95 = format_seconds(s["convert"]["p95"]) if s["convert"] else "-"
+        peak = format_bytes(s["peak_rss"]) if s["peak_rss"] else "-"
+        print(f"{key:<12}{s['images']:>4}{s['failed']:>6}{ips:>8}{med:>13}{p95:>13}{peak:>11}")
+
+
+def csv_list(cast=str):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=csv_list(int), default=[12, 24, 48], help="megapixels, e.g. 12,24,48")
+    parser.add_argument("--inputs", type=csv_list(), default=["jpeg", "png"], help="jpeg,png,heic")
+    parser.add_argument("--targets", type=csv_list(), default=["webp", "jpeg", "png"])
+    parser.add_argument("--qualities", type=csv_list(float), default=[0.8, 0.9])
+    parser.add_argument("--count", type=int, default=1, help="images per size and input format")
+    parser.add_argument("--timeout", type=int, default=120000, help="per-step timeout in ms")
+    parser.add_argument("--output", help="write raw runs and summary as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    corpus = image_corpus(args.sizes, args.inputs, args.count)
+    with serve(args) as base_url:
+        runs = run_benchmark(base_url, corpus, args.targets, args.qualities, args.timeout)
+
+    summary = aggregate(runs)
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+    return 0 if all("error" not in r for r in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
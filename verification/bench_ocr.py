@@ -0,0 +1,109 @@
+"""OCR throughput of Text Lab's OCR tab, cold vs. warm.
+
+Generates --pages typed document pages (cached in verification/fixtures/),
+either as separate JPEGs or as one scan-like PDF, and recognises them as a
+single batch:
+
+  cold   a fresh browser context: worker script, core and language data
+         are fetched and every Tesseract worker is initialised
+  warm   the same page again (--warm-runs times): the worker pool is
+         already up, so only recognition is timed
+
+Reports pages/minute per run and checks that the expected sentence was
+read from most pages.
+
+    python verification/bench_ocr.py --pages 12 --source pdf --warm-runs 2
+"""
+import argparse
+import json
+import sys
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import OCR_LINE, document_fixture, document_pdf_fixture
+from harness import format_seconds
+from next_server import add_server_args, serve
+
+# OCR の誤認識を許容して、これだけのページで例文が読めていれば合格
+MIN_HIT_RATIO = 0.8
+
+
+def run_batch(page, inputs, pages, timeout):
+    page.set_input_files("input[type='file']", inputs)
+    done = page.get_by_text(f"{pages} / {pages} ページ", exact=True)
+    expect(page.get_by_text(f"0 / {pages} ページ", exact=True)).to_be_visible(timeout=60000)
+
+    start = time.perf_counter()
+    page.get_by_role("button", name="文字を読み取る").click()
+    done.wait_for(timeout=timeout)
+    elapsed = time.perf_counter() - start
+
+    text = page.locator("pre").first.inner_text(timeout=timeout)
+    hits = text.lower().count("brown fox")
+    page.get_by_role("button", name="クリア").click()
+    return {"seconds": elapsed, "pages_per_minute": pages / elapsed * 60, "hits": hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--source", choices=["images", "pdf"], default="images")
+    parser.add_argument("--warm-runs", type=int, default=2)
+    parser.add_argument("--timeout", type=int, default=900000, help="ms per batch")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    if args.source == "pdf":
+        inputs = [document_pdf_fixture(args.pages)]
+    else:
+        inputs = [document_fixture(index) for index in range(args.pages)]
+    # 1ページにつき例文は40行
+    lines_per_page = 40
+    print(f"{args.pages} pages from {args.source}")
+
+    runs = []
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            context = browser.new_context(base_url=base_url)
+            page = context.new_page()
+            page.goto("/ja/tools/text")
+            expect(page.get_by_role("heading", name="テキストラボ")).to_be_visible(timeout=30000)
+            page.get_by_role("button", name="OCR").click()
+
+            for index in range(1 + args.warm_runs):
+                name = "cold" if index == 0 else f"warm{index}"
+                print(f"{name}...")
+                result = run_batch(page, inputs, args.pages, args.timeout)
+                result["name"] = name
+                runs.append(result)
+            context.close()
+        finally:
+            browser.close()
+
+    print()
+    print(f"{'run':<8}{'time':>10}{'pages/min':>12}{'hits':>8}")
+    for r in runs:
+        print(f"{r['name']:<8}{format_seconds(r['seconds']):>10}{r['pages_per_minute']:>12.1f}{r['hits']:>8}")
+    if len(runs) > 1:
+        warm = sum(r["pages_per_minute"] for r in runs[1:]) / (len(runs) - 1)
+        print(f"\nwarm/cold speed-up: {warm / runs[0]['pages_per_minute']:.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"pages": args.pages, "source": args.source, "line": OCR_LINE, "runs": runs}, f, indent=2)
+
+    failures = []
+    expected = args.pages * lines_per_page
+    for r in runs:
+        if r["hits"] < expected * MIN_HIT_RATIO:
+            failures.append(f"{r['name']}: read the sample sentence {r['hits']} times, expected about {expected}")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Page-load performance budgets for every /[locale]/tools/* route.
+
+Each visit runs in a fresh browser context (cold HTTP cache) and records:
+
+  ttfb, dom_content_loaded, load   Navigation Timing, ms
+  lcp                              largest-contentful-paint start time, ms
+  tbt, long_tasks                  sum of (long task - 50ms) and long task count
+  js_bytes                         encoded bytes of Script responses (CDP Network)
+  js_heap                          JSHeapUsedSize once the page is idle (CDP Performance)
+
+Every route is visited -n times; medians and p95 are written as JSON. With
+--compare the run fails if any median regresses past its budget relative to
+a stored baseline (a previous --output file).
+
+    python verification/bench_pageload.py -n 5 --output verification/baselines/pageload.json
+    python verification/bench_pageload.py --compare verification/baselines/pageload.json \\
+        --budget 0.15 --budget lcp=0.25
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from playwright.sync_api import sync_playwright
+
+from harness import summarize, tool_paths
+from next_server import add_server_args, serve
+
+METRICS = ["ttfb", "dom_content_loaded", "load", "lcp", "tbt", "long_tasks", "js_bytes", "js_heap"]
+
+# Regressions smaller than this are treated as noise whatever the ratio says
+# (a TBT of 0ms -> 8ms is not a 100x regression).
+NOISE_FLOOR = {
+    "ttfb": 20,
+    "dom_content_loaded": 50,
+    "load": 50,
+    "lcp": 50,
+    "tbt": 50,
+    "long_tasks": 1,
+    "js_bytes": 10 * 1024,
+    "js_heap": 1024 * 1024,
+}
+
+OBSERVER_SCRIPT = """
+window.__luminaVitals = { lcp: null, longTasks: [] };
+new PerformanceObserver((list) => {
+  for (const entry of list.getEntries()) window.__luminaVitals.lcp = entry.startTime;
+}).observe({ type: 'largest-contentful-paint', buffered: true });
+new PerformanceObserver((list) => {
+  for (const entry of list.getEntries()) window.__luminaVitals.longTasks.push(entry.duration);
+}).observe({ type: 'longtask', buffered: true });
+"""
+
+
+def measure_visit(browser, base_url, path):
+    context = browser.new_context(base_url=base_url)
+    context.add_init_script(OBSERVER_SCRIPT)
+    page = context.new_page()
+    cdp = context.new_cdp_session(page)
+    cdp.send("Network.enable")
+    cdp.send("Performance.enable")
+
+    scripts = set()
+    js_bytes = [0]
+
+    def on_response(event):
+        if event.get("type") == "Script":
+            scripts.add(event["requestId"])
+
+    def on_finished(event):
+        if event["requestId"] in scripts:
+            js_bytes[0] += event["encodedDataLength"]
+
+    cdp.on("Network.responseReceived", on_response)
+    cdp.on("Network.loadingFinished", on_finished)
+
+    try:
+        page.goto(path, wait_until="load")
+        page.wait_for_load_state("networkidle")
+        nav = page.evaluate("() => performance.getEntriesByType('navigation')[0].toJSON()")
+        vitals = page.evaluate("() => window.__luminaVitals")
+        perf = {m["name"]: m["value"] for m in cdp.send("Performance.getMetrics")["metrics"]}
+    finally:
+        context.close()
+
+    long_tasks = vitals["longTasks"]
+    return {
+        "ttfb": nav["responseStart"] - nav["startTime"],
+        "dom_content_loaded": nav["domContentLoadedEventEnd"] - nav["startTime"],
+        "load": nav["loadEventEnd"] - nav["startTime"],
+        "lcp": vitals["lcp"],
+        "tbt": sum(max(0, d - 50) for d in long_tasks),
+        "long_tasks": len(long_tasks),
+        "js_bytes": js_bytes[0],
+        "js_heap": perf.get("JSHeapUsedSize"),
+    }
+
+
+def run_benchmark(base_url, paths, repetitions):
+    samples = {path: {m: [] for m in METRICS} for path in paths}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            # Interleave routes so a noisy moment doesn't land on one route only.
+            for rep in range(repetitions):
+                for path in paths:
+                    visit = measure_visit(browser, base_url, path)
+                    for metric in METRICS:
+                        samples[path][metric].append(visit[metric])
+                    print(f"[{rep + 1}/{repetitions}] {path}: "
+                          f"lcp={visit['lcp'] or 0:.0f}ms tbt={visit['tbt']:.0f}ms "
+                          f"js={visit['js_bytes'] / 1024:.0f}KB")
+        finally:
+            browser.close()
+    return {path: {m: summarize(v) for m, v in metrics.items()} for path, metrics in samples.items()}
+
+
+def parse_budgets(values):
+    default = 0.10
+    per_metric = {}
+    for value in values or []:
+        if "=" in value:
+            metric, ratio = value.split("=", 1)
+            if metric not in METRICS:
+                raise SystemExit(f"Unknown metric in --budget: {metric}")
+            per_metric[metric] = float(ratio)
+        else:
+            default = float(value)
+    return default, per_metric
+
+
+def compare(current, baseline, default_budget, budgets):
+    """Return a list of human-readable regressions (empty when within budget)."""
+    regressions = []
+    for path, metrics in current["routes"].items():
+        reference = baseline["routes"].get(path)
+        if not reference:
+            continue
+        for metric, stats in metrics.items():
+            ref = reference.get(metric)
+            if not stats or not ref:
+                continue
+            budget = budgets.get(metric, default_budget)
+            allowed = ref["median"] * (1 + budget)
+            delta = stats["median"] - ref["median"]
+            if stats["median"] > allowed and delta > NOISE_FLOOR.get(metric, 0):
+                regressions.append(
+                    f"{path} {metric}: median {stats['median']:.0f} vs baseline {ref['median']:.0f} "
+                    f"(+{delta / ref['median'] * 100 if ref['median'] else float('inf'):.0f}%, budget {budget * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(routes):
+    print(f"\n{'route':<24}{'ttfb':>8}{'lcp':>8}{'lcp p95':>9}{'tbt':>8}{'js KB':>9}{'heap MB':>9}")
+    for path, m in routes.items():
+        def med(metric, scale=1):
+            return f"{m[metric]['median'] / scale:.0f}" if m[metric] else "-"
+        lcp_p95 = f"{m['lcp']['p95']:.0f}" if m["lcp"] else "-"
+        print(f"{path:<24}{med('ttfb'):>8}{med('lcp'):>8}{lcp_p95:>9}{med('tbt'):>8}"
+              f"{med('js_bytes', 1024):>9}{med('js_heap', 1024 * 1024):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--repetitions", type=int, default=5)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail if results regress against this JSON")
+    parser.add_argument("--budget", action="append",
+                        help="allowed regression ratio, either global (0.1) or per metric (lcp=0.25)")
+    parser.add_argument("--locale", action="append", help="limit to these locales (default: en and ja)")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    default_budget, budgets = parse_budgets(args.budget)
+    paths = tool_paths(args.locale) if args.locale else tool_paths()
+
+    with serve(args) as base_url:
+        routes = run_benchmark(base_url, paths, args.repetitions)
+
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repetitions": args.repetitions,
+        "routes": routes,
+    }
+    print_table(routes)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, default_budget, budgets)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nAll routes within budget of {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Memory and time of PDF Lab merges on a large set of scan-like PDFs.
+
+Generates --files PDFs of --pages full-page JPEG scans each (cached in
+verification/fixtures/), drops them all into PDF Lab and merges them with
+each scenario:
+
+  standard      useObjectStreams on, everything saved at the end
+  no_objstm     useObjectStreams off
+  incremental   省メモリモード: objects are written out per source file
+
+Memory is the renderer processes' RSS (the merge worker lives there too),
+reported as growth over the level before the merge started. The
+incremental scenario must stay within --heap-budget MB. The merged PDF is
+downloaded and its page count checked with pypdf when that is installed.
+
+    python verification/bench_pdf_merge.py --files 60 --pages 10 --heap-budget 400
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import pdf_fixture
+from harness import RendererMemorySampler, format_bytes, format_seconds
+from next_server import add_server_args, serve
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+OBJECT_STREAMS = "オブジェクトストリームで圧縮"
+INCREMENTAL = "省メモリモード（大量・大容量向け）"
+
+# name -> {option label: enabled}
+SCENARIOS = {
+    "standard": {OBJECT_STREAMS: True, INCREMENTAL: False},
+    "no_objstm": {OBJECT_STREAMS: False, INCREMENTAL: False},
+    "incremental": {OBJECT_STREAMS: True, INCREMENTAL: True},
+}
+
+
+def set_option(page, label, enabled):
+    option = page.get_by_text(label, exact=True)
+    box = option.locator("xpath=preceding-sibling::div")
+    if ("bg-red-600" in (box.get_attribute("class") or "")) != enabled:
+        option.click()
+
+
+def count_pages(path):
+    if pypdf is None:
+        return None
+    return len(pypdf.PdfReader(path).pages)
+
+
+def run_merge(page, sampler, paths, options, timeout, download_dir, name):
+    page.goto("/ja/tools/pdf")
+    expect(page.get_by_role("heading", name="PDFラボ")).to_be_visible(timeout=30000)
+    page.set_input_files("input[type='file']", paths)
+    expect(page.get_by_text(f"{len(paths)} ファイル", exact=True)).to_be_visible(timeout=30000)
+    for label, enabled in options.items():
+        set_option(page, label, enabled)
+
+    with sampler:
+        start = time.perf_counter()
+        page.get_by_role("button", name="PDFを結合").click()
+        link = page.locator("a[download='merged-document.pdf']")
+        link.wait_for(timeout=timeout)
+        elapsed = time.perf_counter() - start
+
+    with page.expect_download() as download_info:
+        link.click()
+    output = os.path.join(download_dir, f"merged_{name}.pdf")
+    download_info.value.save_as(output)
+
+    with open(output, "rb") as f:
+        head = f.read(8)
+        f.seek(-32, os.SEEK_END)
+        tail = f.read()
+    if not head.startswith(b"%PDF-") or b"%%EOF" not in tail:
+        raise AssertionError(f"{name}: output is not a complete PDF")
+
+    return {
+        "seconds": elapsed,
+        "output_bytes": os.path.getsize(output),
+        "pages": count_pages(output),
+        "peak_rss": sampler.peak,
+        "rss_growth": sampler.growth,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--pages", type=int, default=10, help="pages per file")
+    parser.add_argument("--megapixels", type=int, default=2, help="size of each scanned page")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--heap-budget", type=float, default=400,
+                        help="max renderer RSS growth in MB for the incremental scenario")
+    parser.add_argument("--timeout", type=int, default=900000, help="ms per merge")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    paths = [pdf_fixture(args.pages, args.megapixels, index) for index in range(args.files)]
+    input_bytes = sum(os.path.getsize(path) for path in paths)
+    download_dir = os.path.dirname(paths[0])
+    print(f"{args.files} files, {args.files * args.pages} pages, {format_bytes(input_bytes)}")
+
+    results = {}
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for name in scenarios:
+                context = browser.new_context(base_url=base_url, accept_downloads=True)
+                page = context.new_page()
+                print(f"{name}...")
+                results[name] = run_merge(page, RendererMemorySampler(browser), paths, SCENARIOS[name],
+                                          args.timeout, download_dir, name)
+                context.close()
+        finally:
+            browser.close()
+
+    print()
+    print(f"{'scenario':<14}{'time':>10}{'output':>12}{'pages':>8}{'rss growth':>14}")
+    for name, r in results.items():
+        growth = format_bytes(r["rss_growth"]) if r["rss_growth"] is not None else "-"
+        pages = r["pages"] if r["pages"] is not None else "-"
+        print(f"{name:<14}{format_seconds(r['seconds']):>10}{format_bytes(r['output_bytes']):>12}"
+              f"{pages:>8}{growth:>14}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"files": args.files, "pages": args.pages, "input_bytes": input_bytes,
+                       "results": results}, f, indent=2)
+
+    failures = []
+    expected_pages = args.files * args.pages
+    for name, r in results.items():
+        if r["pages"] is not None and r["pages"] != expected_pages:
+            failures.append(f"{name}: merged PDF has {r['pages']} pages, expected {expected_pages}")
+    incremental = results.get("incremental")
+    budget = args.heap_budget * 1024 * 1024
+    if incremental and incremental["rss_growth"] is not None and incremental["rss_growth"] > budget:
+        failures.append(f"incremental: renderer grew by {format_bytes(incremental['rss_growth'])}, "
+                        f"budget {format_bytes(budget)}")
+    if pypdf is None:
+        print("pypdf not installed; page counts not checked")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Throughput and leak check for Image Lab's metadata removal (Privacy Mode).
+
+Generates photos locally with large metadata blocks (fixtures.tagged_image_fixture:
+~50 KB EXIF with GPS and a MakerNote, XMP, IPTC, JPEG comments, PNG text
+chunks), drops them all on Image Lab in "メタデータ削除" mode, and times the
+batch until the ZIP is ready. The ZIP is then checked file by file:
+
+  * the canary string written into every metadata block is gone
+  * Pillow finds no EXIF beyond Orientation (kept only when it was not 1),
+    no GPS IFD, no XMP / IPTC / comment / PNG text
+  * decoded pixels are identical to the source (nothing was re-encoded)
+
+    python verification/bench_privacy.py --size 12 --count 8
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import METADATA_CANARY, TAGGED_FORMATS, heic_supported, tagged_image_fixture
+from harness import RendererMemorySampler, format_bytes, format_seconds
+from next_server import add_server_args, serve
+
+
+def run_batch(page, sampler, paths, timeout):
+    page.goto("/ja/tools/image")
+    expect(page.get_by_role("heading", name="画像ラボ")).to_be_visible(timeout=30000)
+    page.get_by_role("button", name="メタデータ削除", exact=True).click()
+
+    with sampler:
+        start = time.perf_counter()
+        page.set_input_files("input[type='file']", paths)
+        link = page.locator("a[download='cleaned-images.zip']")
+        link.wait_for(timeout=timeout * len(paths))
+        elapsed = time.perf_counter() - start
+
+    if page.get_by_text(f"{len(paths)} / {len(paths)} 完了").count() == 0:
+        raise AssertionError("privacy batch finished without every file")
+    with page.expect_download() as download:
+        link.click()
+    return elapsed, sampler.peak, download.value.path()
+
+
+def leaks_in(name, data, source_path):
+    """Human-readable problems with one cleaned file (empty when it is clean)."""
+    from PIL import Image
+    problems = []
+    if METADATA_CANARY.encode() in data:
+        problems.append("canary bytes present")
+
+    if name.endswith(".heic"):
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+    cleaned = Image.open(io.BytesIO(data))
+    source = Image.open(source_path)
+    exif = cleaned.getexif()
+    expected = {274} if source.getexif().get(274, 1) != 1 else set()
+    if set(exif.keys()) - expected:
+        problems.append(f"EXIF tags left: {sorted(set(exif.keys()) - expected)}")
+    if expected and exif.get(274) != source.getexif().get(274):
+        problems.append("Orientation not preserved")
+    if exif.get_ifd(0x8825):
+        problems.append("GPS IFD left")
+    for key in ["xmp", "XML:com.adobe.xmp", "photoshop", "comment", "Author", "Comment"]:
+        if cleaned.info.get(key):
+            problems.append(f"{key} left")
+    if getattr(cleaned, "text", None):
+        problems.append(f"PNG text left: {sorted(cleaned.text)}")
+    if cleaned.tobytes() != source.tobytes():
+        problems.append("pixels changed")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=12, help="megapixels per image")
+    parser.add_argument("--count", type=int, default=8, help="images per format")
+    parser.add_argument("--formats", nargs="+", choices=TAGGED_FORMATS,
+                        help="default: jpeg png webp, plus heic when pillow-heif is installed")
+    parser.add_argument("--min-mb-per-sec", type=float, default=0.0)
+    parser.add_argument("--timeout", type=int, default=30000, help="per-image timeout in ms")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    formats = args.formats or [fmt for fmt in TAGGED_FORMATS if fmt != "heic" or heic_supported()]
+    paths = [tagged_image_fixture(args.size, fmt, index) for fmt in formats for index in range(args.count)]
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            context = browser.new_context(base_url=base_url, accept_downloads=True)
+            page = context.new_page()
+            sampler = RendererMemorySampler(browser)
+            print(f"Privacy Mode: {len(paths)} x {args.size}MP ({', '.join(formats)}, {format_bytes(total_bytes)})...")
+            elapsed, peak, zip_path = run_batch(page, sampler, paths, args.timeout)
+
+            with zipfile.ZipFile(zip_path) as archive:
+                cleaned = {name: archive.read(name) for name in archive.namelist()}
+            context.close()
+        finally:
+            browser.close()
+
+    failures = {}
+    removed = 0
+    for path in paths:
+        name = os.path.basename(path)
+        if name not in cleaned:
+            failures[name] = ["missing from the ZIP"]
+            continue
+        removed += os.path.getsize(path) - len(cleaned[name])
+        problems = leaks_in(name, cleaned[name], path)
+        if problems:
+            failures[name] = problems
+
+    mb_per_sec = total_bytes / 1e6 / elapsed
+    result = {
+        "images": len(paths),
+        "megapixels": args.size,
+        "formats": formats,
+        "input_bytes": total_bytes,
+        "removed_bytes": removed,
+        "seconds": elapsed,
+        "images_per_sec": len(paths) / elapsed,
+        "mb_per_sec": mb_per_sec,
+        "peak_rss": peak,
+        "failures": failures,
+    }
+    print(f"{format_seconds(elapsed):>10}{len(paths) / elapsed:>8.2f} img/s{mb_per_sec:>8.1f} MB/s   "
+          f"peak {format_bytes(peak) if peak else '-'}   removed {format_bytes(removed)}")
+    for name, problems in failures.items():
+        print(f"  LEAK {name}: {'; '.join(problems)}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if failures:
+        print(f"{len(failures)} of {len(paths)} files still carry metadata")
+        return 1
+    if mb_per_sec < args.min_mb_per_sec:
+        print(f"Throughput below {args.min_mb_per_sec} MB/s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""Throughput of the Video Lab conversion queue.
+
+Drops --count synthetic clips into Video Lab at once and converts them with
+each scenario:
+
+  remux_webm   VP9/Opus in MP4 -> WebM, "再エンコードなし" (stream copy)
+  fast_webm    the same files re-encoded with the "高速" preset
+  fast_mp4     H.264/AAC MP4 -> MP4 with the "高速" preset
+
+Reports wall time, files/s and the realtime factor (media seconds converted
+per wall second), and fails if the remux scenario re-encoded anything or was
+not faster than re-encoding the same files.
+
+--engine picks the conversion engine preference: "auto" (WebCodecs, falling
+back to FFmpeg per file) or "ffmpeg" (the ffmpeg.wasm queue only). The engine
+each file actually ran on is counted from the per-file badges.
+
+    python verification/bench_video_queue.py --count 4 --seconds 20
+    python verification/bench_video_queue.py --engine ffmpeg
+"""
+import argparse
+import json
+import sys
+import time
+
+from playwright.sync_api import expect, sync_playwright
+
+from fixtures import video_fixture
+from harness import RendererMemorySampler, format_bytes, format_seconds
+from next_server import add_server_args, serve
+
+# name -> (source codec, output format button, preset button)
+SCENARIOS = {
+    "remux_webm": ("vp9", "WEBM", "再エンコードなし"),
+    "fast_webm": ("vp9", "WEBM", "高速"),
+    "fast_mp4": ("h264", "MP4", "高速"),
+}
+
+
+def run_queue(page, sampler, paths, format_button, preset_button, timeout):
+    page.goto("/ja/tools/video")
+    expect(page.get_by_text("ここに動画をドロップ")).to_be_visible(timeout=120000)
+
+    page.set_input_files("input[type='file']", paths)
+    expect(page.get_by_text(f"0 / {len(paths)} 完了")).to_be_visible(timeout=30000)
+    page.get_by_role("button", name=format_button, exact=True).click()
+    page.get_by_role("button", name=preset_button).click()
+
+    with sampler:
+        start = time.perf_counter()
+        page.get_by_role("button", name="変換を開始").click()
+        expect(page.get_by_text(f"{len(paths)} / {len(paths)} 完了")).to_be_visible(timeout=timeout * len(paths))
+        elapsed = time.perf_counter() - start
+
+    downloads = page.locator("a[download]")
+    return {
+        "seconds": elapsed,
+        "converted": downloads.count(),
+        "copied": page.get_by_text("コピー", exact=True).count(),
+        "webcodecs": page.locator("[data-engine='webcodecs']").count(),
+        "peak_rss": sampler.peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=4, help="clips per queue")
+    parser.add_argument("--seconds", type=int, default=20, help="length of each clip")
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of scenarios")
+    parser.add_argument("--timeout", type=int, default=600000, help="per-clip timeout in ms")
+    parser.add_argument("--engine", choices=["auto", "ffmpeg"], default="auto", help="conversion engine preference")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    corpus = {
+        codec: [video_fixture(args.seconds, codec, args.height, index) for index in range(args.count)]
+        for codec in {SCENARIOS[name][0] for name in scenarios}
+    }
+
+    results = {}
+    with serve(args) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for name in scenarios:
+                codec, format_button, preset_button = SCENARIOS[name]
+                context = browser.new_context(base_url=base_url)
+                context.add_init_script(f"localStorage.setItem('lumina-media-engine', '{args.engine}')")
+                page = context.new_page()
+                print(f"{name}: {args.count} x {args.seconds}s {args.height}p {codec} ({args.engine})...")
+                results[name] = run_queue(page, RendererMemorySampler(browser), corpus[codec],
+                                          format_button, preset_button, args.timeout)
+                context.close()
+        finally:
+            browser.close()
+
+    media_seconds = args.count * args.seconds
+    print()
+    print(f"{'scenario':<14}{'wall':>10}{'files/s':>10}{'x realtime':>12}{'peak':>12}{'webcodecs':>11}")
+    for name, r in results.items():
+        r["files_per_sec"] = args.count / r["seconds"]
+        r["realtime_factor"] = media_seconds / r["seconds"]
+        peak = format_bytes(r["peak_rss"]) if r["peak_rss"] else "-"
+        print(f"{name:<14}{format_seconds(r['seconds']):>10}{r['files_per_sec']:>10.2f}"
+              f"{r['realtime_factor']:>12.1f}{peak:>12}{r['webcodecs']:>8}/{args.count}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"count": args.count, "seconds": args.seconds, "height": args.height,
+                       "engine": args.engine, "results": results}, f, indent=2)
+
+    failures = [f"{name}: {r['converted']} of {args.count} files converted"
+                for name, r in results.items() if r["converted"] != args.count]
+    remux = results.get("remux_webm")
+    if remux and remux["copied"] != args.count:
+        failures.append(f"remux_webm: only {remux['copied']} of {args.count} files were stream-copied")
+    if remux and "fast_webm" in results and remux["seconds"] >= results["fast_webm"]["seconds"]:
+        failures.append("remux_webm was not faster than re-encoding")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Per-route JS weight from the .next build manifests, checked against budgets.
+
+For every /[locale]/tools/* route the client chunks needed on first load are
+read from the build output:
+
+  .next/build-manifest.json               rootMainFiles (every page)
+  .next/server/app/<route>/page_client-reference-manifest.js
+                                          entryJSFiles (layouts + page)
+  .next/app-build-manifest.json           pages -> chunks (older builds)
+
+Chunks that every tool route loads are reported once as "shared"; the rest
+are attributed to the route. Each chunk is sized raw, gzip and brotli (when
+the brotli package is installed) and scanned for the heavy client libraries,
+identified by strings that survive minification. The run fails when:
+
+  - shared or a route's own JS (gzip) exceeds its budget (--budget NAME=KB)
+  - a library that must be loaded on demand (everything in LIBRARY_MARKERS
+    except SHARED_LIBRARIES) is in any route's first-load chunks
+  - in the browser cross-check, a route loads script bytes on first paint
+    that the manifests don't account for (chunks imported on mount), or one
+    of those chunks carries a heavy library
+
+    python verification/check_bundle_budgets.py                 # build, analyze, cross-check
+    python verification/check_bundle_budgets.py --no-build --skip-browser
+    python verification/check_bundle_budgets.py --budget shared=320 --budget dev=90
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+
+from harness import REPO_ROOT, TOOLS, format_bytes
+from next_server import add_server_args, serve
+
+try:
+    import brotli
+except ImportError:  # optional: brotli sizes are reported as "-"
+    brotli = None
+
+NEXT_DIR = os.path.join(REPO_ROOT, ".next")
+
+# ライブラリ名 -> 圧縮後も残る文字列（エラーメッセージや既定の URL）。どれか1つがあれば含まれているとみなす
+LIBRARY_MARKERS = {
+    "@ffmpeg/ffmpeg": [b"ffmpeg is not loaded, call `await ffmpeg.load()` first"],
+    "@ffmpeg/util": [b"failed to get response body reader"],
+    "@xenova/transformers": [b"@xenova/transformers", b"onnxruntime-web"],
+    "tesseract.js": [b"npm/tesseract.js@v"],
+    "@monaco-editor/react": [b"npm/monaco-editor@"],
+    "pdf-lib": [b"pdf-lib (https://github.com/Hopding/pdf-lib)"],
+    "jszip": [b"removed in JSZip 3.0"],
+    "wavesurfer.js": [b'part="scroll"', b'part="cursor"'],
+    "heic2any": [b"ERR_LIBHEIF"],
+    "pako": [b"invalid distance too far back"],
+    "framer-motion": [b"framerAppearId"],
+}
+# 全ページ共通のレイアウト（ドック・ファイルシェルフ）が使うので共有チャンクにあってよい
+SHARED_LIBRARIES = {"framer-motion"}
+
+# gzip 後の KB。"shared" は全ツール共通のチャンク、ツール名はそのページだけのチャンク
+DEFAULT_BUDGETS_KB = {"shared": 320, "default": 80}
+
+# 初回表示で manifest にないスクリプトをこれ以上読んだら失敗（バイト数の比率）
+DEFAULT_TOLERANCE = 0.05
+
+
+def route_for(tool):
+    return f"/[locale]/tools/{tool}"
+
+
+def _load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def root_main_files(next_dir=NEXT_DIR):
+    manifest = _load_json(os.path.join(next_dir, "build-manifest.json"))
+    # polyfillFiles は nomodule なので対応ブラウザでは読まれない
+    return list(manifest.get("rootMainFiles", []))
+
+
+def client_reference_chunks(route, next_dir=NEXT_DIR):
+    """entryJSFiles of the route's client reference manifest, or None if it isn't there."""
+    path = os.path.join(next_dir, "server", "app", *route.strip("/").split("/"), "page_client-reference-manifest.js")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    match = re.search(r"globalThis\.__RSC_MANIFEST\[\"[^\"]+\"\]\s*=\s*", text)
+    if not match:
+        raise ValueError(f"unrecognised client reference manifest: {path}")
+    manifest, _end = json.JSONDecoder().raw_decode(text, match.end())
+    return [chunk for chunks in manifest.get("entryJSFiles", {}).values() for chunk in chunks]
+
+
+def app_build_manifest_chunks(route, next_dir=NEXT_DIR):
+    path = os.path.join(next_dir, "app-build-manifest.json")
+    if not os.path.exists(path):
+        return None
+    pages = _load_json(path).get("pages", {})
+    segments = route.strip("/").split("/")
+    keys = ["/layout"] + ["/" + "/".join(segments[:i]) + "/layout" for i in range(1, len(segments) + 1)]
+    keys.append(route + "/page")
+    if route + "/page" not in pages:
+        return None
+    return [chunk for key in keys for chunk in pages.get(key, [])]
+
+
+def first_load_chunks(route, next_dir=NEXT_DIR):
+    """Every JS file a route needs before hydration, in load order, de-duplicated."""
+    chunks = client_reference_chunks(route, next_dir)
+    if chunks is None:
+        chunks = app_build_manifest_chunks(route, next_dir)
+    if chunks is None:
+        raise FileNotFoundError(f"no build manifest lists {route}; is .next a production build?")
+    seen = []
+    for chunk in root_main_files(next_dir) + chunks:
+        if chunk.endswith(".js") and chunk not in seen:
+            seen.append(chunk)
+    return seen
+
+
+class ChunkInfo:
+    """Sizes and detected libraries of one file under .next/ (cached per path)."""
+    _cache = {}
+
+    def __init__(self, path, raw, gzip_size, brotli_size, libraries):
+        self.path = path
+        self.raw = raw
+        self.gzip = gzip_size
+        self.brotli = brotli_size
+        self.libraries = libraries
+
+    @classmethod
+    def load(cls, chunk, next_dir=NEXT_DIR):
+        key = (next_dir, chunk)
+        if key not in cls._cache:
+            with open(os.path.join(next_dir, chunk), "rb") as f:
+                data = f.read()
+            libraries = sorted(name for name, markers in LIBRARY_MARKERS.items()
+                               if any(marker in data for marker in markers))
+            cls._cache[key] = cls(
+                chunk,
+                len(data),
+                len(gzip.compress(data, compresslevel=9)),
+                len(brotli.compress(data, quality=11)) if brotli else None,
+                libraries,
+            )
+        return cls._cache[key]
+
+
+def group_summary(chunks, next_dir=NEXT_DIR):
+    infos = [ChunkInfo.load(chunk, next_dir) for chunk in chunks]
+    return {
+        "chunks": [info.path for info in infos],
+        "raw": sum(info.raw for info in infos),
+        "gzip": sum(info.gzip for info in infos),
+        "brotli": sum(info.brotli for info in infos) if brotli else None,
+        "libraries": sorted({name for info in infos for name in info.libraries}),
+    }
+
+
+def analyze(tools, next_dir=NEXT_DIR):
+    """{"shared": summary, "routes": {tool: summary of the route's own chunks + first_load totals}}."""
+    per_route = {tool: first_load_chunks(route_for(tool), next_dir) for tool in tools}
+    shared = [chunk for chunk in per_route[tools[0]] if all(chunk in chunks for chunks in per_route.values())]
+    result = {"shared": group_summary(shared, next_dir), "routes": {}}
+    for tool, chunks in per_route.items():
+        own = group_summary([chunk for chunk in chunks if chunk not in shared], next_dir)
+        total = group_summary(chunks, next_dir)
+        own["first_load"] = {key: total[key] for key in ("raw", "gzip", "brotli")}
+        own["first_load_chunks"] = chunks
+        result["routes"][tool] = own
+    return result
+
+
+def parse_budgets(values):
+    budgets = dict(DEFAULT_BUDGETS_KB)
+    for value in values or []:
+        name, _, kb = value.partition("=")
+        if not kb:
+            raise SystemExit(f"--budget expects NAME=KB, got {value!r}")
+        budgets[name] = float(kb)
+    return budgets
+
+
+def check_budgets(analysis, budgets):
+    problems = []
+    groups = [("shared", analysis["shared"])] + list(analysis["routes"].items())
+    for name, summary in groups:
+        budget = budgets.get(name, budgets["default"])
+        if summary["gzip"] > budget * 1024:
+            problems.append(f"{name}: {format_bytes(summary['gzip'])} gzip exceeds the {budget:.0f} KB budget")
+    for name, summary in groups:
+        leaked = [lib for lib in summary["libraries"] if lib not in SHARED_LIBRARIES]
+        if leaked:
+            where = "the shared chunks" if name == "shared" else f"{name}'s first-load chunks"
+            problems.append(f"{', '.join(leaked)} in {where} (should be imported on demand)")
+    return problems
+
+
+def print_analysis(analysis, budgets):
+    def row(name, summary, budget):
+        brotli_size = format_bytes(summary["brotli"]) if summary["brotli"] is not None else "-"
+        print(f"{name:<10}{format_bytes(summary['raw']):>11}{format_bytes(summary['gzip']):>11}{brotli_size:>11}"
+              f"{budget:>8.0f} KB  {', '.join(summary['libraries']) or '-'}")
+
+    print(f"{'':<10}{'raw':>11}{'gzip':>11}{'brotli':>11}{'budget':>11}  libraries")
+    row("shared", analysis["shared"], budgets["shared"])
+    for tool, summary in analysis["routes"].items():
+        row(tool, summary, budgets.get(tool, budgets["default"]))
+    print("first load (shared + route), gzip: " + ", ".join(
+        f"{tool} {format_bytes(summary['first_load']['gzip'])}" for tool, summary in analysis["routes"].items()))
+
+
+def measure_first_paint(browser, base_url, path):
+    """Scripts fetched by a fresh context until the network is idle: {chunk: (decoded, transferred)}."""
+    context = browser.new_context(base_url=base_url, service_workers="block")
+    page = context.new_page()
+    responses = []
+    page.on("response", lambda response: responses.append(response) if response.request.resource_type == "script" else None)
+    try:
+        page.goto(path, wait_until="load")
+        page.wait_for_load_state("networkidle")
+        scripts = {}
+        for response in responses:
+            url_path = response.url.split("?", 1)[0].split(base_url, 1)[-1]
+            if not url_path.startswith("/_next/"):
+                continue
+            chunk = url_path[len("/_next/"):]
+            scripts[chunk] = (len(response.body()), response.request.sizes()["responseBodySize"])
+        return scripts
+    finally:
+        context.close()
+
+
+def cross_check(analysis, base_url, locale, tolerance, next_dir=NEXT_DIR):
+    from playwright.sync_api import sync_playwright
+
+    problems = []
+    results = {}
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            for tool, summary in analysis["routes"].items():
+                path = f"/{locale}/tools/{tool}"
+                scripts = measure_first_paint(browser, base_url, path)
+                expected = set(summary["first_load_chunks"])
+                extra = sorted(chunk for chunk in scripts if chunk not in expected)
+                missing = sorted(chunk for chunk in expected if chunk not in scripts)
+                loaded = sum(decoded for decoded, _transferred in scripts.values())
+                extra_bytes = sum(scripts[chunk][0] for chunk in extra)
+                results[tool] = {
+                    "loaded": loaded,
+                    "transferred": sum(transferred for _decoded, transferred in scripts.values()),
+                    "manifest": summary["first_load"]["raw"],
+                    "extra": extra,
+                    "missing": missing,
+                }
+                r = results[tool]
+                print(f"  {path:<22} loaded {format_bytes(r['loaded']):>10}  manifest {format_bytes(r['manifest']):>10}"
+                      f"  over the wire {format_bytes(r['transferred']):>10}  extra chunks {len(extra)}")
+
+                if extra_bytes > tolerance * summary["first_load"]["raw"]:
+                    problems.append(f"{path}: {format_bytes(extra_bytes)} of script loaded on first paint "
+                                    f"outside the build manifest ({', '.join(extra)})")
+                for chunk in extra:
+                    if not os.path.exists(os.path.join(next_dir, chunk)):
+                        continue
+                    leaked = [lib for lib in ChunkInfo.load(chunk, next_dir).libraries if lib not in SHARED_LIBRARIES]
+                    if leaked:
+                        problems.append(f"{path}: {', '.join(leaked)} loaded on first paint without user action ({chunk})")
+        finally:
+            browser.close()
+    return problems, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", nargs="+", default=TOOLS, choices=TOOLS)
+    parser.add_argument("--budget", action="append", metavar="NAME=KB",
+                        help="gzip budget for 'shared', 'default' or a tool (repeatable)")
+    parser.add_argument("--skip-browser", action="store_true", help="only analyze the existing .next output")
+    parser.add_argument("--locale", default="ja", help="locale used for the browser cross-check")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="share of first-load bytes allowed outside the manifests")
+    parser.add_argument("--output", help="write results as JSON")
+    add_server_args(parser)
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    def analyze_build():
+        analysis = analyze(args.tools)
+        print_analysis(analysis, budgets)
+        return analysis, check_budgets(analysis, budgets)
+
+    first_paint = {}
+    if args.skip_browser:
+        if not os.path.isdir(NEXT_DIR):
+            raise SystemExit("No .next build output found; run `npm run build` first")
+        analysis, problems = analyze_build()
+    else:
+        with serve(args) as base_url:
+            analysis, problems = analyze_build()
+            print("First paint in Chromium:")
+            browser_problems, first_paint = cross_check(analysis, base_url, args.locale, args.tolerance)
+            problems += browser_problems
+    if not brotli:
+        print("(brotli sizes need the brotli package: pip install brotli)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"analysis": analysis, "first_paint": first_paint, "budgets": budgets, "problems": problems},
+                      f, indent=2)
+
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
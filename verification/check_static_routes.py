@@ -0,0 +1,162 @@
+"""Checks that every page is prerendered and measures TTFB against `next start`.
+
+All tools run entirely in the browser, so every /[locale]/* page should be
+generated at build time for each locale (○ static or ● SSG in the route
+table). This fails if:
+
+  - any page route in the "Route (app)" table of `next build` is ƒ (Dynamic)
+  - the build warns that the edge runtime disabled static generation
+  - a /<locale>/tools/* URL is missing from .next/prerender-manifest.json
+
+Then every tool URL (plus the locale home pages) is requested -n times over
+a fresh HTTP connection, and the time to the first response byte is
+reported. The run fails if any route's median exceeds --max-ttfb.
+
+    python verification/check_static_routes.py              # build, check, serve, measure
+    python verification/check_static_routes.py --no-build   # reuse .next: manifest check and TTFB
+    python verification/check_static_routes.py --log build.log --skip-ttfb
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+from harness import LOCALES, REPO_ROOT, summarize, tool_paths
+from next_server import NextServer, parse_route_table
+
+PRERENDER_MANIFEST = os.path.join(REPO_ROOT, ".next", "prerender-manifest.json")
+EDGE_WARNING = "Using edge runtime on a page currently disables static generation"
+
+# ページではない内部ルート（/_not-found など）と API
+NON_PAGE_PREFIXES = ("/_", "/api/")
+
+
+def check_route_table(build_output):
+    """Returns a list of problems found in the `next build` output."""
+    problems = []
+    if EDGE_WARNING in build_output:
+        problems.append(f"build warns: {EDGE_WARNING}")
+
+    routes = parse_route_table(build_output)
+    if not routes:
+        return problems + ["no route table found in the build output"]
+
+    dynamic = [route for route, kind in routes if kind == "ƒ" and not route.startswith(NON_PAGE_PREFIXES)]
+    problems += [f"{route} is rendered on demand (ƒ Dynamic)" for route in dynamic]
+
+    listed = {route for route, _kind in routes}
+    expected = {path.replace(f"/{LOCALES[0]}/", "/[locale]/", 1) for path in tool_paths(LOCALES[:1])}
+    problems += [f"{route} is missing from the route table" for route in sorted(expected - listed)]
+
+    static = len(routes) - len(dynamic)
+    print(f"route table: {static} of {len(routes)} routes prerendered")
+    return problems
+
+
+def check_prerender_manifest(path=PRERENDER_MANIFEST):
+    if not os.path.exists(path):
+        print(f"{os.path.relpath(path, REPO_ROOT)} not found; skipping the manifest check")
+        return []
+    with open(path, encoding="utf-8") as f:
+        routes = json.load(f).get("routes", {})
+    expected = tool_paths() + [f"/{locale}" for locale in LOCALES]
+    missing = [p for p in expected if p not in routes]
+    print(f"prerender manifest: {len(expected) - len(missing)} of {len(expected)} locale pages prerendered")
+    return [f"{p} is not in the prerender manifest" for p in missing]
+
+
+def time_to_first_byte(base_url, path):
+    """Seconds from sending the request to reading the status line, plus the response headers."""
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=30)
+    try:
+        connection.connect()
+        start = time.perf_counter()
+        connection.request("GET", path, headers={"Accept": "text/html"})
+        response = connection.getresponse()
+        ttfb = time.perf_counter() - start
+        response.read()
+        return ttfb, response.status, dict(response.getheaders())
+    finally:
+        connection.close()
+
+
+def measure_ttfb(base_url, paths, repetitions):
+    results = {}
+    for path in paths:
+        samples = []
+        status = None
+        cache = None
+        for _ in range(repetitions):
+            ttfb, status, headers = time_to_first_byte(base_url, path)
+            samples.append(ttfb * 1000)
+            cache = headers.get("x-nextjs-cache") or headers.get("x-nextjs-prerender")
+        results[path] = {"status": status, "cache": cache, **summarize(samples)}
+        r = results[path]
+        print(f"  {status} {path:<24} median {r['median']:7.1f} ms   p95 {r['p95']:7.1f} ms   cache {cache or '-'}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="check this `next build` output instead of building")
+    parser.add_argument("--no-build", action="store_true", help="serve the existing .next output")
+    parser.add_argument("--base-url", default=os.environ.get("LUMINA_BASE_URL"),
+                        help="measure TTFB against an already running server")
+    parser.add_argument("--skip-ttfb", action="store_true")
+    parser.add_argument("-n", "--repetitions", type=int, default=20)
+    parser.add_argument("--max-ttfb", type=float, default=50, help="median budget per route, ms")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    server = None
+    problems = []
+    results = {}
+    try:
+        if args.log:
+            with open(args.log, encoding="utf-8") as f:
+                problems += check_route_table(f.read())
+        elif not args.no_build and not args.base_url:
+            server = NextServer(prewarm=False)
+            server.run_build()
+            problems += check_route_table(server.build_output)
+            server.build = False
+        if not args.base_url:
+            problems += check_prerender_manifest()
+
+        if not args.skip_ttfb:
+            base_url = args.base_url
+            if not base_url:
+                server = server or NextServer(build=False, prewarm=False)
+                base_url = server.start().base_url
+            base_url = base_url.rstrip("/")
+            paths = [f"/{locale}" for locale in LOCALES] + tool_paths()
+            # 初回アクセスのコストは測らない
+            for path in paths:
+                time_to_first_byte(base_url, path)
+            print(f"TTFB over {args.repetitions} requests per route:")
+            results = measure_ttfb(base_url, paths, args.repetitions)
+            problems += [
+                f"{path}: median TTFB {r['median']:.1f} ms exceeds {args.max_ttfb:.0f} ms"
+                for path, r in results.items() if r["median"] > args.max_ttfb
+            ]
+            problems += [f"{path}: HTTP {r['status']}" for path, r in results.items() if r["status"] != 200]
+    finally:
+        if server:
+            server.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"problems": problems, "ttfb": results}, f, indent=2)
+
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
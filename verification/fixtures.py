@@ -0,0 +1,617 @@
+"""Locally generated input files for the benchmarks.
+
+Nothing here is downloaded: files are synthesised on first use and cached in
+verification/fixtures/ (gitignored). Image generation needs Pillow; HEIC
+output additionally needs pillow-heif. Video and audio generation need an
+ffmpeg binary on PATH, and so do grid HEICs (built with libx265). The
+stand-in segmentation model needs the onnx package.
+"""
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+import wave
+import zipfile
+
+from harness import VERIFICATION_DIR
+
+FIXTURE_DIR = os.path.join(VERIFICATION_DIR, "fixtures")
+
+IMAGE_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp", "heic": ".heic"}
+
+
+def fixture_path(name):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    return os.path.join(FIXTURE_DIR, name)
+
+
+def _require_pillow():
+    try:
+        from PIL import Image
+    except ImportError:
+        raise SystemExit("Generating image fixtures needs Pillow: pip install pillow")
+    return Image
+
+
+def heic_supported():
+    try:
+        import pillow_heif  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def dimensions_for(megapixels, aspect=4 / 3):
+    height = int(math.sqrt(megapixels * 1_000_000 / aspect))
+    return int(height * aspect), height
+
+
+def photo_like_image(width, height):
+    """An RGB image with gradients plus noise, so encoders can't cheat on flat colour."""
+    Image = _require_pillow()
+    red = Image.linear_gradient("L").resize((width, height))
+    green = Image.effect_noise((max(1, width // 4), max(1, height // 4)), 48).resize((width, height), Image.BILINEAR)
+    blue = Image.radial_gradient("L").resize((width, height))
+    return Image.merge("RGB", (red, green, blue))
+
+
+def save_image(image, path, fmt, **params):
+    if fmt == "heic":
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+        image.save(path, format="HEIF", quality=params.get("quality", 90))
+    elif fmt == "jpeg":
+        image.save(path, format="JPEG", quality=params.get("quality", 90), exif=params.get("exif", b""))
+    elif fmt == "png":
+        image.save(path, format="PNG", compress_level=1)
+    else:
+        image.save(path, format=fmt.upper(), quality=params.get("quality", 90))
+
+
+def image_fixture(megapixels, fmt, index=0):
+    """Path to a cached synthetic image of roughly `megapixels` MP in `fmt`."""
+    if fmt == "heic" and not heic_supported():
+        raise SystemExit("HEIC fixtures need pillow-heif: pip install pillow-heif")
+    path = fixture_path(f"photo_{megapixels}mp_{index}{IMAGE_EXTENSIONS[fmt]}")
+    if not os.path.exists(path):
+        width, height = dimensions_for(megapixels)
+        print(f"Generating {os.path.basename(path)} ({width}x{height})...")
+        save_image(photo_like_image(width, height), path, fmt)
+    return path
+
+
+def pdf_fixture(pages, megapixels=2, index=0):
+    """Path to a cached scan-like PDF: `pages` pages, each a full-page JPEG image."""
+    path = fixture_path(f"scan_{pages}p_{megapixels}mp_{index}.pdf")
+    if not os.path.exists(path):
+        width, height = dimensions_for(megapixels, aspect=1 / math.sqrt(2))
+        print(f"Generating {os.path.basename(path)} ({pages} pages)...")
+        page = photo_like_image(width, height)
+        page.save(path, format="PDF", save_all=True, append_images=[page] * (pages - 1),
+                  resolution=150, quality=85)
+    return path
+
+
+def zip_of_images(count, megapixels=1):
+    """Path to a cached ZIP holding `count` copies of one JPEG under distinct names."""
+    path = fixture_path(f"images_{count}x{megapixels}mp.zip")
+    if not os.path.exists(path):
+        source = image_fixture(megapixels, "jpeg")
+        with zipfile.ZipFile(path + ".part", "w", zipfile.ZIP_STORED) as archive:
+            for index in range(count):
+                archive.write(source, f"photo_{index:03d}.jpg")
+        os.replace(path + ".part", path)
+    return path
+
+
+OCR_LINE = "the quick brown fox jumps over the lazy dog"
+
+
+def _document_page(index, width=1240, height=1754):
+    """A4 at 150 dpi: black sans-serif lines on white, numbered per page."""
+    Image = _require_pillow()
+    from PIL import ImageDraw, ImageFont
+    try:
+        font = ImageFont.load_default(size=28)
+    except TypeError:  # Pillow < 10.1 has only the small bitmap font
+        font = ImageFont.load_default()
+    page = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(page)
+    for line in range(40):
+        draw.text((100, 100 + line * 38), f"Page {index + 1} line {line + 1}: {OCR_LINE}", fill="black", font=font)
+    return page
+
+
+def document_fixture(index=0):
+    """Path to a cached JPEG of a typed document page (OCR input)."""
+    path = fixture_path(f"document_{index}.jpg")
+    if not os.path.exists(path):
+        _document_page(index).save(path, format="JPEG", quality=90)
+    return path
+
+
+def document_pdf_fixture(pages):
+    """Path to a cached scan-like PDF of `pages` typed document pages (JPEG per page)."""
+    path = fixture_path(f"document_{pages}p.pdf")
+    if not os.path.exists(path):
+        print(f"Generating {os.path.basename(path)}...")
+        images = [_document_page(index) for index in range(pages)]
+        images[0].save(path, format="PDF", save_all=True, append_images=images[1:], resolution=150, quality=90)
+    return path
+
+
+def modnet_fixture():
+    """Directory laid out like the Xenova/modnet repo, holding a tiny stand-in model.
+
+    The model keeps AI Lab's input/output contract ("input" [1, 3, H, W] ->
+    "output" [1, 1, H, W], any H/W) but is a single 1x1 convolution plus a
+    sigmoid, so timings measure the app's pipeline (decode, preprocessing,
+    transfer, compositing, PNG encode) rather than the network. Both the full
+    and the quantized file names are provided so either variant loads.
+    """
+    root = fixture_path(os.path.join("models", "Xenova", "modnet"))
+    model_path = os.path.join(root, "onnx", "model.onnx")
+    if os.path.exists(model_path):
+        return root
+
+    try:
+        import onnx
+        from onnx import TensorProto, helper
+    except ImportError:
+        raise SystemExit("Generating the model fixture needs onnx: pip install onnx")
+
+    print("Generating the stand-in modnet model...")
+    graph = helper.make_graph(
+        [
+            helper.make_node("Conv", ["input", "weight", "bias"], ["logits"]),
+            helper.make_node("Sigmoid", ["logits"], ["output"]),
+        ],
+        "modnet_stub",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, [1, 3, "height", "width"])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 1, "height", "width"])],
+        initializer=[
+            # 正規化済み（-1〜1）の輝度が高いほど前景とみなす
+            helper.make_tensor("weight", TensorProto.FLOAT, [1, 3, 1, 1], [1.2, 2.4, 0.4]),
+            helper.make_tensor("bias", TensorProto.FLOAT, [1], [0.0]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    # onnxruntime-web 1.14 が読める IR バージョンに揃える
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    onnx.save(model, model_path)
+    shutil.copyfile(model_path, os.path.join(root, "onnx", "model_quantized.onnx"))
+    with open(os.path.join(root, "config.json"), "w") as f:
+        json.dump({"model_type": "modnet", "architectures": ["MODNet"]}, f, indent=2)
+    with open(os.path.join(root, "preprocessor_config.json"), "w") as f:
+        json.dump({
+            "do_normalize": True,
+            "do_pad": False,
+            "do_rescale": True,
+            "do_resize": True,
+            "feature_extractor_type": "ImageFeatureExtractor",
+            "image_mean": [0.5, 0.5, 0.5],
+            "image_std": [0.5, 0.5, 0.5],
+            "resample": 2,
+            "rescale_factor": 1 / 255,
+            "size": {"shortest_edge": 512},
+            "size_divisibility": 32,
+        }, f, indent=2)
+    return root
+
+
+def image_corpus(sizes, formats, count=1):
+    """[(megapixels, fmt, path)] for every size x format x count."""
+    corpus = []
+    for megapixels in sizes:
+        for fmt in formats:
+            for index in range(count):
+                corpus.append((megapixels, fmt, image_fixture(megapixels, fmt, index)))
+    return corpus
+
+
+# Written into every metadata block of tagged_image_fixture(); it must not
+# survive Privacy Mode.
+METADATA_CANARY = "LUMINA-PRIVATE-METADATA"
+TAGGED_FORMATS = ["jpeg", "png", "webp", "heic"]
+
+
+def _tagged_exif(orientation):
+    """~56 KB of EXIF: camera, GPS position, a user comment and a padded MakerNote."""
+    Image = _require_pillow()
+    from PIL import ExifTags
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "Lumina"
+    exif[ExifTags.Base.Model] = f"Camera {METADATA_CANARY}"
+    exif[ExifTags.Base.Artist] = METADATA_CANARY
+    exif[ExifTags.Base.DateTime] = "2024:05:06 07:08:09"
+    exif[ExifTags.Base.Orientation] = orientation
+    details = exif.get_ifd(ExifTags.IFD.Exif)
+    details[ExifTags.Base.UserComment] = b"ASCII\0\0\0" + METADATA_CANARY.encode() * 64
+    details[ExifTags.Base.MakerNote] = (METADATA_CANARY.encode() + bytes(range(256))) * 180
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    gps[ExifTags.GPS.GPSLatitudeRef] = "N"
+    gps[ExifTags.GPS.GPSLatitude] = (35.0, 39.0, 31.0)
+    gps[ExifTags.GPS.GPSLongitudeRef] = "E"
+    gps[ExifTags.GPS.GPSLongitude] = (139.0, 44.0, 43.0)
+    return exif.tobytes()
+
+
+def _tagged_xmp():
+    packet = (
+        '<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+        '<rdf:Description xmlns:dc="http://purl.org/dc/elements/1.1/" '
+        'xmlns:exif="http://ns.adobe.com/exif/1.0/">'
+        f"<dc:creator>{METADATA_CANARY}</dc:creator>"
+        '<exif:GPSLatitude>35,39.52N</exif:GPSLatitude>'
+        f"<dc:description>{METADATA_CANARY * 400}</dc:description>"
+        "</rdf:Description></rdf:RDF></x:xmpmeta>"
+    )
+    return packet.encode()
+
+
+def _iptc_segment():
+    """APP13 Photoshop IRB holding an IPTC caption (Pillow can read IPTC but not write it)."""
+    caption = f"Caption {METADATA_CANARY}".encode()
+    iptc = b"\x1c\x02\x78" + len(caption).to_bytes(2, "big") + caption
+    irb = b"8BIM\x04\x04\x00\x00" + len(iptc).to_bytes(4, "big") + iptc + b"\x00" * (len(iptc) % 2)
+    payload = b"Photoshop 3.0\x00" + irb
+    return b"\xff\xed" + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def tagged_image_fixture(megapixels, fmt, index=0):
+    """Path to a cached photo carrying large EXIF (with GPS), XMP and, per format,
+    IPTC / comments / text chunks. Odd indices are rotated (Orientation 6)."""
+    if fmt == "heic" and not heic_supported():
+        raise SystemExit("HEIC fixtures need pillow-heif: pip install pillow-heif")
+    path = fixture_path(f"tagged_{megapixels}mp_{index}{IMAGE_EXTENSIONS[fmt]}")
+    if os.path.exists(path):
+        return path
+    Image = _require_pillow()
+    width, height = dimensions_for(megapixels)
+    print(f"Generating {os.path.basename(path)} ({width}x{height})...")
+    image = photo_like_image(width, height)
+    exif = _tagged_exif(6 if index % 2 else 1)
+    xmp = _tagged_xmp()
+    if fmt == "jpeg":
+        image.save(path, format="JPEG", quality=90, exif=exif, xmp=xmp, comment=METADATA_CANARY)
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:2] + _iptc_segment() + data[2:])
+    elif fmt == "png":
+        from PIL import PngImagePlugin
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Author", METADATA_CANARY)
+        info.add_text("Comment", METADATA_CANARY * 100, zip=True)
+        info.add_itxt("XML:com.adobe.xmp", xmp.decode())
+        image.save(path, format="PNG", compress_level=1, exif=exif, pnginfo=info)
+    elif fmt == "webp":
+        image.save(path, format="WEBP", quality=90, exif=exif, xmp=xmp)
+    else:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+        image.save(path, format="HEIF", quality=90, exif=exif, xmp=xmp)
+    return path
+
+
+# codec -> (ffmpeg encoder args, extension). "vp9" is deliberately muxed into
+# MP4: converting it to WebM only needs a container change, not a re-encode.
+VIDEO_CODECS = {
+    "h264": (["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-c:a", "aac"], ".mp4"),
+    "vp9": (["-c:v", "libvpx-vp9", "-deadline", "realtime", "-cpu-used", "8", "-c:a", "libopus"], ".mp4"),
+}
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def _require_ffmpeg():
+    binary = shutil.which("ffmpeg")
+    if not binary:
+        raise SystemExit("Generating video fixtures needs ffmpeg on PATH")
+    return binary
+
+
+def video_width(height):
+    """16:9 width for `height`, rounded down to even (libx264's yuv420p rejects odd sizes)."""
+    return height * 16 // 9 // 2 * 2
+
+
+def video_fixture(seconds, codec="h264", height=720, index=0):
+    """Path to a cached synthetic clip (test pattern + tone) of `seconds` length."""
+    encoder_args, ext = VIDEO_CODECS[codec]
+    path = fixture_path(f"clip_{seconds}s_{height}p_{codec}_{index}{ext}")
+    if not os.path.exists(path):
+        width = video_width(height)
+        print(f"Generating {os.path.basename(path)}...")
+        subprocess.run(
+            [_require_ffmpeg(), "-loglevel", "error", "-y",
+             "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=30:duration={seconds}",
+             "-f", "lavfi", "-i", f"sine=frequency={440 + index * 10}:duration={seconds}",
+             *encoder_args, "-shortest", path],
+            check=True,
+        )
+    return path
+
+
+# format -> ffmpeg encoder args. The extension is the format name.
+AUDIO_CODECS = {
+    "wav": ["-c:a", "pcm_s16le"],
+    "mp3": ["-c:a", "libmp3lame", "-q:a", "2"],
+    "ogg": ["-c:a", "libopus", "-b:a", "128k"],
+}
+
+
+def audio_fixture(seconds, fmt="wav", rate=48000, index=0):
+    """Path to a cached stereo tone sweep of `seconds` length in `fmt`."""
+    path = fixture_path(f"tone_{seconds}s_{rate // 1000}k_{index}.{fmt}")
+    if not os.path.exists(path):
+        print(f"Generating {os.path.basename(path)}...")
+        subprocess.run(
+            [_require_ffmpeg(), "-loglevel", "error", "-y",
+             "-f", "lavfi", "-i", f"sine=frequency={220 + index * 10}:beep_factor=4:sample_rate={rate}:duration={seconds}",
+             "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.05:sample_rate={rate}:duration={seconds}",
+             "-filter_complex", "[0:a][1:a]amerge=inputs=2[a]", "-map", "[a]",
+             *AUDIO_CODECS[fmt], path],
+            check=True,
+        )
+    return path
+
+
+def probe_media(path, kind):
+    """Codec, duration and decoded length of the first `kind` ("video"/"audio") stream.
+
+    The stream is decoded in full (ffmpeg's framecrc muxer, -xerror), so a
+    file that only probes cleanly still fails here. `frames` is the number of
+    decoded video frames, or of audio sample frames (at `rate`) for audio.
+    """
+    binary = _require_ffmpeg()
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        raise SystemExit("Checking converted files needs ffprobe on PATH")
+    selector = "0:v:0" if kind == "video" else "0:a:0"
+    info = json.loads(subprocess.run(
+        [ffprobe, "-v", "error", "-select_streams", selector[2:],
+         "-show_entries", "stream=codec_name,sample_rate:format=duration", "-of", "json", path],
+        capture_output=True, text=True, check=True,
+    ).stdout)
+    if not info.get("streams"):
+        raise AssertionError(f"{os.path.basename(path)} has no {kind} stream")
+
+    # Audio is downmixed to mono 16-bit, so each frame's size / 2 is its sample count
+    decode = subprocess.run(
+        [binary, "-v", "error", "-xerror", "-i", path, "-map", selector,
+         *(["-ac", "1", "-c:a", "pcm_s16le"] if kind == "audio" else []), "-f", "framecrc", "-"],
+        capture_output=True, text=True,
+    )
+    if decode.returncode != 0 or decode.stderr.strip():
+        raise AssertionError(f"{os.path.basename(path)} does not decode cleanly: {decode.stderr.strip()}")
+    rows = [line.split(",") for line in decode.stdout.splitlines() if line and not line.startswith("#")]
+    frames = len(rows) if kind == "video" else sum(int(row[4]) for row in rows) // 2
+    stream = info["streams"][0]
+    return {
+        "codec": stream["codec_name"],
+        "rate": int(stream["sample_rate"]) if kind == "audio" else None,
+        "duration": float(info["format"]["duration"]),
+        "frames": frames,
+    }
+
+
+def check_converted(output, source, kind, codecs):
+    """Asserts that `output` holds a `kind` stream in one of `codecs` with the source's length.
+
+    Video must keep every frame. The decoded audio and the container
+    durations may differ by encoder priming/padding: up to 0.1 s or 1%.
+    """
+    out, src = probe_media(output, kind), probe_media(source, kind)
+    name = os.path.basename(output)
+    if out["codec"] not in codecs:
+        raise AssertionError(f"{name}: codec {out['codec']}, expected one of {', '.join(codecs)}")
+    tolerance = max(0.1, src["duration"] * 0.01)
+    if abs(out["duration"] - src["duration"]) > tolerance:
+        raise AssertionError(f"{name}: duration {out['duration']:.3f}s, source {src['duration']:.3f}s")
+    if kind == "video" and out["frames"] != src["frames"]:
+        raise AssertionError(f"{name}: {out['frames']} frames, source {src['frames']}")
+    if kind == "audio" and abs(out["frames"] / out["rate"] - src["frames"] / src["rate"]) > tolerance:
+        raise AssertionError(f"{name}: {out['frames']} samples at {out['rate']} Hz, "
+                             f"source {src['frames']} at {src['rate']} Hz")
+    return out
+
+
+def tone_wav_fixture(seconds, rate=44100):
+    """Path to a cached stereo 16-bit sine WAV, written without ffmpeg."""
+    path = fixture_path(f"sine_{seconds}s_{rate // 1000}k.wav")
+    if not os.path.exists(path):
+        frames = bytearray()
+        for n in range(seconds * rate):
+            sample = int(12000 * math.sin(2 * math.pi * 440 * n / rate))
+            frames += struct.pack("<hh", sample, sample)
+        with wave.open(path, "wb") as out:
+            out.setnchannels(2)
+            out.setsampwidth(2)
+            out.setframerate(rate)
+            out.writeframes(bytes(frames))
+    return path
+
+
+# iPhone-style HEIC: the photo is cut into 512x512 tiles, each tile is an
+# independent HEVC intra picture, and a "grid" item stitches them back
+# together (cropping the padding on the right and bottom edges).
+HEIC_TILE = 512
+
+
+def _hevc_nal_units(stream):
+    """Split an Annex B HEVC stream on its start codes."""
+    units = []
+    start = None
+    pos = 0
+    while True:
+        found = stream.find(b"\x00\x00\x01", pos)
+        if start is not None:
+            end = len(stream) if found < 0 else found
+            # a four-byte start code leaves its leading zero on the previous unit
+            units.append(stream[start:end].rstrip(b"\x00") if found >= 0 else stream[start:end])
+        if found < 0:
+            return units
+        start = pos = found + 3
+
+
+def _hevc_pictures(stream):
+    """Parameter sets (VPS, SPS, PPS) and the slice NAL units of each picture."""
+    parameter_sets = {32: [], 33: [], 34: []}
+    pictures = []
+    for unit in _hevc_nal_units(stream):
+        nal_type = (unit[0] >> 1) & 0x3F
+        if nal_type in parameter_sets:
+            if unit not in parameter_sets[nal_type]:
+                parameter_sets[nal_type].append(unit)
+        elif nal_type < 32:
+            if unit[2] & 0x80:  # first_slice_segment_in_pic_flag
+                pictures.append([])
+            pictures[-1].append(unit)
+    return parameter_sets, pictures
+
+
+def _hvcc(parameter_sets):
+    """HEVCDecoderConfigurationRecord for 8-bit 4:2:0 with four-byte NAL lengths."""
+    # profile_tier_level starts after the NAL header and one byte of SPS ids
+    sps = parameter_sets[33][0].replace(b"\x00\x00\x03", b"\x00\x00")
+    profile = sps[3:15]
+    record = bytes([1]) + profile + struct.pack(">H", 0xF000) + bytes([0xFC, 0xFD, 0xF8, 0xF8])
+    record += struct.pack(">H", 0) + bytes([0x0F, len(parameter_sets)])
+    for nal_type, units in parameter_sets.items():
+        record += bytes([0x80 | nal_type]) + struct.pack(">H", len(units))
+        for unit in units:
+            record += struct.pack(">H", len(unit)) + unit
+    return record
+
+
+def _box(box_type, *payload):
+    body = b"".join(payload)
+    return struct.pack(">I", 8 + len(body)) + box_type.encode() + body
+
+
+def _full_box(box_type, version, flags, *payload):
+    return _box(box_type, bytes([version]) + flags.to_bytes(3, "big"), *payload)
+
+
+def _heif_grid(width, height, columns, rows, hvcc, tiles):
+    """HEIF bytes with a grid primary item (id 1) over hvc1 tiles (ids 2..)."""
+    tile_ids = list(range(2, 2 + len(tiles)))
+
+    def u16(value):
+        return struct.pack(">H", value)
+
+    def u32(value):
+        return struct.pack(">I", value)
+
+    grid = bytes([0, 0, rows - 1, columns - 1]) + u16(width) + u16(height)
+    infe = [_full_box("infe", 2, 0, u16(1), u16(0), b"grid", b"\x00")]
+    infe += [_full_box("infe", 2, 1, u16(item), u16(0), b"hvc1", b"\x00") for item in tile_ids]  # hidden
+    ipco = _box("ipco",
+                _box("hvcC", hvcc),
+                _full_box("ispe", 0, 0, u32(HEIC_TILE), u32(HEIC_TILE)),
+                _full_box("ispe", 0, 0, u32(width), u32(height)))
+    associations = u16(1) + bytes([1, 3])
+    for item in tile_ids:
+        associations += u16(item) + bytes([2, 0x81, 2])  # hvcC is essential
+    ipma = _full_box("ipma", 0, 0, u32(1 + len(tiles)), associations)
+
+    def meta(mdat_start):
+        # iloc v1: 4-byte offsets and lengths, no base offset; the grid lives in idat
+        entries = u16(1) + u16(1) + u16(0) + u16(1) + u32(0) + u32(len(grid))
+        offset = mdat_start
+        for item, tile in zip(tile_ids, tiles):
+            entries += u16(item) + u16(0) + u16(0) + u16(1) + u32(offset) + u32(len(tile))
+            offset += len(tile)
+        return _full_box("meta", 0, 0,
+                         _full_box("hdlr", 0, 0, b"\x00" * 4, b"pict", b"\x00" * 12, b"\x00"),
+                         _full_box("pitm", 0, 0, u16(1)),
+                         _full_box("iinf", 0, 0, u16(len(infe)), *infe),
+                         _full_box("iref", 0, 0, _box("dimg", u16(1), u16(len(tile_ids)), *map(u16, tile_ids))),
+                         _box("iprp", ipco, ipma),
+                         _full_box("iloc", 1, 0, bytes([0x44, 0x00]), u16(1 + len(tiles)), entries),
+                         _box("idat", grid))
+
+    ftyp = _box("ftyp", b"heic", u32(0), b"mif1", b"heic")
+    # the meta box has the same size whatever the offsets are
+    mdat_start = len(ftyp) + len(meta(0)) + 8
+    return ftyp + meta(mdat_start) + _box("mdat", *tiles)
+
+
+def heic_grid_fixture(megapixels, index=0):
+    """Path to a cached grid HEIC shaped like an iPhone photo (needs ffmpeg with libx265)."""
+    path = fixture_path(f"grid_{megapixels}mp_{index}.heic")
+    if not os.path.exists(path):
+        width, height = dimensions_for(megapixels)
+        columns = -(-width // HEIC_TILE)
+        rows = -(-height // HEIC_TILE)
+        print(f"Generating {os.path.basename(path)} ({width}x{height}, {columns}x{rows} tiles)...")
+        Image = _require_pillow()
+        padded = Image.new("RGB", (columns * HEIC_TILE, rows * HEIC_TILE))
+        padded.paste(photo_like_image(width, height))
+        work = path + ".tiles"
+        os.makedirs(work, exist_ok=True)
+        try:
+            for n in range(columns * rows):
+                x, y = n % columns * HEIC_TILE, n // columns * HEIC_TILE
+                padded.crop((x, y, x + HEIC_TILE, y + HEIC_TILE)).save(os.path.join(work, f"{n:04d}.png"))
+            stream = os.path.join(work, "tiles.hevc")
+            # every tile is an IDR picture, so each one decodes on its own
+            subprocess.run(
+                [_require_ffmpeg(), "-loglevel", "error", "-y",
+                 "-framerate", "1", "-i", os.path.join(work, "%04d.png"),
+                 "-c:v", "libx265", "-pix_fmt", "yuv420p",
+                 "-x265-params", "keyint=1:open-gop=0:log-level=error", "-f", "hevc", stream],
+                check=True,
+            )
+            with open(stream, "rb") as f:
+                parameter_sets, pictures = _hevc_pictures(f.read())
+        finally:
+            shutil.rmtree(work)
+        if len(pictures) != columns * rows:
+            raise SystemExit(f"Expected {columns * rows} HEVC pictures, got {len(pictures)}")
+        tiles = [b"".join(struct.pack(">I", len(unit)) + unit for unit in picture) for picture in pictures]
+        with open(path + ".part", "wb") as f:
+            f.write(_heif_grid(width, height, columns, rows, _hvcc(parameter_sets), tiles))
+        os.replace(path + ".part", path)
+    return path
+
+
+# kind -> extension. "media" is incompressible random bytes named like a video
+# (Archive Lab stores it as-is); "text" is repetitive log lines that deflate well.
+BULK_KINDS = {"media": ".mp4", "text": ".log"}
+
+
+def bulk_fixture(megabytes, kind="media", index=0):
+    """Path to a cached `megabytes` MB file of incompressible or log-like content."""
+    path = fixture_path(f"bulk_{megabytes}mb_{kind}_{index}{BULK_KINDS[kind]}")
+    if not os.path.exists(path):
+        print(f"Generating {os.path.basename(path)}...")
+        block = 16 * 1024 * 1024
+        remaining = megabytes * 1024 * 1024
+        line = 0
+        with open(path + ".part", "wb") as f:
+            while remaining > 0:
+                size = min(block, remaining)
+                if kind == "media":
+                    data = os.urandom(size)
+                else:
+                    lines = []
+                    total = 0
+                    while total < size:
+                        text = f"2025-01-01T00:00:{line % 60:02d}Z INFO worker-{line % 8} processed request {line}\n"
+                        lines.append(text)
+                        total += len(text)
+                        line += 1
+                    data = "".join(lines).encode()[:size]
+                f.write(data)
+                remaining -= size
+        os.replace(path + ".part", path)
+    return path
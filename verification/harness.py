@@ -0,0 +1,195 @@
+"""Shared helpers for the Playwright verification scripts.
+
+Every ``verify_*.py`` script keeps its own ``__main__`` so it can still be run
+on its own; this module holds the bits the suite-wide tooling needs on top of
+that (base URL, route lists, test discovery, free ports, timing and memory
+summaries).
+"""
+import importlib
+import inspect
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # optional: only needed for renderer memory numbers
+    psutil = None
+
+VERIFICATION_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(VERIFICATION_DIR)
+
+if VERIFICATION_DIR not in sys.path:
+    sys.path.insert(0, VERIFICATION_DIR)
+
+# Tests navigate with paths ("/ja/tools/image"); the server they hit is set
+# once here. run_all.py points this at its managed server.
+BASE_URL = os.environ.get("LUMINA_BASE_URL", "http://localhost:3000")
+
+LOCALES = ["en", "ja"]
+TOOLS = ["image", "video", "audio", "pdf", "ai", "qr", "text", "dev", "archive", "recorder"]
+
+
+def tool_paths(locales=LOCALES, tools=TOOLS):
+    return [f"/{locale}/tools/{tool}" for tool in tools for locale in locales]
+
+
+class VerificationTest:
+    def __init__(self, module_name, func):
+        self.module_name = module_name
+        self.func = func
+
+    @property
+    def name(self):
+        return f"{self.module_name}::{self.func.__name__}"
+
+    def __call__(self, page):
+        return self.func(page)
+
+
+def _takes_only_page(func):
+    params = list(inspect.signature(func).parameters.values())
+    return len(params) == 1 and params[0].name == "page"
+
+
+def discover_tests(keyword=None):
+    """Import every verify_*.py and collect its test_*(page) functions."""
+    tests = []
+    for filename in sorted(os.listdir(VERIFICATION_DIR)):
+        if not (filename.startswith("verify_") and filename.endswith(".py")):
+            continue
+        module_name = filename[:-3]
+        module = importlib.import_module(module_name)
+        for attr, func in inspect.getmembers(module, inspect.isfunction):
+            if not attr.startswith("test_") or func.__module__ != module_name:
+                continue
+            if not _takes_only_page(func):
+                continue
+            test = VerificationTest(module_name, func)
+            if keyword and keyword not in test.name:
+                continue
+            tests.append(test)
+    return tests
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; pct in 0-100."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {
+        "n": len(values),
+        "median": statistics.median(values),
+        "p95": percentile(values, 95),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+class RendererMemorySampler:
+    """Polls the summed RSS of the browser's renderer processes.
+
+    Renderer PIDs come from CDP SystemInfo.getProcessInfo, RSS from psutil.
+    Without psutil every peak is None.
+
+        sampler = RendererMemorySampler(browser)
+        with sampler:
+            ...
+        print(sampler.peak, sampler.growth)
+    """
+
+    def __init__(self, browser, interval=0.05):
+        self.interval = interval
+        self.peak = None
+        self.baseline = None
+        self._cdp = browser.new_browser_cdp_session()
+        self._pids = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def available(self):
+        return psutil is not None
+
+    @property
+    def growth(self):
+        """Peak minus the RSS sampled on entering the block."""
+        if self.peak is None or self.baseline is None:
+            return None
+        return max(0, self.peak - self.baseline)
+
+    def refresh_pids(self):
+        info = self._cdp.send("SystemInfo.getProcessInfo")["processInfo"]
+        self._pids = [p["id"] for p in info if p["type"] == "renderer"]
+
+    def _rss(self):
+        total = 0
+        for pid in self._pids:
+            try:
+                total += psutil.Process(pid).memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak or 0, self._rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = None
+        self.baseline = None
+        if not self.available:
+            return self
+        self.refresh_pids()
+        self.baseline = self._rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+def js_heap_used(page, cdp=None):
+    """Used JS heap of the page's main thread after a forced GC, in bytes.
+
+    Pass a CDP session to reuse it across samples; one is opened otherwise.
+    """
+    cdp = cdp or page.context.new_cdp_session(page)
+    cdp.send("HeapProfiler.collectGarbage")
+    return cdp.send("Runtime.getHeapUsage")["usedSize"]
+
+
+def format_bytes(num):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num) < 1024 or unit == "GB":
+            return f"{num:.0f}{unit}" if unit == "B" else f"{num:.1f}{unit}"
+        num /= 1024
+
+
+def format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    return f"{seconds:.2f}s"
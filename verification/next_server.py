@@ -0,0 +1,217 @@
+"""Managed Next.js production server for the verification suite.
+
+Builds once with ``next build``, starts ``next start`` on a free port, waits
+for it to answer and pre-warms every route from the build's route table so
+that no test pays for a first render.
+
+    with NextServer() as server:
+        print(server.base_url)
+
+Can also be run directly to keep a warmed server up for manual runs:
+
+    python verification/next_server.py [--no-build]
+"""
+import argparse
+import contextlib
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from harness import LOCALES, REPO_ROOT, format_seconds, free_port
+
+BUILD_LOG = os.path.join(REPO_ROOT, "build.log")
+
+# "├ ƒ /[locale]/tools/ai" / "└ ○ /sitemap.xml"
+ROUTE_LINE = re.compile(r"^[┌├└]\s+(\S)\s+(/\S*)")
+
+
+class ServerError(RuntimeError):
+    pass
+
+
+def parse_route_table(build_output):
+    """Return [(route, kind)] from the "Route (app)" table of `next build`.
+
+    kind is the build symbol: "○" static, "●" SSG, "ƒ" dynamic.
+    """
+    routes = []
+    for line in build_output.splitlines():
+        match = ROUTE_LINE.match(line.strip())
+        if match:
+            kind, route = match.groups()
+            routes.append((route, kind))
+    return routes
+
+
+def expand_routes(routes, locales=LOCALES):
+    """Turn route patterns into concrete URLs that can be requested.
+
+    [locale] is expanded to every locale; routes with any other dynamic
+    segment (e.g. [slug]) are skipped since their params are unknown here.
+    """
+    paths = []
+    for route, _kind in routes:
+        if route.startswith("/_"):
+            continue
+        targets = [route.replace("[locale]", loc) for loc in locales] if "[locale]" in route else [route]
+        for path in targets:
+            if "[" not in path:
+                paths.append(path)
+    return paths
+
+
+class NextServer:
+    """`env` is added to the environment of both `next build` and `next start`.
+    A build variant that next.config.ts sends to another distDir (such as the
+    LUMINA_BENCH_NO_I18N build) must pass that directory as `dist_dir`.
+    """
+
+    def __init__(self, port=None, build=True, prewarm=True, log_path=None, env=None, dist_dir=".next"):
+        self.port = port or free_port()
+        self.build = build
+        self.prewarm = prewarm
+        self.env = {**os.environ, **env} if env else None
+        self.dist_dir = os.path.join(REPO_ROOT, dist_dir)
+        self.log_path = log_path or os.path.join(self.dist_dir, "verification-server.log")
+        self.build_output = None
+        self.process = None
+        self._log = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def run_build(self):
+        # npm run build (not npx next build) so the prebuild hook vendors the engine assets.
+        print("Building with `npm run build`...")
+        start = time.perf_counter()
+        proc = subprocess.run(
+            ["npm", "run", "build"],
+            cwd=REPO_ROOT,
+            env=self.env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(proc.stdout)
+            raise ServerError("next build failed")
+        self.build_output = proc.stdout
+        print(f"Build finished in {format_seconds(time.perf_counter() - start)}")
+
+    def routes(self):
+        output = self.build_output
+        if output is None and os.path.exists(BUILD_LOG):
+            with open(BUILD_LOG, encoding="utf-8") as f:
+                output = f.read()
+        return expand_routes(parse_route_table(output or ""))
+
+    def start(self, timeout=60):
+        if self.build:
+            self.run_build()
+        elif not os.path.isdir(self.dist_dir):
+            raise ServerError(f"No {os.path.basename(self.dist_dir)} build output found; run without --no-build first")
+
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self._log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            ["npx", "next", "start", "-p", str(self.port), "-H", "127.0.0.1"],
+            cwd=REPO_ROOT,
+            env=self.env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            self.wait_until_healthy(timeout)
+            if self.prewarm:
+                self.warm_routes()
+        except BaseException:
+            # Don't leave `next start` running when the caller never gets the server (or Ctrl-C)
+            self.stop()
+            raise
+        return self
+
+    def wait_until_healthy(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise ServerError(f"next start exited with {self.process.returncode}; see {self.log_path}")
+            try:
+                with urllib.request.urlopen(self.base_url + "/", timeout=5) as res:
+                    if res.status < 500:
+                        print(f"Server ready at {self.base_url}")
+                        return
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                pass
+            time.sleep(0.25)
+        raise ServerError(f"Server did not become healthy within {timeout}s")
+
+    def warm_routes(self):
+        paths = self.routes()
+        print(f"Pre-warming {len(paths)} routes...")
+        for path in paths:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(self.base_url + path, timeout=30) as res:
+                    res.read()
+                    status = res.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            print(f"  {status} {path} ({format_seconds(time.perf_counter() - start)})")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_server_args(parser):
+    parser.add_argument("--base-url", default=os.environ.get("LUMINA_BASE_URL"),
+                        help="test an already running server instead of starting one")
+    parser.add_argument("--no-build", action="store_true",
+                        help="start the managed server from the existing .next output")
+
+
+@contextlib.contextmanager
+def serve(args):
+    """Yield a base URL: args.base_url if given, otherwise a managed server."""
+    if args.base_url:
+        yield args.base_url.rstrip("/")
+        return
+    with NextServer(build=not args.no_build) as server:
+        yield server.base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and serve the app for manual verification runs.")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--no-build", action="store_true", help="reuse the existing .next output")
+    args = parser.parse_args()
+
+    with NextServer(port=args.port, build=not args.no_build) as server:
+        print(f"export LUMINA_BASE_URL={server.base_url}")
+        try:
+            server.process.wait()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Per-stage timings from the app's own instrumentation (src/lib/perf.ts).
+
+Every conversion hot path records User Timing measures:
+
+  lumina:<tool>:<stage>   one stage of one run (load, read, decode, compute,
+                          encode, write); detail = {run, tool, stage, label}
+  lumina:<tool>           the whole run; detail also carries ok, bytesIn,
+                          bytesOut and wasmMemory (null where the wasm lives in
+                          a third-party worker: ffmpeg.wasm, tesseract.js)
+
+Tools are video, audio, pdf, image, ocr, ocr-pdf, ai, plus ffmpeg and ai-model
+for engine loads. Stages that run in a worker are timed there and re-recorded
+on the main thread, so a single PerformanceObserver sees everything.
+
+PerfCapture streams those measures out of the page while a flow runs (an
+init script observes them and calls an exposed binding, so navigations do not
+lose anything) and can also record a Playwright trace and a CDP CPU profile
+of the main thread:
+
+    with PerfCapture(page, "imagelab", out_dir="verification/perf", trace=True) as perf:
+        ...drive the page...
+    print(format_breakdown(perf.breakdown))
+
+snapshot(page) reads window.__luminaPerf directly for one-off checks.
+"""
+import json
+import os
+import re
+
+from harness import format_bytes, summarize
+
+STAGES = ["load", "read", "decode", "compute", "encode", "write"]
+
+# Kept in sync with LEGACY_MEASURES in src/lib/perf.ts.
+LEGACY_MEASURES = ["ffmpeg-load", "ai-model-load", "json-process"]
+
+SINK = "__luminaPerfSink"
+
+OBSERVER_SCRIPT = """
+(() => {
+  if (window.__luminaPerfStream) return;
+  window.__luminaPerfStream = true;
+  const legacy = %s;
+  const origin = performance.timeOrigin;
+  new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) {
+      if (!entry.name.startsWith('lumina:') && !legacy.includes(entry.name)) continue;
+      window.%s({
+        name: entry.name,
+        start: entry.startTime,
+        duration: entry.duration,
+        detail: entry.detail ?? null,
+        document: origin,
+        path: location.pathname,
+      });
+    }
+  }).observe({ type: 'measure', buffered: true });
+})();
+""" % (json.dumps(LEGACY_MEASURES), SINK)
+
+
+def snapshot(page, clear=False):
+    """runs/counters/entries from window.__luminaPerf, or None before it is installed."""
+    return page.evaluate(
+        """(clear) => {
+            const api = window.__luminaPerf;
+            if (!api) return null;
+            const data = { version: api.version, runs: api.runs(), counters: api.counters(), entries: api.entries() };
+            if (clear) api.clear();
+            return data;
+        }""",
+        clear,
+    )
+
+
+def runs_from_entries(entries):
+    """Rebuild per-run summaries from streamed measures.
+
+    Run ids restart with every document, so runs are keyed by the document's
+    timeOrigin as well. Runs that never ended (the page navigated away
+    mid-flow) are left out.
+    """
+    stages = {}
+    runs = []
+    for entry in entries:
+        detail = entry.get("detail") or {}
+        if not entry["name"].startswith("lumina:") or "run" not in detail:
+            continue
+        key = (entry.get("document"), detail["run"])
+        if "stage" in detail:
+            per_run = stages.setdefault(key, {})
+            per_run[detail["stage"]] = per_run.get(detail["stage"], 0.0) + entry["duration"]
+        else:
+            runs.append((key, {
+                "tool": detail["tool"],
+                "label": detail.get("label"),
+                "ok": detail.get("ok", True),
+                "duration": entry["duration"],
+                "bytes_in": detail.get("bytesIn", 0),
+                "bytes_out": detail.get("bytesOut", 0),
+                "wasm_memory": detail.get("wasmMemory"),
+                # video/audio: "webcodecs" or "ffmpeg" (lib/media-engine.ts)
+                "engine": detail.get("engine"),
+                # image (HEIC only): "webcodecs", "ffmpeg" or "heic2any" (lib/heic.ts)
+                "decoder": detail.get("decoder"),
+                "path": entry.get("path"),
+            }))
+    return [dict(run, stages=stages.get(key, {})) for key, run in runs]
+
+
+def stage_breakdown(runs):
+    """Per tool: run count, bytes, wasm peak, total time and each stage's share of it."""
+    tools = {}
+    for run in runs:
+        tools.setdefault(run["tool"], []).append(run)
+
+    breakdown = {}
+    for tool, tool_runs in sorted(tools.items()):
+        total = sum(run["duration"] for run in tool_runs)
+        stages = {}
+        for stage in STAGES:
+            values = [run["stages"][stage] for run in tool_runs if stage in run["stages"]]
+            if not values:
+                continue
+            stages[stage] = {
+                "total_ms": sum(values),
+                # share of the tool's summed run time; the rest is queueing and message passing
+                "share": sum(values) / total if total else None,
+                "per_run_ms": summarize(values),
+            }
+        wasm = [run["wasm_memory"] for run in tool_runs if run["wasm_memory"] is not None]
+        breakdown[tool] = {
+            "runs": len(tool_runs),
+            "failures": sum(1 for run in tool_runs if not run["ok"]),
+            "bytes_in": sum(run["bytes_in"] for run in tool_runs),
+            "bytes_out": sum(run["bytes_out"] for run in tool_runs),
+            "wasm_memory_peak": max(wasm) if wasm else None,
+            "total_ms": total,
+            "run_ms": summarize([run["duration"] for run in tool_runs]),
+            "stages": stages,
+        }
+    return breakdown
+
+
+def format_breakdown(breakdown):
+    """Fixed-width table: one row per tool, total ms and share per stage."""
+    if not breakdown:
+        return "  (no instrumented runs)"
+    header = f"  {'tool':<10}{'runs':>5}{'total':>10}" + "".join(f"{stage:>16}" for stage in STAGES) + "   bytes in/out"
+    lines = [header]
+    for tool, data in breakdown.items():
+        cells = []
+        for stage in STAGES:
+            info = data["stages"].get(stage)
+            cells.append(f"{info['total_ms']:>9.0f}ms {info['share'] * 100:>3.0f}%" if info and info["share"] is not None
+                         else f"{'-':>16}")
+        failures = f" ({data['failures']} failed)" if data["failures"] else ""
+        lines.append(
+            f"  {tool:<10}{data['runs']:>5}{data['total_ms']:>8.0f}ms" + "".join(f"{cell:>16}" for cell in cells)
+            + f"   {format_bytes(data['bytes_in'])}/{format_bytes(data['bytes_out'])}{failures}"
+        )
+    return "\n".join(lines)
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+class PerfCapture:
+    """Collects lumina:* measures for one flow, optionally with a trace and CPU profile.
+
+    Attach before the page navigates to the tool (run_all.py does it right
+    after creating the page). Files land in out_dir as <name>.perf.json,
+    <name>.trace.zip (open with `playwright show-trace`) and <name>.cpuprofile
+    (Chrome DevTools > Performance > Load profile). The CPU profile covers the
+    page's main thread only; worker stages still show up in the measures.
+    """
+
+    def __init__(self, page, name, out_dir=None, trace=False, cpu_profile=False):
+        self.page = page
+        self.name = name
+        self.out_dir = out_dir
+        self.trace = trace
+        self.cpu_profile = cpu_profile
+        self.entries = []
+        self.files = {}
+        self._cdp = None
+
+    def _on_entry(self, source, entry):
+        self.entries.append(entry)
+
+    def __enter__(self):
+        context = self.page.context
+        context.expose_binding(SINK, self._on_entry)
+        context.add_init_script(OBSERVER_SCRIPT)
+        if self.page.url != "about:blank":
+            self.page.evaluate(OBSERVER_SCRIPT)
+        if self.trace:
+            context.tracing.start(screenshots=True, snapshots=True, sources=False)
+        if self.cpu_profile:
+            self._cdp = context.new_cdp_session(self.page)
+            self._cdp.send("Profiler.enable")
+            self._cdp.send("Profiler.start")
+        return self
+
+    def __exit__(self, *exc):
+        # Measures recorded just before the flow returned may still be in flight.
+        try:
+            self.page.evaluate("() => new Promise((resolve) => setTimeout(resolve, 0))")
+        except Exception:
+            pass
+        if self.out_dir:
+            os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir or ".", _slug(self.name))
+
+        if self._cdp:
+            try:
+                profile = self._cdp.send("Profiler.stop")["profile"]
+                if self.out_dir:
+                    self.files["cpu_profile"] = f"{base}.cpuprofile"
+                    with open(self.files["cpu_profile"], "w") as f:
+                        json.dump(profile, f)
+            finally:
+                self._cdp.detach()
+                self._cdp = None
+        if self.trace:
+            path = f"{base}.trace.zip" if self.out_dir else None
+            self.page.context.tracing.stop(path=path)
+            if path:
+                self.files["trace"] = path
+
+        if self.out_dir:
+            self.files["report"] = f"{base}.perf.json"
+            with open(self.files["report"], "w") as f:
+                json.dump(self.report(), f, indent=2)
+
+    @property
+    def runs(self):
+        return runs_from_entries(self.entries)
+
+    @property
+    def breakdown(self):
+        return stage_breakdown(self.runs)
+
+    def report(self):
+        return {
+            "name": self.name,
+            "breakdown": self.breakdown,
+            "runs": self.runs,
+            "legacy": [entry for entry in self.entries if entry["name"] in LEGACY_MEASURES],
+            "files": {key: os.path.basename(path) for key, path in self.files.items() if key != "report"},
+        }
@@ -0,0 +1,237 @@
+"""Run every verify_*.py test against one shared Chromium.
+
+Unless --base-url (or LUMINA_BASE_URL) points at a running server, the runner
+builds the app and serves it with ``next start`` via NextServer, so timings
+reflect production rather than dev-mode compiles.
+
+The browser is launched once with a remote-debugging port; each worker thread
+attaches its own Playwright client over CDP (the sync API is per-thread) and
+gives every test a fresh, isolated BrowserContext.
+
+    python verification/run_all.py            # all tests, one worker per CPU
+    python verification/run_all.py -k textlab -j 2
+    python verification/run_all.py --no-build         # reuse .next from a previous build
+    python verification/run_all.py --base-url http://localhost:3000
+
+With --perf-dir every test also collects the app's per-stage timings
+(perf_report.PerfCapture) and writes <test>.perf.json there, plus a
+suite-wide perf-summary.json; --trace and --cpu-profile add a Playwright
+trace and a main-thread CPU profile per test.
+
+    python verification/run_all.py -k videolab --perf-dir verification/perf --trace
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from playwright.sync_api import sync_playwright
+
+from harness import REPO_ROOT, VERIFICATION_DIR, discover_tests, format_seconds, free_port
+from next_server import add_server_args, serve
+from perf_report import PerfCapture, format_breakdown, stage_breakdown
+
+
+class TestResult:
+    def __init__(self, name, passed, duration, error=None, worker=None):
+        self.name = name
+        self.passed = passed
+        self.duration = duration
+        self.error = error
+        self.worker = worker
+        self.perf_runs = None
+
+    def to_dict(self):
+        result = {
+            "name": self.name,
+            "passed": self.passed,
+            "duration": round(self.duration, 3),
+            "error": self.error,
+            "worker": self.worker,
+        }
+        if self.perf_runs is not None:
+            result["perf"] = stage_breakdown(self.perf_runs)
+        return result
+
+
+class PerfOptions:
+    def __init__(self, out_dir, trace=False, cpu_profile=False):
+        self.out_dir = out_dir
+        self.trace = trace
+        self.cpu_profile = cpu_profile
+
+
+def describe(error):
+    return "".join(traceback.format_exception_only(type(error), error)).strip()
+
+
+def run_test(browser, base_url, test, worker_id, perf=None):
+    context = browser.new_context(base_url=base_url)
+    result = None
+    capture = None
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            page = context.new_page()
+            if perf:
+                capture = stack.enter_context(PerfCapture(page, test.name, out_dir=perf.out_dir,
+                                                          trace=perf.trace, cpu_profile=perf.cpu_profile))
+            start = time.perf_counter()
+            try:
+                test(page)
+                result = TestResult(test.name, True, time.perf_counter() - start, worker=worker_id)
+            except Exception as e:
+                duration = time.perf_counter() - start
+                shot = f"verification/error_{test.name.replace('::', '__')}.png"
+                try:
+                    page.screenshot(path=shot)
+                except Exception:
+                    pass
+                result = TestResult(test.name, False, duration, error=describe(e), worker=worker_id)
+        if capture:
+            result.perf_runs = capture.runs
+    except Exception as e:
+        if result is None:
+            # The page or the perf capture could not be set up
+            result = TestResult(test.name, False, time.perf_counter() - start, error=describe(e), worker=worker_id)
+        else:
+            print(f"[perf] {test.name}: could not collect timings ({e})")
+    finally:
+        context.close()
+    return result
+
+
+def worker_loop(worker_id, cdp_endpoint, base_url, jobs, results, lock, perf):
+    # Each thread needs its own Playwright driver connection; they all attach
+    # to the same browser process.
+    with sync_playwright() as p:
+        browser = p.chromium.connect_over_cdp(cdp_endpoint)
+        try:
+            while True:
+                try:
+                    test = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                result = run_test(browser, base_url, test, worker_id, perf)
+                status = "PASS" if result.passed else "FAIL"
+                with lock:
+                    results.append(result)
+                    print(f"[{status}] {result.name} ({format_seconds(result.duration)}, worker {worker_id})")
+        finally:
+            browser.close()
+
+
+def print_summary(results, wall_time):
+    print("\n" + "=" * 72)
+    width = max(len(r.name) for r in results)
+    for r in sorted(results, key=lambda r: r.duration, reverse=True):
+        status = "PASS" if r.passed else "FAIL"
+        print(f"{status}  {r.name.ljust(width)}  {format_seconds(r.duration):>8}")
+        if r.error:
+            print(f"      {r.error.splitlines()[0]}")
+    passed = sum(1 for r in results if r.passed)
+    serial = sum(r.duration for r in results)
+    print("=" * 72)
+    print(f"{passed} passed, {len(results) - passed} failed in {format_seconds(wall_time)} "
+          f"(sum of test times {format_seconds(serial)})")
+
+
+def write_perf_summary(results, out_dir):
+    breakdown = stage_breakdown([run for r in results for run in (r.perf_runs or [])])
+    print("\nPer-stage timings (all tests):")
+    print(format_breakdown(breakdown))
+    with open(os.path.join(out_dir, "perf-summary.json"), "w") as f:
+        json.dump({
+            "breakdown": breakdown,
+            "tests": {r.name: stage_breakdown(r.perf_runs) for r in results if r.perf_runs},
+        }, f, indent=2)
+
+
+def run_suite(tests, base_url, workers, headed, perf=None):
+    jobs = queue.Queue()
+    for test in tests:
+        jobs.put(test)
+    workers = max(1, min(workers, len(tests)))
+    results = []
+    lock = threading.Lock()
+
+    print(f"Running {len(tests)} tests on {workers} workers against {base_url}...")
+    start = time.perf_counter()
+    with sync_playwright() as p:
+        port = free_port()
+        browser = p.chromium.launch(
+            headless=not headed,
+            args=[f"--remote-debugging-port={port}"],
+        )
+        try:
+            threads = [
+                threading.Thread(
+                    target=worker_loop,
+                    args=(i, f"http://127.0.0.1:{port}", base_url, jobs, results, lock, perf),
+                    daemon=True,
+                )
+                for i in range(workers)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            browser.close()
+    return results, time.perf_counter() - start, workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="keyword", help="only run tests whose name contains this string")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of parallel workers (default: CPU count)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--report", help="write per-test results as JSON to this path")
+    parser.add_argument("--perf-dir", help="collect per-stage timings and write them to this directory")
+    parser.add_argument("--trace", action="store_true", help="record a Playwright trace per test (implies --perf-dir)")
+    parser.add_argument("--cpu-profile", action="store_true",
+                        help="record a main-thread CPU profile per test (implies --perf-dir)")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    perf = None
+    if args.perf_dir or args.trace or args.cpu_profile:
+        out_dir = os.path.abspath(args.perf_dir) if args.perf_dir else os.path.join(VERIFICATION_DIR, "perf")
+        os.makedirs(out_dir, exist_ok=True)
+        perf = PerfOptions(out_dir, trace=args.trace, cpu_profile=args.cpu_profile)
+
+    # Tests write screenshots to verification/... relative to the repo root.
+    os.chdir(REPO_ROOT)
+
+    tests = discover_tests(args.keyword)
+    if not tests:
+        print("No tests found.")
+        return 1
+
+    with serve(args) as base_url:
+        results, wall_time, workers = run_suite(tests, base_url, args.workers, args.headed, perf)
+
+    print_summary(results, wall_time)
+    if perf:
+        write_perf_summary(results, perf.out_dir)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({
+                "base_url": base_url,
+                "wall_time": round(wall_time, 3),
+                "workers": workers,
+                "results": [r.to_dict() for r in results],
+            }, f, indent=2)
+
+    return 0 if all(r.passed for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,34 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from fixtures import zip_of_images
+from harness import BASE_URL, format_bytes, js_heap_used
 import os
 
+SHELF_ITEMS = 100
+# 100件ぶんのメタデータとサムネイル（96px WebP）だけが残る想定
+SHELF_HEAP_BUDGET = 32 * 1024 * 1024
+
+CLEAR_SHELF_STORAGE = """async () => {
+    await new Promise((resolve) => {
+        const request = indexedDB.deleteDatabase('lumina-shelf');
+        request.onsuccess = request.onerror = request.onblocked = resolve;
+    });
+    const root = await navigator.storage.getDirectory();
+    await root.removeEntry('shelf', { recursive: true }).catch(() => {});
+}"""
+
+COUNT_LIVE_BLOB_URLS = """async (urls) => {
+    let live = 0;
+    for (const url of urls) {
+        try { await fetch(url); live++; } catch {}
+    }
+    return live;
+}"""
+
 def test_adaptive_ui(page: Page):
     # Test Desktop (Floating Dock)
     print("Testing Desktop View...")
     page.set_viewport_size({"width": 1280, "height": 800})
-    page.goto("http://localhost:3004/ja")
+    page.goto("/ja")
 
     # Dock should be visible
     # We look for the Floating Dock container
@@ -37,12 +60,54 @@ def test_adaptive_ui(page: Page):
     print("Taking mobile screenshot...")
     page.screenshot(path="verification/mobile_ui.png")
 
+def test_shelf_memory(page: Page):
+    # Fill the shelf with 100 photos (Archive Lab's "extract all"), then check
+    # that only metadata and thumbnails stay in memory, that thumbnail blob URLs
+    # are revoked when the shelf closes, and that the shelf survives a reload.
+    page.set_viewport_size({"width": 1280, "height": 800})
+    page.goto("/ja")
+    page.evaluate(CLEAR_SHELF_STORAGE)
+
+    page.goto("/ja/tools/archive")
+    cdp = page.context.new_cdp_session(page)
+    baseline = js_heap_used(page, cdp)
+
+    print(f"Adding {SHELF_ITEMS} items to the shelf...")
+    page.set_input_files("input[type='file']", zip_of_images(SHELF_ITEMS))
+    expect(page.get_by_text(f"{SHELF_ITEMS} items", exact=False)).to_be_visible(timeout=30000)
+    page.get_by_role("button", name="全て解凍").click()
+
+    rows = page.get_by_text("Archive Lab •", exact=False)
+    expect(rows).to_have_count(SHELF_ITEMS, timeout=180000)
+    thumbnails = page.locator("img[alt='preview']")
+    expect(thumbnails).to_have_count(SHELF_ITEMS, timeout=30000)
+    urls = [thumbnails.nth(i).get_attribute("src") for i in range(SHELF_ITEMS)]
+
+    growth = js_heap_used(page, cdp) - baseline
+    print(f"JS heap growth with {SHELF_ITEMS} shelved items: {format_bytes(growth)}")
+    assert growth < SHELF_HEAP_BUDGET, f"heap grew by {format_bytes(growth)}"
+
+    print("Closing the shelf...")
+    page.mouse.click(20, 400)
+    expect(thumbnails).to_have_count(0)
+    live = page.evaluate(COUNT_LIVE_BLOB_URLS, urls)
+    assert live == 0, f"{live} thumbnail blob URLs still alive after closing the shelf"
+
+    print("Reloading...")
+    page.reload()
+    page.locator(".fixed.bottom-6").get_by_role("button", name="Shelf").click()
+    expect(rows).to_have_count(SHELF_ITEMS, timeout=30000)
+
+    page.evaluate(CLEAR_SHELF_STORAGE)
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_adaptive_ui(page)
+            test_shelf_memory(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
@@ -1,9 +1,27 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from fixtures import audio_fixture, check_converted, ffmpeg_available
+from harness import BASE_URL, RendererMemorySampler, format_bytes
+from perf_report import snapshot
 import os
+import time
+
+# Real files for the engine comparison: (source format, output button, accepted
+# output codecs, whether "auto" must run on WebCodecs). Linux Chromium has no AAC
+# encoder, so WAV -> AAC may fall back to FFmpeg.
+ENGINE_SCENARIOS = [
+    ("wav", "OGG", ("opus", "vorbis", "flac"), True),
+    ("wav", "AAC", ("aac",), False),
+    ("ogg", "WAV", ("pcm_s16le",), True),
+]
+ENGINE_SECONDS = 120
+ENGINE_RATE = 48000
+
+# Time-to-first-waveform for 1 min / 30 min / 2 h MP3s
+WAVEFORM_SECONDS = [60, 1800, 7200]
 
 def test_audiolab(page: Page):
     print("Navigating to Audio Lab...")
-    page.goto("http://localhost:3001/ja/tools/audio")
+    page.goto("/ja/tools/audio")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="オーディオラボ")).to_be_visible(timeout=30000)
@@ -33,12 +51,137 @@ def test_audiolab(page: Page):
     print("Taking editor screenshot...")
     page.screenshot(path="verification/audiolab_editor.png")
 
+def convert_with_engine(page: Page, engine, path, format_button):
+    """Converts one file with the engine preference set to `engine` ("auto" or "ffmpeg").
+
+    The downloaded output stays valid until the page's context closes.
+    """
+    page.goto("/ja/tools/audio")
+    page.evaluate("(engine) => localStorage.setItem('lumina-media-engine', engine)", engine)
+    page.reload()
+    expect(page.get_by_text("ここに音声をドロップ")).to_be_visible(timeout=120000)
+
+    page.set_input_files("input[type='file']", path)
+    page.get_by_role("button", name=format_button, exact=True).click()
+    page.get_by_role("button", name="変換を開始").click()
+    expect(page.get_by_text("変換完了")).to_be_visible(timeout=600000)
+    with page.expect_download() as download:
+        page.locator("a[download]").click()
+
+    runs = [run for run in snapshot(page)["runs"] if run["tool"] == "audio"]
+    finished = runs[-1]
+    badge = page.locator("[data-engine]")
+    return {
+        "engine": finished["detail"].get("engine"),
+        "fallback": badge.get_attribute("title") if badge.count() else None,
+        "seconds": finished["duration"] / 1000,
+        "output": download.value.path(),
+    }
+
+
+def test_audiolab_engines(page: Page):
+    """Converts real files with WebCodecs (auto) and with FFmpeg and compares frames/sec.
+
+    Audio frames are PCM sample frames (one sample per channel).
+    """
+    if not ffmpeg_available():
+        print("Skipping the engine comparison: generating the files needs ffmpeg on PATH")
+        return
+
+    frames = ENGINE_SECONDS * ENGINE_RATE
+    results = []
+    for source, format_button, codecs, webcodecs in ENGINE_SCENARIOS:
+        path = audio_fixture(ENGINE_SECONDS, source, ENGINE_RATE)
+        for engine in ("auto", "ffmpeg"):
+            print(f"Converting {source} -> {format_button} with engine={engine}...")
+            result = convert_with_engine(page, engine, path, format_button)
+            if engine == "ffmpeg":
+                assert result["engine"] == "ffmpeg", f"engine=ffmpeg ran on {result['engine']}"
+            elif webcodecs:
+                assert result["engine"] == "webcodecs", \
+                    f"auto ran {source} -> {format_button} on {result['engine']}: {result['fallback']}"
+            output = check_converted(result["output"], path, "audio", codecs)
+            print(f"  {output['codec']}, {output['frames']} samples at {output['rate']} Hz, {output['duration']:.2f}s")
+            results.append((f"{source}->{format_button.lower()}", engine, result))
+
+    print(f"{'scenario':<12}{'preference':<12}{'ran on':<11}{'seconds':>9}{'kframes/s':>11}{'x realtime':>12}")
+    for scenario, engine, result in results:
+        print(f"{scenario:<12}{engine:<12}{result['engine'] or '-':<11}{result['seconds']:>9.2f}"
+              f"{frames / result['seconds'] / 1000:>11.0f}{ENGINE_SECONDS / result['seconds']:>12.1f}")
+        if result["fallback"]:
+            print(f"  {result['fallback']}")
+
+
+def clear_waveform_cache(page: Page):
+    # Called right after navigation, before the waveform worker opens the database
+    page.evaluate("""() => new Promise((resolve) => {
+        const request = indexedDB.deleteDatabase('lumina-waveforms');
+        request.onsuccess = request.onerror = request.onblocked = () => resolve();
+    })""")
+
+
+def load_waveform(page: Page, path, cold, sampler=None):
+    """Opens `path` in Audio Lab and returns seconds until the waveform is drawn."""
+    page.goto("/ja/tools/audio")
+    expect(page.get_by_text("ここに音声をドロップ")).to_be_visible(timeout=120000)
+    if cold:
+        clear_waveform_cache(page)
+
+    if sampler:
+        sampler.refresh_pids()
+    start = time.perf_counter()
+    page.set_input_files("input[type='file']", path)
+    expect(page.locator("[data-waveform=ready]")).to_be_visible(timeout=900000)
+    elapsed = time.perf_counter() - start
+
+    runs = [run for run in snapshot(page)["runs"] if run["tool"] == "waveform"]
+    return {
+        "seconds": elapsed,
+        "source": page.locator("[data-waveform]").get_attribute("data-waveform-source"),
+        "decode": (runs[-1]["stages"].get("decode", 0) / 1000) if runs else None,
+    }
+
+
+def test_audiolab_waveform(page: Page):
+    """Time-to-first-waveform for long MP3s, cold (worker decode) and warm (IndexedDB peaks)."""
+    if not ffmpeg_available():
+        print("Skipping the waveform benchmark: generating the files needs ffmpeg on PATH")
+        return
+
+    browser = page.context.browser
+    sampler = RendererMemorySampler(browser) if browser else None
+    results = []
+    for seconds in WAVEFORM_SECONDS:
+        path = audio_fixture(seconds, "mp3", 44100)
+        for cold in (True, False):
+            label = "cold" if cold else "warm"
+            print(f"Loading the waveform for {seconds}s ({label})...")
+            if sampler:
+                with sampler:
+                    result = load_waveform(page, path, cold, sampler)
+                result["peak"] = sampler.peak
+            else:
+                result = load_waveform(page, path, cold)
+            expected = "worker" if cold else "cache"
+            assert result["source"] == expected, f"{seconds}s {label}: waveform came from {result['source']}, expected {expected}"
+            results.append((seconds, label, result))
+
+    print(f"{'length':>8}{'load':>6}{'TTFW s':>9}{'decode s':>10}{'x realtime':>12}{'peak RSS':>12}")
+    for seconds, label, result in results:
+        decode = f"{result['decode']:.2f}" if result["decode"] else "-"
+        peak = format_bytes(result["peak"]) if result.get("peak") else "-"
+        print(f"{seconds:>7}s{label:>6}{result['seconds']:>9.2f}{decode:>10}"
+              f"{seconds / result['seconds']:>12.0f}{peak:>12}")
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_audiolab(page)
+            test_audiolab_engines(page)
+            test_audiolab_waveform(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
@@ -1,10 +1,11 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 import os
 
 def test_blog_flow(page: Page):
     # 1. Arrange: Go to the Blog list page.
     print("Navigating to /ja/blog")
-    page.goto("http://localhost:3000/ja/blog")
+    page.goto("/ja/blog")
 
     # 2. Act & Assert List Page
     print("Checking list page...")
@@ -32,7 +33,7 @@ def test_blog_flow(page: Page):
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_blog_flow(page)
         finally:
@@ -1,8 +1,9 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 
 def test_dashboard_ui(page: Page):
     print("Navigating to Dashboard...")
-    page.goto("http://localhost:3000/ja")
+    page.goto("/ja")
 
     print("Checking for dashboard grid...")
     # Check for Image Lab card
@@ -19,7 +20,7 @@ def test_dashboard_ui(page: Page):
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_dashboard_ui(page)
             print("Verification script finished successfully.")
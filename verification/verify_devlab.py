@@ -1,9 +1,83 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 import os
+import time
+
+# 大きな JSON のベンチマークのサイズ（MB）
+JSON_SIZES_MB = [int(s) for s in os.environ.get("LUMINA_DEVLAB_SIZES", "1,10,50").split(",") if s]
+# 処理中にメインスレッドが止まってよい時間（1回のロングタスクの上限, ms）
+MAX_LONG_TASK_MS = float(os.environ.get("LUMINA_DEVLAB_MAX_LONG_TASK_MS", "250"))
+
+# ページ内で API のダンプ風の JSON（1行）を作り、入力欄に入れる（Playwright 経由で数十MBを送らない）
+FILL_SCRIPT = """
+(megabytes) => {
+  const target = megabytes * 1024 * 1024;
+  const items = [];
+  let length = 2;
+  for (let i = 0; length < target; i++) {
+    const item = JSON.stringify({
+      id: i, name: `item ${i}`, tags: ['alpha', 'ベータ'], price: i * 1.25,
+      active: i % 3 === 0, meta: { created: 1700000000 + i, note: null, nested: [[], {}] }
+    });
+    items.push(item);
+    length += item.length + 1;
+  }
+  const text = '[' + items.join(',') + ']';
+  window.__devLabInput = text;
+  document.querySelector('textarea').value = text;
+  return text.length;
+}
+"""
+
+# 以前の実装（メインスレッドで JSON.parse → JSON.stringify）にかかる時間と、正しい出力の大きさ
+BASELINE_SCRIPT = """
+(mode) => {
+  const start = performance.now();
+  const value = JSON.parse(window.__devLabInput);
+  const output = mode === 'format' ? JSON.stringify(value, null, 2) : JSON.stringify(value);
+  const ms = performance.now() - start;
+  let lines = 1;
+  for (let i = output.indexOf('\\n'); i !== -1; i = output.indexOf('\\n', i + 1)) lines++;
+  return { ms, lines, bytes: new TextEncoder().encode(output).length };
+}
+"""
+
+# 開いたファイルとして同じ JSON を渡す（ワーカーがストリームで読む経路）
+OPEN_FILE_SCRIPT = """
+() => {
+  const input = document.querySelector('input[type="file"]');
+  const transfer = new DataTransfer();
+  transfer.items.add(new File([window.__devLabInput], 'dump.json', { type: 'application/json' }));
+  input.files = transfer.files;
+  input.dispatchEvent(new Event('change', { bubbles: true }));
+}
+"""
+
+OBSERVE_LONG_TASKS = """
+() => {
+  window.__devLabLongTasks = [];
+  new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) window.__devLabLongTasks.push({ start: entry.startTime, duration: entry.duration });
+  }).observe({ type: 'longtask' });
+}
+"""
+
+# 直近の json-process の計測と、その間に起きたロングタスクの最大値
+LAST_RUN_SCRIPT = """
+() => {
+  const measures = performance.getEntriesByName('json-process');
+  const last = measures[measures.length - 1];
+  const end = last.startTime + last.duration;
+  const blocked = window.__devLabLongTasks
+    .filter((task) => task.start + task.duration >= last.startTime && task.start <= end)
+    .reduce((max, task) => Math.max(max, task.duration), 0);
+  return { ms: last.duration, bytes: last.detail.bytes, rows: last.detail.rows, mode: last.detail.mode, blocked };
+}
+"""
 
 def test_devlab(page: Page):
     print("Navigating to Dev Lab...")
-    page.goto("http://localhost:3003/ja/tools/dev")
+    page.goto("/ja/tools/dev")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="デブラボ")).to_be_visible(timeout=30000)
@@ -41,12 +115,92 @@ def test_devlab(page: Page):
     print("Taking password screenshot...")
     page.screenshot(path="verification/devlab_password.png")
 
+def run_json(page: Page, button: str):
+    """Clicks format/minify and waits for the worker to finish; returns the run plus seconds to the first row."""
+    runs = page.evaluate("() => performance.getEntriesByName('json-process').length")
+    start = time.perf_counter()
+    page.get_by_role("button", name=button).click()
+    page.get_by_test_id("json-row").first.wait_for(timeout=120000)
+    first_row = time.perf_counter() - start
+    page.wait_for_function(f"() => performance.getEntriesByName('json-process').length > {runs}", timeout=300000)
+    return {**page.evaluate(LAST_RUN_SCRIPT), "first_row": first_row}
+
+
+def test_devlab_json_errors(page: Page):
+    page.goto("/ja/tools/dev")
+    expect(page.get_by_role("heading", name="デブラボ")).to_be_visible(timeout=30000)
+
+    # 3行目の14列目に余計なカンマ
+    page.locator("textarea").first.fill('{\n  "a": 1,\n  "b": [1, 2,, 3]\n}')
+    page.get_by_role("button", name="整形 (Pretty Print)").click()
+    expect(page.get_by_test_id("json-error")).to_contain_text("3 行 14 列目", timeout=30000)
+    expect(page.get_by_text("無効なJSONです")).to_be_visible()
+
+    page.locator("textarea").first.fill('{"a": "unterminated')
+    page.get_by_role("button", name="圧縮 (Minify)").click()
+    expect(page.get_by_test_id("json-error")).to_contain_text("JSON が途中で終わっています", timeout=30000)
+
+
+def test_devlab_monaco_lazy(page: Page):
+    page.goto("/ja/tools/dev")
+    expect(page.get_by_role("heading", name="デブラボ")).to_be_visible(timeout=30000)
+    page.wait_for_load_state("networkidle")
+
+    # エディタに切り替えるまで Monaco は読み込まない
+    loaded = "() => performance.getEntriesByType('resource').some((entry) => entry.name.includes('monaco-editor'))"
+    assert not page.evaluate(loaded), "Monaco was loaded before the editor was opened"
+
+    page.locator("textarea").first.fill('{"a":1}')
+    page.get_by_role("button", name="エディタで編集").click()
+    expect(page.locator(".monaco-editor").first).to_be_visible(timeout=60000)
+    assert page.evaluate(loaded)
+    page.get_by_role("button", name="整形 (Pretty Print)").click()
+    expect(page.get_by_text('"a": 1')).to_be_visible()
+
+
+def test_devlab_large_json(page: Page):
+    page.goto("/ja/tools/dev")
+    expect(page.get_by_role("heading", name="デブラボ")).to_be_visible(timeout=30000)
+    page.evaluate(OBSERVE_LONG_TASKS)
+
+    failures = []
+    for megabytes in JSON_SIZES_MB:
+        length = page.evaluate(FILL_SCRIPT, megabytes)
+        print(f"{megabytes} MB ({length:,} chars)")
+        for mode, button in (("format", "整形 (Pretty Print)"), ("minify", "圧縮 (Minify)")):
+            baseline = page.evaluate(BASELINE_SCRIPT, mode)
+            r = run_json(page, button)
+            print(f"  {mode:<7} worker {r['ms']:8.0f} ms  first row {r['first_row'] * 1000:6.0f} ms  "
+                  f"longest main-thread block {r['blocked']:5.0f} ms   (JSON.parse+stringify on main thread {baseline['ms']:6.0f} ms)")
+            # 出力は JSON.stringify と同じ（バイト数と、整形なら行数。圧縮した1行は表示用に折り返される）
+            if r["bytes"] != baseline["bytes"] or (mode == "format" and r["rows"] != baseline["lines"]):
+                failures.append(f"{megabytes} MB {mode}: {r['rows']} rows / {r['bytes']} bytes, "
+                                f"expected {baseline['lines']} / {baseline['bytes']}")
+            if r["blocked"] > MAX_LONG_TASK_MS:
+                failures.append(f"{megabytes} MB {mode}: main thread blocked for {r['blocked']:.0f} ms")
+
+        # 同じ JSON をファイルとして開く（ワーカーがストリームで読む）
+        page.evaluate(OPEN_FILE_SCRIPT)
+        expect(page.get_by_text("dump.json")).to_be_visible()
+        r = run_json(page, "整形 (Pretty Print)")
+        print(f"  file    worker {r['ms']:8.0f} ms  first row {r['first_row'] * 1000:6.0f} ms  "
+              f"longest main-thread block {r['blocked']:5.0f} ms")
+        if r["blocked"] > MAX_LONG_TASK_MS:
+            failures.append(f"{megabytes} MB file: main thread blocked for {r['blocked']:.0f} ms")
+        page.get_by_role("button", name="ファイルを閉じる").click()
+
+    assert not failures, "; ".join(failures)
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_devlab(page)
+            test_devlab_json_errors(page)
+            test_devlab_monaco_lazy(page)
+            test_devlab_large_json(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
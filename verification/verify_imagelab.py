@@ -1,4 +1,5 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 import os
 import base64
 
@@ -10,7 +11,7 @@ def create_dummy_png(filepath):
 
 def test_imagelab(page: Page):
     print("Navigating to Image Lab...")
-    page.goto("http://localhost:3000/ja/tools/image")
+    page.goto("/ja/tools/image")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="画像ラボ")).to_be_visible(timeout=30000)
@@ -38,7 +39,7 @@ def test_imagelab(page: Page):
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_imagelab(page)
             print("Verification script finished successfully.")
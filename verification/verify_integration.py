@@ -1,10 +1,37 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL, format_bytes, js_heap_used
 import os
+import time
+from urllib.parse import urlsplit
+
+# Chromium's fake capture devices: getDisplayMedia/getUserMedia resolve with a
+# generated test pattern and tone without a permission prompt.
+FAKE_MEDIA_ARGS = [
+    "--use-fake-ui-for-media-stream",
+    "--use-fake-device-for-media-stream",
+    "--auto-accept-this-tab-capture",
+]
+RECORDING_SECONDS = int(os.environ.get("LUMINA_RECORDING_SECONDS", "120"))
+SAMPLE_SECONDS = 10
+# チャンクは OPFS へ書き出すので、録画中のヒープは録画時間に比例して増えない
+RECORDING_HEAP_BUDGET = 16 * 1024 * 1024
+
+OPFS_ENTRIES = """async (name) => {
+    const root = await navigator.storage.getDirectory();
+    try {
+        const dir = await root.getDirectoryHandle(name);
+        const names = [];
+        for await (const key of dir.keys()) names.push(key);
+        return names;
+    } catch {
+        return [];
+    }
+}"""
 
 def test_integration(page: Page):
     # Navigate to Archive Lab
     print("Navigating to Archive Lab...")
-    page.goto("http://localhost:3005/ja/tools/archive")
+    page.goto("/ja/tools/archive")
     expect(page.get_by_role("heading", name="アーカイブ・ラボ")).to_be_visible(timeout=30000)
 
     # Check Compressor UI
@@ -13,7 +40,7 @@ def test_integration(page: Page):
 
     # Navigate to Recorder
     print("Navigating to Recorder...")
-    page.goto("http://localhost:3005/ja/tools/recorder")
+    page.goto("/ja/tools/recorder")
     expect(page.get_by_role("heading", name="スクリーンレコーダー")).to_be_visible(timeout=30000)
 
     # Check Recorder UI
@@ -30,12 +57,78 @@ def test_integration(page: Page):
     print("Taking final integration screenshot...")
     page.screenshot(path="verification/integration_check.png")
 
+def test_long_recording(page: Page):
+    # Runs in its own browser: the fake media flags are launch arguments.
+    # The given page only tells us which server to hit.
+    page.goto("/ja")
+    base_url = urlsplit(page.url)._replace(path="", query="", fragment="").geturl()
+    browser = page.context.browser.browser_type.launch(headless=True, args=FAKE_MEDIA_ARGS)
+    try:
+        context = browser.new_context(base_url=base_url)
+        recorder = context.new_page()
+        recorder.set_viewport_size({"width": 1280, "height": 800})
+        recorder.goto("/ja/tools/recorder")
+        expect(recorder.get_by_role("heading", name="スクリーンレコーダー")).to_be_visible(timeout=30000)
+
+        cdp = context.new_cdp_session(recorder)
+        print(f"Recording for {RECORDING_SECONDS}s...")
+        recorder.locator("button.bg-rose-600").click()
+        written = recorder.get_by_test_id("recorded-bytes")
+        expect(written).to_be_visible(timeout=30000)
+
+        samples = []
+        start = time.monotonic()
+        while time.monotonic() - start < RECORDING_SECONDS:
+            time.sleep(SAMPLE_SECONDS)
+            samples.append(js_heap_used(recorder, cdp))
+            print(f"  {time.monotonic() - start:5.0f}s heap {format_bytes(samples[-1])}, written {written.inner_text()}")
+
+        # 最初のサンプルはページ・ワーカーの立ち上がりを含むので基準にしない
+        steady = samples[1:] or samples
+        drift = max(steady) - min(steady)
+        print(f"Heap drift while recording: {format_bytes(drift)}")
+        assert drift < RECORDING_HEAP_BUDGET, f"heap drifted by {format_bytes(drift)} while recording"
+
+        recorder.locator("button:has(svg.lucide-square)").click()
+        video = recorder.locator("video[controls]")
+        expect(video).to_be_visible(timeout=60000)
+
+        # Duration が書き込まれていればシークできる
+        duration = recorder.evaluate("""async () => {
+            const video = document.querySelector('video');
+            if (!(video.readyState >= 1)) await new Promise((r) => video.addEventListener('loadedmetadata', r, { once: true }));
+            return video.duration;
+        }""")
+        print(f"Recorded duration: {duration}")
+        assert duration not in (None, float("inf")) and duration > RECORDING_SECONDS * 0.8, \
+            f"recording has no usable duration ({duration})"
+        recorder.evaluate("""async (t) => {
+            const video = document.querySelector('video');
+            await new Promise((resolve) => {
+                video.addEventListener('seeked', resolve, { once: true });
+                video.currentTime = t;
+            });
+        }""", duration / 2)
+
+        print("Saving to shelf...")
+        assert len(recorder.evaluate(OPFS_ENTRIES, "recordings")) == 1
+        recorder.get_by_role("button", name="シェルフに保存").click()
+        expect(recorder.get_by_text("Screen Recorder •", exact=False)).to_be_visible(timeout=30000)
+        # 録画ファイルはコピーではなく移動されている
+        assert recorder.evaluate(OPFS_ENTRIES, "recordings") == []
+        assert len(recorder.evaluate(OPFS_ENTRIES, "shelf")) >= 1
+        context.close()
+    finally:
+        browser.close()
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_integration(page)
+            test_long_recording(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
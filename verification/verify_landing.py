@@ -1,8 +1,9 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 
 def test_landing_hero(page: Page):
     print("Navigating to Home...")
-    page.goto("http://localhost:3000/ja")
+    page.goto("/ja")
 
     print("Checking for Hero text...")
     expect(page.get_by_text("Your Creative Studio. In the Browser.")).to_be_visible()
@@ -16,7 +17,7 @@ def test_landing_hero(page: Page):
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_landing_hero(page)
             print("Verification script finished successfully.")
@@ -1,15 +1,16 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 
 def test_pdflab(page: Page):
     print("Navigating to PDF Lab...")
-    page.goto("http://localhost:3000/ja/tools/pdf")
+    page.goto("/ja/tools/pdf")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="PDFラボ")).to_be_visible(timeout=30000)
 
     # Check if dashboard card exists
     print("Checking Dashboard link...")
-    page.goto("http://localhost:3000/ja")
+    page.goto("/ja")
     expect(page.get_by_role("link", name="Lumina PDF Lab")).to_be_visible()
 
     print("Taking screenshot...")
@@ -18,7 +19,7 @@ def test_pdflab(page: Page):
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_pdflab(page)
             print("Verification script finished successfully.")
@@ -1,10 +1,11 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL
 import os
 
 def test_polish(page: Page):
     # Navigate Home
     print("Navigating Home...")
-    page.goto("http://localhost:3006/")
+    page.goto("/")
 
     # Test Footer Links
     print("Testing Footer Links...")
@@ -16,7 +17,7 @@ def test_polish(page: Page):
 
     # Navigate to About via Footer (or Header)
     print("Navigating to About...")
-    page.goto("http://localhost:3005/") # Go back home to find footer again or use header
+    page.goto("/") # Go back home to find footer again or use header
     page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
     page.get_by_role("link", name="Privacy & About").click()
     expect(page.get_by_text("プライバシー宣言")).to_be_visible()
@@ -25,7 +26,7 @@ def test_polish(page: Page):
     # Test Settings
     print("Testing Settings...")
     # Settings icon in header
-    page.goto("http://localhost:3006/ja/settings") # Direct link for reliability in test
+    page.goto("/ja/settings") # Direct link for reliability in test
     expect(page.get_by_text("設定")).to_be_visible()
     expect(page.get_by_text("データ管理")).to_be_visible()
 
@@ -42,7 +43,7 @@ def test_polish(page: Page):
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_polish(page)
             print("Verification script finished successfully.")
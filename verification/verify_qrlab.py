@@ -1,9 +1,18 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from fixtures import fixture_path
+from harness import BASE_URL
+from perf_report import snapshot
 import os
+import time
+import zipfile
+
+# Codes per run for the bulk-mode throughput benchmark
+BULK_CODES = 10000
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 
 def test_qrlab(page: Page):
     print("Navigating to QR Lab...")
-    page.goto("http://localhost:3002/ja/tools/qr")
+    page.goto("/ja/tools/qr")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="QRマスター")).to_be_visible(timeout=30000)
@@ -30,12 +39,76 @@ def test_qrlab(page: Page):
     print("Taking active screenshot...")
     page.screenshot(path="verification/qrlab_active.png")
 
+def open_bulk_mode(page: Page):
+    page.goto("/ja/tools/qr")
+    expect(page.get_by_role("heading", name="QRマスター")).to_be_visible(timeout=30000)
+    page.get_by_role("button", name="一括生成").click()
+    expect(page.get_by_text("内容のリスト")).to_be_visible()
+
+
+def generate_zip(page: Page, timeout=600000):
+    """Clicks ZIPを作成 and returns (seconds until the download starts, local zip path)."""
+    start = time.perf_counter()
+    with page.expect_download(timeout=timeout) as download_info:
+        page.get_by_role("button", name="ZIPを作成").click()
+    elapsed = time.perf_counter() - start
+    return elapsed, download_info.value.path()
+
+
+def test_qrlab_bulk_csv(page: Page):
+    """A CSV with content/name columns becomes one named PNG per row."""
+    open_bulk_mode(page)
+
+    csv_path = fixture_path("qr_badges.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write('name,content\n')
+        f.write('alice,https://lumina.studio/badge/1\n')
+        f.write('"bob, jr.","https://lumina.studio/badge/2?a=1,2"\n')
+        f.write('alice,https://lumina.studio/badge/3\n')
+    page.set_input_files("input[data-qr-list]", csv_path)
+    expect(page.locator("[data-qr-count='3']")).to_be_visible()
+
+    _, path = generate_zip(page, timeout=60000)
+    with zipfile.ZipFile(path) as archive:
+        names = sorted(archive.namelist())
+        assert names == ["alice-1.png", "alice.png", "bob, jr..png"], names
+        assert all(archive.read(name).startswith(PNG_SIGNATURE) for name in names)
+
+
+def test_qrlab_bulk_throughput(page: Page):
+    """Generates BULK_CODES unique codes as PNG and as SVG and prints codes/sec."""
+    open_bulk_mode(page)
+    lines = "\n".join(f"https://lumina.studio/e/2025/badge/{i:05d}?seat={i % 400}" for i in range(BULK_CODES))
+    page.locator("textarea").fill(lines)
+    expect(page.locator(f"[data-qr-count='{BULK_CODES}']")).to_be_visible(timeout=30000)
+
+    results = []
+    for fmt in ("PNG", "SVG"):
+        page.get_by_role("button", name=fmt, exact=True).click()
+        print(f"Generating {BULK_CODES} {fmt} codes...")
+        elapsed, path = generate_zip(page)
+        with zipfile.ZipFile(path) as archive:
+            entries = archive.infolist()
+            assert len(entries) == BULK_CODES, f"{fmt}: {len(entries)} entries"
+            first = archive.read(entries[0])
+            assert first.startswith(PNG_SIGNATURE) if fmt == "PNG" else first.startswith(b"<svg")
+        run = [run for run in snapshot(page)["runs"] if run["tool"] == "qr"][-1]
+        results.append((fmt, elapsed, os.path.getsize(path), run["stages"]))
+
+    print(f"{'format':<8}{'seconds':>9}{'codes/s':>10}{'zip MB':>9}  worker stages (ms, summed over workers)")
+    for fmt, elapsed, size, stages in results:
+        breakdown = ", ".join(f"{stage} {ms:.0f}" for stage, ms in stages.items())
+        print(f"{fmt:<8}{elapsed:>9.2f}{BULK_CODES / elapsed:>10.0f}{size / 1e6:>9.1f}  {breakdown}")
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_qrlab(page)
+            test_qrlab_bulk_csv(page)
+            test_qrlab_bulk_throughput(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
@@ -1,10 +1,21 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from fixtures import document_fixture, image_fixture, pdf_fixture, tone_wav_fixture
+from harness import BASE_URL, format_seconds
+from perf_report import snapshot
 import os
+import time
+
+# The service worker fetches ~60 MB of engine assets after the first idle
+WARMUP_TIMEOUT = 600000
+OPERATION_TIMEOUT = 300000
+# Engine groups the offline operations below depend on (the AI model is
+# warmed too, but only reported: it comes from huggingface.co)
+REQUIRED_ENGINES = ["tesseract", "ffmpeg"]
 
 def test_safety(page: Page):
     # Test 404
     print("Testing 404 Page...")
-    page.goto("http://localhost:3007/ja/this-page-does-not-exist-12345")
+    page.goto("/ja/this-page-does-not-exist-12345")
 
     # Check for 404 title
     expect(page.get_by_role("heading", name="404 - Lost in Space")).to_be_visible(timeout=30000)
@@ -36,14 +47,138 @@ def test_safety(page: Page):
     # Indicator should disappear
     expect(page.get_by_text("Offline Mode Active")).to_be_hidden(timeout=5000)
 
+def convert_image(page: Page):
+    page.set_input_files("input[type='file']", image_fixture(2, "jpeg"))
+    page.get_by_role("button", name="PNG", exact=True).click()
+    page.get_by_role("button", name="変換を実行").click()
+    page.locator("a[download^='converted-image']").wait_for(timeout=OPERATION_TIMEOUT)
+
+
+def convert_audio(page: Page):
+    # lumina-media-engine=ffmpeg is set beforehand, so this needs the FFmpeg core
+    page.set_input_files("input[type='file']", tone_wav_fixture(10))
+    page.get_by_role("button", name="OGG", exact=True).click()
+    page.get_by_role("button", name="変換を開始").click()
+    expect(page.get_by_text("変換完了")).to_be_visible(timeout=OPERATION_TIMEOUT)
+
+
+def recognize_text(page: Page):
+    page.get_by_role("button", name="OCR").click()
+    page.set_input_files("input[type='file']", document_fixture(0))
+    expect(page.get_by_text("0 / 1 ページ", exact=True)).to_be_visible(timeout=60000)
+    page.get_by_role("button", name="文字を読み取る").click()
+    page.get_by_text("1 / 1 ページ", exact=True).wait_for(timeout=OPERATION_TIMEOUT)
+    text = page.locator("pre").first.inner_text()
+    assert "brown fox" in text.lower(), f"OCR did not read the sample sentence: {text[:200]!r}"
+
+
+def merge_pdfs(page: Page):
+    page.set_input_files("input[type='file']", [pdf_fixture(2, 1, index) for index in range(2)])
+    expect(page.get_by_text("2 ファイル", exact=True)).to_be_visible(timeout=30000)
+    page.get_by_role("button", name="PDFを結合").click()
+    page.locator("a[download='merged-document.pdf']").wait_for(timeout=OPERATION_TIMEOUT)
+
+
+# (name, route, heading, operation): one real operation per engine family
+OFFLINE_OPERATIONS = [
+    ("image", "/ja/tools/image", "画像ラボ", convert_image),
+    ("audio", "/ja/tools/audio", "オーディオラボ", convert_audio),
+    ("ocr", "/ja/tools/text", "テキストラボ", recognize_text),
+    ("pdf", "/ja/tools/pdf", "PDFラボ", merge_pdfs),
+]
+
+
+def run_operation(page: Page, path, heading, operation):
+    """Navigates to the tool and runs the operation; returns page load, engine load and total seconds."""
+    start = time.perf_counter()
+    page.goto(path)
+    expect(page.get_by_role("heading", name=heading)).to_be_visible(timeout=60000)
+    loaded = time.perf_counter()
+    operation(page)
+    done = time.perf_counter()
+
+    # FFmpeg core / Tesseract worker start-up as recorded by the app itself
+    engine_load = [run["stages"].get("load", 0) for run in snapshot(page)["runs"] if run["tool"] in ("ffmpeg", "ocr")]
+    return {
+        "page": loaded - start,
+        "engine": max(engine_load) / 1000 if engine_load else None,
+        "total": done - start,
+    }
+
+
+def prefer_ffmpeg(page: Page):
+    page.goto("/ja")
+    page.evaluate("() => localStorage.setItem('lumina-media-engine', 'ffmpeg')")
+
+
+def test_safety_offline_engines(page: Page):
+    """After one warm visit, runs an image, audio, OCR and PDF operation with the network off.
+
+    cold  a separate context with service workers blocked: every engine asset
+          comes from the network
+    warm  this context after the service worker has precached the engine
+          assets and each tool page was visited once, then taken offline
+    """
+    context = page.context
+    prefer_ffmpeg(page)
+    origin = page.evaluate("() => location.origin")
+
+    print("Cold runs (online, no service worker)...")
+    cold_context = context.browser.new_context(base_url=origin, service_workers="block")
+    cold = {}
+    try:
+        cold_page = cold_context.new_page()
+        prefer_ffmpeg(cold_page)
+        for name, path, heading, operation in OFFLINE_OPERATIONS:
+            cold[name] = run_operation(cold_page, path, heading, operation)
+    finally:
+        cold_context.close()
+
+    print("Waiting for the service worker to warm the engine caches...")
+    page.wait_for_function("() => window.__luminaEngineWarmup", timeout=WARMUP_TIMEOUT)
+    report = page.evaluate("() => window.__luminaEngineWarmup")
+    print(f"  engines: {report['groups']}")
+    if report["quota"]:
+        print(f"  storage: {report['usage'] / 1e6:.0f} MB used of {report['quota'] / 1e6:.0f} MB")
+    for group in REQUIRED_ENGINES:
+        assert report["groups"].get(group) == "cached", f"{group} was not precached: {report['groups']}"
+
+    # One online visit per tool puts its page in the navigation cache
+    for name, path, heading, operation in OFFLINE_OPERATIONS:
+        page.goto(path)
+        expect(page.get_by_role("heading", name=heading)).to_be_visible(timeout=60000)
+    assert page.evaluate("() => navigator.serviceWorker.controller !== null"), "page is not controlled by the service worker"
+
+    print("Warm runs (offline)...")
+    warm = {}
+    context.set_offline(True)
+    try:
+        expect(page.get_by_text("Offline Mode Active")).to_be_visible(timeout=5000)
+        for name, path, heading, operation in OFFLINE_OPERATIONS:
+            print(f"  {name}...")
+            warm[name] = run_operation(page, path, heading, operation)
+    finally:
+        context.set_offline(False)
+
+    def cell(seconds):
+        return format_seconds(seconds) if seconds is not None else "-"
+
+    print(f"{'operation':<10}{'page cold':>11}{'warm':>9}{'engine cold':>13}{'warm':>9}{'total cold':>12}{'warm':>9}")
+    for name, *_ in OFFLINE_OPERATIONS:
+        c, w = cold[name], warm[name]
+        print(f"{name:<10}{cell(c['page']):>11}{cell(w['page']):>9}{cell(c['engine']):>13}{cell(w['engine']):>9}"
+              f"{cell(c['total']):>12}{cell(w['total']):>9}")
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         # Create context to enable offline testing
-        context = browser.new_context()
+        context = browser.new_context(base_url=BASE_URL)
         page = context.new_page()
         try:
             test_safety(page)
+            test_safety_offline_engines(context.new_page())
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
@@ -1,9 +1,62 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from harness import BASE_URL, percentile
 import os
 
+# 入力遅延ベンチマークのテキストサイズ（MB）
+TEXT_SIZES_MB = [int(s) for s in os.environ.get("LUMINA_TEXTLAB_SIZES", "1,10,50").split(",") if s]
+KEYSTROKES = int(os.environ.get("LUMINA_TEXTLAB_KEYSTROKES", "20"))
+# キー入力から文字数の表示が更新されて描画されるまでの p95 の上限（ms）
+MAX_STATS_P95_MS = float(os.environ.get("LUMINA_TEXTLAB_MAX_P95_MS", "200"))
+
+# ページ内でログ風のテキストを作って貼り付ける（Playwright 経由で数十MBを送らない）
+FILL_SCRIPT = """
+(megabytes) => {
+  const line = '2025-01-01T00:00:00Z INFO worker-3 processed request 12345 in 42ms\\n';
+  const text = line.repeat(Math.ceil(megabytes * 1024 * 1024 / line.length));
+  const textarea = document.querySelector('textarea');
+  textarea.focus();
+  textarea.value = text;
+  textarea.setSelectionRange(text.length, text.length);
+  textarea.dispatchEvent(new InputEvent('input', { bubbles: true, inputType: 'insertFromPaste' }));
+  // 以降のキー入力はテキストの途中で行う
+  const middle = text.indexOf('\\n', text.length >> 1) + 1;
+  textarea.setSelectionRange(middle, middle);
+  return text.length;
+}
+"""
+
+# keydown から「入力欄への反映」「文字数の表示更新」それぞれの後の描画までを測る
+LATENCY_SCRIPT = """
+() => {
+  const textarea = document.querySelector('textarea');
+  const stat = document.querySelector('[data-testid="stat-chars"]');
+  const afterPaint = (callback) => requestAnimationFrame(() => setTimeout(callback, 0));
+  window.__textLabLatency = [];
+  textarea.addEventListener('keydown', (event) => {
+    const start = event.timeStamp;
+    const sample = { echo: null, stats: null };
+    window.__textLabLatency.push(sample);
+    textarea.addEventListener('input', () => afterPaint(() => { sample.echo = performance.now() - start; }), { once: true });
+    const observer = new MutationObserver(() => {
+      observer.disconnect();
+      afterPaint(() => { sample.stats = performance.now() - start; });
+    });
+    observer.observe(stat, { childList: true, characterData: true, subtree: true });
+  });
+}
+"""
+
+LAST_SAMPLE_DONE = """
+() => {
+  const samples = window.__textLabLatency;
+  const last = samples[samples.length - 1];
+  return last && last.echo !== null && last.stats !== null;
+}
+"""
+
 def test_textlab(page: Page):
     print("Navigating to Text Lab...")
-    page.goto("http://localhost:3003/ja/tools/text")
+    page.goto("/ja/tools/text")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="テキストラボ")).to_be_visible(timeout=30000)
@@ -43,12 +96,43 @@ def test_textlab(page: Page):
     print("Taking converter screenshot...")
     page.screenshot(path="verification/textlab_converter.png")
 
+def test_textlab_input_latency(page: Page):
+    page.goto("/ja/tools/text")
+    expect(page.get_by_role("heading", name="テキストラボ")).to_be_visible(timeout=30000)
+    stat = page.get_by_test_id("stat-chars")
+    page.evaluate(LATENCY_SCRIPT)
+
+    failures = []
+    for megabytes in TEXT_SIZES_MB:
+        print(f"Filling {megabytes} MB...")
+        length = page.evaluate(FILL_SCRIPT, megabytes)
+        expect(stat).to_have_text(f"{length:,}", timeout=120000)
+
+        page.evaluate("() => { window.__textLabLatency.length = 0; }")
+        for _ in range(KEYSTROKES):
+            page.keyboard.press("a")
+            page.wait_for_function(LAST_SAMPLE_DONE, timeout=30000)
+        # 差分だけで更新した文字数が正しいこと
+        expect(stat).to_have_text(f"{length + KEYSTROKES:,}", timeout=30000)
+
+        samples = page.evaluate("() => window.__textLabLatency")
+        echo = [s["echo"] for s in samples]
+        stats = [s["stats"] for s in samples]
+        print(f"  {megabytes:>3} MB  echo p50 {percentile(echo, 50):6.1f} ms  p95 {percentile(echo, 95):6.1f} ms   "
+              f"stats p50 {percentile(stats, 50):6.1f} ms  p95 {percentile(stats, 95):6.1f} ms")
+        if percentile(stats, 95) > MAX_STATS_P95_MS:
+            failures.append(f"{megabytes} MB: keystroke-to-stats p95 {percentile(stats, 95):.1f} ms > {MAX_STATS_P95_MS:.0f} ms")
+
+    assert not failures, "; ".join(failures)
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_textlab(page)
+            test_textlab_input_latency(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")
@@ -1,9 +1,43 @@
 from playwright.sync_api import Page, expect, sync_playwright
+from fixtures import check_converted, ffmpeg_available, video_fixture, video_width
+from harness import BASE_URL
+from perf_report import snapshot
 import os
+import time
+
+# Real clips for the engine comparison: (source codec, output button, preset button,
+# accepted output codecs). VP9 -> WebM is a VP8 re-encode with the fast preset
+# on both engines.
+ENGINE_SCENARIOS = [
+    ("h264", "MP4", "高速", ("h264",)),
+    ("vp9", "WEBM", "高速", ("vp8", "vp9")),
+]
+# What "auto" needs from the browser to stay on WebCodecs for each clip: the
+# decoders for the fixture's tracks (fixtures.VIDEO_CODECS; the sine track is
+# 44.1kHz mono, resampled to 48kHz for Opus) and one of the encoder candidates
+# lib/transcode.ts tries for the output container with the fast preset.
+ENGINE_CODECS = {
+    "h264": {
+        "videoDecoder": "avc1.64001f",
+        "videoEncoders": ["avc1.64001f", "avc1.4d001f", "avc1.42001f"],
+        "audioDecoder": "mp4a.40.2",
+        "audioEncoders": ["mp4a.40.2", "opus"],
+        "sampleRate": 44100,
+    },
+    "vp9": {
+        "videoDecoder": "vp09.00.30.08",
+        "videoEncoders": ["vp8", "vp09.00.41.08"],
+        "audioDecoder": "opus",
+        "audioEncoders": ["opus"],
+        "sampleRate": 48000,
+    },
+}
+ENGINE_CLIP_SECONDS = 10
+ENGINE_CLIP_HEIGHT = 480
 
 def test_videolab(page: Page):
     print("Navigating to Video Lab...")
-    page.goto("http://localhost:3000/ja/tools/video")
+    page.goto("/ja/tools/video")
 
     print("Checking for title...")
     expect(page.get_by_role("heading", name="動画ラボ")).to_be_visible(timeout=30000)
@@ -32,16 +66,122 @@ def test_videolab(page: Page):
 
     # Check controls
     expect(page.get_by_text("出力フォーマット")).to_be_visible()
+    expect(page.get_by_text("変換キュー (1件)")).to_be_visible()
+    expect(page.get_by_role("button", name="再エンコードなし")).to_be_visible()
 
     print("Taking editor screenshot...")
     page.screenshot(path="verification/videolab_editor.png")
 
+def convert_with_engine(page: Page, engine, path, format_button, preset_button):
+    """Converts one file with the engine preference set to `engine` ("auto" or "ffmpeg").
+
+    Returns the engine that actually ran (from the perf run's detail), the
+    fallback reason if WebCodecs handed over to FFmpeg, the run's duration and
+    the downloaded output (valid until the page's context closes).
+    """
+    page.goto("/ja/tools/video")
+    page.evaluate("(engine) => localStorage.setItem('lumina-media-engine', engine)", engine)
+    page.reload()
+    expect(page.get_by_text("ここに動画をドロップ")).to_be_visible(timeout=120000)
+
+    page.set_input_files("input[type='file']", path)
+    page.get_by_role("button", name=format_button, exact=True).click()
+    page.get_by_role("button", name=preset_button).click()
+    start = time.perf_counter()
+    page.get_by_role("button", name="変換を開始").click()
+    expect(page.get_by_text("1 / 1 完了")).to_be_visible(timeout=600000)
+    wall = time.perf_counter() - start
+    expect(page.locator("a[download]")).to_have_count(1)
+    with page.expect_download() as download:
+        page.locator("a[download]").click()
+
+    runs = [run for run in snapshot(page)["runs"] if run["tool"] == "video"]
+    finished = runs[-1]
+    badge = page.locator("[data-engine]")
+    return {
+        "engine": finished["detail"].get("engine"),
+        "fallback": badge.get_attribute("title") if badge.count() else None,
+        "seconds": finished["duration"] / 1000,
+        "wall": wall,
+        "output": download.value.path(),
+    }
+
+
+WEBCODECS_SUPPORT = """async (c) => {
+  if (!('VideoDecoder' in window) || !('VideoEncoder' in window) || !('AudioDecoder' in window) || !('AudioEncoder' in window)) {
+    return 'WebCodecs is not available';
+  }
+  const supported = (check) => check.then((support) => support.supported, () => false);
+  const video = { width: c.width, height: c.height, framerate: 30, bitrate: Math.round(c.width * c.height * 30 * 0.08),
+                  bitrateMode: 'variable', latencyMode: 'realtime' };
+  const audio = { sampleRate: c.sampleRate, numberOfChannels: 1 };
+  if (!(await supported(VideoDecoder.isConfigSupported({ codec: c.videoDecoder, codedWidth: c.width, codedHeight: c.height })))) {
+    return `VideoDecoder does not support ${c.videoDecoder}`;
+  }
+  let encoder = false;
+  for (const codec of c.videoEncoders) {
+    const avc = codec.startsWith('avc1') ? { avc: { format: 'avc' } } : {};
+    if (await supported(VideoEncoder.isConfigSupported({ codec, ...video, ...avc }))) { encoder = true; break; }
+  }
+  if (!encoder) return `VideoEncoder supports none of ${c.videoEncoders.join(', ')}`;
+  if (!(await supported(AudioDecoder.isConfigSupported({ codec: c.audioDecoder, ...audio })))) {
+    return `AudioDecoder does not support ${c.audioDecoder}`;
+  }
+  encoder = false;
+  for (const codec of c.audioEncoders) {
+    if (await supported(AudioEncoder.isConfigSupported({ codec, ...audio, bitrate: 128000 }))) { encoder = true; break; }
+  }
+  if (!encoder) return `AudioEncoder supports none of ${c.audioEncoders.join(', ')}`;
+  return null;
+}"""
+
+
+def webcodecs_unsupported(page: Page, codec, width, height):
+    """Returns why this browser can't convert the `codec` clip with WebCodecs, or None if it can."""
+    return page.evaluate(WEBCODECS_SUPPORT, {**ENGINE_CODECS[codec], "width": width, "height": height})
+
+
+def test_videolab_engines(page: Page):
+    """Converts real clips with WebCodecs (auto) and with FFmpeg and compares frames/sec."""
+    if not ffmpeg_available():
+        print("Skipping the engine comparison: generating the clips needs ffmpeg on PATH")
+        return
+
+    frames = ENGINE_CLIP_SECONDS * 30
+    results = []
+    for codec, format_button, preset_button, codecs in ENGINE_SCENARIOS:
+        path = video_fixture(ENGINE_CLIP_SECONDS, codec, ENGINE_CLIP_HEIGHT)
+        page.goto("/ja/tools/video")
+        unsupported = webcodecs_unsupported(page, codec, video_width(ENGINE_CLIP_HEIGHT), ENGINE_CLIP_HEIGHT)
+        if unsupported:
+            print(f"  {codec} -> {format_button} may fall back to FFmpeg in this browser: {unsupported}")
+        for engine in ("auto", "ffmpeg"):
+            print(f"Converting {codec} -> {format_button} with engine={engine}...")
+            result = convert_with_engine(page, engine, path, format_button, preset_button)
+            if engine == "ffmpeg":
+                assert result["engine"] == "ffmpeg", f"engine=ffmpeg ran on {result['engine']}"
+            elif not unsupported:
+                assert result["engine"] == "webcodecs", \
+                    f"auto ran {codec} -> {format_button} on {result['engine']}: {result['fallback']}"
+            output = check_converted(result["output"], path, "video", codecs)
+            print(f"  {output['codec']}, {output['frames']} frames, {output['duration']:.2f}s")
+            results.append((f"{codec}->{format_button.lower()}", engine, result))
+
+    print(f"{'scenario':<14}{'preference':<12}{'ran on':<11}{'seconds':>9}{'frames/s':>10}")
+    for scenario, engine, result in results:
+        print(f"{scenario:<14}{engine:<12}{result['engine'] or '-':<11}{result['seconds']:>9.2f}"
+              f"{frames / result['seconds']:>10.1f}")
+        if result["fallback"]:
+            print(f"  {result['fallback']}")
+
+
 if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        page = browser.new_page(base_url=BASE_URL)
         try:
             test_videolab(page)
+            test_videolab_engines(page)
             print("Verification script finished successfully.")
         except Exception as e:
             print(f"Verification failed: {e}")